@@ -20,6 +20,7 @@ import { MatIconModule } from '@angular/material/icon';
 export class GuiderComponent {
   capturedImage: string | null = null;
   capturing = false;
+  liveView = false;
   errorMessage = '';
   deviceStatus = { connected: false, device: null };
   phd2Status = { connected: false, state: 'Stopped' };
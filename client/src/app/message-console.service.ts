@@ -1,4 +1,5 @@
-import { Injectable } from '@angular/core';
+import { Injectable, Inject, OnDestroy, PLATFORM_ID } from '@angular/core';
+import { isPlatformBrowser } from '@angular/common';
 import { BehaviorSubject } from 'rxjs';
 
 export interface Message {
@@ -7,16 +8,31 @@ export interface Message {
   type: 'info' | 'success' | 'error';
 }
 
+interface ServerLogRecord {
+  id: number;
+  time: string;
+  level: string;
+  logger: string;
+  message: string;
+}
+
 @Injectable({
   providedIn: 'root'
 })
-export class MessageConsoleService {
+export class MessageConsoleService implements OnDestroy {
   private messages = new BehaviorSubject<Message[]>([]);
   public messages$ = this.messages.asObservable();
+  private serverLogs?: EventSource;
 
-  addMessage(text: string, type: 'info' | 'success' | 'error' = 'info') {
+  constructor(@Inject(PLATFORM_ID) private platformId: object) {
+    if (isPlatformBrowser(this.platformId)) {
+      this.followServerLogs();
+    }
+  }
+
+  addMessage(text: string, type: 'info' | 'success' | 'error' = 'info', timestamp = new Date()) {
     const message: Message = {
-      timestamp: new Date(),
+      timestamp,
       text,
       type
     };
@@ -28,4 +44,21 @@ export class MessageConsoleService {
   clear() {
     this.messages.next([]);
   }
+
+  ngOnDestroy() {
+    this.serverLogs?.close();
+  }
+
+  // Server warnings and errors, EventSource reconnects from the last id by itself
+  private followServerLogs() {
+    this.serverLogs = new EventSource('/api/logs/stream?level=WARNING');
+    this.serverLogs.onmessage = (event: MessageEvent) => {
+      const record: ServerLogRecord = JSON.parse(event.data);
+      this.addMessage(
+        `[server] ${record.message}`,
+        record.level === 'WARNING' ? 'info' : 'error',
+        new Date(record.time)
+      );
+    };
+  }
 }
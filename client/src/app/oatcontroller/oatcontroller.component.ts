@@ -49,7 +49,8 @@ export class OATControllerComponent implements OnInit {
   ) {
     this.targetForm = new FormGroup({
       ra: new FormControl('', [Validators.required]),
-      dec: new FormControl('', [Validators.required])
+      dec: new FormControl('', [Validators.required]),
+      epoch: new FormControl('JNOW')
     });
   }
 
@@ -156,11 +157,32 @@ export class OATControllerComponent implements OnInit {
   selectCatalogTarget(target: any) {
     this.targetForm.patchValue({
       ra: target.ra,
-      dec: target.dec
+      dec: target.dec,
+      epoch: 'J2000'
     });
     this.messageService.addMessage(`Selected ${target.name} as target`, 'info');
   }
 
+  get finderChartUrl(): string | null {
+    const ra = this.parseSexagesimal(this.currentPosition.ra);
+    const dec = this.parseSexagesimal(this.currentPosition.dec);
+    if (ra === null || dec === null) {
+      return null;
+    }
+    const mount = `mra=${encodeURIComponent(this.currentPosition.ra)}&mdec=${encodeURIComponent(this.currentPosition.dec)}`;
+    return `/api/chart?ra=${ra.toFixed(4)}&dec=${dec.toFixed(3)}&fov=5&size=300&format=svg&${mount}`;
+  }
+
+  private parseSexagesimal(value: string): number | null {
+    const parts = (value || '').replace('#', '').split(/[:*'"\s]+/).filter(p => p !== '');
+    if (parts.length === 0 || parts.some(p => isNaN(Number(p)))) {
+      return null;
+    }
+    const [degrees, minutes = 0, seconds = 0] = parts.map(p => Math.abs(Number(p)));
+    const sign = value.trim().startsWith('-') ? -1 : 1;
+    return sign * (degrees + minutes / 60 + seconds / 3600);
+  }
+
   updatePosition() {
     this.http.get<any>('/api/mount/position').subscribe({
       next: (response) => {
@@ -105,10 +105,10 @@ export class SettingsComponent implements OnInit {
     });
   }
 
-  loadAvailableDevices() {
+  loadAvailableDevices(refresh = false) {
     this.messageService.addMessage('Loading available devices...', 'info');
     
-    this.http.get<{devices: Device[]}>('/api/devices').subscribe({
+    this.http.get<{devices: Device[]}>(refresh ? '/api/devices?refresh=1' : '/api/devices').subscribe({
       next: (response) => {
         this.availableDevices = response.devices;
         this.messageService.addMessage(`Found ${this.availableDevices.length} devices`, 'success');
@@ -1,4 +1,4 @@
-import { Component, Inject, OnInit } from '@angular/core';
+import { Component, Inject, OnDestroy, OnInit } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { HttpClient } from '@angular/common/http';
 import { FormsModule } from '@angular/forms';
@@ -8,6 +8,11 @@ import { MatButtonModule } from '@angular/material/button';
 import { MatIconModule } from '@angular/material/icon';
 import { MatFormFieldModule } from '@angular/material/form-field';
 import { MatInputModule } from '@angular/material/input';
+import { Observable, Subject, Subscription, of } from 'rxjs';
+import { catchError, debounceTime, distinctUntilChanged, map, startWith, switchMap } from 'rxjs/operators';
+
+// Milliseconds the search waits for typing to pause
+const SEARCH_DEBOUNCE_MS = 300;
 
 interface MessierObject {
   id: string;
@@ -20,6 +25,14 @@ interface MessierObject {
   dec: number;
 }
 
+interface CatalogSearchResponse {
+  total: number;
+  has_more: boolean;
+  offset: number;
+  limit: number;
+  results: MessierObject[];
+}
+
 interface CatalogObject {
   name: string;
   ra: string;
@@ -45,11 +58,13 @@ interface CatalogObject {
   templateUrl: './object-selection-dialog.component.html',
   styleUrl: './object-selection-dialog.component.css'
 })
-export class ObjectSelectionDialogComponent implements OnInit {
+export class ObjectSelectionDialogComponent implements OnInit, OnDestroy {
   displayedColumns: string[] = ['name', 'type', 'magnitude', 'coordinates', 'action'];
   catalogObjects: CatalogObject[] = [];
   filteredObjects: CatalogObject[] = [];
   searchTerm: string = '';
+  private searchTerms = new Subject<string>();
+  private searchSubscription?: Subscription;
 
   constructor(
     public dialogRef: MatDialogRef<ObjectSelectionDialogComponent>,
@@ -58,15 +73,29 @@ export class ObjectSelectionDialogComponent implements OnInit {
   ) {}
 
   ngOnInit() {
-    this.loadMessierCatalog();
+    // One request once typing pauses, a newer term cancels the one in flight
+    this.searchSubscription = this.searchTerms
+      .pipe(
+        debounceTime(SEARCH_DEBOUNCE_MS),
+        startWith(''),
+        distinctUntilChanged(),
+        switchMap(term => this.searchCatalog(term))
+      )
+      .subscribe(objects => (this.filteredObjects = objects));
+  }
+
+  ngOnDestroy() {
+    this.searchSubscription?.unsubscribe();
   }
 
-  loadMessierCatalog() {
-    console.log('Loading Messier catalog...');
-    this.http.get<MessierObject[]>('static/messier.json').subscribe({
-      next: (messierData) => {
-        console.log('Raw Messier data:', messierData);
-        this.catalogObjects = messierData.map(obj => ({
+  searchCatalog(term: string): Observable<CatalogObject[]> {
+    if (!term && this.catalogObjects.length) {
+      return of([...this.catalogObjects]);
+    }
+    const params = { q: term, limit: '200' };
+    return this.http.get<CatalogSearchResponse>('/api/catalog/search', { params }).pipe(
+      map(response => {
+        const objects = response.results.map(obj => ({
           name: obj.name && obj.name.trim() ? `${obj.id} (${obj.name})` : obj.id,
           ra: this.decimalToHMS(obj.ra),
           dec: this.decimalToDMS(obj.dec),
@@ -74,35 +103,29 @@ export class ObjectSelectionDialogComponent implements OnInit {
           magnitude: obj.magnitude,
           constellation: obj.constellation
         }));
-        this.filteredObjects = [...this.catalogObjects];
-        console.log('Loaded', this.catalogObjects.length, 'Messier objects');
-      },
-      error: (error) => {
-        console.error('Failed to load Messier catalog:', error);
-        // Fallback to a few sample objects if catalog fails to load
-        this.catalogObjects = [
-          { name: 'M31 (Andromeda Galaxy)', ra: '00:42:44', dec: '+41:16:09', type: 'Galaxy', magnitude: 3.44, constellation: 'Andromeda' },
-          { name: 'M42 (Orion Nebula)', ra: '05:35:17', dec: '-05:23:14', type: 'Nebula', magnitude: 4.0, constellation: 'Orion' },
-          { name: 'M13 (Hercules Cluster)', ra: '16:41:41', dec: '+36:27:37', type: 'Globular cluster', magnitude: 5.8, constellation: 'Hercules' }
-        ];
-        this.filteredObjects = [...this.catalogObjects];
-        console.log('Using fallback objects');
-      }
-    });
+        if (!term) {
+          this.catalogObjects = [...objects];
+        }
+        return objects;
+      }),
+      catchError(error => {
+        console.error('Failed to search catalog:', error);
+        if (!this.catalogObjects.length) {
+          // Fallback to a few sample objects if catalog fails to load
+          this.catalogObjects = [
+            { name: 'M31 (Andromeda Galaxy)', ra: '00:42:44', dec: '+41:16:09', type: 'Galaxy', magnitude: 3.44, constellation: 'Andromeda' },
+            { name: 'M42 (Orion Nebula)', ra: '05:35:17', dec: '-05:23:14', type: 'Nebula', magnitude: 4.0, constellation: 'Orion' },
+            { name: 'M13 (Hercules Cluster)', ra: '16:41:41', dec: '+36:27:37', type: 'Globular cluster', magnitude: 5.8, constellation: 'Hercules' }
+          ];
+          console.log('Using fallback objects');
+        }
+        return of([...this.catalogObjects]);
+      })
+    );
   }
 
   filterObjects() {
-    if (!this.searchTerm.trim()) {
-      this.filteredObjects = [...this.catalogObjects];
-      return;
-    }
-
-    const term = this.searchTerm.toLowerCase();
-    this.filteredObjects = this.catalogObjects.filter(obj =>
-      obj.name.toLowerCase().includes(term) ||
-      obj.type.toLowerCase().includes(term) ||
-      (obj.constellation && obj.constellation.toLowerCase().includes(term))
-    );
+    this.searchTerms.next(this.searchTerm.trim());
   }
 
   private decimalToHMS(decimal: number): string {
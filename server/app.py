@@ -3,38 +3,68 @@
 import glob
 import logging
 import os
-import subprocess
 import time
 from datetime import datetime
 
-import gphoto2 as gp
-import serial.tools.list_ports
-from flask import (Flask, abort, jsonify, render_template, request, send_file,
-                   send_from_directory)
+from flask import Flask, abort, jsonify, request, send_from_directory
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .camera.routes import camera_bp
+from .catalog.routes import catalog_bp, chart_bp
+from .config.store import ConfigError, config_store
+from .devices.registry import device_registry
+from .executors import ExecutorBusy, ExecutorTimeout, executor_metrics
 from .guider.routes import guider_bp
+from .images.routes import images_bp
+from .jobs.routes import jobs_bp
+from .logs.pipeline import log_pipeline
+from .logs.routes import logs_bp
 from .mount.routes import mount_bp
+from .planner.routes import planner_bp
+from .profiling import request_profiler
+from .static_files import SpaShell, send_static
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging, records are written by a background thread
+log_pipeline.start(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configure App
 app = Flask(
     __name__,
     template_folder="templates",
-    static_folder="static",
+    # Served by serve_static with precompressed variants
+    static_folder=None,
 )
+STATIC_DIR = os.path.join(app.root_path, "static")
+spa_shell = SpaShell(os.path.join(app.root_path, "templates", "index.html"))
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
 # Add Blueprints
 app.register_blueprint(camera_bp)
 app.register_blueprint(mount_bp)
 app.register_blueprint(guider_bp)
+app.register_blueprint(catalog_bp)
+app.register_blueprint(chart_bp)
+app.register_blueprint(planner_bp)
+app.register_blueprint(logs_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(images_bp)
+
+# Opt-in profiling and stack samples of slow requests, the profiles and
+# their stacks are only served when OAT_PROFILING=1
+app.config["PROFILING"] = os.environ.get("OAT_PROFILING", "0") == "1"
+request_profiler.init_app(app)
+
+
+def create_app():
+    """Get the app with its background services started, for servers to load.
+
+    Importing this module only builds the app, so tests and tools that
+    import it do not start the device watcher.
+    """
+    # Enumerate devices in the background and watch for hot-plugged ones
+    device_registry.start()
+    return app
 
 
 # Error Handling
@@ -59,100 +89,106 @@ def not_implemented(e):  # pylint: disable=unused-argument
     return jsonify({"message": "Request has not been implemented."}), 501
 
 
+@app.errorhandler(ExecutorBusy)
+def executor_busy(e):
+    """Device queue full."""
+    logger.warning("503 %s: %s", str(e), request.url)
+    return jsonify({"error": str(e)}), 503
+
+
+@app.errorhandler(ExecutorTimeout)
+def executor_timeout(e):
+    """Device did not answer in time."""
+    logger.warning("504 %s: %s", str(e), request.url)
+    return jsonify({"error": str(e)}), 504
+
+
 @app.route("/")
 @app.route("/<path:path>")
 def client_app(path=None):
     """Serve the Angular client application."""
-    return render_template("index.html")
+    return spa_shell.response()
+
+
+@app.route("/static/<path:filename>", endpoint="static")
+def serve_static(filename):
+    """Serve the client build, precompressed and cached."""
+    return send_static(STATIC_DIR, filename)
 
 
 @app.route("/favicon.ico")
 def send_favicon():
     """Serve favicon."""
-    return send_file("static/favicon.ico")
+    return send_static(STATIC_DIR, "favicon.ico")
 
 
 @app.route("/api/devices")
 def list_devices():
-    """List available serial and USB devices."""
-
-    devices = []
-
-    # Serial ports
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        devices.append(
-            {
-                "device": port.device,
-                "description": port.description,
-                "hwid": port.hwid,
-                "vid": port.vid,
-                "pid": port.pid,
-                "manufacturer": port.manufacturer,
-                "product": port.product,
-                "type": "serial",
-            }
-        )
-
-    # USB video devices using v4l2-ctl
-    try:
-        result = subprocess.run(
-            ["v4l2-ctl", "--list-devices"], capture_output=True, text=True, check=True
-        )
-
-        lines = result.stdout.strip().split("\n")
-        current_camera = None
-
-        for line in lines:
-            if line and not line.startswith("\t") and not line.startswith(" "):
-                # Camera name line
-                current_camera = line.split(":")[0]
-            elif line.startswith("\t/dev/video") and current_camera:
-                # First video device for this camera
-                device_path = line.strip()
-                devices.append(
-                    {
-                        "device": device_path,
-                        "description": current_camera,
-                        "hwid": "",
-                        "vid": None,
-                        "pid": None,
-                        "product": current_camera,
-                        "type": "video",
-                    }
-                )
-                current_camera = None  # Only take first device per camera
-
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        logger.warning("gphoto2 not found")
-
-    # Get gphoto2 supported cameras
-    port_info_list = gp.PortInfoList()
-    port_info_list.load()
-    abilities_list = gp.CameraAbilitiesList()
-    abilities_list.load()
-
-    # Detect cameras
-    cameras = abilities_list.detect(port_info_list)
-    for camera in cameras:
-        devices.append(
-            {
-                "device": camera,
-                "type": "camera",
-            }
-        )
-
-    return jsonify({"devices": devices})
+    """List available serial and USB devices.
+
+    Served from the device registry, refresh=1 rescans every device first.
+    """
+    if request.args.get("refresh") in ("1", "true"):
+        device_registry.refresh()
+    generation, devices = device_registry.devices()
+    return jsonify({"devices": devices, "generation": generation})
+
+
+@app.route("/api/executors")
+def list_executors():
+    """Queue depth and counters of each device executor."""
+    return jsonify({"executors": executor_metrics()})
+
+
+@app.route("/api/debug/profiles", methods=["GET", "POST", "DELETE"])
+def debug_profiles():
+    """List captured profiles, arm profiling or clear the captures.
+
+    POST takes "next" (profile the next N requests), "sample_every" (profile
+    1 in K requests, 0 stops) and "threshold_ms" (keep stack samples of
+    slower requests, 0 stops). Not found unless PROFILING is enabled.
+    """
+    if not app.config["PROFILING"]:
+        abort(404)
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        threshold = data.get("threshold_ms")
+        try:
+            settings = request_profiler.configure(
+                armed=data.get("next"),
+                sample_every=data.get("sample_every"),
+                threshold=None if threshold is None else float(threshold) / 1000,
+            )
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid profiling settings"}), 400
+        return jsonify(settings)
+    if request.method == "DELETE":
+        request_profiler.clear()
+    return jsonify(
+        {
+            "settings": request_profiler.settings(),
+            "profiles": request_profiler.profiles(),
+        }
+    )
+
+
+@app.route("/api/debug/profiles/<int:capture_id>")
+def debug_profile(capture_id):
+    """A captured profile with its stack samples and cProfile report."""
+    if not app.config["PROFILING"]:
+        abort(404)
+    capture = request_profiler.get(capture_id)
+    if capture is None:
+        abort(404)
+    return jsonify(capture)
 
 
 @app.route("/api/config/device", methods=["GET", "POST"])
 def device_config():
-    """Get or set device configuration."""
-    import json
-    import os
-
-    config_file = "device_config.json"
+    """Get or update device configuration.
 
+    POST merges the given keys into the saved configuration.
+    """
     if request.method == "POST":
         # Save device configuration
         data = request.get_json()
@@ -160,33 +196,17 @@ def device_config():
             return jsonify({"error": "No configuration data provided"}), 400
 
         try:
-            with open(config_file, "w") as f:
-                json.dump(data, f, indent=2)
-            logger.info("Device configuration saved: %s", data)
-            return jsonify({"message": "Device configuration saved", "config": data})
-        except Exception as e:
+            config = config_store.update(data)
+            logger.info("Device configuration saved: %s", ", ".join(sorted(data)))
+            return jsonify({"message": "Device configuration saved", "config": config})
+        except ConfigError as e:
+            return jsonify({"error": str(e)}), 400
+        except OSError as e:
             logger.error("Failed to save device config: %s", str(e))
             return jsonify({"error": "Failed to save configuration"}), 500
 
-    else:
-        # Get current device configuration
-        try:
-            if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    config = json.load(f)
-                return jsonify({"config": config})
-            else:
-                # Return default configuration
-                default_config = {
-                    "telescopeDevice": "",
-                    "telescopeBaudrate": 9600,
-                    "guiderDevice": "",
-                    "cameraDevice": "",
-                }
-                return jsonify({"config": default_config})
-        except Exception as e:
-            logger.error("Failed to load device config: %s", str(e))
-            return jsonify({"error": "Failed to load configuration"}), 500
+    # Current device configuration, defaults for unset keys
+    return jsonify({"config": config_store.all()})
 
 
 @app.route("/static/images/<filename>")
@@ -0,0 +1,250 @@
+"""ASGI entry point serving the Flask app without pinning the event loop.
+
+Run with an ASGI server, for example:
+
+    uvicorn server.asgi:application --host 0.0.0.0 --port 5000
+
+Flask views run on thread pools, one per lane, so a blocking capture or
+systemctl call in a GET only ever ties up a thread of the "default" lane.
+Requests that change hardware state (POST, PUT, DELETE) run on a separate
+"control" lane, so dashboards can never starve a jog or stop command.
+Endless responses (MJPEG and server-sent event streams) hold a thread for as
+long as a client watches, so they get a "stream" lane of their own, and are
+closed as soon as the client disconnects. Once every stream thread is taken,
+further stream clients get a 503 instead of waiting forever. Hot polling
+endpoints have native async handlers that await device I/O on its
+executors, costing no thread per waiting client.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .app import app, create_app
+from .mount.status import dashboard_status, status_aggregator
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per lane
+LANES = {"control": 4, "default": 16, "stream": 32}
+CONTROL_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Live views and event streams, which run until the client leaves
+STREAM_PATH = re.compile(r"/stream$|^/api/images/live/")
+# Lanes whose requests never finish on their own, refused once full
+ENDLESS_LANES = ("stream",)
+
+
+def lane_for(method, path):
+    """Name of the thread pool lane that serves a request."""
+    if method in CONTROL_METHODS:
+        return "control"
+    return "stream" if STREAM_PATH.search(path) else "default"
+
+
+async def status_all(scope, body):
+    """Native /api/mount/status/all, awaiting the subsystem probes."""
+    status = await status_aggregator.collect_async()
+    return 200, dashboard_status(status)
+
+
+# Paths answered without a Flask thread
+ASYNC_ROUTES = {("GET", "/api/mount/status/all"): status_all}
+
+
+def wsgi_environ(scope, body):
+    """Build a WSGI environ for an ASGI http scope and request body."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            continue
+        else:
+            key = f"HTTP_{name}"
+            if key in environ:
+                # Several Cookie headers become one, pairs separated by "; "
+                separator = "; " if key == "HTTP_COOKIE" else ","
+                value = f"{environ[key]}{separator}{value}"
+            environ[key] = value
+    return environ
+
+
+class AsgiApp:
+    """ASGI application running a WSGI app on per-lane thread pools."""
+
+    def __init__(self, wsgi_app, lanes=LANES, routes=ASYNC_ROUTES, startup=None):
+        """Initialize with a WSGI app, lane sizes and native async routes.
+
+        startup is an optional callable run when the server starts.
+        """
+        self.wsgi_app = wsgi_app
+        self.routes = routes
+        self.startup = startup
+        self.lanes = dict(lanes)
+        self.busy = dict.fromkeys(lanes, 0)
+        self.executors = {
+            name: ThreadPoolExecutor(workers, thread_name_prefix=f"asgi-{name}")
+            for name, workers in lanes.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        """Handle an ASGI connection."""
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            body = await self._read_body(receive)
+            handler = self.routes.get((scope["method"], scope["path"]))
+            if handler is not None:
+                await self._send_json(send, *await handler(scope, body))
+            else:
+                await self._run_wsgi(scope, body, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.startup is not None:
+                    self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for executor in self.executors.values():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _watch_disconnect(receive, disconnected):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    async def _run_wsgi(self, scope, body, receive, send):
+        """Run the WSGI app on its lane, forwarding the response as it is produced.
+
+        The worker thread waits for each chunk to be sent, so slow clients
+        apply backpressure. Once the client disconnects the response iterator
+        is closed at its next chunk, which ends endless streams. A full
+        endless lane answers 503 rather than queueing the request, and a
+        failing app answers 500 unless its response has already started.
+        """
+        loop = asyncio.get_running_loop()
+        lane = lane_for(scope["method"], scope["path"])
+        if lane in ENDLESS_LANES and self.busy[lane] >= self.lanes[lane]:
+            logger.warning("Refused %s, all %s threads busy", scope["path"], lane)
+            await self._send_json(send, 503, {"error": "Too many streams open"})
+            return
+        executor = self.executors[lane]
+        environ = wsgi_environ(scope, body)
+        disconnected = threading.Event()
+        watcher = asyncio.ensure_future(self._watch_disconnect(receive, disconnected))
+        state = {"started": False}
+
+        def forward(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response["status"] = int(status.split(" ", 1)[0])
+                response["headers"] = [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ]
+                return lambda data: None
+
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in iterable:
+                    if disconnected.is_set():
+                        logger.debug("Client left %s", scope["path"])
+                        return
+                    if not state["started"]:
+                        forward({"type": "http.response.start", **response})
+                        state["started"] = True
+                    if chunk:
+                        forward(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+                if not state["started"]:
+                    forward({"type": "http.response.start", **response})
+                    state["started"] = True
+                forward({"type": "http.response.body", "body": b""})
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+
+        self.busy[lane] += 1
+        try:
+            await loop.run_in_executor(executor, run)
+        except OSError as e:
+            logger.info("Client went away: %s", str(e))
+        except Exception:
+            logger.exception("Failed to serve %s", scope["path"])
+            if not state["started"]:
+                await self._send_json(send, 500, {"error": "Internal server error"})
+        finally:
+            self.busy[lane] -= 1
+            watcher.cancel()
+
+
+application = AsgiApp(app, startup=create_app)
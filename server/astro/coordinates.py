@@ -0,0 +1,145 @@
+"""Time and coordinate conversions shared by the catalog, mount and planner.
+
+Right ascension is in hours and declination, latitude, longitude, altitude and
+azimuth are in degrees, matching ``assets/messier.json``. Longitude is east
+positive and azimuth is measured from north through east. Functions taking
+coordinates accept scalars or NumPy arrays so whole catalogs convert in one
+call.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+SIDEREAL_RATE = 1.00273790935  # Sidereal hours per solar hour
+
+_SEXAGESIMAL = re.compile(r"[:*'\"\s°hmsd]+")
+
+
+def utc(when=None):
+    """Get a timezone aware UTC datetime, now by default, naive times are UTC."""
+    if when is None:
+        return datetime.now(timezone.utc)
+    if when.tzinfo is None:
+        return when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc)
+
+
+def julian_date(when=None):
+    """Julian date of a datetime (UTC)."""
+    return utc(when).timestamp() / 86400.0 + UNIX_EPOCH_JD
+
+
+def sidereal_time(when=None, longitude=0.0):
+    """Local mean sidereal time in degrees for an east positive longitude."""
+    jd = julian_date(when)
+    t = (jd - J2000) / 36525.0
+    gmst = (
+        280.46061837
+        + 360.98564736629 * (jd - J2000)
+        + 0.000387933 * t * t
+        - t * t * t / 38710000.0
+    )
+    return (gmst + longitude) % 360.0
+
+
+def hour_angle(ra, lst):
+    """Hour angle in hours, wrapped to [-12, 12), for RA in hours and LST in degrees."""
+    return (lst / 15.0 - np.asarray(ra, dtype=np.float64) + 12.0) % 24.0 - 12.0
+
+
+def altaz(ra, dec, latitude, lst):
+    """Altitude and azimuth in degrees for RA (hours), Dec and LST (degrees).
+
+    Returns (altitude, azimuth, hour angle in hours).
+    """
+    ha = hour_angle(ra, lst)
+    ha_rad = np.radians(ha * 15.0)
+    dec_rad = np.radians(np.asarray(dec, dtype=np.float64))
+    lat_rad = np.radians(latitude)
+
+    sin_dec, cos_dec = np.sin(dec_rad), np.cos(dec_rad)
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    cos_ha = np.cos(ha_rad)
+
+    altitude = np.degrees(
+        np.arcsin(np.clip(sin_dec * sin_lat + cos_dec * cos_lat * cos_ha, -1.0, 1.0))
+    )
+    azimuth = (
+        np.degrees(
+            np.arctan2(
+                -cos_dec * np.sin(ha_rad),
+                sin_dec * cos_lat - cos_dec * sin_lat * cos_ha,
+            )
+        )
+        % 360.0
+    )
+    return altitude, azimuth, ha
+
+
+def equatorial(altitude, azimuth, latitude, lst):
+    """RA (hours) and Dec (degrees) for altitude, azimuth and LST in degrees."""
+    alt_rad = np.radians(np.asarray(altitude, dtype=np.float64))
+    az_rad = np.radians(np.asarray(azimuth, dtype=np.float64))
+    lat_rad = np.radians(latitude)
+
+    sin_alt, cos_alt = np.sin(alt_rad), np.cos(alt_rad)
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    cos_az = np.cos(az_rad)
+
+    dec = np.degrees(
+        np.arcsin(np.clip(sin_alt * sin_lat + cos_alt * cos_lat * cos_az, -1.0, 1.0))
+    )
+    ha = np.degrees(
+        np.arctan2(
+            -np.sin(az_rad) * cos_alt, sin_alt * cos_lat - cos_alt * sin_lat * cos_az
+        )
+    )
+    return (lst - ha) / 15.0 % 24.0, dec
+
+
+def transit_offset(ha):
+    """Solar hours from now to the nearest upper transit for hour angles in hours."""
+    return -np.asarray(ha) / SIDEREAL_RATE
+
+
+def transit_altitude(dec, latitude):
+    """Altitude in degrees at upper transit."""
+    return 90.0 - np.abs(latitude - np.asarray(dec, dtype=np.float64))
+
+
+def parse_sexagesimal(text):
+    """Parse values such as "+45*30:15", "12:34:56", "-05:23" or "41.27"."""
+    text = str(text).strip().rstrip("#")
+    if not text:
+        raise ValueError("Empty coordinate")
+    parts = [part for part in _SEXAGESIMAL.split(text) if part]
+    sign = -1.0 if text.startswith("-") else 1.0
+    values = [abs(float(part)) for part in parts[:3]]
+    values += [0.0] * (3 - len(values))
+    return sign * (values[0] + values[1] / 60.0 + values[2] / 3600.0)
+
+
+def format_hms(hours):
+    """Format hours as HH:MM:SS for Meade :Sr commands."""
+    total = int(round((hours % 24.0) * 3600.0)) % 86400
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+def format_dms(degrees):
+    """Format degrees as sDD:MM:SS for Meade :Sd commands."""
+    sign = "-" if degrees < 0 else "+"
+    total = int(round(abs(degrees) * 3600.0))
+    return f"{sign}{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+def add_hours(when, hours):
+    """Add (array of) hours to a datetime, returning ISO strings."""
+    when = utc(when)
+    return [
+        (when + timedelta(hours=float(offset))).isoformat(timespec="seconds")
+        for offset in np.atleast_1d(hours)
+    ]
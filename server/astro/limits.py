@@ -0,0 +1,253 @@
+"""Mount limit, horizon mask and meridian flip prediction for target lists.
+
+All targets are evaluated over a grid of times in one NumPy pass, giving the
+windows in which each target is reachable and the time the mount has to flip.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+
+from .coordinates import add_hours, altaz, sidereal_time, utc
+from .precession import j2000_to_jnow
+
+SIDEREAL_DEGREES_PER_HOUR = 15.0410686
+# Targets evaluated together, bounds memory to CHUNK x time steps
+CHUNK = 2048
+
+# Targets by time step, ra and dec are of date
+Grid = namedtuple(
+    "Grid", ["times", "offsets", "ok", "altitude", "hour_angle", "ra", "dec"]
+)
+
+
+class HorizonProfile:
+    """Minimum altitude by azimuth, linearly interpolated around the horizon."""
+
+    def __init__(self, points=None, default=0.0):
+        """Initialize from [[azimuth, min altitude], ...] in degrees."""
+        points = sorted((float(az) % 360.0, float(alt)) for az, alt in points or [])
+        self.points = points
+        self.default = float(default)
+        if points:
+            self._azimuth = np.array([az for az, _ in points])
+            self._altitude = np.array([alt for _, alt in points])
+
+    def min_altitude(self, azimuth):
+        """Get the minimum altitude for azimuths in degrees."""
+        if not self.points:
+            return np.full(np.shape(azimuth), self.default)
+        return np.interp(azimuth, self._azimuth, self._altitude, period=360.0)
+
+    def to_config(self):
+        """Get the profile as a JSON serializable list."""
+        return [[az, alt] for az, alt in self.points]
+
+
+class MountLimits:
+    """Hour angle and declination travel of the mount.
+
+    Hour angles are in hours, negative east of the meridian. The mount tracks
+    from ``ha_east`` to ``meridian_limit`` on one side of the pier, flips, and
+    tracks on to ``ha_west``.
+    """
+
+    def __init__(
+        self,
+        ha_east=-12.0,
+        ha_west=12.0,
+        meridian_limit=0.0,
+        dec_min=-90.0,
+        dec_max=90.0,
+        min_altitude=0.0,
+    ):
+        """Initialize limits, the defaults allow the whole sky above the horizon."""
+        self.ha_east = float(ha_east)
+        self.ha_west = float(ha_west)
+        self.meridian_limit = float(meridian_limit)
+        self.dec_min = float(dec_min)
+        self.dec_max = float(dec_max)
+        self.min_altitude = float(min_altitude)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build limits from the device config "mountLimits" entry."""
+        config = config or {}
+        names = {
+            "raLimitEast": "ha_east",
+            "raLimitWest": "ha_west",
+            "meridianLimit": "meridian_limit",
+            "decMin": "dec_min",
+            "decMax": "dec_max",
+            "minAltitude": "min_altitude",
+        }
+        return cls(
+            **{names[key]: value for key, value in config.items() if key in names}
+        )
+
+    def to_config(self):
+        """Get limits in the device config format."""
+        return {
+            "raLimitEast": self.ha_east,
+            "raLimitWest": self.ha_west,
+            "meridianLimit": self.meridian_limit,
+            "decMin": self.dec_min,
+            "decMax": self.dec_max,
+            "minAltitude": self.min_altitude,
+        }
+
+
+class LimitsEngine:
+    """Evaluates targets against the site, mount limits and horizon profile."""
+
+    def __init__(self, latitude, longitude, limits=None, horizon=None):
+        """Initialize for a site in degrees (east positive longitude)."""
+        self.latitude = latitude
+        self.longitude = longitude
+        self.limits = limits or MountLimits()
+        self.horizon = horizon or HorizonProfile()
+
+    def key(self):
+        """Hashable description of the site, limits and horizon."""
+        return (
+            self.latitude,
+            self.longitude,
+            tuple(sorted(self.limits.to_config().items())),
+            tuple(self.horizon.points),
+            self.horizon.default,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, LimitsEngine) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def masks(self, altitude, azimuth, ha, dec):
+        """Get (above horizon, within RA travel, within Dec limits) masks."""
+        minimum = np.maximum(
+            self.horizon.min_altitude(azimuth), self.limits.min_altitude
+        )
+        above = altitude >= minimum
+        in_travel = (ha >= self.limits.ha_east) & (ha <= self.limits.ha_west)
+        in_dec = (dec >= self.limits.dec_min) & (dec <= self.limits.dec_max)
+        return above, in_travel, in_dec
+
+    def _evaluate(self, ra, dec, lst):
+        """Masks, altitude and hour angle for (n, 1) targets and (1, t) LST."""
+        altitude, azimuth, ha = altaz(ra, dec, self.latitude, lst)
+        return self.masks(altitude, azimuth, ha, dec) + (altitude, ha)
+
+    def check(self, ra, dec, when=None, epoch="J2000"):
+        """Check targets at one time, vectorized over whole catalogs.
+
+        Returns (reachable, reason) arrays, reason is "" when reachable.
+        """
+        ra = np.atleast_1d(ra).astype(np.float64)
+        dec = np.atleast_1d(dec).astype(np.float64)
+        if epoch == "J2000":
+            ra, dec = j2000_to_jnow(ra, dec, when)
+        lst = sidereal_time(when, self.longitude)
+        above, in_travel, in_dec, _, _ = self._evaluate(ra, dec, lst)
+        return above & in_travel & in_dec, self.reasons(above, in_travel, in_dec)
+
+    @staticmethod
+    def reasons(above, in_travel, in_dec):
+        """Explain masks, "" where reachable."""
+        return np.where(
+            ~in_dec,
+            "outside declination limits",
+            np.where(
+                ~in_travel,
+                "outside RA travel limits",
+                np.where(~above, "below horizon", ""),
+            ),
+        )
+
+    def _time_grid(self, start, end, step):
+        """Offsets in hours, LST in degrees and ISO times from start to end."""
+        start = utc(start)
+        end = utc(end) if end else start + timedelta(hours=12)
+        span = (end - start).total_seconds() / 3600.0
+        offsets = np.append(np.arange(0.0, span, step / 60.0), span)
+        lst = sidereal_time(start, self.longitude) + SIDEREAL_DEGREES_PER_HOUR * offsets
+        return start, end, offsets, lst, add_hours(start, offsets)
+
+    def _jnow(self, ra, dec, start, end, epoch):
+        ra = np.atleast_1d(ra).astype(np.float64)
+        dec = np.atleast_1d(dec).astype(np.float64)
+        if epoch == "J2000":
+            ra, dec = j2000_to_jnow(ra, dec, start + (end - start) / 2)
+        return ra, dec
+
+    def grid(self, ra, dec, start=None, end=None, step=5.0, epoch="J2000"):
+        """Evaluate targets at every step (minutes) from start to end.
+
+        Returns a Grid of (n targets, t times) arrays for planners.
+        """
+        start, end, offsets, lst, times = self._time_grid(start, end, step)
+        ra, dec = self._jnow(ra, dec, start, end, epoch)
+        above, in_travel, in_dec, altitude, ha = self._evaluate(
+            ra[:, None], dec[:, None], lst[None, :]
+        )
+        return Grid(times, offsets, above & in_travel & in_dec, altitude, ha, ra, dec)
+
+    def windows(self, ra, dec, start=None, end=None, step=5.0, epoch="J2000"):
+        """Reachable windows and meridian flip times for targets over a time range.
+
+        step is in minutes, end defaults to 12 hours after start. Returns one
+        dict per target with "windows" [{"start", "end"}], "flip" (time the
+        mount must flip, or None), "max_altitude" and "best_time".
+        """
+        start, end, _, lst, times = self._time_grid(start, end, step)
+        ra, dec = self._jnow(ra, dec, start, end, epoch)
+
+        results = []
+        for first in range(0, len(ra), CHUNK):
+            chunk_ra = ra[first : first + CHUNK, None]
+            chunk_dec = dec[first : first + CHUNK, None]
+            above, in_travel, in_dec, altitude, ha = self._evaluate(
+                chunk_ra, chunk_dec, lst[None, :]
+            )
+            ok = above & in_travel & in_dec
+            flip = self.flips(ha)
+            for row in range(len(chunk_ra)):
+                results.append(
+                    self._summarize(ok[row], flip[row], altitude[row], times)
+                )
+        return results
+
+    def flips(self, ha):
+        """Mask of time steps (t - 1 columns) in which a target crosses the flip limit."""
+        return (ha[..., :-1] < self.limits.meridian_limit) & (
+            ha[..., 1:] >= self.limits.meridian_limit
+        )
+
+    @staticmethod
+    def _summarize(ok, flip, altitude, times):
+        edges = np.diff(np.concatenate(([0], ok.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        windows = [
+            {"start": times[first], "end": times[last]}
+            for first, last in zip(starts, ends)
+        ]
+
+        flip_time = None
+        flips = np.flatnonzero(flip & ok[:-1] & ok[1:])
+        if len(flips):
+            flip_time = times[flips[0] + 1]
+
+        if ok.any():
+            best = int(np.argmax(np.where(ok, altitude, -np.inf)))
+            max_altitude, best_time = round(float(altitude[best]), 3), times[best]
+        else:
+            max_altitude, best_time = None, None
+        return {
+            "reachable": bool(ok.any()),
+            "windows": windows,
+            "flip": flip_time,
+            "max_altitude": max_altitude,
+            "best_time": best_time,
+        }
@@ -0,0 +1,163 @@
+"""J2000 to epoch-of-date (JNow) transforms for goto targets and catalogs.
+
+Precession uses the IAU 1976 angles, nutation the four largest IAU 1980 terms
+and annual aberration a circular Earth orbit, which is good to about an arc
+second. Rotation matrices are cached per epoch rounded to EPOCH_STEP days, so
+transforming one goto target or a whole catalog array costs a matrix multiply.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .coordinates import J2000, altaz, equatorial, julian_date, sidereal_time
+
+# Epoch rounding for cached matrices, 0.01 day moves stars by < 0.001"
+EPOCH_STEP = 0.01
+ARCSEC = math.radians(1.0 / 3600.0)
+ABERRATION_CONSTANT = 20.49552 * ARCSEC
+
+
+def _rotation(axis, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    if axis == 1:
+        return np.array([[1, 0, 0], [0, c, s], [0, -s, c]])
+    if axis == 2:
+        return np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]])
+    return np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
+
+
+def _centuries(jd):
+    return (jd - J2000) / 36525.0
+
+
+def obliquity(jd):
+    """Mean obliquity of the ecliptic in radians."""
+    t = _centuries(jd)
+    return math.radians(
+        23.43929111 - (46.8150 * t + 0.00059 * t * t - 0.001813 * t**3) / 3600.0
+    )
+
+
+def precession_matrix(jd):
+    """Rotation from J2000 mean equator to the mean equator of date."""
+    t = _centuries(jd)
+    zeta = (2306.2181 * t + 0.30188 * t * t + 0.017998 * t**3) * ARCSEC
+    z = (2306.2181 * t + 1.09468 * t * t + 0.018203 * t**3) * ARCSEC
+    theta = (2004.3109 * t - 0.42665 * t * t - 0.041833 * t**3) * ARCSEC
+    return _rotation(3, -z) @ _rotation(2, theta) @ _rotation(3, -zeta)
+
+
+def nutation(jd):
+    """Nutation in longitude and obliquity (radians)."""
+    t = _centuries(jd)
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun = math.radians(280.4665 + 36000.7698 * t)
+    moon = math.radians(218.3165 + 481267.8813 * t)
+    dpsi = (
+        -17.20 * math.sin(omega)
+        - 1.32 * math.sin(2 * sun)
+        - 0.23 * math.sin(2 * moon)
+        + 0.21 * math.sin(2 * omega)
+    )
+    deps = (
+        9.20 * math.cos(omega)
+        + 0.57 * math.cos(2 * sun)
+        + 0.10 * math.cos(2 * moon)
+        - 0.09 * math.cos(2 * omega)
+    )
+    return dpsi * ARCSEC, deps * ARCSEC
+
+
+def nutation_matrix(jd):
+    """Rotation from the mean to the true equator of date."""
+    eps = obliquity(jd)
+    dpsi, deps = nutation(jd)
+    return _rotation(1, -(eps + deps)) @ _rotation(3, -dpsi) @ _rotation(1, eps)
+
+
+def aberration_vector(jd):
+    """Earth velocity over c in equatorial coordinates of date."""
+    t = _centuries(jd)
+    mean_anomaly = math.radians(357.52911 + 35999.05029 * t)
+    longitude = math.radians(
+        280.46646
+        + 36000.76983 * t
+        + 1.914602 * math.sin(mean_anomaly)
+        + 0.019993 * math.sin(2 * mean_anomaly)
+    )
+    eps = obliquity(jd)
+    return ABERRATION_CONSTANT * np.array(
+        [
+            math.sin(longitude),
+            -math.cos(longitude) * math.cos(eps),
+            -math.cos(longitude) * math.sin(eps),
+        ]
+    )
+
+
+@lru_cache(maxsize=64)
+def _transform(epoch, nutate):
+    jd = epoch * EPOCH_STEP
+    matrix = precession_matrix(jd)
+    if nutate:
+        matrix = nutation_matrix(jd) @ matrix
+    return matrix, aberration_vector(jd)
+
+
+def transform(when=None, nutate=True):
+    """Get the cached (rotation matrix, aberration vector) for a datetime."""
+    return _transform(round(julian_date(when) / EPOCH_STEP), nutate)
+
+
+def _vectors(ra, dec):
+    ra = np.radians(np.asarray(ra, dtype=np.float64) * 15.0)
+    dec = np.radians(np.asarray(dec, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def _angles(vectors):
+    vectors = vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+    ra = np.degrees(np.arctan2(vectors[..., 1], vectors[..., 0])) / 15.0 % 24.0
+    dec = np.degrees(np.arcsin(np.clip(vectors[..., 2], -1.0, 1.0)))
+    return ra, dec
+
+
+def j2000_to_jnow(ra, dec, when=None, nutate=True, aberrate=True):
+    """Convert J2000 RA (hours) and Dec (degrees) to apparent coordinates of date.
+
+    Accepts scalars or arrays and returns the same shape.
+    """
+    matrix, velocity = transform(when, nutate)
+    vectors = _vectors(ra, dec) @ matrix.T
+    if aberrate:
+        vectors = vectors + velocity
+    return _angles(vectors)
+
+
+def jnow_to_j2000(ra, dec, when=None, nutate=True, aberrate=True):
+    """Convert apparent coordinates of date back to J2000."""
+    matrix, velocity = transform(when, nutate)
+    vectors = _vectors(ra, dec)
+    if aberrate:
+        vectors = vectors - velocity
+    return _angles(vectors @ matrix)
+
+
+def refraction(altitude, pressure=1010.0, temperature=10.0):
+    """Atmospheric refraction in degrees for true altitudes in degrees (Saemundsson)."""
+    altitude = np.asarray(altitude, dtype=np.float64)
+    h = np.maximum(altitude, -1.0)
+    minutes = 1.02 / np.tan(np.radians(h + 10.3 / (h + 5.11)))
+    minutes *= (pressure / 1010.0) * (283.0 / (273.0 + temperature))
+    return np.where(altitude > -1.0, minutes / 60.0, 0.0)
+
+
+def refract(ra, dec, latitude, longitude, when=None, pressure=1010.0, temperature=10.0):
+    """Shift RA (hours) and Dec (degrees) of date to where refraction shows them."""
+    lst = sidereal_time(when, longitude)
+    altitude, azimuth, _ = altaz(ra, dec, latitude, lst)
+    altitude = altitude + refraction(altitude, pressure, temperature)
+    return equatorial(altitude, azimuth, latitude, lst)
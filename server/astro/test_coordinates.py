@@ -0,0 +1,64 @@
+"""Unit tests for time and coordinate conversions."""
+
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .coordinates import (
+    altaz,
+    format_dms,
+    format_hms,
+    hour_angle,
+    julian_date,
+    parse_sexagesimal,
+    sidereal_time,
+)
+
+J2000_NOON = datetime(2000, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestCoordinates(unittest.TestCase):
+    """Test coordinate helpers."""
+
+    def test_julian_date(self):
+        """Test the J2000 epoch."""
+        self.assertAlmostEqual(julian_date(J2000_NOON), 2451545.0, places=6)
+
+    def test_sidereal_time(self):
+        """Test GMST at J2000 and a known local sidereal time."""
+        self.assertAlmostEqual(sidereal_time(J2000_NOON), 280.46061837, places=5)
+        # Meeus example 12.b: 1987-04-10 19:21:00 UT, GMST 8h34m57.0896s
+        when = datetime(1987, 4, 10, 19, 21, tzinfo=timezone.utc)
+        self.assertAlmostEqual(sidereal_time(when) / 15.0, 8.582525, places=4)
+
+    def test_altaz_zenith_and_meridian(self):
+        """Test an object on the meridian and one at the zenith."""
+        altitude, azimuth, ha = altaz(
+            np.array([6.0, 6.0]), np.array([45.0, 0.0]), 45.0, 90.0
+        )
+        np.testing.assert_allclose(altitude, [90.0, 45.0], atol=1e-9)
+        self.assertAlmostEqual(azimuth[1], 180.0, places=6)
+        np.testing.assert_allclose(ha, [0.0, 0.0], atol=1e-12)
+
+    def test_altaz_east(self):
+        """Test an equatorial object rising due east."""
+        altitude, azimuth, ha = altaz(12.0, 0.0, 30.0, 90.0)
+        self.assertAlmostEqual(float(altitude), 0.0, places=6)
+        self.assertAlmostEqual(float(azimuth), 90.0, places=6)
+        self.assertAlmostEqual(float(ha), -6.0, places=9)
+
+    def test_hour_angle_wraps(self):
+        """Test hour angles wrap to [-12, 12)."""
+        self.assertAlmostEqual(float(hour_angle(23.0, 15.0)), 2.0)
+
+    def test_sexagesimal(self):
+        """Test parsing Meade replies and formatting Meade arguments."""
+        self.assertAlmostEqual(parse_sexagesimal("+45*30"), 45.5)
+        self.assertAlmostEqual(parse_sexagesimal("-05:23:28#"), -5.391111, places=5)
+        self.assertEqual(format_hms(0.712306), "00:42:44")
+        self.assertEqual(format_dms(-5.391111), "-05:23:28")
+
+
+if __name__ == "__main__":
+    unittest.main()
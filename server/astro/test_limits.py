@@ -0,0 +1,112 @@
+"""Unit tests for mount limits and meridian flip prediction."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .coordinates import sidereal_time
+from .limits import HorizonProfile, LimitsEngine, MountLimits
+
+WHEN = datetime(2025, 1, 15, 3, 0, tzinfo=timezone.utc)
+LATITUDE, LONGITUDE = 45.0, -75.0
+
+
+def meridian_ra(when=WHEN):
+    """RA in hours on the meridian at when."""
+    return sidereal_time(when, LONGITUDE) / 15.0
+
+
+class TestHorizonProfile(unittest.TestCase):
+    """Test horizon interpolation."""
+
+    def test_interpolates_across_north(self):
+        """Test interpolation wraps around azimuth 0."""
+        horizon = HorizonProfile([[350, 10], [10, 30], [180, 0]])
+        self.assertAlmostEqual(float(horizon.min_altitude(0.0)), 20.0)
+        self.assertAlmostEqual(float(horizon.min_altitude(95.0)), 15.0)
+
+    def test_default(self):
+        """Test an empty profile uses the default altitude."""
+        np.testing.assert_array_equal(
+            HorizonProfile(default=5).min_altitude(np.zeros(3)), [5, 5, 5]
+        )
+
+
+class TestLimitsEngine(unittest.TestCase):
+    """Test reachability checks and windows."""
+
+    def setUp(self):
+        """Set up an engine with RA travel of 6 hours each side."""
+        self.engine = LimitsEngine(
+            LATITUDE,
+            LONGITUDE,
+            MountLimits(ha_east=-6, ha_west=6, dec_max=85, min_altitude=10),
+        )
+
+    def test_check(self):
+        """Test a target per limit in one vectorized call."""
+        ra = meridian_ra()
+        reachable, reason = self.engine.check(
+            [ra, ra, ra + 12.0, ra - 7.0], [40.0, 89.0, 0.0, 80.0], WHEN, epoch="JNOW"
+        )
+        self.assertEqual(reachable.tolist(), [True, False, False, False])
+        self.assertEqual(
+            reason.tolist(),
+            [
+                "",
+                "outside declination limits",
+                "outside RA travel limits",
+                "outside RA travel limits",
+            ],
+        )
+
+    def test_horizon_profile(self):
+        """Test a tall horizon hides a target the mount could reach."""
+        engine = LimitsEngine(
+            LATITUDE, LONGITUDE, horizon=HorizonProfile([[0, 80], [359, 80]])
+        )
+        reachable, reason = engine.check(meridian_ra(), 0.0, WHEN, epoch="JNOW")
+        self.assertFalse(reachable[0])
+        self.assertEqual(reason[0], "below horizon")
+
+    def test_windows_and_flip(self):
+        """Test a target two hours east of the meridian flips in about two hours."""
+        ra = meridian_ra() + 2.0
+        result = self.engine.windows(
+            [ra], [40.0], WHEN, WHEN + timedelta(hours=10), step=1.0, epoch="JNOW"
+        )[0]
+        self.assertTrue(result["reachable"])
+        self.assertEqual(len(result["windows"]), 1)
+        window = result["windows"][0]
+        self.assertEqual(window["start"], WHEN.isoformat(timespec="seconds"))
+        # Reaches ha_west = 6 about 8 sidereal hours later
+        end = datetime.fromisoformat(window["end"])
+        self.assertAlmostEqual((end - WHEN).total_seconds() / 3600.0, 7.98, delta=0.05)
+        flip = datetime.fromisoformat(result["flip"])
+        self.assertAlmostEqual((flip - WHEN).total_seconds() / 3600.0, 1.99, delta=0.05)
+        best = datetime.fromisoformat(result["best_time"])
+        self.assertLessEqual(abs((best - flip).total_seconds()), 120)
+
+    def test_unreachable(self):
+        """Test a target that never rises."""
+        result = self.engine.windows([0.0], [-80.0], WHEN)[0]
+        self.assertFalse(result["reachable"])
+        self.assertEqual(result["windows"], [])
+        self.assertIsNone(result["flip"])
+
+    def test_hashable(self):
+        """Test engines with the same configuration compare equal."""
+        other = LimitsEngine(
+            LATITUDE,
+            LONGITUDE,
+            MountLimits.from_config({"raLimitEast": -6, "raLimitWest": 6}),
+        )
+        other.limits.dec_max = 85
+        other.limits.min_altitude = 10
+        self.assertEqual(self.engine, other)
+        self.assertEqual(hash(self.engine), hash(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Unit tests for J2000 to epoch of date transforms."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .precession import j2000_to_jnow, jnow_to_j2000, refraction
+
+# Meeus, Astronomical Algorithms, example 23.a: theta Persei on 2028 Nov 13.19
+EXAMPLE_TIME = datetime(2000, 1, 1, 12, tzinfo=timezone.utc) + timedelta(
+    days=2462088.69 - 2451545.0
+)
+EXAMPLE_RA = 41.054063 / 15.0
+EXAMPLE_DEC = 49.227750
+ARCSEC = 1.0 / 3600.0
+
+
+class TestPrecession(unittest.TestCase):
+    """Test precession, nutation, aberration and refraction."""
+
+    def test_precession(self):
+        """Test mean place of date against Meeus example 21.b."""
+        ra, dec = j2000_to_jnow(
+            EXAMPLE_RA, EXAMPLE_DEC, EXAMPLE_TIME, nutate=False, aberrate=False
+        )
+        self.assertAlmostEqual(float(ra) * 15.0, 41.547214, delta=0.1 * ARCSEC)
+        self.assertAlmostEqual(float(dec), 49.348483, delta=0.1 * ARCSEC)
+
+    def test_apparent_place(self):
+        """Test apparent place of date against Meeus example 23.a."""
+        ra, dec = j2000_to_jnow(EXAMPLE_RA, EXAMPLE_DEC, EXAMPLE_TIME)
+        self.assertAlmostEqual(float(ra) * 15.0, 41.5599646, delta=1.0 * ARCSEC)
+        self.assertAlmostEqual(float(dec), 49.3520685, delta=1.0 * ARCSEC)
+
+    def test_round_trip_arrays(self):
+        """Test arrays convert in one call and invert."""
+        ra = np.array([0.0, 5.5881, 13.703, 23.99])
+        dec = np.array([0.0, -5.3911, 28.3772, -89.0])
+        jnow_ra, jnow_dec = j2000_to_jnow(ra, dec, EXAMPLE_TIME)
+        self.assertEqual(jnow_ra.shape, ra.shape)
+        back_ra, back_dec = jnow_to_j2000(jnow_ra, jnow_dec, EXAMPLE_TIME)
+        ra_error = (back_ra - ra + 12.0) % 24.0 - 12.0
+        np.testing.assert_allclose(
+            ra_error * 15.0 * np.cos(np.radians(dec)), 0, atol=1e-6
+        )
+        np.testing.assert_allclose(back_dec, dec, atol=1e-6)
+
+    def test_refraction(self):
+        """Test refraction is about 29 arcminutes at the horizon and 0 at zenith."""
+        values = refraction([0.0, 90.0])
+        self.assertAlmostEqual(values[0] * 60.0, 29.0, delta=1.0)
+        self.assertAlmostEqual(values[1], 0.0, delta=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Device backends imported on first use.
+
+OpenCV and libgphoto2 dominate import time and resident memory on a Pi, even
+when no camera is attached. Modules use LazyModule in place of an import
+statement; the real module is imported the first time one of its attributes
+is read, so the server starts without loading backends it never touches.
+"""
+
+import importlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUnavailable(ImportError):
+    """A device backend is not installed."""
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        """Initialize for a module name, nothing is imported yet."""
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the module if needed and return it."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    try:
+                        self._module = importlib.import_module(self._name)
+                    except ImportError as e:
+                        raise BackendUnavailable(
+                            f"{self._name} backend is not available: {e}"
+                        ) from e
+                    logger.info("Loaded %s backend", self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        """True once the module has been imported."""
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
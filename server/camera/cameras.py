@@ -1,55 +1,147 @@
 """Setup connections for guider and cammera."""
 
+import logging
+import math
 import os
+import re
+import threading
 import time
 
-import cv2
-import gphoto2 as gp
+from ..backends import LazyModule
+from .capture import capture_service
+from .discovery import webcam_discovery
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+gp = LazyModule("gphoto2")
 
 IMAGE_PATH = "/var/www/images"
+# Port part of a gphoto2 camera entry, "Canon EOS 600D, usb:001,005"
+GPHOTO_PORT = re.compile(r"\b(?:usb|ptpip|serial):\S*")
+# Largest difference, in stops, between an asked exposure and a shutter speed
+SHUTTER_TOLERANCE = 1.0 / 3.0
+# Shortest exposure in seconds taken in bulb mode
+BULB_MIN = 1.0
+# Seconds to wait for a bulb exposure's file after the shutter closes
+BULB_FILE_TIMEOUT = 60.0
 
 
 def get_camera_list():
-    """Check for cameras that have been connected or removed."""
+    """Check for cameras that have been connected or removed.
+
+    Webcams come from the discovery cache, which only probes new video nodes.
+    """
     gp_cameras = list(gp.gp_camera_autodetect())
     gp_return_list = []
     if gp_cameras:
-        for model, port in camera_list:
+        for model, port in gp_cameras:
             gp_return_list.append(f"{model}, {port}")
-    cv_cameras = []
-    for index in range(10):
-        cap = cv2.VideoCapture(index)
-        if cap is not None and cap.isOpened():
-            name = cap.getBackendName()
-            if not name:
-                name = f"webcam{index}"
-            cv_cameras.append({"index": index, "name": name})
-            cap.release()
-    return {"webcameras": cv_cameras, "ptp_cameras": gp_return_list}
+    return {"webcameras": webcam_discovery.cameras(), "ptp_cameras": gp_return_list}
+
+
+def gphoto_port(device):
+    """gphoto2 port ("usb:001,005") in a configured camera device, or None."""
+    match = GPHOTO_PORT.search(str(device))
+    return match.group(0) if match else None
+
+
+def shutter_seconds(choice):
+    """Seconds of a gphoto2 shutter speed choice ("1/250", "0.5", "30s"), or None.
+
+    Choices without a time, such as "bulb" or "auto", are None.
+    """
+    text = str(choice).strip().lower().rstrip("s").replace('"', "")
+    try:
+        if "/" in text:
+            numerator, denominator = text.split("/")
+            return float(numerator) / float(denominator)
+        return float(text)
+    except (ValueError, ZeroDivisionError):
+        return None
 
 
 class GPCamera:
-    def __init__(self, name):
+    def __init__(self, name, port=None):
         self.name = name
         self.camera = gp.Camera()
+        if port:
+            # Open the configured camera rather than the first one detected
+            port_info_list = gp.PortInfoList()
+            port_info_list.load()
+            self.camera.set_port_info(port_info_list[port_info_list.lookup_path(port)])
         self.camera.init()
 
     def get_image(self):
         """Take an image, this file will be saved on the camera's memeory card."""
-        file_path = self.camera.capture(gp.GP_CAPTURE_IMAGE)
+        file_name, data = self.get_image_data()
+        os.makedirs(IMAGE_PATH, exist_ok=True)
+        with open(f"{IMAGE_PATH}/{file_name}", "wb") as f:
+            f.write(data)
+        return file_name
+
+    def get_image_data(self):
+        """Take an image and download it into memory, returns (name, bytes)."""
+        return self._download(self.camera.capture(gp.GP_CAPTURE_IMAGE))
+
+    def get_exposure_data(self, seconds):
+        """Take an image exposed for seconds, returns (name, bytes, seconds).
+
+        The nearest shutter speed within SHUTTER_TOLERANCE stops is used,
+        otherwise exposures of BULB_MIN seconds or more are timed in bulb
+        mode. The last item is the exposure the camera was set to. Raises
+        RuntimeError when the camera can take neither.
+        """
+        widget = self.camera.get_single_config("shutterspeed")
+        choices = [widget.get_choice(i) for i in range(widget.count_choices())]
+        timed = {choice: shutter_seconds(choice) for choice in choices}
+        timed = {choice: value for choice, value in timed.items() if value}
+        if timed:
+            nearest = min(timed, key=lambda c: abs(math.log2(timed[c] / seconds)))
+            if abs(math.log2(timed[nearest] / seconds)) <= SHUTTER_TOLERANCE:
+                self._set_config("shutterspeed", nearest)
+                return self.get_image_data() + (timed[nearest],)
+        bulb = next((choice for choice in choices if choice.lower() == "bulb"), None)
+        if bulb is not None and seconds >= BULB_MIN:
+            self._set_config("shutterspeed", bulb)
+            return self._capture_bulb(seconds) + (seconds,)
+        raise RuntimeError(f"Camera has no {seconds:g} s shutter speed")
+
+    def _capture_bulb(self, seconds):
+        self._set_config("bulb", 1)
+        try:
+            time.sleep(seconds)
+        finally:
+            self._set_config("bulb", 0)
+        deadline = time.monotonic() + BULB_FILE_TIMEOUT
+        while time.monotonic() < deadline:
+            event, data = self.camera.wait_for_event(1000)
+            if event == gp.GP_EVENT_FILE_ADDED:
+                return self._download(data)
+        raise RuntimeError("Camera did not save the bulb exposure")
+
+    def _set_config(self, name, value):
+        widget = self.camera.get_single_config(name)
+        widget.set_value(value)
+        self.camera.set_single_config(name, widget)
+
+    def _download(self, file_path):
         camera_file = self.camera.file_get(
             file_path.folder, file_path.name, gp.GP_FILE_TYPE_NORMAL
         )
-        target_path = f"{IMAGE_PATH}/{file_name}"
-        camera_file.save(target_path)
-        return filename
+        return file_path.name, bytes(memoryview(camera_file.get_data_and_size()))
 
     def get_liveview(self):
-        """Get a preview, this image won't be saved on the camera's memeory card."""
-        file_name = f"{self.name}_liveview.jpg"
+        """Get a preview as JPEG bytes, read from the CameraFile in memory.
+
+        Neither the camera's memory card nor the local disk is written.
+        """
         camera_file = self.camera.capture_preview()
-        camera_file.save(f"{IMAGE_PATH}/{file_name}")
-        return file_name
+        return bytes(memoryview(camera_file.get_data_and_size()))
+
+    def close(self):
+        """Release the camera, which also ends its live view."""
+        self.camera.exit()
 
     def get_summary(self):
         return self.camera.get_summary()
@@ -58,22 +150,97 @@ class GPCamera:
         return self.camera.get_config()
 
 
+class CameraHandles:
+    """One open GPCamera per gphoto2 port, shared by live view and capture jobs.
+
+    gphoto2 cannot claim a port twice, so every user takes the same handle,
+    which is closed once the last one releases it. A capture job holds its
+    port while it runs and live view pauses meanwhile. Handles are opened,
+    used and closed on the camera executor.
+    """
+
+    def __init__(self):
+        """Initialize with no camera open."""
+        self._cameras = {}
+        self._users = {}
+        self._held = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, port):
+        """Open port's camera, or share the one already open."""
+        with self._condition:
+            camera = self._cameras.get(port)
+        if camera is None:
+            camera = GPCamera("camera", port)
+        with self._condition:
+            self._cameras[port] = camera
+            self._users[port] = self._users.get(port, 0) + 1
+        return camera
+
+    def release(self, port):
+        """Give up a handle from acquire, the last user closes the camera."""
+        with self._condition:
+            if port not in self._users:
+                return
+            self._users[port] -= 1
+            if self._users[port] > 0:
+                return
+            del self._users[port]
+            camera = self._cameras.pop(port, None)
+        if camera is not None:
+            camera.close()
+
+    def discard(self, port):
+        """Close port's camera after a failure, the next acquire reopens it."""
+        with self._condition:
+            camera = self._cameras.pop(port, None)
+            self._users.pop(port, None)
+        if camera is not None:
+            try:
+                camera.close()
+            except Exception as e:
+                logger.warning("Failed to close camera %s: %s", port, str(e))
+
+    def hold(self, port):
+        """Reserve port for a capture job, pausing its live view."""
+        with self._condition:
+            self._held[port] = self._held.get(port, 0) + 1
+
+    def unhold(self, port):
+        """End a reservation from hold."""
+        with self._condition:
+            self._held[port] -= 1
+            if not self._held[port]:
+                del self._held[port]
+            self._condition.notify_all()
+
+    def held(self, port):
+        """True while a capture job holds port."""
+        with self._condition:
+            return port in self._held
+
+    def wait_free(self, port, timeout):
+        """Wait until no job holds port, False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: port not in self._held, timeout)
+
+
+# Global gphoto2 handles
+camera_handles = CameraHandles()
+
+
 class CVCamera:
     def __init__(self, name, index):
         self.name = name
         self.index = index
 
-    def get_image(self):
-        cap = cv2.VideoCapture(self.index)
-        if not cap.isOpened():
-            cap.release()
-            raise Exception(f"Cannot open camera at index {self.index}")
-
-        ret, frame = cap.read()
-        cap.release()
+    def get_image(self, fresh=False):
+        """Save the newest frame of the device, or the next one when fresh.
 
-        if not ret:
-            raise Exception("Failed to capture frame from camera")
+        Frames come from the device's capture thread, which keeps it open.
+        """
+        capture = capture_service.get(self.index)
+        frame = capture.next() if fresh else capture.latest()
 
         filename = self.output_file_name()
         filepath = f"{IMAGE_PATH}/{filename}"
@@ -81,7 +248,7 @@ class CVCamera:
         # Ensure directory exists
         os.makedirs(IMAGE_PATH, exist_ok=True)
 
-        success = cv2.imwrite(filepath, frame)
+        success = cv2.imwrite(filepath, frame.image)
         if not success:
             raise Exception("Failed to save image")
 
@@ -0,0 +1,266 @@
+"""Persistent capture threads filling a ring buffer of frames.
+
+Opening a V4L2 device and letting its auto exposure settle takes most of a
+second, and the first frame read after opening is often stale or dark. Each
+video device in use is therefore kept open by a CaptureThread, which reads
+frames continuously into a FrameRing of preallocated arrays. Captures take
+the latest frame, or wait for the next one, and stacking or analysis code
+can read the most recent frames without touching the device.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from ..backends import LazyModule
+from .discovery import webcam_discovery
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+
+# Frames kept per device
+RING_SLOTS = 4
+# Frames read and thrown away after opening, while exposure settles
+WARMUP_FRAMES = 5
+# Seconds between attempts to reopen a failed device
+REOPEN_DELAY = 2.0
+# Seconds to wait for a frame before giving up
+FRAME_TIMEOUT = 5.0
+# Seconds without a reader after which a device is released
+IDLE_TIMEOUT = 300.0
+
+
+class CaptureError(RuntimeError):
+    """No frame could be captured from a device."""
+
+
+class Frame:
+    """A copy of one frame with its sequence number and capture time."""
+
+    __slots__ = ("seq", "timestamp", "image")
+
+    def __init__(self, seq, timestamp, image):
+        """Initialize from a frame copied out of a ring."""
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+
+
+class FrameRing:
+    """Fixed number of preallocated frame arrays, written round robin.
+
+    The writer fills the slot after the newest one without holding the lock,
+    so readers only ever copy published slots, never the one being written.
+    """
+
+    def __init__(self, slots=RING_SLOTS):
+        """Initialize, arrays are allocated with the first frame's shape."""
+        self.slots = [None] * slots
+        self.times = [0.0] * slots
+        self.seq = 0
+        self._condition = threading.Condition()
+
+    def slot(self, shape, dtype=np.uint8):
+        """Array the next frame should be read into."""
+        index = (self.seq + 1) % len(self.slots)
+        array = self.slots[index]
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = self.slots[index] = np.empty(shape, dtype)
+        return array
+
+    def publish(self, image, timestamp=None):
+        """Publish the next frame, normally the array returned by slot."""
+        with self._condition:
+            index = (self.seq + 1) % len(self.slots)
+            if image is not self.slots[index]:
+                # Readers that do not take an output array return a new one
+                self.slots[index] = image
+            self.times[index] = time.time() if timestamp is None else timestamp
+            self.seq += 1
+            self._condition.notify_all()
+
+    def _frame(self, seq):
+        index = seq % len(self.slots)
+        return Frame(seq, self.times[index], self.slots[index].copy())
+
+    def latest(self):
+        """Copy of the newest frame, None before the first one."""
+        with self._condition:
+            return self._frame(self.seq) if self.seq else None
+
+    def next(self, after=None, timeout=FRAME_TIMEOUT):
+        """Copy of the first frame newer than seq after, None on timeout.
+
+        after defaults to the newest frame, so this waits for the next frame
+        published.
+        """
+        with self._condition:
+            after = self.seq if after is None else after
+            if not self._condition.wait_for(lambda: self.seq > after, timeout):
+                return None
+            return self._frame(self.seq)
+
+    def recent(self, count=None):
+        """Copies of up to count published frames, oldest first.
+
+        At most slots - 1 are returned, the remaining slot may be mid-write.
+        """
+        with self._condition:
+            available = min(self.seq, len(self.slots) - 1)
+            count = available if count is None else min(count, available)
+            return [
+                self._frame(seq) for seq in range(self.seq - count + 1, self.seq + 1)
+            ]
+
+
+def open_video(index):
+    """Open an OpenCV capture for a video device index."""
+    capture = cv2.VideoCapture(index)
+    if not capture.isOpened():
+        capture.release()
+        raise CaptureError(f"Cannot open camera at index {index}")
+    return capture
+
+
+class CaptureThread:
+    """Thread keeping one video device open and filling its FrameRing."""
+
+    def __init__(self, index, slots=RING_SLOTS, opener=open_video):
+        """Initialize for a device index, the thread starts with start."""
+        self.index = index
+        self.ring = FrameRing(slots)
+        self.opener = opener
+        self.error = None
+        self.last_used = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start reading frames, idempotent."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"capture-{self.index}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop reading and release the device."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        """True while the thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def idle(self):
+        """True when no frame has been asked for in IDLE_TIMEOUT."""
+        return time.monotonic() - self.last_used > IDLE_TIMEOUT
+
+    def _run(self):
+        while not self._stop.is_set() and not self.idle:
+            try:
+                capture = self.opener(self.index)
+            except Exception as e:
+                self._failed(e)
+                continue
+            try:
+                self._read_frames(capture)
+            except Exception as e:
+                self._failed(e)
+            finally:
+                capture.release()
+
+    def _failed(self, error):
+        if str(error) != str(self.error):
+            logger.warning("Camera %s capture failed: %s", self.index, str(error))
+        self.error = error
+        self._stop.wait(REOPEN_DELAY)
+
+    def _read_frames(self, capture):
+        for _ in range(WARMUP_FRAMES):
+            capture.grab()
+        shape = None
+        while not self._stop.is_set() and not self.idle:
+            image = self.ring.slot(shape) if shape else None
+            ok, image = capture.read(image)
+            if not ok or image is None:
+                raise CaptureError(f"Failed to capture frame from camera {self.index}")
+            shape = image.shape
+            self.error = None
+            self.ring.publish(image)
+
+    def latest(self, timeout=FRAME_TIMEOUT):
+        """Newest frame, waiting for the first one after the device opens."""
+        self.last_used = time.monotonic()
+        frame = self.ring.latest()
+        if frame is None:
+            frame = self.ring.next(0, timeout)
+        return self._checked(frame)
+
+    def next(self, timeout=FRAME_TIMEOUT):
+        """First frame whose read started after this call."""
+        self.last_used = time.monotonic()
+        # The frame after the newest may already be mid-exposure
+        return self._checked(self.ring.next(self.ring.seq + 1, timeout))
+
+    def _checked(self, frame):
+        if frame is None:
+            raise CaptureError(
+                str(self.error) if self.error else f"No frame from camera {self.index}"
+            )
+        return frame
+
+
+class CaptureService:
+    """CaptureThreads by device index, started on first use.
+
+    Threads release their device after IDLE_TIMEOUT without readers and are
+    started again by the next get.
+    """
+
+    def __init__(self, slots=RING_SLOTS, opener=open_video):
+        """Initialize with no devices open."""
+        self.slots = slots
+        self.opener = opener
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def get(self, index):
+        """Running capture thread of a device index."""
+        with self._lock:
+            thread = self._threads.get(index)
+            if thread is not None:
+                thread.last_used = time.monotonic()
+            if thread is None or not thread.running:
+                thread = CaptureThread(index, self.slots, self.opener).start()
+                self._threads[index] = thread
+            return thread
+
+    def stop(self, index=None):
+        """Release one device, or every device when index is None."""
+        with self._lock:
+            indexes = list(self._threads) if index is None else [index]
+            threads = [self._threads.pop(i) for i in indexes if i in self._threads]
+        for thread in threads:
+            thread.stop()
+
+
+def video_index(device):
+    """OpenCV index of a configured device path, name or index, default 0."""
+    if str(device).isdigit():
+        return int(device)
+    for camera in webcam_discovery.cameras():
+        if device in (camera["device"], camera["name"]):
+            return camera["index"]
+    return 0
+
+
+# Global capture service
+capture_service = CaptureService()
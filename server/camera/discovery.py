@@ -0,0 +1,167 @@
+"""Webcam discovery from sysfs and V4L2 capability queries.
+
+/dev/video* nodes are mapped through /sys/class/video4linux without opening
+them. Only nodes not seen before are probed, with a VIDIOC_QUERYCAP ioctl on
+a non-blocking descriptor, which neither starts nor disturbs a stream. Probes
+run in parallel and results are cached by device node and inode, so a node
+that udev recreates for a different camera is probed again.
+"""
+
+import fcntl
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+SYSFS_ROOT = "/sys/class/video4linux"
+DEV_ROOT = "/dev"
+# Seconds to wait for probes of new nodes, and parallel probes
+PROBE_TIMEOUT = 2.0
+PROBE_WORKERS = 4
+
+# struct v4l2_capability: driver, card, bus_info, version, capabilities,
+# device_caps, reserved[3]
+_CAPABILITY = struct.Struct("16s32s32sIII12x")
+VIDIOC_QUERYCAP = (2 << 30) | (_CAPABILITY.size << 16) | (ord("V") << 8)
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def list_video_nodes(sysfs_root=SYSFS_ROOT, dev_root=DEV_ROOT):
+    """Map video nodes from sysfs without opening them.
+
+    Returns a dict of device path to {"node", "index", "name", "inode"}, where
+    index is the N of videoN, which is also the OpenCV camera index.
+    """
+    try:
+        names = os.listdir(sysfs_root)
+    except OSError:
+        return {}
+
+    nodes = {}
+    for name in names:
+        if not name.startswith("video") or not name[5:].isdigit():
+            continue
+        device = os.path.join(dev_root, name)
+        try:
+            inode = os.stat(device).st_ino
+        except OSError:
+            continue
+        nodes[device] = {
+            "node": device,
+            "index": int(name[5:]),
+            "name": _read(os.path.join(sysfs_root, name, "name")) or name,
+            "inode": inode,
+        }
+    return nodes
+
+
+def query_capabilities(device):
+    """Read driver, card, bus and capture support of a node with VIDIOC_QUERYCAP."""
+    fd = os.open(device, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        data = fcntl.ioctl(fd, VIDIOC_QUERYCAP, bytes(_CAPABILITY.size))
+    finally:
+        os.close(fd)
+    driver, card, bus, _, capabilities, device_caps = _CAPABILITY.unpack(data)
+    if capabilities & V4L2_CAP_DEVICE_CAPS:
+        capabilities = device_caps
+    return {
+        "driver": driver.rstrip(b"\0").decode(errors="replace"),
+        "card": card.rstrip(b"\0").decode(errors="replace"),
+        "bus": bus.rstrip(b"\0").decode(errors="replace"),
+        "capture": bool(capabilities & V4L2_CAP_VIDEO_CAPTURE),
+    }
+
+
+class WebcamDiscovery:
+    """Cached list of capture capable video nodes."""
+
+    def __init__(
+        self,
+        sysfs_root=SYSFS_ROOT,
+        dev_root=DEV_ROOT,
+        probe=query_capabilities,
+        timeout=PROBE_TIMEOUT,
+    ):
+        """Initialize with sysfs and /dev roots and a probe(device) callable."""
+        self.sysfs_root = sysfs_root
+        self.dev_root = dev_root
+        self.probe = probe
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            PROBE_WORKERS, thread_name_prefix="webcam-probe"
+        )
+        self._nodes = None
+        self._probes = {}  # (node, inode) -> capabilities
+        self._pending = {}  # (node, inode) -> future
+
+    def refresh(self):
+        """Map video nodes and probe the new ones, returns the webcams.
+
+        Probes still running after the timeout are left out until they
+        finish; their results are picked up by a later refresh.
+        """
+        nodes = list_video_nodes(self.sysfs_root, self.dev_root)
+        keys = {(node, info["inode"]) for node, info in nodes.items()}
+        with self._lock:
+            for key in set(self._probes) - keys:
+                del self._probes[key]
+            futures = []
+            for key in keys - set(self._probes):
+                if key not in self._pending:
+                    self._pending[key] = self._executor.submit(self._probe, key)
+                futures.append(self._pending[key])
+        if futures:
+            wait(futures, timeout=self.timeout)
+        with self._lock:
+            self._nodes = nodes
+        return self.cameras()
+
+    def _probe(self, key):
+        try:
+            result = self.probe(key[0])
+        except OSError as e:
+            logger.warning("Failed to probe %s: %s", key[0], str(e))
+            result = {"capture": False, "error": str(e)}
+        with self._lock:
+            self._probes[key] = result
+            self._pending.pop(key, None)
+        return result
+
+    def cameras(self):
+        """Capture capable webcams from the cache, mapping the nodes on first use."""
+        if self._nodes is None:
+            return self.refresh()
+        with self._lock:
+            cameras = []
+            for node, info in self._nodes.items():
+                probe = self._probes.get((node, info["inode"]))
+                if not probe or not probe.get("capture"):
+                    continue
+                cameras.append(
+                    {
+                        "index": info["index"],
+                        "name": probe.get("card") or info["name"],
+                        "device": node,
+                        "driver": probe.get("driver", ""),
+                        "bus": probe.get("bus", ""),
+                    }
+                )
+        return sorted(cameras, key=lambda camera: camera["index"])
+
+
+# Global webcam discovery cache
+webcam_discovery = WebcamDiscovery()
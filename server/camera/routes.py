@@ -1,23 +1,27 @@
 """Routes to query and control Camera"""
 
-import json
-import os
-
-from flask import Blueprint, abort, jsonify
-
-from .cameras import CVCamera, get_camera_list
+from flask import Blueprint, abort, jsonify, request
+
+from ..config.store import config_store
+from ..executors import on_executor
+from ..jobs.routes import queue_capture
+from .cameras import CVCamera, get_camera_list, gphoto_port
+from .capture import video_index
+from .discovery import webcam_discovery
+from .stream import (
+    GPhotoLiveView,
+    configured_max_fps,
+    stream_hub,
+    stream_response,
+    video_source,
+)
 
 camera_bp = Blueprint("camera", __name__, url_prefix="/api/camera")
 
 
 def get_configured_camera():
-    """Get the configured camera device from config file."""
-    config_file = "device_config.json"
-    if os.path.exists(config_file):
-        with open(config_file, "r") as f:
-            config = json.load(f)
-            return config.get("cameraDevice", "")
-    return ""
+    """Get the configured camera device from the config store."""
+    return config_store.get("cameraDevice", "")
 
 
 @camera_bp.route("/")
@@ -26,17 +30,31 @@ def index():
     return jsonify({"message": "This is the camera blueprint"})
 
 
+@camera_bp.route("/capture", methods=["POST"])
+def queue_capture_job():
+    """Queue a capture job, returns its id at once with 202.
+
+    Takes "exposure" in seconds, "count" and "format"; progress is at
+    /api/jobs/<id>.
+    """
+    return queue_capture("camera", request.get_json(silent=True) or {})
+
+
 @camera_bp.route("/capture")
+@on_executor("camera")
 def capture():
-    """Capture image from configured camera"""
+    """Capture image from configured camera.
+
+    Saves the newest frame, or with fresh=1 the first one exposed after the
+    request.
+    """
     configured_device = get_configured_camera()
     if not configured_device:
         return jsonify({"error": "No camera configured"}), 400
 
     try:
-        # Use index 0 for the first available camera
-        camera = CVCamera("camera", 0)
-        filename = camera.get_image()
+        camera = CVCamera("camera", video_index(configured_device))
+        filename = camera.get_image(fresh=request.args.get("fresh") in ("1", "true"))
         return jsonify({"filename": filename, "message": "Image captured successfully"})
     except ValueError:
         return jsonify({"error": "Invalid camera device format"}), 400
@@ -44,6 +62,31 @@ def capture():
         return jsonify({"error": f"Failed to capture image: {str(e)}"}), 500
 
 
+@camera_bp.route("/stream")
+def stream():
+    """MJPEG live view of the configured camera, fps= lowers the frame rate.
+
+    gphoto2 cameras (a device naming a usb: or ptpip: port) stream their
+    live view previews, webcams their capture thread's frames.
+    """
+    configured_device = get_configured_camera()
+    if not configured_device:
+        return jsonify({"error": "No camera configured"}), 400
+
+    port = gphoto_port(configured_device)
+    if port:
+        # DSLR live view, previews are read from the camera in memory
+        live = stream_hub.get(
+            f"gphoto-{port}", lambda: GPhotoLiveView(port), configured_max_fps()
+        )
+    else:
+        index = video_index(configured_device)
+        live = stream_hub.get(
+            f"video{index}", lambda: video_source(index), configured_max_fps()
+        )
+    return stream_response(live, request.args.get("fps", type=float))
+
+
 @camera_bp.route("/status")
 def status():
     """Return Camera status"""
@@ -53,11 +96,10 @@ def status():
             {"connected": False, "device": None, "error": "No camera configured"}
         )
 
-    # Check if configured device is available
-    camera_list = get_camera_list()
+    # Check if configured device is available, from the discovery cache
     device_available = any(
-        cam["name"] == configured_device or str(cam["index"]) == configured_device
-        for cam in camera_list.get("webcameras", [])
+        configured_device in (cam["device"], cam["name"], str(cam["index"]))
+        for cam in webcam_discovery.cameras()
     )
 
     return jsonify(
@@ -70,6 +112,7 @@ def status():
 
 
 @camera_bp.route("/list")
+@on_executor("camera")
 def list_cameras():
     """Return the names and port of attached cameras."""
     return jsonify(get_camera_list())
@@ -0,0 +1,295 @@
+"""MJPEG live view shared by every viewer of a device.
+
+One producer thread per stream reads frames from its source, encodes each to
+JPEG once and publishes it. Viewers wait for a frame newer than the last one
+they sent and always take the newest, so a slow client skips frames instead
+of slowing the producer or other viewers. The producer runs while a stream
+has viewers and is capped at a frame rate to keep the Pi's CPU free.
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+from flask import Response, jsonify
+
+from ..backends import LazyModule
+from ..config.store import config_store
+from ..executors import get_executor
+from .cameras import camera_handles
+from .capture import capture_service
+
+logger = logging.getLogger(__name__)
+
+cv2 = LazyModule("cv2")
+
+BOUNDARY = "frame"
+# Frames per second unless streamMaxFps is configured
+MAX_FPS = 10.0
+JPEG_QUALITY = 80
+# Seconds a producer keeps running after its last viewer left
+LINGER = 5.0
+# Seconds a viewer waits for a frame before the stream ends
+FRAME_TIMEOUT = 10.0
+# Seconds between repeats of the last preview while a capture holds the camera
+PAUSE_POLL = 1.0
+
+
+class StreamError(RuntimeError):
+    """A stream's source stopped producing frames."""
+
+
+class FrameBroadcaster:
+    """Single producer thread fanning out encoded frames to viewers."""
+
+    def __init__(self, name, source, max_fps=MAX_FPS):
+        """Initialize for source, a callable blocking until the next JPEG."""
+        self.name = name
+        self.source = source
+        self.max_fps = max_fps
+        self.seq = 0
+        self.frame = None
+        self.error = None
+        self.viewers = 0
+        self.frames = 0
+        self._idle_since = time.monotonic()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.error = None
+            self._thread = threading.Thread(
+                target=self._produce, name=f"stream-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _produce(self):
+        try:
+            self._produce_frames()
+        finally:
+            # Sources holding a device, such as a DSLR in live view, release it
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                close()
+
+    def _produce_frames(self):
+        next_frame = time.monotonic()
+        while True:
+            with self._condition:
+                if self.viewers == 0 and time.monotonic() - self._idle_since > LINGER:
+                    self._thread = None
+                    return
+            try:
+                data = self.source()
+            except Exception as e:
+                logger.warning("Stream %s stopped: %s", self.name, str(e))
+                with self._condition:
+                    self.error = e
+                    self._thread = None
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self.seq += 1
+                self.frame = data
+                self.frames += 1
+                self._condition.notify_all()
+            # Cap the frame rate without accumulating delay
+            next_frame = max(next_frame + 1.0 / self.max_fps, time.monotonic())
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+
+    def frames_for_viewer(self, fps=None, timeout=FRAME_TIMEOUT):
+        """Yield each newest JPEG for one viewer, at most fps per second.
+
+        Raises StreamError when the source fails or no frame arrives within
+        timeout.
+        """
+        with self._condition:
+            self.viewers += 1
+            self._start()
+        interval = 1.0 / min(fps or self.max_fps, self.max_fps)
+        last = 0
+        try:
+            while True:
+                with self._condition:
+                    if not self._condition.wait_for(
+                        lambda: self.seq > last or self.error is not None, timeout
+                    ):
+                        raise StreamError(f"No frame from {self.name} stream")
+                    if self.error is not None:
+                        raise StreamError(str(self.error))
+                    last, data = self.seq, self.frame
+                sent = time.monotonic()
+                yield data
+                time.sleep(max(0.0, interval - (time.monotonic() - sent)))
+        finally:
+            with self._condition:
+                self.viewers -= 1
+                if self.viewers == 0:
+                    self._idle_since = time.monotonic()
+
+    def metrics(self):
+        """Viewers and frames produced."""
+        with self._condition:
+            return {
+                "name": self.name,
+                "viewers": self.viewers,
+                "frames": self.frames,
+                "max_fps": self.max_fps,
+                "running": self._thread is not None,
+            }
+
+
+def mjpeg(frames):
+    """multipart/x-mixed-replace body parts for an iterable of JPEG frames.
+
+    Ends quietly when the stream fails, the viewer sees the last frame.
+    """
+    try:
+        for data in frames:
+            yield (
+                f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                f"Content-Length: {len(data)}\r\n\r\n"
+            ).encode("latin-1") + data + b"\r\n"
+    except StreamError as e:
+        logger.info("Stream ended: %s", str(e))
+
+
+def stream_response(stream, fps=None):
+    """MJPEG response for one viewer of stream.
+
+    The first frame is waited for here, so a device that cannot be opened
+    answers 503 instead of an empty stream.
+    """
+    frames = stream.frames_for_viewer(fps)
+    try:
+        first = next(frames)
+    except StreamError as e:
+        frames.close()
+        return jsonify({"error": str(e)}), 503
+
+    response = Response(
+        mjpeg(itertools.chain([first], frames)),
+        mimetype=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+    )
+    response.headers["Cache-Control"] = "no-cache, no-store"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def video_source(index, quality=JPEG_QUALITY):
+    """Source encoding each new frame of a video device's capture thread."""
+    params = None
+
+    def source():
+        nonlocal params
+        if params is None:
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        frame = capture_service.get(index).next()
+        ok, data = cv2.imencode(".jpg", frame.image, params)
+        if not ok:
+            raise StreamError(f"Failed to encode frame from camera {index}")
+        return data.tobytes()
+
+    return source
+
+
+class GPhotoLiveView:
+    """Source of gphoto2 preview JPEGs, read in memory.
+
+    The camera handle is shared with capture jobs through camera_handles. It
+    is taken by the first frame and given back by close, or dropped when a
+    preview fails so the producer can reopen it later. Previews run on the
+    camera executor, in turn with captures. While a capture job holds the
+    camera the last preview is repeated every PAUSE_POLL seconds, and a
+    stream without one yet fails.
+    """
+
+    def __init__(self, port=None):
+        """Initialize for a gphoto2 port, None for the first camera."""
+        self.port = port
+        self.camera = None
+        self.frame = None
+
+    def _preview(self):
+        if camera_handles.held(self.port):
+            return None
+        if self.camera is None:
+            self.camera = camera_handles.acquire(self.port)
+        try:
+            return self.camera.get_liveview()
+        except Exception:
+            # Dropped in this job, so a capture opened next keeps its camera
+            self.camera = None
+            camera_handles.discard(self.port)
+            raise
+
+    def __call__(self):
+        """JPEG bytes of the next preview frame."""
+        while True:
+            if camera_handles.wait_free(self.port, PAUSE_POLL):
+                try:
+                    frame = get_executor("camera").run(self._preview)
+                except Exception:
+                    self.close()
+                    raise
+                if frame is not None:
+                    self.frame = frame
+                    return frame
+            elif self.frame is None:
+                raise StreamError(f"Camera {self.port} is busy with a capture")
+            else:
+                return self.frame
+
+    def _close(self):
+        camera, self.camera = self.camera, None
+        if camera is not None:
+            camera_handles.release(self.port)
+
+    def close(self):
+        """Give the camera back, its live view ends with the last user."""
+        try:
+            get_executor("camera").run(self._close)
+        except Exception as e:
+            logger.warning("Failed to release camera %s: %s", self.port, str(e))
+
+
+def configured_max_fps():
+    """Frame rate cap from streamMaxFps in the device config."""
+    return config_store.get("streamMaxFps") or MAX_FPS
+
+
+class StreamHub:
+    """FrameBroadcasters by stream name."""
+
+    def __init__(self):
+        """Initialize with no streams."""
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, source_factory, max_fps=MAX_FPS):
+        """Broadcaster for name, created with source_factory() when new.
+
+        A failed stream, or one whose rate changed, is replaced once it has
+        no viewers.
+        """
+        with self._lock:
+            stream = self._streams.get(name)
+            if stream is None or (
+                stream.viewers == 0
+                and (stream.max_fps != max_fps or stream.error is not None)
+            ):
+                stream = FrameBroadcaster(name, source_factory(), max_fps)
+                self._streams[name] = stream
+            return stream
+
+    def metrics(self):
+        """Metrics of every stream."""
+        with self._lock:
+            streams = list(self._streams.values())
+        return [stream.metrics() for stream in streams]
+
+
+# Global stream hub
+stream_hub = StreamHub()
@@ -0,0 +1,78 @@
+"""Unit tests for camera control."""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from . import cameras
+from .cameras import GPCamera, shutter_seconds
+
+
+def fake_camera(choices):
+    """gphoto2 camera mock offering shutter speed choices."""
+    camera = Mock()
+    widgets = {}
+
+    def get_single_config(name):
+        widget = widgets.setdefault(name, Mock(name=name))
+        widget.count_choices.return_value = len(choices)
+        widget.get_choice.side_effect = choices.__getitem__
+        return widget
+
+    camera.get_single_config.side_effect = get_single_config
+    camera.capture.return_value = Mock(folder="/DCIM")
+    camera.capture.return_value.name = "IMG_0001.CR2"
+    camera.file_get.return_value.get_data_and_size.return_value = b"raw"
+    camera.widgets = widgets
+    return camera
+
+
+class TestShutterSpeed(unittest.TestCase):
+    """Test exposures are taken at a shutter speed the camera offers."""
+
+    def setUp(self):
+        """Replace gphoto2 with a mock."""
+        patcher = patch.object(cameras, "gp", Mock(GP_EVENT_FILE_ADDED=2))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open(self, choices):
+        """GPCamera around a fake camera offering choices."""
+        cameras.gp.Camera.return_value = fake_camera(choices)
+        return GPCamera("capture")
+
+    def test_shutter_seconds(self):
+        """Test gphoto2 shutter speed choices are read as seconds."""
+        self.assertEqual(shutter_seconds("1/250"), 0.004)
+        self.assertEqual(shutter_seconds("2.5"), 2.5)
+        self.assertEqual(shutter_seconds("30s"), 30.0)
+        self.assertIsNone(shutter_seconds("bulb"))
+
+    def test_nearest_speed(self):
+        """Test the nearest shutter speed is set and reported."""
+        camera = self.open(["1/100", "1", "13", "15", "30", "bulb"])
+        name, data, used = camera.get_exposure_data(14.0)
+        self.assertEqual((name, data, used), ("IMG_0001.CR2", b"raw", 15.0))
+        camera.camera.widgets["shutterspeed"].set_value.assert_called_with("15")
+
+    def test_bulb(self):
+        """Test exposures longer than every speed are timed in bulb mode."""
+        camera = self.open(["1", "30", "Bulb"])
+        added = Mock(folder="/DCIM")
+        added.name = "IMG_0002.CR2"
+        camera.camera.wait_for_event.side_effect = [(0, None), (2, added)]
+        with patch.object(cameras.time, "sleep") as sleep:
+            name, _, used = camera.get_exposure_data(120.0)
+        sleep.assert_called_once_with(120.0)
+        self.assertEqual((name, used), ("IMG_0002.CR2", 120.0))
+        bulb = camera.camera.widgets["bulb"].set_value
+        self.assertEqual([c.args[0] for c in bulb.call_args_list], [1, 0])
+
+    def test_unavailable(self):
+        """Test an exposure the camera cannot take fails."""
+        camera = self.open(["1/100", "1", "30"])
+        with self.assertRaises(RuntimeError):
+            camera.get_exposure_data(120.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
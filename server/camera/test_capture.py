@@ -0,0 +1,130 @@
+"""Unit tests for persistent capture threads."""
+
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from .capture import CaptureError, CaptureService, FrameRing
+
+
+class FakeCapture:
+    """VideoCapture stand-in producing numbered 4x6 frames."""
+
+    def __init__(self):
+        """Initialize an open device."""
+        self.count = 0
+        self.outputs = []
+        self.released = threading.Event()
+
+    def grab(self):
+        """Discard a warm up frame."""
+        return True
+
+    def read(self, image=None):
+        """Fill image, or a new array, with the frame number."""
+        time.sleep(0.005)
+        self.count += 1
+        if image is None:
+            image = np.empty((4, 6, 3), np.uint8)
+        self.outputs.append(image)
+        image.fill(self.count % 256)
+        return True, image
+
+    def release(self):
+        """Close the device."""
+        self.released.set()
+
+
+class TestFrameRing(unittest.TestCase):
+    """Test publishing and reading frames."""
+
+    def test_slots_reused(self):
+        """Test slots are preallocated once and reused round robin."""
+        ring = FrameRing(3)
+        arrays = []
+        for value in range(6):
+            slot = ring.slot((2, 2))
+            slot.fill(value)
+            ring.publish(slot)
+            arrays.append(slot)
+        self.assertIs(arrays[0], arrays[3])
+        self.assertEqual(len({id(array) for array in arrays}), 3)
+        self.assertEqual(ring.latest().seq, 6)
+        self.assertEqual(int(ring.latest().image[0, 0]), 5)
+
+    def test_recent(self):
+        """Test recent frames leave out the slot being written."""
+        ring = FrameRing(3)
+        self.assertEqual(ring.recent(), [])
+        for value in range(5):
+            ring.publish(np.full((2, 2), value, np.uint8))
+        frames = ring.recent()
+        self.assertEqual([frame.seq for frame in frames], [4, 5])
+        self.assertEqual([int(frame.image[0, 0]) for frame in frames], [3, 4])
+
+    def test_copies(self):
+        """Test readers get copies that later frames do not change."""
+        ring = FrameRing(2)
+        ring.publish(np.zeros((2, 2), np.uint8))
+        frame = ring.latest()
+        ring.slot((2, 2)).fill(9)
+        ring.publish(ring.slots[0])
+        ring.slot((2, 2)).fill(7)
+        self.assertEqual(int(frame.image.max()), 0)
+
+    def test_next_timeout(self):
+        """Test next returns None when no frame arrives."""
+        self.assertIsNone(FrameRing().next(timeout=0.01))
+
+
+class TestCaptureService(unittest.TestCase):
+    """Test devices are opened once and kept reading."""
+
+    def setUp(self):
+        """Set up a service opening fake devices."""
+        self.opened = []
+
+        def opener(index):
+            capture = FakeCapture()
+            self.opened.append(capture)
+            return capture
+
+        self.service = CaptureService(slots=3, opener=opener)
+
+    def tearDown(self):
+        """Stop every capture thread."""
+        self.service.stop()
+
+    def test_latest_and_next(self):
+        """Test frames come from one open device into preallocated slots."""
+        capture = self.service.get(0)
+        first = capture.latest()
+        following = capture.next()
+        self.assertGreater(following.seq, first.seq + 1)
+        self.assertIs(self.service.get(0), capture)
+        self.assertEqual(len(self.opened), 1)
+        # The first frame's array becomes a slot, later reads reuse the slots
+        self.assertEqual(len({id(array) for array in self.opened[0].outputs}), 3)
+
+    def test_stop_releases(self):
+        """Test stopping a device releases it."""
+        self.service.get(1).latest()
+        self.service.stop(1)
+        self.assertTrue(self.opened[0].released.is_set())
+
+    def test_open_failure(self):
+        """Test a device that cannot be opened raises CaptureError."""
+
+        def opener(index):
+            raise CaptureError(f"Cannot open camera at index {index}")
+
+        service = CaptureService(opener=opener)
+        with self.assertRaisesRegex(CaptureError, "Cannot open camera at index 2"):
+            service.get(2).latest(timeout=0.2)
+        service.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
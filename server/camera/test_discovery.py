@@ -0,0 +1,100 @@
+"""Unit tests for webcam discovery."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from .discovery import WebcamDiscovery, list_video_nodes
+
+
+class TestWebcamDiscovery(unittest.TestCase):
+    """Test sysfs mapping and cached, parallel probing."""
+
+    def setUp(self):
+        """Set up fake sysfs and /dev trees and a counting probe."""
+        self.root = tempfile.mkdtemp()
+        self.sysfs = os.path.join(self.root, "sys")
+        self.dev = os.path.join(self.root, "dev")
+        os.makedirs(self.sysfs)
+        os.makedirs(self.dev)
+        self.probed = []
+
+        def probe(device):
+            self.probed.append(device)
+            # Odd nodes are metadata nodes without capture support
+            index = int(device[-1])
+            return {"card": f"Cam {index // 2}", "capture": index % 2 == 0}
+
+        self.discovery = WebcamDiscovery(self.sysfs, self.dev, probe=probe)
+
+    def tearDown(self):
+        """Remove the fake trees."""
+        shutil.rmtree(self.root)
+
+    def add(self, index, name="USB Camera"):
+        """Add videoN to sysfs and /dev."""
+        os.makedirs(os.path.join(self.sysfs, f"video{index}"), exist_ok=True)
+        with open(os.path.join(self.sysfs, f"video{index}", "name"), "w") as f:
+            f.write(name + "\n")
+        temporary = os.path.join(self.dev, ".node")
+        open(temporary, "w").close()
+        os.replace(temporary, os.path.join(self.dev, f"video{index}"))
+
+    def test_list_video_nodes(self):
+        """Test nodes are mapped from sysfs."""
+        self.add(0, "HD Webcam")
+        os.makedirs(os.path.join(self.sysfs, "v4l-subdev0"))
+        nodes = list_video_nodes(self.sysfs, self.dev)
+        self.assertEqual(list(nodes), [os.path.join(self.dev, "video0")])
+        self.assertEqual(nodes[os.path.join(self.dev, "video0")]["name"], "HD Webcam")
+
+    def test_probes_new_nodes_once(self):
+        """Test only new nodes are probed and capture nodes are listed."""
+        self.add(0)
+        self.add(1)
+        cameras = self.discovery.refresh()
+        self.assertEqual([camera["index"] for camera in cameras], [0])
+        self.assertEqual(cameras[0]["name"], "Cam 0")
+        self.assertEqual(len(self.probed), 2)
+
+        self.add(2)
+        self.assertEqual(len(self.discovery.refresh()), 2)
+        self.assertEqual(self.probed[2:], [os.path.join(self.dev, "video2")])
+        self.assertEqual(len(self.discovery.cameras()), 2)
+        self.assertEqual(len(self.probed), 3)
+
+    def test_new_inode_probed_again(self):
+        """Test a node recreated by udev is probed again."""
+        self.add(0)
+        self.discovery.refresh()
+        self.add(0)
+        self.discovery.refresh()
+        self.assertEqual(len(self.probed), 2)
+
+    def test_removed_node(self):
+        """Test removed nodes drop out of the list."""
+        self.add(0)
+        self.discovery.refresh()
+        shutil.rmtree(os.path.join(self.sysfs, "video0"))
+        self.assertEqual(self.discovery.refresh(), [])
+
+    def test_probe_deadline(self):
+        """Test a slow probe is left out until it finishes."""
+        release = threading.Event()
+
+        def slow(device):
+            release.wait(5)
+            return {"card": "Slow", "capture": True}
+
+        discovery = WebcamDiscovery(self.sysfs, self.dev, probe=slow, timeout=0.05)
+        self.add(0)
+        self.assertEqual(discovery.refresh(), [])
+        release.set()
+        discovery._executor.shutdown(wait=True)
+        self.assertEqual(discovery.cameras()[0]["name"], "Slow")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+"""Unit tests for MJPEG live view fan-out."""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from ..jobs import runner
+from . import cameras
+from . import stream as stream_module
+from .cameras import CameraHandles, gphoto_port
+from .stream import (
+    FrameBroadcaster,
+    GPhotoLiveView,
+    StreamError,
+    StreamHub,
+    mjpeg,
+    stream_response,
+)
+
+
+class CountingSource:
+    """Source returning numbered frames, as fast as it is called."""
+
+    def __init__(self, fail=False):
+        """Initialize, every call raises when fail is set."""
+        self.calls = 0
+        self.fail = fail
+
+    def __call__(self):
+        """Produce the next frame."""
+        if self.fail:
+            raise StreamError("Cannot open camera at index 0")
+        self.calls += 1
+        time.sleep(0.001)
+        return f"jpeg{self.calls}".encode()
+
+
+class TestFrameBroadcaster(unittest.TestCase):
+    """Test one producer serves every viewer at a capped rate."""
+
+    def test_fan_out(self):
+        """Test viewers share frames from a single producer."""
+        source = CountingSource()
+        stream = FrameBroadcaster("test", source, max_fps=50)
+        first = stream.frames_for_viewer()
+        second = stream.frames_for_viewer()
+        frames = [next(first), next(second), next(first), next(second)]
+        self.assertTrue(all(frame.startswith(b"jpeg") for frame in frames))
+        self.assertEqual(stream.metrics()["viewers"], 2)
+        first.close()
+        second.close()
+        self.assertEqual(stream.metrics()["viewers"], 0)
+
+    def test_rate_cap(self):
+        """Test the producer never exceeds max_fps."""
+        source = CountingSource()
+        stream = FrameBroadcaster("test", source, max_fps=20)
+        viewer = stream.frames_for_viewer()
+        began = time.monotonic()
+        for _ in range(5):
+            next(viewer)
+        elapsed = time.monotonic() - began
+        viewer.close()
+        self.assertGreaterEqual(elapsed, 4 / 20 - 0.01)
+        self.assertLessEqual(source.calls / elapsed, 20 * 1.5)
+
+    def test_slow_viewer_skips(self):
+        """Test a slow viewer gets the newest frame, not a backlog."""
+        stream = FrameBroadcaster("test", CountingSource(), max_fps=100)
+        fast = stream.frames_for_viewer()
+        slow = stream.frames_for_viewer()
+        next(slow)
+        seen = [next(fast) for _ in range(10)]
+        skipped = next(slow)
+        self.assertEqual(skipped, stream.frame)
+        self.assertGreater(int(skipped[4:]), 2)
+        self.assertEqual(len(set(seen)), 10)
+        fast.close()
+        slow.close()
+
+    def test_source_failure(self):
+        """Test viewers are told when the source fails."""
+        stream = FrameBroadcaster("test", CountingSource(fail=True))
+        with self.assertRaisesRegex(StreamError, "Cannot open camera"):
+            next(stream.frames_for_viewer(timeout=1.0))
+
+    def test_hub_replaces_failed(self):
+        """Test a failed stream is recreated for the next viewer."""
+        hub = StreamHub()
+        failed = hub.get("video0", lambda: CountingSource(fail=True))
+        with self.assertRaises(StreamError):
+            next(failed.frames_for_viewer(timeout=1.0))
+        stream = hub.get("video0", CountingSource)
+        self.assertIsNot(stream, failed)
+        self.assertIs(hub.get("video0", CountingSource), stream)
+
+
+class FakeGPCamera:
+    """GPCamera stand-in returning preview bytes."""
+
+    opened = []
+
+    def __init__(self, name, port=None):
+        """Open the camera on a port."""
+        self.port = port
+        self.previews = 0
+        self.closed = False
+        FakeGPCamera.opened.append(self)
+
+    def get_liveview(self):
+        """Preview JPEG bytes, the third one fails."""
+        self.previews += 1
+        if self.previews == 3:
+            raise OSError("Camera busy")
+        return b"\xff\xd8preview\xff\xd9"
+
+    def close(self):
+        """Release the camera."""
+        self.closed = True
+
+
+class TestGPhotoLiveView(unittest.TestCase):
+    """Test DSLR previews are streamed from memory."""
+
+    def setUp(self):
+        """Replace GPCamera with the fake and share fresh handles."""
+        FakeGPCamera.opened = []
+        self.handles = CameraHandles()
+        for patcher in (
+            patch.object(cameras, "GPCamera", FakeGPCamera),
+            patch.object(stream_module, "camera_handles", self.handles),
+            patch.object(runner, "camera_handles", self.handles),
+            patch.object(stream_module, "PAUSE_POLL", 0.01),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_gphoto_port(self):
+        """Test the port is found in configured device strings."""
+        self.assertEqual(gphoto_port("Canon EOS 600D, usb:001,005"), "usb:001,005")
+        self.assertEqual(gphoto_port("usb:"), "usb:")
+        self.assertIsNone(gphoto_port("/dev/video0"))
+
+    def test_previews(self):
+        """Test the camera is opened once and released after a failure."""
+        source = GPhotoLiveView("usb:001,005")
+        self.assertEqual(source(), b"\xff\xd8preview\xff\xd9")
+        source()
+        with self.assertRaises(OSError):
+            source()
+        camera = FakeGPCamera.opened[0]
+        self.assertEqual(camera.port, "usb:001,005")
+        self.assertTrue(camera.closed)
+        source()
+        self.assertEqual(len(FakeGPCamera.opened), 2)
+        source.close()
+        self.assertTrue(FakeGPCamera.opened[1].closed)
+
+    def test_released_with_stream(self):
+        """Test the camera is released when a failed preview stops the stream."""
+        live = FrameBroadcaster("gphoto", GPhotoLiveView("usb:"), max_fps=50)
+        viewer = live.frames_for_viewer()
+        self.assertIn(b"preview", next(viewer))
+        viewer.close()
+        with self.assertRaises(StreamError):
+            list(live.frames_for_viewer(timeout=1.0))
+        self.assertTrue(FakeGPCamera.opened[0].closed)
+
+    def test_shared_with_capture(self):
+        """Test a capture job takes the live view's camera and pauses it."""
+        source = GPhotoLiveView("usb:")
+        frame = source()
+        backend = runner.GPhotoBackend("usb:")
+        backend.open()
+        self.assertIs(backend.camera, FakeGPCamera.opened[0])
+        # The last preview is repeated without touching the camera
+        self.assertEqual(source(), frame)
+        self.assertEqual(backend.camera.previews, 1)
+        backend.close()
+
+        self.assertFalse(FakeGPCamera.opened[0].closed)
+        source()
+        self.assertEqual(FakeGPCamera.opened[0].previews, 2)
+        source.close()
+        self.assertTrue(FakeGPCamera.opened[0].closed)
+        self.assertEqual(len(FakeGPCamera.opened), 1)
+
+    def test_paused_before_first_frame(self):
+        """Test a live view started during a capture fails instead of waiting."""
+        backend = runner.GPhotoBackend("usb:")
+        backend.open()
+        with self.assertRaises(StreamError):
+            GPhotoLiveView("usb:")()
+        backend.close()
+        self.assertTrue(FakeGPCamera.opened[0].closed)
+
+    def test_close_after_reopen(self):
+        """Test closing an old live view leaves a newer one's camera open."""
+        old = GPhotoLiveView("usb:")
+        old()
+        new = GPhotoLiveView("usb:")
+        new()
+        old.close()
+        self.assertFalse(FakeGPCamera.opened[0].closed)
+        new.close()
+        self.assertTrue(FakeGPCamera.opened[0].closed)
+
+
+class TestMjpeg(unittest.TestCase):
+    """Test the multipart response."""
+
+    def test_parts(self):
+        """Test each frame is a part with its length."""
+        body = b"".join(mjpeg([b"abc", b"de"]))
+        self.assertEqual(
+            body,
+            b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 3\r\n\r\nabc\r\n"
+            b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 2\r\n\r\nde\r\n",
+        )
+
+    def test_response(self):
+        """Test the stream response, and 503 when no frame can be read."""
+        app = Flask(__name__)
+        with app.test_request_context():
+            stream = FrameBroadcaster("test", CountingSource(), max_fps=50)
+            response = stream_response(stream)
+            self.assertIn("multipart/x-mixed-replace", response.mimetype)
+            chunks = response.response
+            self.assertIn(b"jpeg", next(chunks))
+            chunks.close()
+
+            failed = FrameBroadcaster("test", CountingSource(fail=True))
+            response, status = stream_response(failed)
+            self.assertEqual(status, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
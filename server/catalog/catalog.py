@@ -0,0 +1,216 @@
+"""Indexed in-memory catalog of deep sky objects.
+
+Objects are kept in the same shape as ``assets/messier.json``:
+    {"id": "M31", "ngc": "NGC 224", "name": "Andromeda Galaxy",
+     "type": "Galaxy", "constellation": "Andromeda", "magnitude": 3.4,
+     "ra": 0.7123 (hours), "dec": 41.2689 (degrees)}
+
+The index is built once when objects are added so that searches only touch
+the objects that match instead of scanning the whole catalog.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Longest token prefix stored in the prefix index, longer terms fall back to
+# the n-gram index and are verified against the object text. Terms shorter
+# than an n-gram are looked for in every object text.
+MAX_PREFIX = 12
+NGRAM = 3
+
+_DESIGNATION = re.compile(r"\b([a-z]+)\s+(?=\d)")
+_TOKEN = re.compile(r"[a-z0-9+\-.]+")
+
+
+def normalize(text):
+    """Lower case text and join catalog prefixes to their numbers (NGC 224 -> ngc224)."""
+    return _DESIGNATION.sub(r"\1", (text or "").lower().strip())
+
+
+def designation_key(text):
+    """Key used to look up designations regardless of spacing (M 31 -> m31)."""
+    return normalize(text).replace(" ", "")
+
+
+def _ngrams(term):
+    return {term[i : i + NGRAM] for i in range(len(term) - NGRAM + 1)}
+
+
+class Catalog:
+    """Searchable collection of catalog objects."""
+
+    def __init__(self, objects=None):
+        """Initialize an empty catalog, optionally adding objects."""
+        self.objects = []
+        self._text = []
+        self._designations = {}
+        self._prefixes = {}
+        self._ngram_index = {}
+        self._types = {}
+        self._constellations = {}
+        self._magnitudes = []
+        self._by_magnitude = []
+        self._rank = []
+        self._digest = hashlib.sha1()
+        self.version = self._digest.hexdigest()
+        if objects:
+            self.add(objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    @classmethod
+    def from_json(cls, *paths):
+        """Build a catalog from one or more JSON files."""
+        catalog = cls()
+        for path in paths:
+            catalog.load_json(path)
+        return catalog
+
+    def load_json(self, path):
+        """Add all objects from a JSON list file."""
+        with open(path, "r") as f:
+            objects = json.load(f)
+        self.add(objects)
+        logger.info("Loaded %d catalog objects from %s", len(objects), path)
+
+    def add(self, objects):
+        """Add objects and index them."""
+        for obj in objects:
+            index = len(self.objects)
+            self.objects.append(obj)
+            self._index(index, obj)
+            self._digest.update(json.dumps(obj, sort_keys=True).encode("utf-8"))
+
+        magnitudes = [self._magnitude(obj) for obj in self.objects]
+        self._by_magnitude = sorted(
+            range(len(self.objects)), key=magnitudes.__getitem__
+        )
+        self._magnitudes = [magnitudes[i] for i in self._by_magnitude]
+        self._rank = [0] * len(self.objects)
+        for rank, index in enumerate(self._by_magnitude):
+            self._rank[index] = rank
+        self.version = self._digest.hexdigest()
+
+    @staticmethod
+    def _magnitude(obj):
+        magnitude = obj.get("magnitude")
+        return float(magnitude) if magnitude is not None else float("inf")
+
+    def _index(self, index, obj):
+        designations = [designation_key(obj.get(key, "")) for key in ("id", "ngc")]
+        for designation in designations:
+            if designation:
+                self._designations.setdefault(designation, index)
+
+        text = " ".join(
+            normalize(obj.get(key, ""))
+            for key in ("id", "ngc", "name", "type", "constellation")
+        )
+        self._text.append(text)
+
+        for token in set(_TOKEN.findall(text)):
+            for length in range(1, min(len(token), MAX_PREFIX) + 1):
+                self._prefixes.setdefault(token[:length], set()).add(index)
+            for gram in _ngrams(token):
+                self._ngram_index.setdefault(gram, set()).add(index)
+
+        obj_type = (obj.get("type") or "").lower()
+        if obj_type:
+            self._types.setdefault(obj_type, set()).add(index)
+        constellation = (obj.get("constellation") or "").lower()
+        if constellation:
+            self._constellations.setdefault(constellation, set()).add(index)
+
+    def _match_term(self, term):
+        """Return indices of objects whose text contains the term."""
+        if len(term) < NGRAM:
+            # Too short for n-grams, and "31" must still find M31
+            return {index for index, text in enumerate(self._text) if term in text}
+        if len(term) <= MAX_PREFIX and term in self._prefixes:
+            return self._prefixes[term]
+        grams = _ngrams(term)
+        if not grams:
+            return set()
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self._ngram_index.get(g, ()))):
+            matches = self._ngram_index.get(gram)
+            if not matches:
+                return set()
+            candidates = set(matches) if candidates is None else candidates & matches
+        return {index for index in candidates if term in self._text[index]}
+
+    def lookup(self, designation):
+        """Get an object by designation (M31, NGC 224), or None."""
+        index = self._designations.get(designation_key(designation))
+        return self.objects[index] if index is not None else None
+
+    def facets(self):
+        """Get object counts per type and per constellation."""
+        return {
+            name: {
+                self.objects[min(indices)][key]: len(indices)
+                for indices in facet.values()
+            }
+            for name, key, facet in (
+                ("types", "type", self._types),
+                ("constellations", "constellation", self._constellations),
+            )
+        }
+
+    def search(
+        self,
+        query="",
+        obj_type=None,
+        constellation=None,
+        max_magnitude=None,
+        limit=50,
+        offset=0,
+    ):
+        """Search the catalog.
+
+        Returns a tuple of (total matches, objects for the requested page).
+        Objects matching a designation exactly come first, then by magnitude.
+        """
+        candidates = None
+
+        for term in normalize(query).split():
+            matches = self._match_term(term)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return 0, []
+
+        for facets, value in (
+            (self._types, obj_type),
+            (self._constellations, constellation),
+        ):
+            if value:
+                matches = facets.get(value.lower(), set())
+                candidates = matches if candidates is None else candidates & matches
+
+        if max_magnitude is not None:
+            cutoff = bisect.bisect_right(self._magnitudes, max_magnitude)
+            if candidates is None:
+                ordered = self._by_magnitude[:cutoff]
+            else:
+                ordered = sorted(
+                    (i for i in candidates if self._rank[i] < cutoff),
+                    key=self._rank.__getitem__,
+                )
+        elif candidates is None:
+            ordered = self._by_magnitude
+        else:
+            ordered = sorted(candidates, key=self._rank.__getitem__)
+
+        exact = self._designations.get(designation_key(query))
+        if exact is not None and candidates and exact in candidates:
+            if max_magnitude is None or self._rank[exact] < cutoff:
+                ordered = [exact] + [i for i in ordered if i != exact]
+
+        page = ordered[offset : offset + limit]
+        return len(ordered), [self.objects[i] for i in page]
@@ -0,0 +1,272 @@
+"""Finder charts drawn from cone searches of the catalog service.
+
+Only objects inside the chart's cone are projected and drawn, so a cold
+render costs one cone search per catalog and a few NumPy operations. PNG
+output is rasterized and encoded with NumPy and zlib, no imaging library is
+needed. SVG output also labels the deep sky objects.
+"""
+
+import math
+import struct
+import zlib
+from html import escape
+
+import numpy as np
+
+BACKGROUND = (0, 0, 0)
+STAR_COLOR = (255, 255, 255)
+DSO_COLOR = (255, 96, 96)
+MOUNT_COLOR = (96, 255, 96)
+# Brightest stars kept per chart
+MAX_STARS = 5000
+# Pixel radius of deep sky objects without an outline, and of the mount marker
+DSO_RADIUS = 6
+MOUNT_RADIUS = 9
+MAX_STAR_RADIUS = 6
+
+
+def project(ra, dec, ra0, dec0):
+    """Gnomonic projection of RA (hours), Dec (degrees) around ra0, dec0.
+
+    Returns (xi, eta, front): tangent plane coordinates with xi pointing east
+    and eta north, and a mask of points on the near side of the sky.
+    """
+    ra = np.radians(np.asarray(ra, dtype=np.float64) * 15.0)
+    dec = np.radians(np.asarray(dec, dtype=np.float64))
+    ra0, dec0 = math.radians(ra0 * 15.0), math.radians(dec0)
+    delta = ra - ra0
+    cos_c = math.sin(dec0) * np.sin(dec) + math.cos(dec0) * np.cos(dec) * np.cos(delta)
+    front = cos_c > 1e-6
+    cos_c = np.where(front, cos_c, 1.0)
+    xi = np.cos(dec) * np.sin(delta) / cos_c
+    eta = (
+        math.cos(dec0) * np.sin(dec) - math.sin(dec0) * np.cos(dec) * np.cos(delta)
+    ) / cos_c
+    return xi, eta, front
+
+
+class FinderChart:
+    """Stars, deep sky objects and the mount position in pixel coordinates.
+
+    North is up and east is left, as the sky is seen. fov is the width and
+    height of the chart in degrees.
+    """
+
+    def __init__(self, ra, dec, fov, size, max_magnitude):
+        """Initialize an empty chart centred on ra (hours), dec (degrees)."""
+        self.ra = ra
+        self.dec = dec
+        self.fov = fov
+        self.size = size
+        self.max_magnitude = max_magnitude
+        self.scale = size / (2.0 * math.tan(math.radians(fov) / 2.0))
+        self.stars = np.zeros((0, 3))  # x, y, magnitude
+        self.objects = []
+        self.mount = None
+
+    def pixels(self, ra, dec):
+        """Pixel x, y and an on-chart mask for RA (hours), Dec (degrees)."""
+        xi, eta, front = project(ra, dec, self.ra, self.dec)
+        x = self.size / 2.0 - xi * self.scale
+        y = self.size / 2.0 - eta * self.scale
+        inside = front & (x > -50) & (x < self.size + 50)
+        inside &= (y > -50) & (y < self.size + 50)
+        return x, y, inside
+
+    def add_catalogs(self, service):
+        """Add objects of every sky catalog within the chart's cone."""
+        radius = self.fov * math.sqrt(0.5) * 1.05
+        stars, seen = [], set()
+        for sky in service.sky:
+            indices, _ = sky.cone(self.ra, self.dec, radius)
+            if not len(indices):
+                continue
+            magnitude = sky.magnitude[indices].astype(np.float64)
+            is_star = sky.is_star(indices)
+            x, y, inside = self.pixels(sky.ra[indices], sky.dec[indices])
+
+            keep = inside & is_star & (magnitude <= self.max_magnitude)
+            stars.append(np.column_stack([x[keep], y[keep], magnitude[keep]]))
+
+            faint = magnitude > self.max_magnitude
+            for position in np.flatnonzero(inside & ~is_star & ~faint):
+                obj = sky.get(indices[position])
+                if obj["id"] in seen:
+                    continue
+                seen.add(obj["id"])
+                self._add_object(obj, x[position], y[position])
+
+        if stars:
+            stars = np.concatenate(stars)
+            self.stars = stars[np.argsort(stars[:, 2], kind="stable")][:MAX_STARS]
+
+    def _add_object(self, obj, x, y):
+        pixels_per_arcminute = math.radians(1.0 / 60.0) * self.scale
+        major = obj.get("major")
+        if major:
+            rx = max(major / 2.0 * pixels_per_arcminute, 3.0)
+            ry = max((obj.get("minor") or major) / 2.0 * pixels_per_arcminute, 3.0)
+        else:
+            rx = ry = DSO_RADIUS
+        self.objects.append(
+            {
+                "id": obj["id"],
+                "x": float(x),
+                "y": float(y),
+                "rx": rx,
+                "ry": ry,
+                # Position angle is north through east, east is left
+                "angle": math.degrees(
+                    math.atan2(
+                        -math.cos(math.radians(obj.get("angle") or 0.0)),
+                        -math.sin(math.radians(obj.get("angle") or 0.0)),
+                    )
+                ),
+            }
+        )
+
+    def set_mount(self, ra, dec):
+        """Mark the mount position, RA (hours), Dec (degrees) in the chart epoch."""
+        x, y, inside = self.pixels(ra, dec)
+        self.mount = (float(x), float(y)) if inside else None
+
+    def star_radius(self, magnitude):
+        """Pixel radius of stars by magnitude."""
+        return np.clip(
+            1.0 + (self.max_magnitude - magnitude) * 0.6, 1.0, MAX_STAR_RADIUS
+        )
+
+    def to_svg(self):
+        """Render the chart as an SVG document."""
+        size = self.size
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" '
+            f'height="{size}" viewBox="0 0 {size} {size}">',
+            f'<rect width="{size}" height="{size}" fill="{_hex(BACKGROUND)}"/>',
+            f'<g fill="{_hex(STAR_COLOR)}">',
+        ]
+        radii = self.star_radius(self.stars[:, 2])
+        parts.extend(
+            f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r:.1f}"/>'
+            for (x, y, _), r in zip(self.stars, radii)
+        )
+        parts.append(
+            f'</g><g fill="none" stroke="{_hex(DSO_COLOR)}" font-family="sans-serif" '
+            'font-size="11">'
+        )
+        for obj in self.objects:
+            parts.append(
+                f'<ellipse cx="{obj["x"]:.1f}" cy="{obj["y"]:.1f}" rx="{obj["rx"]:.1f}" '
+                f'ry="{obj["ry"]:.1f}" transform="rotate({obj["angle"]:.1f} '
+                f'{obj["x"]:.1f} {obj["y"]:.1f})"/>'
+                f'<text x="{obj["x"] + obj["rx"] + 3:.1f}" y="{obj["y"] - 3:.1f}" '
+                f'stroke="none" fill="{_hex(DSO_COLOR)}">{escape(obj["id"])}</text>'
+            )
+        parts.append("</g>")
+        if self.mount:
+            x, y = self.mount
+            r = MOUNT_RADIUS
+            parts.append(
+                f'<g stroke="{_hex(MOUNT_COLOR)}" fill="none">'
+                f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r}"/>'
+                f'<path d="M{x - 2 * r:.1f} {y:.1f}H{x - r / 2:.1f}'
+                f"M{x + r / 2:.1f} {y:.1f}H{x + 2 * r:.1f}"
+                f"M{x:.1f} {y - 2 * r:.1f}V{y - r / 2:.1f}"
+                f'M{x:.1f} {y + r / 2:.1f}V{y + 2 * r:.1f}"/></g>'
+            )
+        parts.append("</svg>")
+        return "".join(parts).encode("utf-8")
+
+    def to_png(self):
+        """Render the chart as a PNG image."""
+        image = np.empty((self.size, self.size, 3), dtype=np.uint8)
+        image[:] = BACKGROUND
+        self._draw_stars(image)
+        for obj in self.objects:
+            _draw_ellipse(image, obj, DSO_COLOR)
+        if self.mount:
+            _draw_mount(image, *self.mount)
+        return encode_png(image)
+
+    def _draw_stars(self, image):
+        if not len(self.stars):
+            return
+        level = np.zeros(image.shape[:2], dtype=np.float32)
+        x = np.rint(self.stars[:, 0]).astype(np.int64)
+        y = np.rint(self.stars[:, 1]).astype(np.int64)
+        radii = np.rint(self.star_radius(self.stars[:, 2])).astype(np.int64)
+        brightness = np.clip(
+            0.45 + (self.max_magnitude - self.stars[:, 2]) * 0.15, 0.45, 1.0
+        )
+        # Stamp every star of one radius at once
+        for radius in np.unique(radii):
+            dy, dx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+            disk = dx * dx + dy * dy <= radius * radius + radius
+            dx, dy = dx[disk], dy[disk]
+            group = radii == radius
+            px = (x[group, None] + dx[None, :]).ravel()
+            py = (y[group, None] + dy[None, :]).ravel()
+            values = np.repeat(brightness[group], len(dx))
+            inside = (px >= 0) & (px < self.size) & (py >= 0) & (py < self.size)
+            np.maximum.at(level, (py[inside], px[inside]), values[inside])
+        stars = np.asarray(STAR_COLOR, dtype=np.float32) * level[..., None]
+        np.maximum(image, stars.astype(np.uint8), out=image)
+
+
+def _hex(color):
+    return "#{:02x}{:02x}{:02x}".format(*color)
+
+
+def _plot(image, x, y, color):
+    x = np.rint(x).astype(np.int64)
+    y = np.rint(y).astype(np.int64)
+    height, width = image.shape[:2]
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    image[y[inside], x[inside]] = color
+
+
+def _draw_ellipse(image, obj, color):
+    steps = max(24, int(2.0 * math.pi * max(obj["rx"], obj["ry"])))
+    t = np.linspace(0.0, 2.0 * math.pi, steps, endpoint=False)
+    angle = math.radians(obj["angle"])
+    u = obj["rx"] * np.cos(t)
+    v = obj["ry"] * np.sin(t)
+    x = obj["x"] + u * math.cos(angle) - v * math.sin(angle)
+    y = obj["y"] + u * math.sin(angle) + v * math.cos(angle)
+    _plot(image, x, y, color)
+
+
+def _draw_mount(image, x, y):
+    r = MOUNT_RADIUS
+    _draw_ellipse(image, {"x": x, "y": y, "rx": r, "ry": r, "angle": 0.0}, MOUNT_COLOR)
+    arm = np.arange(r // 2, 2 * r + 1)
+    _plot(
+        image, np.concatenate([x - arm, x + arm]), np.full(2 * len(arm), y), MOUNT_COLOR
+    )
+    _plot(
+        image, np.full(2 * len(arm), x), np.concatenate([y - arm, y + arm]), MOUNT_COLOR
+    )
+
+
+def encode_png(image):
+    """Encode an (height, width, 3) uint8 array as PNG bytes."""
+    height, width = image.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(tag, data):
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)),
+            chunk(b"IEND", b""),
+        ]
+    )
@@ -0,0 +1,291 @@
+"""Compact memory-mapped columnar catalog files.
+
+File layout:
+    8 bytes   magic, b"OATCAT\\x00\\x01"
+    4 bytes   header length, little endian uint32
+    header    JSON with the object count, grid cell size, category vocabularies
+              and the offset, dtype and length of every array
+    arrays    raw little endian arrays, each aligned to 8 bytes
+
+Objects are stored sorted by sky grid cell so cone searches read contiguous
+slices. Files are opened read only with mmap: opening costs nothing up front
+and every worker process shares the same page cache.
+"""
+
+import bisect
+import itertools
+import json
+import math
+import mmap
+import struct
+
+import numpy as np
+
+from .catalog import designation_key
+from .spatial import SkyGrid, angular_distance
+
+MAGIC = b"OATCAT\x00\x01"
+STRING_COLUMNS = ("id", "ngc", "name")
+CATEGORY_COLUMNS = ("type", "constellation")
+# Optional outline of extended objects: axes in arcminutes, position angle in degrees
+SHAPE_COLUMNS = ("major", "minor", "angle")
+STAR_TYPES = ("Star", "Double star")
+ALIGNMENT = 8
+
+
+class StringColumn:
+    """Read only sequence of strings stored as a UTF-8 blob and offsets."""
+
+    def __init__(self, blob, offsets):
+        """Initialize from a uint8 blob and uint32 offsets (length + 1)."""
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+
+def _pack_strings(values):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _float(value):
+    return float(value) if value not in (None, "") else math.nan
+
+
+def pack(objects, cell_size=1.0):
+    """Pack catalog objects (messier.json shape) into the columnar format."""
+    objects = list(objects)
+    ra = np.array([float(obj["ra"]) for obj in objects], dtype=np.float64)
+    dec = np.array([float(obj["dec"]) for obj in objects], dtype=np.float64)
+
+    grid = SkyGrid(cell_size)
+    cells = grid.cell_of(ra * 15.0, dec)
+    order = np.argsort(cells, kind="stable")
+    objects = [objects[i] for i in order]
+
+    arrays = {
+        "ra": ra[order].astype("<f4"),
+        "dec": dec[order].astype("<f4"),
+        "magnitude": np.array(
+            [_float(obj.get("magnitude")) for obj in objects], dtype="<f4"
+        ),
+        "cell_start": np.searchsorted(
+            cells[order], np.arange(grid.cell_count + 1)
+        ).astype("<u4"),
+    }
+
+    for column in SHAPE_COLUMNS:
+        values = [_float(obj.get(column)) for obj in objects]
+        if not all(math.isnan(value) for value in values):
+            arrays[column] = np.array(values, dtype="<f4")
+    for column in STRING_COLUMNS:
+        values = [str(obj.get(column) or "") for obj in objects]
+        arrays[f"{column}.blob"], arrays[f"{column}.offsets"] = _pack_strings(values)
+
+    vocabularies = {}
+    for column in CATEGORY_COLUMNS:
+        values = [str(obj.get(column) or "") for obj in objects]
+        vocabulary = sorted(set(values))
+        codes = {value: code for code, value in enumerate(vocabulary)}
+        arrays[column] = np.array([codes[value] for value in values], dtype="<u2")
+        vocabularies[column] = vocabulary
+
+    keys = sorted(
+        (designation_key(designation), index)
+        for index, obj in enumerate(objects)
+        for designation in [obj.get("id") or ""] + str(obj.get("ngc") or "").split(",")
+        if designation_key(designation)
+    )
+    arrays["keys.blob"], arrays["keys.offsets"] = _pack_strings(
+        [key for key, _ in keys]
+    )
+    arrays["key_index"] = np.array([index for _, index in keys], dtype="<u4")
+
+    header = {
+        "count": len(objects),
+        "cell_size": grid.cell_size,
+        "vocabularies": vocabularies,
+        "arrays": {},
+    }
+    # Array offsets are relative to the data section that follows the header
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "length": len(array),
+        }
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+    data = bytearray(data_start + offset)
+    data[: len(MAGIC)] = MAGIC
+    data[len(MAGIC) : len(MAGIC) + 4] = struct.pack("<I", len(header_bytes))
+    data[len(MAGIC) + 4 : len(MAGIC) + 4 + len(header_bytes)] = header_bytes
+    for name, array in arrays.items():
+        start = data_start + header["arrays"][name]["offset"]
+        data[start : start + array.nbytes] = array.tobytes()
+    return bytes(data)
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_catalog(objects, path, cell_size=1.0):
+    """Write catalog objects to a columnar catalog file."""
+    data = pack(objects, cell_size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class ColumnarCatalog:
+    """Read only catalog backed by a columnar buffer or memory-mapped file."""
+
+    def __init__(self, buffer, name=""):
+        """Initialize from a buffer holding a packed catalog."""
+        if bytes(buffer[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a columnar catalog")
+        (header_length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buffer[start : start + header_length]))
+        data_start = _align(start + header_length)
+
+        self.name = name
+        self._buffer = buffer
+        self._arrays = {
+            key: np.frombuffer(
+                buffer,
+                dtype=spec["dtype"],
+                count=spec["length"],
+                offset=data_start + spec["offset"],
+            )
+            for key, spec in header["arrays"].items()
+        }
+        self.count = header["count"]
+        self.vocabularies = header["vocabularies"]
+        self.grid = SkyGrid(header["cell_size"])
+        self.ra = self._arrays["ra"]
+        self.dec = self._arrays["dec"]
+        self.magnitude = self._arrays["magnitude"]
+        self._cell_start = self._arrays["cell_start"]
+        # None when the catalog has no outlines
+        self.shape = {column: self._arrays.get(column) for column in SHAPE_COLUMNS}
+        self._star_codes = np.array(
+            [
+                code
+                for code, value in enumerate(self.vocabularies["type"])
+                if value in STAR_TYPES
+            ],
+            dtype=np.int64,
+        )
+        self._strings = {
+            column: StringColumn(
+                self._arrays[f"{column}.blob"], self._arrays[f"{column}.offsets"]
+            )
+            for column in STRING_COLUMNS + ("keys",)
+        }
+        self._keys = self._strings["keys"]
+
+    @classmethod
+    def open(cls, path, name=None):
+        """Memory map a catalog file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, name=name or path)
+
+    @classmethod
+    def from_objects(cls, objects, cell_size=1.0, name=""):
+        """Build an in-memory columnar catalog from catalog objects."""
+        return cls(pack(objects, cell_size), name=name)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, index):
+        """Get the object at index in messier.json shape."""
+        index = int(index)
+        magnitude = float(self.magnitude[index])
+        obj = {column: self._strings[column][index] for column in STRING_COLUMNS}
+        for column in CATEGORY_COLUMNS:
+            obj[column] = self.vocabularies[column][self._arrays[column][index]]
+        obj["magnitude"] = None if math.isnan(magnitude) else round(magnitude, 2)
+        obj["ra"] = round(float(self.ra[index]), 6)
+        obj["dec"] = round(float(self.dec[index]), 6)
+        for column, values in self.shape.items():
+            if values is not None and not math.isnan(values[index]):
+                obj[column] = round(float(values[index]), 2)
+        return obj
+
+    def is_star(self, indices):
+        """Mask of indices that are stars rather than deep sky objects."""
+        return np.isin(self._arrays["type"][indices], self._star_codes)
+
+    def lookup(self, designation):
+        """Get an object by designation, or None."""
+        key = designation_key(designation)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            return self.get(self._arrays["key_index"][position])
+        return None
+
+    def search_prefix(self, prefix, limit=50):
+        """Get indices of objects with a designation starting with prefix."""
+        return list(itertools.islice(self.iter_prefix(prefix), limit))
+
+    def iter_prefix(self, prefix):
+        """Yield each object with a designation starting with prefix once, by index."""
+        key = designation_key(prefix)
+        seen = set()
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position].startswith(key):
+            index = int(self._arrays["key_index"][position])
+            if index not in seen:
+                seen.add(index)
+                yield index
+            position += 1
+
+    def cone(self, ra, dec, radius, max_magnitude=None):
+        """Find objects within radius degrees of ra (hours), dec (degrees).
+
+        Returns (indices, distances in degrees) sorted by distance.
+        """
+        slices = [
+            (int(self._cell_start[first]), int(self._cell_start[last]))
+            for first, last in self.grid.cone_cells(ra * 15.0, dec, radius)
+        ]
+        candidates = np.concatenate(
+            [np.arange(start, end) for start, end in slices]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+        distances = angular_distance(
+            ra * 15.0,
+            dec,
+            self.ra[candidates].astype(np.float64) * 15.0,
+            self.dec[candidates].astype(np.float64),
+        )
+        keep = distances <= radius
+        if max_magnitude is not None:
+            keep &= self.magnitude[candidates] <= max_magnitude
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, ra, dec, count=1, max_magnitude=None):
+        """Find the count objects closest to ra (hours), dec (degrees)."""
+        radius = self.grid.cell_size
+        while True:
+            indices, distances = self.cone(ra, dec, radius, max_magnitude)
+            if len(indices) >= count or radius >= 180.0:
+                return indices[:count], distances[:count]
+            radius = min(radius * 2, 180.0)
@@ -0,0 +1,207 @@
+"""Convert CSV or JSON catalogs into columnar catalog files.
+
+Usage:
+    python -m server.catalog.importer assets/messier.json server/static/messier.ocat
+    python -m server.catalog.importer NGC.csv server/static/openngc.ocat --preset openngc
+    python -m server.catalog.importer hygdata.csv server/static/stars.ocat --preset hyg
+
+Columnar catalogs (*.ocat) found next to messier.json are memory mapped by the
+catalog service at startup.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+
+from .columnar import SHAPE_COLUMNS, write_catalog
+
+logger = logging.getLogger(__name__)
+
+# Column names for known catalog CSV exports. A list is tried in order until a
+# column has a value, a (column, prefix) pair prefixes that value.
+PRESETS = {
+    "openngc": {
+        "delimiter": ";",
+        "id": "Name",
+        "ngc": "M",
+        "name": "Common names",
+        "type": "Type",
+        "constellation": "Const",
+        "magnitude": ["V-Mag", "B-Mag"],
+        "ra": "RA",
+        "dec": "Dec",
+        "ra_unit": "hours",
+        "major": "MajAx",
+        "minor": "MinAx",
+        "angle": "PosAng",
+    },
+    "hyg": {
+        "delimiter": ",",
+        "id": [("hip", "HIP "), ("hd", "HD "), ("hr", "HR "), "proper"],
+        "ngc": "bf",
+        "name": "proper",
+        "type": None,
+        "constellation": "con",
+        "magnitude": "mag",
+        "ra": "ra",
+        "dec": "dec",
+        "ra_unit": "hours",
+        "default_type": "Star",
+    },
+    "generic": {
+        "delimiter": ",",
+        "id": "id",
+        "ngc": "ngc",
+        "name": "name",
+        "type": "type",
+        "constellation": "constellation",
+        "magnitude": "magnitude",
+        "ra": "ra",
+        "dec": "dec",
+        "ra_unit": "hours",
+    },
+}
+
+# OpenNGC type codes
+OPENNGC_TYPES = {
+    "*": "Star",
+    "**": "Double star",
+    "*Ass": "Association of stars",
+    "OCl": "Open cluster",
+    "GCl": "Globular cluster",
+    "Cl+N": "Cluster with nebula",
+    "G": "Galaxy",
+    "GPair": "Galaxy pair",
+    "GTrpl": "Galaxy triplet",
+    "GGroup": "Group of galaxies",
+    "PN": "Planetary nebula",
+    "HII": "HII region",
+    "DrkN": "Dark nebula",
+    "EmN": "Emission nebula",
+    "Neb": "Nebula",
+    "RfN": "Reflection nebula",
+    "SNR": "Supernova remnant",
+    "Nova": "Nova star",
+    "NonEx": "Nonexistent object",
+    "Dup": "Duplicated object",
+    "Other": "Other",
+}
+
+_PADDED = re.compile(r"^([A-Za-z]+)\s*0*(\d+.*)$")
+
+
+def parse_angle(value):
+    """Parse decimal or sexagesimal (DD:MM:SS or DD MM SS) values."""
+    value = str(value).strip()
+    if not value:
+        raise ValueError("Empty coordinate")
+    parts = re.split(r"[:\s]+", value)
+    if len(parts) == 1:
+        return float(value)
+    sign = -1.0 if parts[0].startswith("-") else 1.0
+    degrees, minutes, seconds = (abs(float(p)) for p in (parts + ["0", "0"])[:3])
+    return sign * (degrees + minutes / 60.0 + seconds / 3600.0)
+
+
+def format_designation(value):
+    """Strip catalog number padding (NGC0224 -> NGC 224, M031 -> M31)."""
+    match = _PADDED.match(value.strip())
+    if not match:
+        return value.strip()
+    separator = "" if match.group(1) == "M" else " "
+    return f"{match.group(1)}{separator}{match.group(2)}"
+
+
+def _column(row, names):
+    names = names if isinstance(names, list) else [names]
+    for name in names:
+        name, prefix = name if isinstance(name, tuple) else (name, "")
+        if name and (row.get(name) or "").strip():
+            return prefix + row[name].strip()
+    return ""
+
+
+def read_csv(path, preset):
+    """Read catalog objects from a CSV file using a column mapping from PRESETS."""
+    objects = []
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter=preset["delimiter"])
+        for line, row in enumerate(reader, start=2):
+            try:
+                ra = parse_angle(row[preset["ra"]])
+                dec = parse_angle(row[preset["dec"]])
+            except (KeyError, ValueError):
+                logger.warning("Skipping line %d: invalid coordinates", line)
+                continue
+            if preset["ra_unit"] == "degrees":
+                ra /= 15.0
+
+            designation = _column(row, preset["id"])
+            obj_type = _column(row, preset["type"]) or preset.get("default_type", "")
+            magnitude = _column(row, preset["magnitude"])
+            alternate = _column(row, preset["ngc"])
+            if alternate.isdigit():
+                alternate = f"M{int(alternate)}"
+
+            objects.append(
+                {
+                    "id": format_designation(designation),
+                    "ngc": ",".join(
+                        format_designation(part)
+                        for part in alternate.split(",")
+                        if part.strip()
+                    ),
+                    "name": _column(row, preset["name"]).split(",")[0],
+                    "type": OPENNGC_TYPES.get(obj_type, obj_type),
+                    "constellation": _column(row, preset["constellation"]),
+                    "magnitude": float(magnitude) if magnitude else None,
+                    "ra": ra % 24.0,
+                    "dec": dec,
+                }
+            )
+            for column in SHAPE_COLUMNS:
+                value = _column(row, preset.get(column))
+                try:
+                    objects[-1][column] = float(value) if value else None
+                except ValueError:
+                    objects[-1][column] = None
+    return objects
+
+
+def read_catalog(path, preset="generic", delimiter=None):
+    """Read catalog objects from a JSON list or CSV file."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    mapping = dict(PRESETS[preset])
+    if delimiter:
+        mapping["delimiter"] = delimiter
+    return read_csv(path, mapping)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("source", help="CSV or JSON catalog")
+    parser.add_argument("output", help="Columnar catalog file to write")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="generic")
+    parser.add_argument(
+        "--delimiter", help="CSV delimiter, overrides the preset's delimiter"
+    )
+    parser.add_argument(
+        "--cell-size", type=float, default=1.0, help="Sky grid cell size in degrees"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    objects = read_catalog(args.source, args.preset, args.delimiter)
+    write_catalog(objects, args.output, args.cell_size)
+    logger.info("Wrote %d objects to %s", len(objects), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
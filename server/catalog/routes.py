@@ -0,0 +1,273 @@
+"""Routes to search the object catalogs."""
+
+import hashlib
+import math
+import os
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from ..astro.coordinates import parse_sexagesimal
+from ..astro.precession import jnow_to_j2000
+from ..mount.site import get_limits_engine, get_site
+from .chart import FinderChart
+from .service import CatalogService
+from .visibility import SORT_KEYS, LRUCache, VisibilityCache
+
+catalog_bp = Blueprint("catalog", __name__, url_prefix="/api/catalog")
+chart_bp = Blueprint("chart", __name__, url_prefix="/api/chart")
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_DIRS = [
+    os.path.join(SERVER_DIR, "static"),
+    os.path.join(os.path.dirname(SERVER_DIR), "assets"),
+]
+MAX_LIMIT = 500
+# Chart centres snap to 1/CHART_STEPS of the field so panning reuses renders
+CHART_STEPS = 64
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Global catalog service, loaded once at startup
+catalog = CatalogService.load(CATALOG_DIRS)
+visibility_cache = VisibilityCache()
+chart_cache = LRUCache(64)
+
+
+def _etag(*parts):
+    """Build an ETag from the catalog version and the request parameters."""
+    key = "|".join([catalog.version] + [str(part) for part in parts])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _conditional(etag, build):
+    """Return 304 when the client already has this response, else build it."""
+    if etag in request.if_none_match:
+        response = jsonify()
+        response.status_code = 304
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@catalog_bp.route("/search")
+def search():
+    """Search catalog objects.
+
+    Query parameters: q, type, constellation, maxmag, limit, offset.
+    has_more tells whether another page follows, total is exact unless it does.
+    """
+    query = request.args.get("q", "")
+    obj_type = request.args.get("type") or None
+    constellation = request.args.get("constellation") or None
+    max_magnitude = request.args.get("maxmag", type=float)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_LIMIT)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+
+    def build():
+        total, results, has_more = catalog.search(
+            query,
+            obj_type=obj_type,
+            constellation=constellation,
+            max_magnitude=max_magnitude,
+            limit=limit,
+            offset=offset,
+        )
+        return {
+            "total": total,
+            "has_more": has_more,
+            "offset": offset,
+            "limit": limit,
+            "results": results,
+        }
+
+    etag = _etag(query, obj_type, constellation, max_magnitude, limit, offset)
+    return _conditional(etag, build)
+
+
+@catalog_bp.route("/facets")
+def facets():
+    """Get the types and constellations available for filtering."""
+    return _conditional(_etag("facets"), catalog.facets)
+
+
+@catalog_bp.route("/object/<designation>")
+def get_object(designation):
+    """Get a single catalog object by designation."""
+    obj = catalog.lookup(designation)
+    if obj is None:
+        return jsonify({"error": f"Object {designation} not found"}), 404
+    return jsonify(obj)
+
+
+def _position_args():
+    """Parse ra (hours) and dec (degrees) query parameters."""
+    ra = request.args.get("ra", type=float)
+    dec = request.args.get("dec", type=float)
+    if ra is None or dec is None or not -90 <= dec <= 90:
+        abort(400)
+    return ra % 24.0, dec
+
+
+@catalog_bp.route("/cone")
+def cone():
+    """Find objects within a radius of a position.
+
+    Query parameters: ra (hours), dec (degrees), radius (degrees), maxmag, limit.
+    """
+    ra, dec = _position_args()
+    radius = min(max(request.args.get("radius", 1.0, type=float), 0.0), 180.0)
+    max_magnitude = request.args.get("maxmag", type=float)
+    limit = min(max(request.args.get("limit", 100, type=int), 1), MAX_LIMIT)
+
+    def build():
+        results = catalog.cone(ra, dec, radius, max_magnitude, limit)
+        return {"count": len(results), "results": results}
+
+    etag = _etag("cone", ra, dec, radius, max_magnitude, limit)
+    return _conditional(etag, build)
+
+
+@catalog_bp.route("/nearest")
+def nearest():
+    """Find the objects nearest to a position.
+
+    Query parameters: ra (hours), dec (degrees), count, maxmag.
+    """
+    ra, dec = _position_args()
+    count = min(max(request.args.get("count", 1, type=int), 1), MAX_LIMIT)
+    max_magnitude = request.args.get("maxmag", type=float)
+
+    def build():
+        return {"results": catalog.nearest(ra, dec, count, max_magnitude)}
+
+    etag = _etag("nearest", ra, dec, count, max_magnitude)
+    return _conditional(etag, build)
+
+
+@catalog_bp.route("/visible")
+def visible():
+    """Get objects above the horizon with altitude, azimuth and transit time.
+
+    Query parameters: lat, lon (degrees, east positive, default to the
+    configured or mount site), time (ISO 8601, default now), minalt (degrees),
+    maxmag, sort (transit, altitude or magnitude), limit, reachable=1 to keep
+    only objects within the configured mount limits and horizon profile.
+    """
+    site = get_site(
+        request.args.get("lat", type=float), request.args.get("lon", type=float)
+    )
+    if site is None:
+        return jsonify({"error": "Site unknown, set location or connect mount"}), 503
+
+    when = None
+    if request.args.get("time"):
+        try:
+            when = datetime.fromisoformat(request.args["time"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    sort = request.args.get("sort", "transit")
+    if sort not in SORT_KEYS:
+        return jsonify({"error": f"Invalid sort. Use: {', '.join(SORT_KEYS)}"}), 400
+
+    latitude, longitude = site
+    limits = None
+    if request.args.get("reachable") in ("1", "true"):
+        limits = get_limits_engine(site)
+    visibility = visibility_cache.visibility(catalog, latitude, longitude, when)
+    total, results = visibility_cache.select(
+        catalog,
+        latitude,
+        longitude,
+        when,
+        min_altitude=request.args.get("minalt", 0.0, type=float),
+        max_magnitude=request.args.get("maxmag", type=float),
+        sort=sort,
+        limit=min(max(request.args.get("limit", 100, type=int), 1), MAX_LIMIT),
+        limits=limits,
+    )
+    return jsonify(
+        {
+            "site": {"latitude": latitude, "longitude": longitude},
+            "time": visibility.time.isoformat(),
+            "total": total,
+            "results": results,
+        }
+    )
+
+
+def default_chart_magnitude(fov):
+    """Limiting magnitude that keeps a chart of fov degrees readable."""
+    return round(min(12.0, 6.0 + 2.5 * math.log10(60.0 / fov)) * 2.0) / 2.0
+
+
+def quantize_centre(ra, dec, fov):
+    """Snap ra (hours), dec (degrees) to a grid of fov / CHART_STEPS degrees."""
+    step = fov / CHART_STEPS
+    dec = max(-90.0, min(90.0, round(dec / step) * step))
+    ra_step = step / max(math.cos(math.radians(dec)), 0.01) / 15.0
+    return round(round(ra / ra_step) * ra_step % 24.0, 6), round(dec, 6)
+
+
+@chart_bp.route("")
+def chart():
+    """Render a finder chart around a position.
+
+    Query parameters: ra (hours), dec (degrees), fov (degrees, default 5),
+    size (pixels, default 512), mag (limiting magnitude, default by fov),
+    format (png or svg), mra and mdec (mount position, epoch of date as the
+    mount reports it) to mark where the telescope points.
+    """
+    ra, dec = _position_args()
+    fov = request.args.get("fov", 5.0, type=float)
+    size = request.args.get("size", 512, type=int)
+    chart_format = request.args.get("format", "png")
+    if not 0.1 <= fov <= 90.0 or not 64 <= size <= 2048:
+        return jsonify({"error": "fov must be 0.1-90 degrees, size 64-2048"}), 400
+    if chart_format not in CHART_FORMATS:
+        return jsonify({"error": "Invalid format. Use: png, svg"}), 400
+    magnitude = request.args.get("mag", type=float)
+    if magnitude is None:
+        magnitude = default_chart_magnitude(fov)
+
+    mount = None
+    if request.args.get("mra") and request.args.get("mdec"):
+        try:
+            mount_ra, mount_dec = jnow_to_j2000(
+                parse_sexagesimal(request.args["mra"]),
+                parse_sexagesimal(request.args["mdec"]),
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid mount position"}), 400
+        mount = (round(float(mount_ra), 4), round(float(mount_dec), 3))
+
+    ra, dec = quantize_centre(ra, dec, fov)
+    key = (
+        catalog.version,
+        ra,
+        dec,
+        float(f"{fov:.3g}"),
+        size,
+        round(magnitude, 1),
+        chart_format,
+        mount,
+    )
+    etag = _etag("chart", *key[1:])
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        body = chart_cache.get(key)
+        if body is None:
+            finder = FinderChart(ra, dec, key[3], size, key[5])
+            finder.add_catalogs(catalog)
+            if mount:
+                finder.set_mount(*mount)
+            body = finder.to_png() if chart_format == "png" else finder.to_svg()
+            chart_cache.put(key, body)
+        response = Response(body, mimetype=CHART_FORMATS[chart_format])
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response
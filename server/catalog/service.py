@@ -0,0 +1,158 @@
+"""Catalog service combining the indexed and memory-mapped catalogs."""
+
+import glob
+import hashlib
+import logging
+import os
+
+from .catalog import Catalog, designation_key
+from .columnar import ColumnarCatalog
+
+logger = logging.getLogger(__name__)
+
+JSON_CATALOGS = ["messier.json"]
+
+
+class CatalogService:
+    """Catalogs loaded once at startup.
+
+    Small JSON catalogs are fully indexed for text search. Large catalogs are
+    memory-mapped columnar files searched by designation prefix. Every catalog
+    is available for cone and nearest object searches.
+    """
+
+    def __init__(self, index=None, mapped=None):
+        """Initialize from an indexed catalog and a list of mapped catalogs."""
+        self.index = index if index is not None else Catalog()
+        self.mapped = list(mapped or [])
+        self.sky = [ColumnarCatalog.from_objects(self.index.objects, name="index")]
+        self.sky.extend(self.mapped)
+        digest = hashlib.sha1(self.index.version.encode("utf-8"))
+        for sky in self.mapped:
+            digest.update(f"{sky.name}:{len(sky)}".encode("utf-8"))
+        self.version = digest.hexdigest()
+
+    @classmethod
+    def load(cls, directories):
+        """Load JSON catalogs and *.ocat files, first directory that has each wins."""
+        index = Catalog()
+        for name in JSON_CATALOGS:
+            for directory in directories:
+                path = os.path.join(directory, name)
+                if os.path.exists(path):
+                    try:
+                        index.load_json(path)
+                    except (OSError, ValueError) as e:
+                        logger.error("Failed to load catalog %s: %s", path, str(e))
+                    break
+
+        mapped = {}
+        for directory in directories:
+            for path in sorted(glob.glob(os.path.join(directory, "*.ocat"))):
+                name = os.path.basename(path)
+                if name in mapped:
+                    continue
+                try:
+                    mapped[name] = ColumnarCatalog.open(path, name=name)
+                    logger.info(
+                        "Mapped %d catalog objects from %s", len(mapped[name]), path
+                    )
+                except (OSError, ValueError) as e:
+                    logger.error("Failed to map catalog %s: %s", path, str(e))
+        return cls(index, mapped.values())
+
+    def __len__(self):
+        return len(self.index) + sum(len(sky) for sky in self.mapped)
+
+    def search(
+        self,
+        query="",
+        obj_type=None,
+        constellation=None,
+        max_magnitude=None,
+        limit=50,
+        offset=0,
+    ):
+        """Search the indexed catalog, then mapped catalogs by designation.
+
+        Returns a tuple of (total matches, objects for the requested page,
+        whether more matches follow the page). Mapped catalogs are only read
+        one match past the page, so total is exact unless more follow. Objects
+        already returned by the index or an earlier catalog are skipped.
+        """
+        total, results = self.index.search(
+            query,
+            obj_type=obj_type,
+            constellation=constellation,
+            max_magnitude=max_magnitude,
+            limit=limit,
+            offset=offset,
+        )
+        if not query.strip() or obj_type or constellation or not self.mapped:
+            return total, results, total > offset + limit
+
+        # One match past the page tells whether another page follows
+        wanted = max(0, offset + limit - total) + 1
+        extra = []
+        seen = set()
+        for obj in self._mapped_matches(query, max_magnitude):
+            keys = {designation_key(obj.get(key, "")) for key in ("id", "ngc")}
+            keys.discard("")
+            if keys & seen or any(self.index.lookup(key) for key in keys):
+                continue
+            seen.update(keys)
+            extra.append(obj)
+            if len(extra) == wanted:
+                break
+        skip = max(0, offset - total)
+        results = results + extra[skip : skip + limit - len(results)]
+        total += len(extra)
+        return total, results, total > offset + limit
+
+    def _mapped_matches(self, query, max_magnitude):
+        for sky in self.mapped:
+            for index in sky.iter_prefix(query):
+                if max_magnitude is None or sky.magnitude[index] <= max_magnitude:
+                    yield sky.get(index)
+
+    def lookup(self, designation):
+        """Get an object by designation from any catalog, or None."""
+        obj = self.index.lookup(designation)
+        for sky in self.mapped:
+            if obj is not None:
+                break
+            obj = sky.lookup(designation)
+        return obj
+
+    def facets(self):
+        """Get types and constellations of the indexed catalog."""
+        return self.index.facets()
+
+    def cone(self, ra, dec, radius, max_magnitude=None, limit=None):
+        """Objects within radius degrees of ra (hours), dec (degrees), nearest first."""
+        found = []
+        for sky in self.sky:
+            indices, distances = sky.cone(ra, dec, radius, max_magnitude)
+            found.extend(
+                (float(distance), sky, index)
+                for index, distance in zip(indices[:limit], distances[:limit])
+            )
+        found.sort(key=lambda item: item[0])
+        return [
+            dict(sky.get(index), distance=round(distance, 6))
+            for distance, sky, index in found[:limit]
+        ]
+
+    def nearest(self, ra, dec, count=1, max_magnitude=None):
+        """The count objects nearest to ra (hours), dec (degrees)."""
+        found = []
+        for sky in self.sky:
+            indices, distances = sky.nearest(ra, dec, count, max_magnitude)
+            found.extend(
+                zip((float(d) for d in distances), [sky] * len(indices), indices)
+            )
+        found.sort(key=lambda item: item[0])
+        return [
+            dict(sky.get(index), distance=round(distance, 6))
+            for distance, sky, index in found[:count]
+        ]
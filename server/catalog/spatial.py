@@ -0,0 +1,86 @@
+"""Equal-area sky grid used to index catalog objects by position.
+
+The sky is cut into declination bands of ``cell_size`` degrees and each band
+into RA cells whose count scales with cos(dec), so every cell covers roughly
+``cell_size``² square degrees. Objects stored sorted by cell id can then be
+cone searched by reading a few contiguous slices instead of the whole catalog.
+"""
+
+import math
+
+import numpy as np
+
+
+def angular_distance(ra1, dec1, ra2, dec2):
+    """Angular distance in degrees between points given in degrees (haversine)."""
+    ra1, dec1, ra2, dec2 = (np.radians(value) for value in (ra1, dec1, ra2, dec2))
+    a = (
+        np.sin((dec2 - dec1) / 2) ** 2
+        + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    )
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+
+
+class SkyGrid:
+    """Partition of the sphere into roughly equal area cells."""
+
+    def __init__(self, cell_size=1.0):
+        """Initialize the grid for cells of about cell_size degrees."""
+        self.cell_size = float(cell_size)
+        self.band_count = int(math.ceil(180.0 / self.cell_size))
+        centers = -90.0 + (np.arange(self.band_count) + 0.5) * self.cell_size
+        self.band_cells = np.maximum(
+            1, np.round(360.0 * np.cos(np.radians(centers)) / self.cell_size)
+        ).astype(np.int64)
+        self.band_start = np.concatenate(([0], np.cumsum(self.band_cells)))
+        self.cell_count = int(self.band_start[-1])
+
+    def _band(self, dec):
+        return np.clip(
+            np.floor((np.asarray(dec) + 90.0) / self.cell_size).astype(np.int64),
+            0,
+            self.band_count - 1,
+        )
+
+    def cell_of(self, ra, dec):
+        """Get cell ids for positions in degrees (vectorized)."""
+        band = self._band(dec)
+        cells = self.band_cells[band]
+        k = np.floor(np.mod(ra, 360.0) / 360.0 * cells).astype(np.int64) % cells
+        return self.band_start[band] + k
+
+    def cone_cells(self, ra, dec, radius):
+        """Get (first, last + 1) cell id ranges that may overlap a cone in degrees."""
+        ranges = []
+        ra = ra % 360.0
+        low = self._band(max(dec - radius, -90.0))
+        high = self._band(min(dec + radius, 90.0))
+        sin_radius = math.sin(math.radians(min(radius, 90.0)))
+
+        for band in range(int(low), int(high) + 1):
+            cells = int(self.band_cells[band])
+            start = int(self.band_start[band])
+            south = -90.0 + band * self.cell_size
+            north = south + self.cell_size
+            # Widest RA extent of the cone is at the declination closest to a pole
+            widest = max(abs(max(south, dec - radius)), abs(min(north, dec + radius)))
+            cos_widest = math.cos(math.radians(min(widest, 90.0)))
+
+            if radius >= 90.0 or sin_radius >= cos_widest:
+                ranges.append((start, start + cells))
+                continue
+
+            half_width = math.degrees(math.asin(sin_radius / cos_widest))
+            first = int(math.floor((ra - half_width) / 360.0 * cells))
+            last = int(math.floor((ra + half_width) / 360.0 * cells))
+            if last - first + 1 >= cells:
+                ranges.append((start, start + cells))
+            elif first < 0:
+                ranges.append((start, start + last + 1))
+                ranges.append((start + cells + first, start + cells))
+            elif last >= cells:
+                ranges.append((start + first, start + cells))
+                ranges.append((start, start + last - cells + 1))
+            else:
+                ranges.append((start + first, start + last + 1))
+        return ranges
@@ -0,0 +1,235 @@
+"""Unit tests for the catalog index and search routes."""
+
+import json
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from ..astro.limits import LimitsEngine, MountLimits
+from . import routes
+from .catalog import Catalog
+from .columnar import ColumnarCatalog
+from .routes import catalog_bp
+from .service import CatalogService
+
+OBJECTS = [
+    {
+        "id": "M31",
+        "ngc": "NGC 224",
+        "name": "Andromeda Galaxy",
+        "type": "Spiral galaxy",
+        "constellation": "Andromeda",
+        "magnitude": 3.4,
+        "ra": 0.7123,
+        "dec": 41.2689,
+    },
+    {
+        "id": "M42",
+        "ngc": "NGC 1976",
+        "name": "Orion Nebula",
+        "type": "Diffuse nebula",
+        "constellation": "Orion",
+        "magnitude": 4.0,
+        "ra": 5.5881,
+        "dec": -5.3911,
+    },
+    {
+        "id": "M3",
+        "ngc": "NGC 5272",
+        "name": "",
+        "type": "Globular cluster",
+        "constellation": "Canes Venatici",
+        "magnitude": 6.2,
+        "ra": 13.703,
+        "dec": 28.3772,
+    },
+    {
+        "id": "M32",
+        "ngc": "NGC 221",
+        "name": "",
+        "type": "Elliptical galaxy",
+        "constellation": "Andromeda",
+        "magnitude": 8.1,
+        "ra": 0.7117,
+        "dec": 40.8653,
+    },
+]
+
+
+class TestCatalog(unittest.TestCase):
+    """Test Catalog class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.catalog = Catalog(OBJECTS)
+
+    def ids(self, results):
+        return [obj["id"] for obj in results]
+
+    def test_search_designation(self):
+        """Test searching by Messier and NGC designation."""
+        self.assertEqual(self.ids(self.catalog.search("M31")[1]), ["M31"])
+        self.assertEqual(self.ids(self.catalog.search("NGC 224")[1]), ["M31"])
+        self.assertEqual(self.ids(self.catalog.search("ngc224")[1]), ["M31"])
+
+    def test_search_prefix_ordered_by_magnitude(self):
+        """Test prefix search returns matches brightest first."""
+        total, results = self.catalog.search("m3")
+        self.assertEqual(total, 3)
+        self.assertEqual(self.ids(results), ["M3", "M31", "M32"])
+
+    def test_search_substring(self):
+        """Test search inside words via the n-gram index."""
+        self.assertEqual(self.ids(self.catalog.search("dromeda")[1]), ["M31", "M32"])
+        self.assertEqual(self.ids(self.catalog.search("venatici")[1]), ["M3"])
+
+    def test_search_short_substring(self):
+        """Test terms shorter than an n-gram also match inside words."""
+        self.assertEqual(self.ids(self.catalog.search("31")[1]), ["M31"])
+        self.assertEqual(self.ids(self.catalog.search("ri")[1]), ["M42"])
+
+    def test_search_facets(self):
+        """Test filtering by type, constellation and magnitude."""
+        total, results = self.catalog.search(constellation="andromeda", max_magnitude=5)
+        self.assertEqual(total, 1)
+        self.assertEqual(self.ids(results), ["M31"])
+        self.assertEqual(
+            self.ids(self.catalog.search(obj_type="Globular cluster")[1]), ["M3"]
+        )
+
+    def test_search_pagination(self):
+        """Test limit and offset."""
+        total, results = self.catalog.search(limit=2, offset=1)
+        self.assertEqual(total, 4)
+        self.assertEqual(self.ids(results), ["M42", "M3"])
+
+    def test_search_no_match(self):
+        """Test search with no matches."""
+        self.assertEqual(self.catalog.search("xyzzy"), (0, []))
+
+    def test_lookup(self):
+        """Test lookup by designation."""
+        self.assertEqual(self.catalog.lookup("NGC 1976")["id"], "M42")
+        self.assertIsNone(self.catalog.lookup("M110"))
+
+
+def ngc(number, ngc=""):
+    """Object of a mapped NGC catalog."""
+    return dict(OBJECTS[0], id=f"NGC {number}", ngc=ngc, name="", magnitude=12.0)
+
+
+class TestCatalogService(unittest.TestCase):
+    """Test searches across the indexed and mapped catalogs."""
+
+    def setUp(self):
+        """Set up an NGC catalog repeating M31 and M32, and a copy of NGC 2."""
+        mapped = [
+            ColumnarCatalog.from_objects(
+                [ngc(2), ngc(20), ngc(200), ngc(221, "M32"), ngc(224, "M31")]
+            ),
+            ColumnarCatalog.from_objects([ngc(2)]),
+        ]
+        self.service = CatalogService(Catalog(OBJECTS), mapped)
+
+    def ids(self, result):
+        return [obj["id"] for obj in result[1]]
+
+    def test_search_deduplicated(self):
+        """Test objects in several catalogs are returned once."""
+        result = self.service.search("ngc2")
+        self.assertEqual(self.ids(result), ["M31", "M32", "NGC 2", "NGC 20", "NGC 200"])
+        self.assertEqual((result[0], result[2]), (5, False))
+
+    def test_search_pages(self):
+        """Test has_more tells whether another page follows."""
+        result = self.service.search("ngc2", limit=3)
+        self.assertEqual(self.ids(result), ["M31", "M32", "NGC 2"])
+        self.assertTrue(result[2])
+        result = self.service.search("ngc2", limit=2, offset=3)
+        self.assertEqual(self.ids(result), ["NGC 20", "NGC 200"])
+        self.assertEqual((result[0], result[2]), (5, False))
+
+
+class TestCatalogRoutes(unittest.TestCase):
+    """Test catalog API routes."""
+
+    def setUp(self):
+        """Set up test client."""
+        self.original = routes.catalog
+        routes.catalog = CatalogService(Catalog(OBJECTS))
+        self.app = Flask(__name__)
+        self.app.register_blueprint(catalog_bp)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Restore the global catalog."""
+        routes.catalog = self.original
+
+    def test_search(self):
+        """Test search endpoint."""
+        response = self.client.get("/api/catalog/search?q=andromeda&maxmag=5")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data["total"], 1)
+        self.assertFalse(data["has_more"])
+        self.assertEqual(data["results"][0]["id"], "M31")
+
+    def test_search_etag(self):
+        """Test a repeated search with a matching ETag returns 304."""
+        response = self.client.get("/api/catalog/search?q=m3")
+        etag = response.headers["ETag"]
+
+        response = self.client.get(
+            "/api/catalog/search?q=m3", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cone(self):
+        """Test cone search returns nearest objects first."""
+        response = self.client.get("/api/catalog/cone?ra=0.7123&dec=41.27&radius=1")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([obj["id"] for obj in data["results"]], ["M31", "M32"])
+
+    def test_cone_missing_position(self):
+        """Test cone search without coordinates."""
+        response = self.client.get("/api/catalog/cone?radius=1")
+        self.assertEqual(response.status_code, 400)
+
+    def test_visible(self):
+        """Test visible objects for a site and time, sorted by altitude."""
+        response = self.client.get(
+            "/api/catalog/visible?lat=45&lon=-75&time=2025-01-15T03:00:00"
+            "&minalt=10&sort=altitude"
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([obj["id"] for obj in data["results"]], ["M42", "M31", "M32"])
+        self.assertTrue(all(obj["altitude"] >= 10 for obj in data["results"]))
+
+    def test_visible_reachable(self):
+        """Test visible objects filtered by the mount limits."""
+        engine = LimitsEngine(45.0, -75.0, MountLimits(dec_min=0))
+        with patch.object(routes, "get_limits_engine", return_value=engine):
+            response = self.client.get(
+                "/api/catalog/visible?lat=45&lon=-75&time=2025-01-15T03:00:00"
+                "&minalt=10&sort=altitude&reachable=1"
+            )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([obj["id"] for obj in data["results"]], ["M31", "M32"])
+
+    def test_visible_invalid_sort(self):
+        """Test visible objects with an unknown sort key."""
+        response = self.client.get("/api/catalog/visible?lat=45&lon=-75&sort=name")
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_object_not_found(self):
+        """Test object lookup for an unknown designation."""
+        response = self.client.get("/api/catalog/object/M200")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Unit tests for finder chart rendering."""
+
+import struct
+import unittest
+import zlib
+
+import numpy as np
+from flask import Flask
+
+from . import routes
+from .catalog import Catalog
+from .chart import FinderChart, encode_png, project
+from .columnar import ColumnarCatalog
+from .routes import chart_bp
+from .service import CatalogService
+from .test_catalog import OBJECTS
+
+STARS = [
+    {"id": "Star A", "type": "Star", "ra": 0.70, "dec": 41.0, "magnitude": 6.0},
+    {"id": "Star B", "type": "Star", "ra": 0.75, "dec": 41.5, "magnitude": 11.0},
+    {"id": "Star C", "type": "Star", "ra": 5.50, "dec": -5.0, "magnitude": 4.0},
+]
+
+
+def service():
+    """Catalog service with the test objects and a few stars."""
+    return CatalogService(
+        Catalog(OBJECTS), [ColumnarCatalog.from_objects(STARS, name="stars")]
+    )
+
+
+def decode_png(data):
+    """Decode an RGB PNG written by encode_png to an array."""
+    width, height = struct.unpack(">II", data[16:24])
+    start = data.index(b"IDAT") + 4
+    length = struct.unpack(">I", data[start - 8 : start - 4])[0]
+    rows = np.frombuffer(zlib.decompress(data[start : start + length]), np.uint8)
+    return rows.reshape(height, width * 3 + 1)[:, 1:].reshape(height, width, 3)
+
+
+class TestFinderChart(unittest.TestCase):
+    """Test chart projection and rendering."""
+
+    def test_project(self):
+        """Test the centre maps to the origin and east is positive xi."""
+        xi, eta, front = project([1.0, 1.1, 13.0], [10.0, 10.0, -10.0], 1.0, 10.0)
+        self.assertAlmostEqual(xi[0], 0.0)
+        self.assertAlmostEqual(eta[0], 0.0)
+        self.assertGreater(xi[1], 0.0)
+        self.assertEqual(front.tolist(), [True, True, False])
+
+    def test_chart_contents(self):
+        """Test stars are limited by magnitude and objects are found."""
+        chart = FinderChart(0.71, 41.27, 3.0, 256, 10.0)
+        chart.add_catalogs(service())
+        self.assertEqual(len(chart.stars), 1)
+        self.assertEqual(sorted(obj["id"] for obj in chart.objects), ["M31", "M32"])
+        # Star A is west of the centre, so it is drawn right of it
+        self.assertGreater(chart.stars[0, 0], 128)
+
+    def test_png(self):
+        """Test the PNG decodes and has the star and mount marker drawn."""
+        chart = FinderChart(0.70, 41.0, 2.0, 128, 10.0)
+        chart.add_catalogs(service())
+        chart.set_mount(0.70, 41.0)
+        data = chart.to_png()
+        self.assertTrue(data.startswith(b"\x89PNG\r\n\x1a\n"))
+        image = decode_png(data)
+        self.assertEqual(image.shape, (128, 128, 3))
+        self.assertGreater(image[:, :, 1].max(), 0)
+
+    def test_svg(self):
+        """Test the SVG labels deep sky objects."""
+        chart = FinderChart(0.71, 41.27, 3.0, 256, 10.0)
+        chart.add_catalogs(service())
+        self.assertIn(b">M31</text>", chart.to_svg())
+
+    def test_encode_png(self):
+        """Test encoding round trips pixels."""
+        image = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+        np.testing.assert_array_equal(decode_png(encode_png(image)), image)
+
+
+class TestChartRoutes(unittest.TestCase):
+    """Test the chart API route."""
+
+    def setUp(self):
+        """Set up test client with a small catalog."""
+        routes.catalog = service()
+        routes.chart_cache.clear()
+        self.app = Flask(__name__)
+        self.app.register_blueprint(chart_bp)
+        self.client = self.app.test_client()
+
+    def test_chart_cached(self):
+        """Test nearby centres share a render and ETags give 304."""
+        response = self.client.get("/api/chart?ra=0.71&dec=41.27&fov=3&size=128")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/png")
+        panned = self.client.get("/api/chart?ra=0.7101&dec=41.2701&fov=3&size=128")
+        self.assertEqual(panned.get_etag(), response.get_etag())
+        self.assertEqual(panned.data, response.data)
+
+        cached = self.client.get(
+            "/api/chart?ra=0.71&dec=41.27&fov=3&size=128",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_chart_svg_with_mount(self):
+        """Test an SVG chart with the mount position."""
+        response = self.client.get(
+            "/api/chart?ra=0.71&dec=41.27&fov=3&format=svg&mra=00:44:00&mdec=%2B41*20"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/svg+xml")
+        self.assertIn(b"<path", response.data)
+
+    def test_chart_invalid(self):
+        """Test invalid field of view and format."""
+        self.assertEqual(
+            self.client.get("/api/chart?ra=1&dec=1&fov=200").status_code, 400
+        )
+        self.assertEqual(
+            self.client.get("/api/chart?ra=1&dec=1&format=gif").status_code, 400
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Unit tests for columnar catalog files and the sky grid."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .columnar import ColumnarCatalog, write_catalog
+from .importer import PRESETS, format_designation, parse_angle, read_csv
+from .spatial import SkyGrid, angular_distance
+from .test_catalog import OBJECTS
+
+
+class TestSkyGrid(unittest.TestCase):
+    """Test SkyGrid class."""
+
+    def test_cone_cells_cover_cone(self):
+        """Test every point inside a cone falls in one of the cone's cells."""
+        grid = SkyGrid(2.0)
+        rng = np.random.default_rng(0)
+        ra = rng.uniform(0, 360, 20000)
+        dec = np.degrees(np.arcsin(rng.uniform(-1, 1, 20000)))
+        cells = grid.cell_of(ra, dec)
+
+        for center_ra, center_dec, radius in [
+            (0.5, 0, 5),
+            (359, 88, 4),
+            (180, -60, 10),
+        ]:
+            inside = angular_distance(center_ra, center_dec, ra, dec) <= radius
+            covered = np.zeros(grid.cell_count, dtype=bool)
+            for first, last in grid.cone_cells(center_ra, center_dec, radius):
+                covered[first:last] = True
+            self.assertTrue(covered[cells[inside]].all())
+
+
+class TestColumnarCatalog(unittest.TestCase):
+    """Test ColumnarCatalog class."""
+
+    def setUp(self):
+        """Write the test catalog to a temporary file and map it."""
+        handle, self.path = tempfile.mkstemp(suffix=".ocat")
+        os.close(handle)
+        write_catalog(OBJECTS, self.path)
+        self.catalog = ColumnarCatalog.open(self.path)
+
+    def tearDown(self):
+        """Remove the temporary file."""
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        """Test objects read back with the same fields."""
+        self.assertEqual(len(self.catalog), 4)
+        obj = self.catalog.lookup("NGC 224")
+        self.assertEqual(obj["id"], "M31")
+        self.assertEqual(obj["type"], "Spiral galaxy")
+        self.assertAlmostEqual(obj["dec"], 41.2689, places=4)
+
+    def test_search_prefix(self):
+        """Test designation prefix search."""
+        ids = [self.catalog.get(i)["id"] for i in self.catalog.search_prefix("M3")]
+        self.assertEqual(sorted(ids), ["M3", "M31", "M32"])
+
+    def test_cone(self):
+        """Test cone search with a magnitude limit."""
+        indices, distances = self.catalog.cone(0.7123, 41.27, 1.0)
+        self.assertEqual([self.catalog.get(i)["id"] for i in indices], ["M31", "M32"])
+        self.assertLess(distances[0], distances[1])
+
+        indices, _ = self.catalog.cone(0.7123, 41.27, 1.0, max_magnitude=5)
+        self.assertEqual(len(indices), 1)
+
+    def test_nearest(self):
+        """Test nearest search widens until enough objects are found."""
+        indices, _ = self.catalog.nearest(5.5, -5.0, count=2)
+        self.assertEqual(self.catalog.get(indices[0])["id"], "M42")
+        self.assertEqual(len(indices), 2)
+
+
+class TestImporter(unittest.TestCase):
+    """Test CSV import helpers."""
+
+    def test_parse_angle(self):
+        """Test decimal and sexagesimal coordinates."""
+        self.assertAlmostEqual(parse_angle("00:42:44.3"), 0.712306, places=5)
+        self.assertAlmostEqual(parse_angle("-05:23:28"), -5.391111, places=5)
+        self.assertEqual(parse_angle("12.5"), 12.5)
+
+    def test_read_openngc(self):
+        """Test reading an OpenNGC style CSV."""
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write("Name;Type;RA;Dec;Const;V-Mag;M;Common names;MajAx;MinAx;PosAng\n")
+            f.write(
+                "NGC0224;G;00:42:44.35;+41:16:08.6;And;3.44;031;Andromeda Galaxy;"
+                "177.83;69.66;35\n"
+            )
+            f.write("NGC9999;G;;;And;;;;;;\n")
+        try:
+            objects = read_csv(path, PRESETS["openngc"])
+        finally:
+            os.remove(path)
+
+        self.assertEqual(len(objects), 1)
+        self.assertEqual(objects[0]["id"], "NGC 224")
+        self.assertEqual(objects[0]["ngc"], "M31")
+        self.assertEqual(objects[0]["type"], "Galaxy")
+        self.assertEqual(objects[0]["major"], 177.83)
+        catalog = ColumnarCatalog.from_objects(objects)
+        self.assertEqual(catalog.get(0)["angle"], 35.0)
+        self.assertFalse(catalog.is_star([0])[0])
+        self.assertEqual(format_designation("IC0434"), "IC 434")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Altitude, azimuth and transit of whole catalogs, cached per site and minute."""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ..astro.coordinates import add_hours, altaz, sidereal_time, transit_offset, utc
+from ..astro.precession import j2000_to_jnow
+
+# Seconds covered by one cached computation
+TIME_STEP = 60
+SORT_KEYS = ("transit", "altitude", "magnitude")
+
+
+class LRUCache:
+    """Small thread safe least recently used cache."""
+
+    def __init__(self, size):
+        """Initialize a cache holding up to size entries."""
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a cached value or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+def time_bucket(when=None, step=TIME_STEP):
+    """Start of the time step containing when."""
+    timestamp = utc(when).timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % step, timezone.utc)
+
+
+class Visibility:
+    """Positions of every object of a catalog service for one site and time."""
+
+    def __init__(self, service, latitude, longitude, when):
+        """Compute alt/az, hour angle and transit for all objects at once."""
+        self.service = service
+        self.latitude = latitude
+        self.longitude = longitude
+        self.time = when
+        lst = sidereal_time(when, longitude)
+
+        sources, indices, ra, dec, magnitude = [], [], [], [], []
+        for source, sky in enumerate(service.sky):
+            sources.append(np.full(len(sky), source, dtype=np.int32))
+            indices.append(np.arange(len(sky), dtype=np.int64))
+            ra.append(sky.ra)
+            dec.append(sky.dec)
+            magnitude.append(sky.magnitude)
+
+        self.source = np.concatenate(sources) if sources else np.zeros(0, np.int32)
+        self.index = np.concatenate(indices) if indices else np.zeros(0, np.int64)
+        self.magnitude = (
+            np.concatenate(magnitude).astype(np.float64) if magnitude else np.zeros(0)
+        )
+        # Catalogs are J2000, positions on the sky are epoch of date
+        ra, self.dec = j2000_to_jnow(
+            np.concatenate(ra) if ra else np.zeros(0),
+            np.concatenate(dec) if dec else np.zeros(0),
+            when,
+        )
+        self.altitude, self.azimuth, self.hour_angle = altaz(
+            ra, self.dec, latitude, lst
+        )
+        self.transit = transit_offset(self.hour_angle)
+
+    def select(
+        self,
+        min_altitude=0.0,
+        max_magnitude=None,
+        sort="transit",
+        limit=100,
+        limits=None,
+    ):
+        """Get objects above min_altitude as dicts, ordered by sort key.
+
+        limits is an optional LimitsEngine, objects the mount cannot reach are
+        left out. Returns (total matches, objects).
+        """
+        keep = self.altitude >= min_altitude
+        if max_magnitude is not None:
+            keep &= self.magnitude <= max_magnitude
+        if limits is not None:
+            for mask in limits.masks(
+                self.altitude, self.azimuth, self.hour_angle, self.dec
+            ):
+                keep &= mask
+        matches = np.flatnonzero(keep)
+
+        if sort == "altitude":
+            key = -self.altitude[matches]
+        elif sort == "magnitude":
+            key = np.nan_to_num(self.magnitude[matches], nan=np.inf)
+        else:
+            key = self.transit[matches]
+        if limit < len(matches):
+            part = np.argpartition(key, limit)[:limit]
+            chosen = matches[part[np.argsort(key[part], kind="stable")]]
+        else:
+            chosen = matches[np.argsort(key, kind="stable")]
+
+        transits = add_hours(self.time, self.transit[chosen])
+        results = []
+        for position, transit in zip(chosen, transits):
+            sky = self.service.sky[self.source[position]]
+            obj = sky.get(self.index[position])
+            obj.update(
+                altitude=round(float(self.altitude[position]), 3),
+                azimuth=round(float(self.azimuth[position]), 3),
+                hour_angle=round(float(self.hour_angle[position]), 4),
+                transit=transit,
+            )
+            results.append(obj)
+        return len(matches), results
+
+
+class VisibilityCache:
+    """Visibility computations and query results cached per (site, time step)."""
+
+    def __init__(self, size=8):
+        """Initialize caches for size site/time combinations."""
+        self._visibility = LRUCache(size)
+        self._results = LRUCache(size * 16)
+
+    def _key(self, service, latitude, longitude, when):
+        return (service.version, round(latitude, 4), round(longitude, 4), when)
+
+    def visibility(self, service, latitude, longitude, when=None):
+        """Get the cached Visibility for the time step containing when."""
+        when = time_bucket(when)
+        key = self._key(service, latitude, longitude, when)
+        cached = self._visibility.get(key)
+        if cached is None:
+            cached = self._visibility.put(
+                key, Visibility(service, latitude, longitude, when)
+            )
+        return cached
+
+    def select(self, service, latitude, longitude, when=None, **query):
+        """Get (total, objects) for a query, repeated queries are a lookup."""
+        when = time_bucket(when)
+        key = self._key(service, latitude, longitude, when) + tuple(
+            sorted(query.items())
+        )
+        cached = self._results.get(key)
+        if cached is None:
+            visibility = self.visibility(service, latitude, longitude, when)
+            cached = self._results.put(key, visibility.select(**query))
+        return cached
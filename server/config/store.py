@@ -0,0 +1,236 @@
+"""Device configuration store shared by every blueprint.
+
+device_config.json is parsed once and revalidated by its mtime, size and
+inode, at most once every REVALIDATE_SECONDS, so hot requests read a dict
+instead of the file. Writes are validated, merged into the current config and
+saved through a temporary file and os.replace, so readers never see a partial
+file. Subscribers are called with the keys that changed, after the store's
+lock is released, so they may read or update the config from any thread.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Next to the server package, wherever the server is started from
+CONFIG_FILE = os.environ.get(
+    "OAT_DEVICE_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "device_config.json"),
+)
+# Seconds between mtime checks of the config file
+REVALIDATE_SECONDS = 1.0
+
+DEFAULTS = {
+    "telescopeDevice": "",
+    "telescopeBaudrate": 9600,
+    "guiderDevice": "",
+    "cameraDevice": "",
+}
+
+# Known keys and their types, other keys are stored as given
+SCHEMA = {
+    "telescopeDevice": str,
+    "telescopeBaudrate": int,
+    "guiderDevice": str,
+    "cameraDevice": str,
+    "latitude": float,
+    "longitude": float,
+    "mountLimits": dict,
+    "horizon": list,
+    "streamMaxFps": float,
+}
+NUMBER_RANGES = {
+    "telescopeBaudrate": (1, 4000000),
+    "latitude": (-90.0, 90.0),
+    "longitude": (-180.0, 360.0),
+    "streamMaxFps": (0.1, 30.0),
+}
+
+
+class ConfigError(ValueError):
+    """Invalid device configuration."""
+
+
+def _coerce(key, value):
+    kind = SCHEMA[key]
+    if kind is str:
+        if value is None:
+            return ""
+        if not isinstance(value, str):
+            raise ConfigError(f"{key} must be a string")
+        return value
+    if kind in (int, float):
+        if value in (None, "") and kind is float:
+            return None
+        if isinstance(value, bool):
+            raise ConfigError(f"{key} must be a number")
+        try:
+            number = kind(value)
+        except (TypeError, ValueError):
+            raise ConfigError(f"{key} must be a number") from None
+        low, high = NUMBER_RANGES[key]
+        if not low <= number <= high:
+            raise ConfigError(f"{key} must be between {low} and {high}")
+        return number
+    if value is not None and not isinstance(value, kind):
+        raise ConfigError(f"{key} must be a {kind.__name__}")
+    return value
+
+
+def validate(config):
+    """Check a config dict against SCHEMA, returns a normalized copy."""
+    if not isinstance(config, dict):
+        raise ConfigError("Configuration must be an object")
+    normalized = {}
+    for key, value in config.items():
+        normalized[key] = _coerce(key, value) if key in SCHEMA else value
+
+    for name, value in (normalized.get("mountLimits") or {}).items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ConfigError(f"mountLimits.{name} must be a number")
+    for point in normalized.get("horizon") or []:
+        if (
+            not isinstance(point, (list, tuple))
+            or len(point) != 2
+            or not all(isinstance(v, (int, float)) for v in point)
+        ):
+            raise ConfigError("horizon must be a list of [azimuth, altitude] pairs")
+    return normalized
+
+
+class DeviceConfig:
+    """Cached, validated view of the device configuration file."""
+
+    def __init__(self, path=CONFIG_FILE, revalidate=REVALIDATE_SECONDS):
+        """Initialize for a config file path, nothing is read until first use."""
+        self.path = os.path.abspath(path)
+        self.revalidate = revalidate
+        self._lock = threading.RLock()
+        self._config = dict(DEFAULTS)
+        self._stamp = False  # (mtime, size, inode) of the parsed file
+        self._checked = None
+        self._subscribers = []
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _refresh(self, force=False):
+        """Reparse the file if it changed, returns the keys that changed."""
+        with self._lock:
+            changed = self._reload(force)
+            config = dict(self._config)
+        if changed:
+            self._notify(changed, config)
+        return changed
+
+    def _reload(self, force):
+        """Reparse the file if it changed, called with the lock held.
+
+        Returns the keys that changed, none for the first load.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._checked is not None
+            and now - self._checked < self.revalidate
+        ):
+            return {}
+        self._checked = now
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return {}
+        first = self._stamp is False
+        self._stamp = stamp
+
+        config = dict(DEFAULTS)
+        if stamp is not None:
+            try:
+                with open(self.path, "r") as f:
+                    config.update(validate(json.load(f)))
+            except (OSError, ValueError) as e:
+                # Keep serving the last good configuration
+                logger.warning("Failed to load device config: %s", str(e))
+                return {}
+        changed = _changes(self._config, config)
+        self._config = config
+        return {} if first else changed
+
+    def get(self, key, default=None):
+        """Get a configuration value."""
+        self._refresh()
+        value = self._config.get(key)
+        return default if value is None else value
+
+    def all(self):
+        """Get a copy of the whole configuration, with defaults filled in."""
+        self._refresh()
+        return dict(self._config)
+
+    def update(self, changes):
+        """Validate changes, merge them into the config and save it atomically.
+
+        Returns the new configuration. Raises ConfigError for invalid values
+        and OSError when the file cannot be written.
+        """
+        changes = validate(changes)
+        with self._lock:
+            changed = self._reload(force=True)
+            config = dict(self._config)
+            config.update(changes)
+            self._write(config)
+            changed.update(_changes(self._config, config))
+            self._config = config
+            self._stamp = self._file_stamp()
+        if changed:
+            self._notify(changed, dict(config))
+        return dict(config)
+
+    def _write(self, config):
+        directory = os.path.dirname(self.path)
+        handle, temporary = tempfile.mkstemp(
+            dir=directory, prefix=".device_config.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump(config, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def subscribe(self, callback, keys=None):
+        """Call callback(changed, config) when any of keys (default all) change."""
+        with self._lock:
+            self._subscribers.append((callback, set(keys) if keys else None))
+
+    def _notify(self, changed, config):
+        for callback, keys in list(self._subscribers):
+            if keys is not None and not keys & changed.keys():
+                continue
+            try:
+                callback(changed, config)
+            except Exception as e:
+                logger.error("Config subscriber failed: %s", str(e))
+
+
+def _changes(old, new):
+    """Keys whose value differs between two configs, with their new values."""
+    return {
+        key: new.get(key) for key in set(old) | set(new) if old.get(key) != new.get(key)
+    }
+
+
+# Global configuration store
+config_store = DeviceConfig()
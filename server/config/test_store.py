@@ -0,0 +1,140 @@
+"""Unit tests for the device configuration store."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from .store import DEFAULTS, ConfigError, DeviceConfig, validate
+
+
+class TestDeviceConfig(unittest.TestCase):
+    """Test caching, revalidation and atomic updates."""
+
+    def setUp(self):
+        """Set up a store in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "device_config.json")
+        self.store = DeviceConfig(self.path, revalidate=0)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+    def write(self, config):
+        """Write a config file behind the store's back."""
+        with open(self.path, "w") as f:
+            json.dump(config, f)
+
+    def test_defaults(self):
+        """Test defaults are served when there is no file."""
+        self.assertEqual(self.store.all(), DEFAULTS)
+        self.assertEqual(self.store.get("telescopeBaudrate"), 9600)
+        self.assertEqual(self.store.get("latitude", 1.0), 1.0)
+
+    def test_revalidate(self):
+        """Test an edited file is picked up and cached between checks."""
+        self.write({"telescopeDevice": "/dev/ttyUSB0"})
+        self.assertEqual(self.store.get("telescopeDevice"), "/dev/ttyUSB0")
+
+        self.write({"telescopeDevice": "/dev/ttyACM0", "latitude": 45})
+        self.assertEqual(self.store.get("telescopeDevice"), "/dev/ttyACM0")
+        self.assertEqual(self.store.get("latitude"), 45.0)
+
+        cached = DeviceConfig(self.path, revalidate=3600)
+        self.assertEqual(cached.get("telescopeDevice"), "/dev/ttyACM0")
+        self.write({"telescopeDevice": "/dev/ttyUSB1"})
+        self.assertEqual(cached.get("telescopeDevice"), "/dev/ttyACM0")
+
+    def test_invalid_file(self):
+        """Test a broken file keeps the last good configuration."""
+        self.write({"cameraDevice": "/dev/video0"})
+        self.assertEqual(self.store.get("cameraDevice"), "/dev/video0")
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(self.store.get("cameraDevice"), "/dev/video0")
+
+    def test_update_merges(self):
+        """Test updates keep other keys and are written atomically."""
+        self.write({"latitude": 45.0, "mountLimits": {"decMax": 85}})
+        config = self.store.update({"telescopeDevice": "/dev/ttyUSB0"})
+        self.assertEqual(config["latitude"], 45.0)
+        self.assertEqual(config["telescopeDevice"], "/dev/ttyUSB0")
+
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["mountLimits"], {"decMax": 85})
+        self.assertEqual(saved["telescopeDevice"], "/dev/ttyUSB0")
+        self.assertEqual(os.listdir(self.directory), ["device_config.json"])
+
+    def test_update_invalid(self):
+        """Test invalid values are rejected without touching the file."""
+        with self.assertRaises(ConfigError):
+            self.store.update({"telescopeBaudrate": "fast"})
+        with self.assertRaises(ConfigError):
+            self.store.update({"latitude": 100})
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_subscribe(self):
+        """Test subscribers only hear about the keys they asked for."""
+        calls = []
+        self.store.subscribe(
+            lambda changed, config: calls.append(changed), keys=["telescopeDevice"]
+        )
+        self.store.update({"cameraDevice": "/dev/video0"})
+        self.assertEqual(calls, [])
+        self.store.update({"telescopeDevice": "/dev/ttyUSB0"})
+        self.assertEqual(calls, [{"telescopeDevice": "/dev/ttyUSB0"}])
+
+        # An edit on disk notifies as well
+        self.write(dict(self.store.all(), telescopeDevice="/dev/ttyACM0"))
+        self.store.get("telescopeDevice")
+        self.assertEqual(calls[-1], {"telescopeDevice": "/dev/ttyACM0"})
+
+    def test_subscriber_unlocked(self):
+        """Test subscribers run after the lock is released."""
+        calls = []
+
+        def subscriber(changed, config):
+            # Another thread would block on the store's lock if it were held
+            reader = threading.Thread(target=self.store.all)
+            reader.start()
+            reader.join(1)
+            calls.append((changed, reader.is_alive()))
+
+        self.store.subscribe(subscriber)
+        # An edit on disk picked up by an update is reported with it
+        self.write(dict(self.store.all(), cameraDevice="/dev/video1"))
+        self.store.update({"telescopeDevice": "/dev/ttyUSB0"})
+        self.assertEqual(
+            calls,
+            [
+                (
+                    {"cameraDevice": "/dev/video1", "telescopeDevice": "/dev/ttyUSB0"},
+                    False,
+                )
+            ],
+        )
+
+
+class TestValidate(unittest.TestCase):
+    """Test schema validation."""
+
+    def test_coerce(self):
+        """Test numbers given as strings are converted."""
+        config = validate({"telescopeBaudrate": "115200", "latitude": "45.5"})
+        self.assertEqual(config, {"telescopeBaudrate": 115200, "latitude": 45.5})
+
+    def test_nested(self):
+        """Test mount limits and horizon entries are checked."""
+        with self.assertRaises(ConfigError):
+            validate({"mountLimits": {"decMax": "high"}})
+        with self.assertRaises(ConfigError):
+            validate({"horizon": [[0, 10, 5]]})
+        validate({"horizon": [[0, 10], [180, 5.5]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
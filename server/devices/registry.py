@@ -0,0 +1,239 @@
+"""In-memory registry of serial ports, video devices and gphoto2 cameras.
+
+Devices are enumerated once in a background thread started by create_app(),
+or by the first reader when the app was loaded without it. After that a
+watcher lists the device nodes under /dev every WATCH_SECONDS, which is a few
+hundred directory entries, and only rescans the kinds whose nodes appeared or
+disappeared when udev adds or removes them. Readers get the last list and a
+generation counter that increases whenever it changes.
+"""
+
+import logging
+import os
+import threading
+
+import serial.tools.list_ports
+
+from ..backends import BackendUnavailable, LazyModule
+from ..camera.discovery import webcam_discovery
+
+logger = logging.getLogger(__name__)
+
+gp = LazyModule("gphoto2")
+
+DEV_ROOT = "/dev"
+# Seconds between listings of /dev
+WATCH_SECONDS = 2.0
+# Seconds a request waits for the first enumeration
+READY_TIMEOUT = 10.0
+# Kinds whose backend is only loaded once devices are first asked for
+DEFERRED = ("camera",)
+
+
+def scan_serial():
+    """Serial ports from pyserial."""
+    return [
+        {
+            "device": port.device,
+            "description": port.description,
+            "hwid": port.hwid,
+            "vid": port.vid,
+            "pid": port.pid,
+            "manufacturer": port.manufacturer,
+            "product": port.product,
+            "type": "serial",
+        }
+        for port in serial.tools.list_ports.comports()
+    ]
+
+
+def scan_video():
+    """Capture capable video devices from the webcam discovery cache."""
+    return [
+        {
+            "device": camera["device"],
+            "description": camera["name"],
+            "hwid": camera["bus"],
+            "vid": None,
+            "pid": None,
+            "product": camera["name"],
+            "type": "video",
+        }
+        for camera in webcam_discovery.refresh()
+    ]
+
+
+def scan_cameras():
+    """Cameras detected by gphoto2."""
+    try:
+        port_info_list = gp.PortInfoList()
+    except BackendUnavailable:
+        logger.warning("gphoto2 not available")
+        return []
+
+    port_info_list.load()
+    abilities_list = gp.CameraAbilitiesList()
+    abilities_list.load()
+    return [
+        {"device": camera, "type": "camera"}
+        for camera in abilities_list.detect(port_info_list)
+    ]
+
+
+# Kind, scanner and the /dev node prefixes that trigger a rescan, in list order
+SCANNERS = (
+    ("serial", scan_serial, ("tty", "serial/")),
+    ("video", scan_video, ("video",)),
+    ("camera", scan_cameras, ("bus/usb/",)),
+)
+
+
+def _listdir(path):
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def list_nodes(root=DEV_ROOT):
+    """Device node names under root, relative to it.
+
+    Covers root itself, serial/by-id and the USB bus directories gphoto2
+    cameras appear in.
+    """
+    nodes = set(_listdir(root))
+    for name in _listdir(os.path.join(root, "serial", "by-id")):
+        nodes.add(f"serial/by-id/{name}")
+    usb = os.path.join(root, "bus", "usb")
+    for bus in _listdir(usb):
+        for device in _listdir(os.path.join(usb, bus)):
+            nodes.add(f"bus/usb/{bus}/{device}")
+    return frozenset(nodes)
+
+
+class DeviceRegistry:
+    """Current device list, updated when device nodes come and go."""
+
+    def __init__(
+        self,
+        scanners=SCANNERS,
+        root=DEV_ROOT,
+        interval=WATCH_SECONDS,
+        deferred=DEFERRED,
+    ):
+        """Initialize with (kind, scanner, node prefixes) tuples and a /dev root.
+
+        Kinds in deferred are not enumerated at startup but on the first call
+        to devices, which keeps their backend out of memory until needed.
+        """
+        self.scanners = scanners
+        self.root = root
+        self.interval = interval
+        self.deferred = deferred
+        self.generation = 0
+        self._devices = {kind: [] for kind, _, _ in scanners}
+        self._scanned = set()
+        self._nodes = None
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Enumerate devices and watch for changes in a background thread."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="device-registry", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def devices(self, timeout=READY_TIMEOUT):
+        """Get (generation, devices), waiting for the first enumeration.
+
+        Starts the watcher if it was never started, so the first reader waits
+        for one scan instead of the whole timeout.
+        """
+        if self._thread is None:
+            self.start()
+        self._ready.wait(timeout)
+        pending = [kind for kind, _, _ in self.scanners if kind not in self._scanned]
+        if pending:
+            with self._scan_lock:
+                self._scan(pending)
+        with self._lock:
+            return self.generation, [
+                device for kind, _, _ in self.scanners for device in self._devices[kind]
+            ]
+
+    def refresh(self, kinds=None):
+        """Rescan kinds (default all) now, returns the new generation."""
+        with self._scan_lock:
+            if kinds is None:
+                self._nodes = list_nodes(self.root)
+            self._scan(kinds)
+        return self.generation
+
+    def poll(self):
+        """Rescan the kinds whose device nodes changed since the last poll."""
+        with self._scan_lock:
+            nodes = list_nodes(self.root)
+            if self._nodes is None:
+                self._nodes = nodes
+                self._scan(
+                    [kind for kind, _, _ in self.scanners if kind not in self.deferred]
+                )
+                return
+            changed = nodes ^ self._nodes
+            self._nodes = nodes
+            if not changed:
+                return
+            kinds = [
+                kind
+                for kind, _, prefixes in self.scanners
+                if kind in self._scanned
+                and any(node.startswith(prefixes) for node in changed)
+            ]
+            if kinds:
+                logger.info("Device nodes changed, rescanning %s", ", ".join(kinds))
+                self._scan(kinds)
+
+    def _scan(self, kinds):
+        results = {}
+        for kind, scanner, _ in self.scanners:
+            if kinds is not None and kind not in kinds:
+                continue
+            try:
+                results[kind] = scanner()
+            except Exception as e:
+                logger.error("Failed to list %s devices: %s", kind, str(e))
+                results[kind] = self._devices[kind]
+        with self._lock:
+            self._scanned.update(results)
+            if any(results[kind] != self._devices[kind] for kind in results):
+                self._devices.update(results)
+                self.generation += 1
+        self._ready.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("Device watcher failed: %s", str(e))
+            finally:
+                self._ready.set()
+            self._stop.wait(self.interval)
+
+
+# Global device registry
+device_registry = DeviceRegistry()
@@ -0,0 +1,129 @@
+"""Unit tests for the device registry."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from .registry import DeviceRegistry, list_nodes
+
+
+class TestDeviceRegistry(unittest.TestCase):
+    """Test enumeration and incremental rescans."""
+
+    def setUp(self):
+        """Set up a fake /dev and counting scanners."""
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "bus", "usb", "001"))
+        self.calls = {"serial": 0, "video": 0}
+
+        def scanner(kind, prefix):
+            def scan():
+                self.calls[kind] += 1
+                return [
+                    {"device": name, "type": kind}
+                    for name in sorted(os.listdir(self.root))
+                    if name.startswith(prefix)
+                ]
+
+            return scan
+
+        self.registry = DeviceRegistry(
+            (
+                ("serial", scanner("serial", "ttyUSB"), ("tty",)),
+                ("video", scanner("video", "video"), ("video",)),
+            ),
+            root=self.root,
+        )
+
+    def tearDown(self):
+        """Stop the watcher and remove the fake /dev."""
+        self.registry.stop()
+        shutil.rmtree(self.root)
+
+    def add(self, name):
+        """Create a device node."""
+        open(os.path.join(self.root, name), "w").close()
+
+    def test_list_nodes(self):
+        """Test nodes under the root and the USB bus are listed."""
+        self.add("ttyUSB0")
+        self.add(os.path.join("bus", "usb", "001", "004"))
+        self.assertEqual(list_nodes(self.root), {"ttyUSB0", "bus", "bus/usb/001/004"})
+
+    def test_poll_rescans_changed_kind(self):
+        """Test a new serial node only rescans serial ports."""
+        self.add("ttyUSB0")
+        self.registry.poll()
+        self.assertEqual(self.calls, {"serial": 1, "video": 1})
+        generation, devices = self.registry.devices()
+        self.assertEqual(devices, [{"device": "ttyUSB0", "type": "serial"}])
+
+        self.registry.poll()
+        self.assertEqual(self.calls, {"serial": 1, "video": 1})
+
+        self.add("ttyUSB1")
+        self.registry.poll()
+        self.assertEqual(self.calls, {"serial": 2, "video": 1})
+        new_generation, devices = self.registry.devices()
+        self.assertEqual(new_generation, generation + 1)
+        self.assertEqual(len(devices), 2)
+
+    def test_refresh(self):
+        """Test refresh rescans everything and keeps the generation if unchanged."""
+        self.add("video0")
+        generation = self.registry.refresh()
+        self.assertEqual(self.registry.refresh(), generation)
+        self.assertEqual(self.calls, {"serial": 2, "video": 2})
+        self.assertEqual(
+            self.registry.devices()[1], [{"device": "video0", "type": "video"}]
+        )
+
+    def test_failed_scan_keeps_devices(self):
+        """Test a failing scanner keeps its last device list."""
+        self.add("ttyUSB0")
+        self.registry.refresh()
+
+        def fail():
+            raise OSError("busy")
+
+        self.registry.scanners = (
+            ("serial", fail, ("tty",)),
+            self.registry.scanners[1],
+        )
+        self.registry.refresh()
+        self.assertEqual(len(self.registry.devices()[1]), 1)
+
+    def test_deferred(self):
+        """Test deferred kinds are only scanned when devices are read."""
+        self.registry.deferred = ("video",)
+        self.add("video0")
+        self.registry.poll()
+        self.assertEqual(self.calls, {"serial": 1, "video": 0})
+        self.add("video1")
+        self.registry.poll()
+        self.assertEqual(self.calls["video"], 0)
+        self.assertEqual(len(self.registry.devices()[1]), 2)
+        self.assertEqual(self.calls["video"], 1)
+
+    def test_start(self):
+        """Test the watcher thread makes the first enumeration available."""
+        self.add("ttyUSB0")
+        self.registry.start()
+        try:
+            self.assertEqual(len(self.registry.devices(timeout=5)[1]), 1)
+        finally:
+            self.registry.stop()
+
+    def test_started_on_first_use(self):
+        """Test reading devices starts the watcher when nothing else did."""
+        self.add("ttyUSB0")
+        started = time.monotonic()
+        self.assertEqual(len(self.registry.devices(timeout=5)[1]), 1)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(self.registry._thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+"""One bounded work queue per physical device or external service.
+
+Blocking device I/O is submitted to the executor of the device it talks to
+instead of running on the request thread. Each executor has its own worker
+threads, a queue limit, a default timeout and queue depth counters, so a 30 s
+DSLR download only ever waits behind other camera work and never delays a
+mount stop. Urgent jobs, such as :Q#, skip ahead of queued ones.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import copy_current_request_context
+
+from .profiling import request_profiler
+
+logger = logging.getLogger(__name__)
+
+# name: (workers, queue limit, default timeout in seconds)
+EXECUTORS = {
+    "mount": (1, 16, 10.0),
+    "camera": (1, 4, 120.0),
+    "guider": (1, 4, 30.0),
+    "phd2": (1, 8, 10.0),
+    "indi": (1, 8, 30.0),
+    "process": (2, 8, 30.0),
+    # Capture jobs run one after another per device, queueing exposures
+    "camera-jobs": (1, 32, 3600.0),
+    "guider-jobs": (1, 32, 3600.0),
+    # Image encoding and file writes of capture jobs
+    "encode": (1, 16, 60.0),
+}
+
+
+class ExecutorBusy(RuntimeError):
+    """An executor's queue is full."""
+
+
+class ExecutorTimeout(TimeoutError):
+    """A job did not finish within its timeout."""
+
+
+class DeviceExecutor:
+    """Worker threads draining a bounded queue for one device."""
+
+    def __init__(self, name, workers=1, max_queue=8, timeout=30.0):
+        """Initialize an executor, threads start with the first job."""
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._running = 0
+        self._closed = False
+        self.counts = {"completed": 0, "failed": 0, "timed_out": 0, "rejected": 0}
+        self._busy_seconds = 0.0
+
+    @property
+    def queued(self):
+        """Number of jobs waiting for a worker."""
+        with self._condition:
+            return len(self._queue)
+
+    def submit(self, fn, *args, urgent=False, **kwargs):
+        """Queue fn(*args, **kwargs) and return a Future.
+
+        Raises ExecutorBusy when max_queue jobs are already waiting.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} executor is shut down")
+            if len(self._queue) >= self.max_queue:
+                self.counts["rejected"] += 1
+                raise ExecutorBusy(f"{self.name} is busy, try again later")
+            job = (future, fn, args, kwargs)
+            if urgent:
+                self._queue.appendleft(job)
+            else:
+                self._queue.append(job)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"{self.name}-{len(self._threads)}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return future
+
+    def run(self, fn, *args, timeout=None, urgent=False, **kwargs):
+        """Run fn on the executor and wait for its result.
+
+        A job still queued when the timeout expires is cancelled; a running
+        one is left to finish. Raises ExecutorTimeout in both cases. Called
+        from one of the executor's own workers, fn runs right away, as a
+        queued job would wait for the worker that waits for it.
+        """
+        with self._condition:
+            nested = threading.current_thread() in self._threads
+        if nested:
+            return fn(*args, **kwargs)
+        future = self.submit(fn, *args, urgent=urgent, **kwargs)
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            self._timed_out(future)
+            raise ExecutorTimeout(f"{self.name} did not respond in time") from None
+
+    async def run_async(self, fn, *args, timeout=None, urgent=False, **kwargs):
+        """Await fn on the executor, like run without blocking the event loop."""
+        future = self.submit(fn, *args, urgent=urgent, **kwargs)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                self.timeout if timeout is None else timeout,
+            )
+        except asyncio.TimeoutError:
+            self._timed_out(future)
+            raise ExecutorTimeout(f"{self.name} did not respond in time") from None
+
+    def _timed_out(self, future):
+        with self._condition:
+            self.counts["timed_out"] += 1
+        future.cancel()
+
+    def cancel_pending(self):
+        """Cancel every queued job, returns how many were cancelled."""
+        with self._condition:
+            jobs = list(self._queue)
+            self._queue.clear()
+        for future, _, _, _ in jobs:
+            future.cancel()
+        return len(jobs)
+
+    def shutdown(self):
+        """Cancel queued jobs and stop the workers after their current job."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.cancel_pending()
+
+    def metrics(self):
+        """Queue depth, running jobs and counters of this executor."""
+        with self._condition:
+            return dict(
+                self.counts,
+                name=self.name,
+                workers=self.workers,
+                queued=len(self._queue),
+                running=self._running,
+                max_queue=self.max_queue,
+                busy_seconds=round(self._busy_seconds, 3),
+            )
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._queue:
+                    return
+                future, fn, args, kwargs = self._queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+
+            began = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                outcome = "failed"
+            else:
+                future.set_result(result)
+                outcome = "completed"
+            with self._condition:
+                self._running -= 1
+                self.counts[outcome] += 1
+                self._busy_seconds += time.monotonic() - began
+
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(name):
+    """Get the executor for a device or service named in EXECUTORS."""
+    with _lock:
+        if name not in _executors:
+            workers, max_queue, timeout = EXECUTORS[name]
+            _executors[name] = DeviceExecutor(name, workers, max_queue, timeout)
+        return _executors[name]
+
+
+def executor_metrics():
+    """Metrics of every executor that has been used."""
+    with _lock:
+        executors = list(_executors.values())
+    return [executor.metrics() for executor in executors]
+
+
+def on_executor(name, urgent=None, timeout=None):
+    """Decorate a Flask view to run on a device executor.
+
+    The view runs in the executor's thread with a copy of the request
+    context and counts toward the request's profile. urgent is an optional
+    callable, evaluated on the request thread, that puts the job at the
+    front of the queue when it returns True.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            job = copy_current_request_context(request_profiler.follow(view))
+            return get_executor(name).run(
+                job,
+                *args,
+                timeout=timeout,
+                urgent=bool(urgent and urgent()),
+                **kwargs,
+            )
+
+        return wrapper
+
+    return decorator
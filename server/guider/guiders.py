@@ -3,7 +3,10 @@
 import os
 import time
 
-import cv2
+from ..backends import LazyModule
+from ..camera.capture import capture_service
+
+cv2 = LazyModule("cv2")
 
 IMAGE_PATH = "/var/www/images"
 
@@ -13,17 +16,10 @@ class GuiderCamera:
         self.name = name
         self.index = index
 
-    def get_image(self):
-        cap = cv2.VideoCapture(self.index)
-        if not cap.isOpened():
-            cap.release()
-            raise Exception(f"Cannot open guider camera at index {self.index}")
-
-        ret, frame = cap.read()
-        cap.release()
-
-        if not ret:
-            raise Exception("Failed to capture frame from guider camera")
+    def get_image(self, fresh=False):
+        """Save the newest frame of the guider, or the next one when fresh."""
+        capture = capture_service.get(self.index)
+        frame = capture.next() if fresh else capture.latest()
 
         filename = self.output_file_name()
         filepath = f"{IMAGE_PATH}/{filename}"
@@ -31,7 +27,7 @@ class GuiderCamera:
         # Ensure directory exists
         os.makedirs(IMAGE_PATH, exist_ok=True)
 
-        success = cv2.imwrite(filepath, frame)
+        success = cv2.imwrite(filepath, frame.image)
         if not success:
             raise Exception("Failed to save guider image")
 
@@ -1,17 +1,27 @@
 """PHD2 JSON-RPC client for guiding control."""
 
 import json
+import time
 from typing import Any, Dict, Optional
 
-import requests
+from ..backends import LazyModule
+
+requests = LazyModule("requests")
 
 
 class PHD2Client:
     def __init__(self, host: str = "localhost", port: int = 4400):
         self.base_url = f"http://{host}:{port}"
-        self.session = requests.Session()
-        self.session.timeout = 5
+        self.timeout = 5
         self.request_id = 1
+        self._session = None
+
+    @property
+    def session(self):
+        """HTTP session, created on the first request."""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
 
     def _send_request(
         self, method: str, params: Optional[Dict[str, Any]] = None
@@ -24,7 +34,9 @@ class PHD2Client:
         self.request_id += 1
 
         try:
-            response = self.session.post(self.base_url, json=payload)
+            response = self.session.post(
+                self.base_url, json=payload, timeout=self.timeout
+            )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -43,11 +55,71 @@ class PHD2Client:
         except:
             return False
 
-    def start_guiding(self) -> bool:
-        """Start PHD2 guiding."""
+    def start_guiding(
+        self, pixels: float = 1.5, settle_time: int = 10, timeout: int = 100
+    ) -> bool:
+        """Start PHD2 guiding, settled once within pixels for settle_time seconds."""
+        try:
+            result = self._send_request(
+                "guide",
+                {
+                    "settle": {
+                        "pixels": pixels,
+                        "time": settle_time,
+                        "timeout": timeout,
+                    }
+                },
+            )
+            return "error" not in result
+        except:
+            return False
+
+    def is_settling(self) -> bool:
+        """Check if PHD2 is still settling after a guide or dither command."""
+        result = self._send_request("get_settling")
+        return bool(result.get("result", False))
+
+    def wait_for_settle(self, timeout: float = 100, poll: float = 1.0) -> bool:
+        """Wait until PHD2 has settled, False on timeout or lost guiding.
+
+        PHD2 announces the end of settling with SettleDone and GuidingDithered
+        events, but this client only sends requests and never reads the event
+        stream, so get_settling is polled every poll seconds instead.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not self.is_settling():
+                    return self.get_app_state() == "Guiding"
+            except Exception:
+                return False
+            time.sleep(poll)
+        return False
+
+    def dither(
+        self,
+        amount: float = 5.0,
+        ra_only: bool = False,
+        pixels: float = 1.5,
+        settle_time: int = 10,
+        timeout: int = 100,
+    ) -> bool:
+        """Shift the lock position by up to amount pixels and settle again.
+
+        Follow with wait_for_settle to know when guiding has settled.
+        """
         try:
             result = self._send_request(
-                "guide", {"settle": {"pixels": 1.5, "time": 10, "timeout": 100}}
+                "dither",
+                {
+                    "amount": amount,
+                    "raOnly": ra_only,
+                    "settle": {
+                        "pixels": pixels,
+                        "time": settle_time,
+                        "timeout": timeout,
+                    },
+                },
             )
             return "error" not in result
         except:
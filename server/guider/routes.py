@@ -1,11 +1,20 @@
 """Routes to query and control Guider"""
 
-import json
 import os
 import subprocess
 
 from flask import Blueprint, abort, jsonify, request
 
+from ..camera.capture import video_index
+from ..camera.stream import (
+    configured_max_fps,
+    stream_hub,
+    stream_response,
+    video_source,
+)
+from ..config.store import config_store
+from ..executors import on_executor
+from ..jobs.routes import queue_capture
 from .guiders import GuiderCamera
 from .phd2_client import PHD2Client
 
@@ -16,13 +25,8 @@ phd2 = PHD2Client()
 
 
 def get_configured_guider():
-    """Get the configured guider device from config file."""
-    config_file = "device_config.json"
-    if os.path.exists(config_file):
-        with open(config_file, "r") as f:
-            config = json.load(f)
-            return config.get("guiderDevice", "")
-    return ""
+    """Get the configured guider device from the config store."""
+    return config_store.get("guiderDevice", "")
 
 
 @guider_bp.route("/")
@@ -31,17 +35,31 @@ def index():
     return jsonify({"message": "This is the guider blueprint"})
 
 
+@guider_bp.route("/capture", methods=["POST"])
+def queue_capture_job():
+    """Queue a capture job, returns its id at once with 202.
+
+    Takes "exposure" in seconds, "count" and "format"; progress is at
+    /api/jobs/<id>.
+    """
+    return queue_capture("guider", request.get_json(silent=True) or {})
+
+
 @guider_bp.route("/capture")
+@on_executor("guider")
 def capture():
-    """Capture image from configured guider camera"""
+    """Capture image from configured guider camera.
+
+    Saves the newest frame, or with fresh=1 the first one exposed after the
+    request.
+    """
     configured_device = get_configured_guider()
     if not configured_device:
         return jsonify({"error": "No guider configured"}), 400
 
     try:
-        # Use index 0 for the first available camera
-        guider = GuiderCamera("guider", 0)
-        filename = guider.get_image()
+        guider = GuiderCamera("guider", video_index(configured_device))
+        filename = guider.get_image(fresh=request.args.get("fresh") in ("1", "true"))
         return jsonify(
             {"filename": filename, "message": "Guider image captured successfully"}
         )
@@ -54,13 +72,29 @@ def capture():
         return jsonify({"error": f"Failed to capture guider image: {str(e)}"}), 500
 
 
+@guider_bp.route("/stream")
+def stream():
+    """MJPEG live view of the configured guider, fps= lowers the frame rate."""
+    configured_device = get_configured_guider()
+    if not configured_device:
+        return jsonify({"error": "No guider configured"}), 400
+
+    index = video_index(configured_device)
+    live = stream_hub.get(
+        f"video{index}", lambda: video_source(index), configured_max_fps()
+    )
+    return stream_response(live, request.args.get("fps", type=float))
+
+
 @guider_bp.route("/phd2/status")
+@on_executor("phd2")
 def phd2_status():
     """Get PHD2 connection status"""
     return jsonify(phd2.get_status())
 
 
 @guider_bp.route("/phd2/connect", methods=["POST"])
+@on_executor("phd2")
 def phd2_connect():
     """Connect to PHD2"""
     status = phd2.get_status()
@@ -71,6 +105,7 @@ def phd2_connect():
 
 
 @guider_bp.route("/phd2/start_guiding", methods=["POST"])
+@on_executor("phd2")
 def start_guiding():
     """Start PHD2 guiding"""
     if not phd2.is_connected():
@@ -84,6 +119,7 @@ def start_guiding():
 
 
 @guider_bp.route("/phd2/stop_guiding", methods=["POST"])
+@on_executor("phd2")
 def stop_guiding():
     """Stop PHD2 guiding"""
     if not phd2.is_connected():
@@ -97,6 +133,7 @@ def stop_guiding():
 
 
 @guider_bp.route("/phd2/process/status")
+@on_executor("process")
 def phd2_process_status():
     """Check if PHD2 process is running"""
     try:
@@ -108,6 +145,7 @@ def phd2_process_status():
 
 
 @guider_bp.route("/phd2/process/control", methods=["POST"])
+@on_executor("process")
 def phd2_process_control():
     """Start or stop PHD2 process"""
     data = request.get_json()
@@ -0,0 +1,110 @@
+"""Routes for statistics of saved and live frames."""
+
+import json
+import os
+import time
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from ..camera.cameras import gphoto_port
+from ..camera.capture import CaptureError, capture_service, video_index
+from ..catalog.visibility import LRUCache
+from ..config.store import config_store
+from ..jobs.formats import read_image
+from ..jobs.runner import DEVICES, job_queue
+from .stats import image_stats, parse_roi
+
+images_bp = Blueprint("images", __name__, url_prefix="/api/images")
+
+# Statistics kept by image, modification time, region and resolution
+stats_cache = LRUCache(256)
+# Seconds between live statistics, and the shortest interval allowed
+LIVE_INTERVAL = 1.0
+MIN_INTERVAL = 0.1
+
+
+def _full():
+    return request.args.get("full", "0").lower() in ("1", "true", "yes")
+
+
+def live_thread(device):
+    """Capture thread of the video device configured for device.
+
+    Raises ValueError for unknown devices and DSLRs.
+    """
+    if device not in DEVICES:
+        raise ValueError(f"device must be one of {', '.join(DEVICES)}")
+    configured = config_store.get(DEVICES[device], "")
+    if not configured or gphoto_port(configured):
+        raise ValueError(f"Live statistics need a video {device}")
+    return capture_service.get(video_index(configured))
+
+
+@images_bp.route("/<image_id>/stats")
+def stats(image_id):
+    """Statistics of a saved image, ?roi=x,y,w,h and ?full=1 for no binning.
+
+    image_id is a file name from a capture job's "files". Results are
+    cached until the file changes.
+    """
+    if image_id != os.path.basename(image_id) or image_id.startswith("."):
+        abort(404)
+    path = os.path.join(job_queue.output, image_id)
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except OSError:
+        abort(404)
+
+    # Looked up before the file is decoded, so a hit costs one stat
+    roi_text = request.args.get("roi") or None
+    key = (image_id, modified, roi_text, _full())
+    result = stats_cache.get(key)
+    if result is None:
+        try:
+            image = read_image(path)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 415
+        try:
+            roi = parse_roi(roi_text, image.shape)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = stats_cache.put(
+            key, dict(image_stats(image, roi, key[3]), id=image_id)
+        )
+    return jsonify(result)
+
+
+@images_bp.route("/live/<device>/stats")
+def live_stats(device):
+    """Server-sent events with statistics of the live camera or guider frame.
+
+    One event every ?interval= seconds (default 1), ?roi= and ?full= as for
+    saved images. The stream ends with an "error" event if the device fails.
+    """
+    try:
+        interval = max(MIN_INTERVAL, float(request.args.get("interval", LIVE_INTERVAL)))
+        thread = live_thread(device)
+        roi_text = request.args.get("roi")
+        full = _full()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def events():
+        while True:
+            began = time.monotonic()
+            try:
+                frame = thread.next()
+                result = image_stats(
+                    frame.image, parse_roi(roi_text, frame.image.shape), full
+                )
+            except (CaptureError, ValueError) as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+            result.update(seq=frame.seq, timestamp=frame.timestamp)
+            yield f"data: {json.dumps(result)}\n\n"
+            time.sleep(max(0.0, interval - (time.monotonic() - began)))
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,200 @@
+"""Per-frame image statistics computed with vectorized NumPy.
+
+A frame, or a region of it, is reduced to one channel and binned so its long
+side is at most MAX_SIDE pixels, unless full resolution is asked for. Median,
+background and noise are robust estimates from a regular sample of that
+view. Stars are the local maxima DETECTION_SIGMA above the background with
+at least one neighbour above it too, which leaves out hot pixels; the
+brightest MAX_STARS are measured in a box around them. Sizes are given in
+pixels of the full frame.
+"""
+
+import math
+import time
+
+import numpy as np
+
+# Longest side of the binned view
+MAX_SIDE = 1024
+HISTOGRAM_BINS = 256
+# Every SAMPLE_STEP-th row and column is used for median and noise
+SAMPLE_STEP = 4
+DETECTION_SIGMA = 5.0
+# Half width of the box stars are measured in, binned pixels
+STAR_BOX = 8
+MAX_STARS = 200
+# MAD to standard deviation of a normal distribution
+MAD_SIGMA = 1.4826
+
+_NEIGHBOURS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+
+def parse_roi(text, shape):
+    """(x, y, width, height) from "x,y,w,h" clipped to a frame shape, None for all.
+
+    Raises ValueError on a malformed or empty region.
+    """
+    if not text:
+        return None
+    try:
+        x, y, width, height = (int(value) for value in text.split(","))
+    except ValueError:
+        raise ValueError("roi must be x,y,width,height") from None
+    x, y = max(0, x), max(0, y)
+    width = min(width, shape[1] - x)
+    height = min(height, shape[0] - y)
+    if width <= 0 or height <= 0:
+        raise ValueError("roi is outside the frame")
+    return x, y, width, height
+
+
+def white_level(image):
+    """Saturation level of a frame's samples."""
+    if np.issubdtype(image.dtype, np.integer):
+        return float(np.iinfo(image.dtype).max)
+    return max(1.0, float(image.max()))
+
+
+def binned(image, factor):
+    """One channel float32 copy of image averaged over factor x factor blocks.
+
+    Strided adds are much faster than summing a reshaped view.
+    """
+    height = image.shape[0] // factor * factor
+    width = image.shape[1] // factor * factor
+    channels = image.shape[2] if image.ndim == 3 else 1
+    total = np.zeros((height // factor, width // factor), dtype=np.float32)
+    for row in range(factor):
+        for column in range(factor):
+            block = image[row:height:factor, column:width:factor]
+            if block.ndim == 3:
+                for channel in range(channels):
+                    total += block[..., channel]
+            else:
+                total += block
+    if factor > 1 or channels > 1:
+        total /= factor * factor * channels
+    return total
+
+
+def histogram(work, white):
+    """Counts of work in HISTOGRAM_BINS equal bins from 0 to white."""
+    index = (work * (HISTOGRAM_BINS / white)).astype(np.intp)
+    np.clip(index, 0, HISTOGRAM_BINS - 1, out=index)
+    return np.bincount(index.ravel(), minlength=HISTOGRAM_BINS)
+
+
+def background(work):
+    """Median, sigma clipped background and noise of a view, from a sample."""
+    sample = work[::SAMPLE_STEP, ::SAMPLE_STEP].ravel()
+    median = float(np.median(sample))
+    noise = MAD_SIGMA * float(np.median(np.abs(sample - median)))
+    # Stars and nebulae only raise the sky, so clip above it
+    sky = sample[sample < median + 3.0 * noise] if noise > 0 else sample
+    level = float(np.median(sky)) if sky.size else median
+    return median, level, noise
+
+
+def find_peaks(work, threshold):
+    """Rows and columns of local maxima above threshold with a neighbour above it."""
+    ys, xs = np.nonzero(work[1:-1, 1:-1] > threshold)
+    ys += 1
+    xs += 1
+    values = work[ys, xs]
+    keep = np.ones(values.shape, dtype=bool)
+    above = np.zeros(values.shape, dtype=np.int8)
+    for dy, dx in _NEIGHBOURS:
+        neighbour = work[ys + dy, xs + dx]
+        # Ties go to the first pixel, so a flat top is one peak
+        keep &= values >= neighbour if (dy, dx) > (0, 0) else values > neighbour
+        above += neighbour > threshold
+    keep &= above > 0
+    return ys[keep], xs[keep]
+
+
+def measure_stars(work, ys, xs):
+    """HFR and FWHM in binned pixels of the stars at ys, xs.
+
+    Each box is less the median of its edge, the star's local background.
+    FWHM is the diameter of a disc as large as the pixels above half the
+    peak, and HFR the flux weighted mean distance from the centroid within
+    1.5 FWHM, so noise far from small stars does not swamp them.
+    """
+    offsets = np.arange(-STAR_BOX, STAR_BOX + 1)
+    dy = offsets[None, :, None].astype(np.float32)
+    dx = offsets[None, None, :].astype(np.float32)
+    patches = work[ys[:, None, None] + offsets[:, None], xs[:, None, None] + offsets]
+    edge = np.concatenate(
+        [patches[:, 0], patches[:, -1], patches[:, 1:-1, 0], patches[:, 1:-1, -1]],
+        axis=1,
+    )
+    patches -= np.median(edge, axis=1)[:, None, None]
+    peak = patches[:, STAR_BOX, STAR_BOX]
+    half = np.count_nonzero(patches >= peak[:, None, None] / 2.0, axis=(1, 2))
+    fwhm = 2.0 * np.sqrt(half / np.pi)
+    radius = np.clip(1.5 * fwhm, 2.0, STAR_BOX)
+    patches *= dy**2 + dx**2 <= radius[:, None, None] ** 2
+    flux = patches.sum(axis=(1, 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cy = (patches * dy).sum(axis=(1, 2)) / flux
+        cx = (patches * dx).sum(axis=(1, 2)) / flux
+        distance = np.sqrt(
+            (dy - cy[:, None, None]) ** 2 + (dx - cx[:, None, None]) ** 2
+        )
+        hfr = (patches * distance).sum(axis=(1, 2)) / flux
+    good = (flux > 0) & (hfr > 0)
+    return hfr[good], fwhm[good]
+
+
+def image_stats(image, roi=None, full=False):
+    """Statistics of a frame array (height, width[, channels]).
+
+    roi is (x, y, width, height) in frame pixels, full skips binning.
+    Returns a dict of plain numbers for JSON.
+    """
+    began = time.perf_counter()
+    frame_height, frame_width = image.shape[:2]
+    if roi is not None:
+        x, y, width, height = roi
+        image = image[y : y + height, x : x + width]
+    white = white_level(image)
+    factor = 1 if full else max(1, math.ceil(max(image.shape[:2]) / MAX_SIDE))
+    work = binned(image, factor)
+
+    median, level, noise = background(work)
+    counts = histogram(work, white)
+    saturated = np.count_nonzero(image >= white) / image.size
+
+    threshold = level + DETECTION_SIGMA * max(noise, white * 1e-4)
+    ys, xs = find_peaks(work, threshold)
+    stars = int(ys.size)
+    # Brightest stars with a whole box inside the view
+    inside = (
+        (ys >= STAR_BOX)
+        & (ys < work.shape[0] - STAR_BOX)
+        & (xs >= STAR_BOX)
+        & (xs < work.shape[1] - STAR_BOX)
+    )
+    ys, xs = ys[inside], xs[inside]
+    if ys.size > MAX_STARS:
+        brightest = np.argpartition(work[ys, xs], -MAX_STARS)[-MAX_STARS:]
+        ys, xs = ys[brightest], xs[brightest]
+    hfr, fwhm = measure_stars(work, ys, xs)
+
+    return {
+        "width": frame_width,
+        "height": frame_height,
+        "roi": list(roi) if roi is not None else None,
+        "bin": factor,
+        "white": white,
+        "histogram": counts.tolist(),
+        "median": round(median, 3),
+        "background": round(level, 3),
+        "noise": round(noise, 3),
+        "saturated_percent": round(100.0 * float(saturated), 4),
+        "stars": stars,
+        "measured": int(hfr.size),
+        "hfr": round(float(np.median(hfr)) * factor, 3) if hfr.size else None,
+        "fwhm": round(float(np.median(fwhm)) * factor, 3) if fwhm.size else None,
+        "elapsed_ms": round((time.perf_counter() - began) * 1000.0, 1),
+    }
@@ -0,0 +1,154 @@
+"""Unit tests for image statistics."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+from flask import Flask
+
+from ..camera.capture import CaptureError, Frame
+from . import routes
+from .stats import image_stats, parse_roi
+
+STAR_SIGMA = 1.5
+
+
+def star_field(shape=(600, 800), stars=40, seed=3, colour=False):
+    """8-bit frame of Gaussian stars on a noisy sky, and their positions."""
+    rng = np.random.default_rng(seed)
+    image = rng.normal(40.0, 4.0, shape)
+    rows, columns = np.mgrid[0 : shape[0], 0 : shape[1]]
+    positions = []
+    for _ in range(stars):
+        y, x = rng.uniform(20, shape[0] - 20), rng.uniform(20, shape[1] - 20)
+        box = (slice(int(y) - 12, int(y) + 13), slice(int(x) - 12, int(x) + 13))
+        distance = (rows[box] - y) ** 2 + (columns[box] - x) ** 2
+        image[box] += 150.0 * np.exp(-distance / (2.0 * STAR_SIGMA**2))
+        positions.append((y, x))
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    if colour:
+        image = np.repeat(image[..., None], 3, axis=2)
+    return image, positions
+
+
+class TestImageStats(unittest.TestCase):
+    """Test statistics of synthetic frames."""
+
+    def test_star_field(self):
+        """Test sky level, noise, star count and star size."""
+        image, positions = star_field()
+        stats = image_stats(image, full=True)
+        self.assertEqual(stats["bin"], 1)
+        self.assertAlmostEqual(stats["background"], 40.0, delta=1.0)
+        self.assertAlmostEqual(stats["noise"], 4.0, delta=0.5)
+        # Overlapping stars may merge
+        self.assertAlmostEqual(stats["stars"], len(positions), delta=2)
+        self.assertAlmostEqual(stats["fwhm"], 2.3548 * STAR_SIGMA, delta=0.5)
+        self.assertAlmostEqual(stats["hfr"], 1.2533 * STAR_SIGMA, delta=0.3)
+        self.assertEqual(sum(stats["histogram"]), image.size)
+        self.assertEqual(stats["saturated_percent"], 0.0)
+
+    def test_binned(self):
+        """Test large frames are binned and sizes stay in frame pixels."""
+        image, positions = star_field((1200, 2400), stars=60, colour=True)
+        stats = image_stats(image)
+        self.assertEqual(stats["bin"], 3)
+        self.assertEqual(sum(stats["histogram"]), 400 * 800)
+        self.assertAlmostEqual(stats["stars"], len(positions), delta=3)
+        self.assertAlmostEqual(stats["fwhm"], 2.3548 * STAR_SIGMA, delta=1.5)
+
+    def test_hot_pixels_and_saturation(self):
+        """Test single hot pixels are not stars but count as saturated."""
+        image = np.full((100, 100), 20, dtype=np.uint16)
+        image[10, 10] = image[50, 70] = 65535
+        stats = image_stats(image)
+        self.assertEqual(stats["stars"], 0)
+        self.assertIsNone(stats["hfr"])
+        self.assertAlmostEqual(stats["saturated_percent"], 0.02)
+        self.assertEqual(stats["white"], 65535.0)
+
+    def test_roi(self):
+        """Test a region is measured on its own."""
+        image, _ = star_field()
+        image[:, 400:] = 200
+        roi = parse_roi("0,0,400,600", image.shape)
+        self.assertAlmostEqual(image_stats(image, roi)["background"], 40.0, delta=1.0)
+        self.assertEqual(
+            parse_roi("700,500,500,500", image.shape), (700, 500, 100, 100)
+        )
+        with self.assertRaises(ValueError):
+            parse_roi("900,0,10,10", image.shape)
+        with self.assertRaises(ValueError):
+            parse_roi("1,2,3", image.shape)
+
+
+class TestImageRoutes(unittest.TestCase):
+    """Test the statistics routes."""
+
+    def setUp(self):
+        """Set up an app with the images blueprint and an image directory."""
+        self.output = tempfile.mkdtemp()
+        patcher = patch.object(routes.job_queue, "output", self.output)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        routes.stats_cache.clear()
+        app = Flask(__name__)
+        app.register_blueprint(routes.images_bp)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Remove the image directory."""
+        shutil.rmtree(self.output)
+
+    def test_saved_image(self):
+        """Test statistics of a saved frame are computed once and cached."""
+        image, _ = star_field()
+        np.save(os.path.join(self.output, "camera_abc_001.npy"), image)
+        with patch.object(routes, "read_image", wraps=routes.read_image) as read:
+            with patch.object(routes, "image_stats", wraps=routes.image_stats) as stats:
+                first = self.client.get("/api/images/camera_abc_001.npy/stats")
+                second = self.client.get("/api/images/camera_abc_001.npy/stats")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(first.get_json()["id"], "camera_abc_001.npy")
+        stats.assert_called_once()
+        # Cache hits do not decode the file again
+        read.assert_called_once()
+
+        response = self.client.get("/api/images/camera_abc_001.npy/stats?roi=a")
+        self.assertEqual(response.status_code, 400)
+
+    def test_errors(self):
+        """Test unknown images are 404 and unreadable formats 415."""
+        self.assertEqual(self.client.get("/api/images/nope.npy/stats").status_code, 404)
+        with open(os.path.join(self.output, "IMG_0001.CR2"), "wb") as f:
+            f.write(b"raw")
+        response = self.client.get("/api/images/IMG_0001.CR2/stats")
+        self.assertEqual(response.status_code, 415)
+
+    def test_live(self):
+        """Test live statistics stream until the device fails."""
+        image, _ = star_field()
+        thread = Mock()
+        thread.next.side_effect = [
+            Frame(1, 100.0, image),
+            CaptureError("No frame from camera 0"),
+        ]
+        with patch.object(routes, "live_thread", return_value=thread):
+            body = self.client.get("/api/images/live/guider/stats?interval=0")
+        events = body.get_data(as_text=True).strip().split("\n\n")
+        self.assertEqual(json.loads(events[0][len("data: ") :])["seq"], 1)
+        self.assertTrue(events[1].startswith("event: error"))
+
+    def test_live_invalid(self):
+        """Test unknown devices are refused."""
+        response = self.client.get("/api/images/live/telescope/stats")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
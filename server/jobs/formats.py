@@ -0,0 +1,182 @@
+"""Image file formats for captured frames.
+
+JPEG and PNG are encoded with OpenCV. "npy" is the frame array as NumPy
+writes it, and FITS is a primary HDU with the header cards given by the
+caller. Both are written from the frame buffer; 8-bit frames, which is
+what video devices return, need no conversion at all since FITS only asks
+larger samples to be big-endian. Saved frames are read back, memory mapped
+for npy and FITS, for analysis.
+"""
+
+import os
+
+import numpy as np
+
+from ..backends import LazyModule
+
+cv2 = LazyModule("cv2")
+
+# Format name and file extension
+FORMATS = {"jpeg": ".jpg", "png": ".png", "npy": ".npy", "fits": ".fits"}
+JPEG_QUALITY = 90
+# Sample types each format can store, None for any
+FORMAT_DTYPES = {
+    "jpeg": (np.dtype(np.uint8),),
+    "png": (np.dtype(np.uint8), np.dtype(np.uint16)),
+    "npy": None,
+}
+FITS_BLOCK = 2880
+CARD = 80
+# Sample type and FITS BITPIX, unsigned 16 bits is stored offset by BZERO
+BITPIX = {
+    np.dtype(np.uint8): 8,
+    np.dtype(np.int16): 16,
+    np.dtype(np.uint16): 16,
+    np.dtype(np.int32): 32,
+    np.dtype(np.float32): -32,
+    np.dtype(np.float64): -64,
+}
+
+
+def fits_card(key, value, comment=""):
+    """One 80 character header card in fixed format."""
+    if isinstance(value, (bool, np.bool_)):
+        text = f"{'T' if value else 'F':>20}"
+    elif isinstance(value, (int, np.integer)):
+        text = f"{int(value):>20d}"
+    elif isinstance(value, (float, np.floating)):
+        text = f"{float(value):>20.10G}"
+    else:
+        text = "'{:<8}'".format(str(value).replace("'", "''"))
+    card = f"{key:<8}= {text}"
+    if comment:
+        card += f" / {comment}"
+    return card[:CARD].ljust(CARD)
+
+
+def fits_header(image, cards=()):
+    """Primary header bytes for image, followed by (key, value, comment) cards.
+
+    Colour frames are stored as three planes, red first.
+    """
+    if image.dtype not in BITPIX:
+        raise ValueError(f"FITS cannot store {image.dtype} samples")
+    axes = image.shape[1::-1] + image.shape[2:]
+    lines = [
+        fits_card("SIMPLE", True, "conforms to FITS standard"),
+        fits_card("BITPIX", BITPIX[image.dtype]),
+        fits_card("NAXIS", len(axes)),
+    ]
+    lines += [fits_card(f"NAXIS{n}", size) for n, size in enumerate(axes, 1)]
+    if image.dtype == np.uint16:
+        lines.append(fits_card("BZERO", 32768, "unsigned 16 bit samples"))
+        lines.append(fits_card("BSCALE", 1))
+    lines.append(fits_card("ROWORDER", "TOP-DOWN", "first row is the top"))
+    lines += [fits_card(*card) for card in cards]
+    lines.append("END".ljust(CARD))
+    header = "".join(lines).encode("ascii", "replace")
+    return header + b" " * (-len(header) % FITS_BLOCK)
+
+
+def fits_data(image):
+    """Image samples in FITS order, the frame itself when no conversion is needed."""
+    if image.ndim == 3:
+        # Interleaved BGR to RGB planes, the one copy colour frames need
+        image = image.transpose(2, 0, 1)[::-1]
+    if image.dtype == np.uint16:
+        data = np.array(image, dtype=">u2", order="C")
+        data ^= 0x8000  # Less BZERO, as signed samples
+        return data.view(">i2")
+    return np.ascontiguousarray(image, dtype=image.dtype.newbyteorder(">"))
+
+
+def write_fits(f, image, cards=()):
+    """Write image to an open binary file as FITS with the extra header cards."""
+    data = fits_data(image)
+    f.write(fits_header(image, cards))
+    f.write(memoryview(data).cast("B"))
+    f.write(b"\0" * (-data.nbytes % FITS_BLOCK))
+
+
+def read_fits(path):
+    """Frame array of a FITS file's primary HDU, memory mapped where possible.
+
+    Colour planes are returned interleaved in BGR order, as OpenCV reads
+    frames.
+    """
+    header = {}
+    with open(path, "rb") as f:
+        while "END" not in header:
+            block = f.read(FITS_BLOCK)
+            if len(block) < FITS_BLOCK:
+                raise ValueError("Truncated FITS header")
+            for start in range(0, FITS_BLOCK, CARD):
+                card = block[start : start + CARD].decode("ascii", "replace")
+                key = card[:8].strip()
+                if key == "END":
+                    header["END"] = True
+                    break
+                if card[8:10] == "= ":
+                    header[key] = card[10:].split("/")[0].strip()
+        offset = f.tell()
+    if header.get("SIMPLE") != "T":
+        raise ValueError("Not a FITS file")
+    dtypes = {bitpix: dtype for dtype, bitpix in BITPIX.items() if dtype != np.uint16}
+    try:
+        dtype = dtypes[int(header["BITPIX"])].newbyteorder(">")
+        axes = [int(header[f"NAXIS{n}"]) for n in range(int(header["NAXIS"]), 0, -1)]
+    except (KeyError, ValueError):
+        raise ValueError("Unsupported FITS header") from None
+    image = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=tuple(axes))
+    if header.get("BZERO") == "32768" and dtype == np.dtype(">i2"):
+        image = image.view(">u2") ^ np.uint16(0x8000)
+    if image.ndim == 3:
+        image = image[::-1].transpose(1, 2, 0)
+    return image
+
+
+def read_image(path):
+    """Frame array of an image saved in one of FORMATS, raises ValueError."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == FORMATS["npy"]:
+        return np.load(path, mmap_mode="r")
+    if extension in (FORMATS["fits"], ".fit", ".fts"):
+        return read_fits(path)
+    if extension in (FORMATS["jpeg"], ".jpeg", FORMATS["png"]):
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError(f"Cannot read {os.path.basename(path)}")
+        return image
+    raise ValueError(f"Cannot read {extension or 'unknown'} files")
+
+
+def check_format(image_format, dtype):
+    """Raise ValueError unless image_format can store samples of dtype."""
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown image format: {image_format}")
+    dtype = np.dtype(dtype)
+    allowed = FORMAT_DTYPES.get(image_format, tuple(BITPIX))
+    if allowed is not None and dtype not in allowed:
+        raise ValueError(f"{image_format} cannot store {dtype} samples")
+
+
+def write_image(path, image, image_format, cards=(), quality=JPEG_QUALITY):
+    """Write a frame array to path in one of FORMATS.
+
+    cards are extra FITS header cards, quality is the JPEG quality.
+    """
+    check_format(image_format, image.dtype)
+    if image_format in ("jpeg", "png"):
+        params = []
+        if image_format == "jpeg":
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+        ok, encoded = cv2.imencode(FORMATS[image_format], image, params)
+        if not ok:
+            raise RuntimeError("Failed to encode image")
+    with open(path, "wb") as f:
+        if image_format == "fits":
+            write_fits(f, image, cards)
+        elif image_format == "npy":
+            np.save(f, image)
+        else:
+            f.write(encoded)
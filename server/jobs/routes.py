@@ -0,0 +1,79 @@
+"""Routes to queue capture jobs and follow their progress."""
+
+import json
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from .runner import JPEG_QUALITY, CaptureJob, JobError, job_queue
+
+jobs_bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+# Seconds between keepalive comments on a job stream
+KEEPALIVE = 15.0
+
+
+def queue_capture(device, data):
+    """Queue a capture job for device from a request body, 202 with the job."""
+    try:
+        job = CaptureJob(
+            device,
+            exposure=data.get("exposure", 0.0),
+            count=data.get("count", 1),
+            image_format=data.get("format", "jpeg"),
+            quality=data.get("quality", JPEG_QUALITY),
+        )
+        job_queue.submit(job)
+    except JobError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@jobs_bp.route("", methods=["GET", "POST"])
+def jobs():
+    """List recent jobs, or queue one.
+
+    POST takes "device" (camera or guider), "exposure" in seconds, "count",
+    "format" (jpeg, png, npy or fits) and JPEG "quality", and returns the
+    job at once with 202.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        return queue_capture(data.get("device", "camera"), data)
+    return jsonify({"jobs": [job.to_dict() for job in job_queue.jobs()]})
+
+
+@jobs_bp.route("/<job_id>", methods=["GET", "DELETE"])
+def job(job_id):
+    """Get a job's progress and files, DELETE cancels it."""
+    found = job_queue.get(job_id)
+    if found is None:
+        abort(404)
+    if request.method == "DELETE" and not job_queue.cancel(job_id):
+        return jsonify({"error": "Job already finished"}), 409
+    return jsonify(found.to_dict())
+
+
+@jobs_bp.route("/<job_id>/stream")
+def job_stream(job_id):
+    """Server-sent events with the job on every change, until it is done."""
+    found = job_queue.get(job_id)
+    if found is None:
+        abort(404)
+
+    def events():
+        version = -1
+        while True:
+            latest = found.wait_change(version, KEEPALIVE)
+            if latest == version:
+                yield ": keepalive\n\n"
+                continue
+            version = latest
+            snapshot = found.to_dict()
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            if snapshot["state"] in ("done", "failed", "cancelled"):
+                return
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
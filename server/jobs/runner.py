@@ -0,0 +1,414 @@
+"""Capture jobs queued per device and run as an expose/encode pipeline.
+
+A job asks for count exposures from the camera or guider. Jobs of a device
+run one after another on its "<device>-jobs" executor; each exposure runs on
+the device's own executor, so it takes turns with other device I/O, and the
+frame is handed to the "encode" executor while the next exposure starts.
+Requests only enqueue a job and read its progress, they never wait for an
+exposure. Frames are saved as JPEG, PNG, NumPy arrays or FITS; files from
+DSLRs are kept in the camera's own format.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from ..astro.coordinates import format_dms, format_hms, parse_sexagesimal, utc
+from ..camera.cameras import IMAGE_PATH, camera_handles, gphoto_port
+from ..camera.capture import FRAME_TIMEOUT, capture_service, video_index
+from ..config.store import config_store
+from ..executors import get_executor
+from ..mount.site import cached_site
+from ..mount.status import status_aggregator
+from .formats import FORMATS, JPEG_QUALITY, check_format, write_image
+
+logger = logging.getLogger(__name__)
+
+# Device name and the config key of its device
+DEVICES = {"camera": "cameraDevice", "guider": "guiderDevice"}
+# Seconds a cached mount position or guiding state may be old for a header
+METADATA_MAX_AGE = 30.0
+MAX_COUNT = 1000
+MAX_EXPOSURE = 3600.0
+# Seconds allowed for download on top of the exposure
+EXPOSURE_MARGIN = 60.0
+# Encodes a job may have queued before its next exposure waits
+MAX_PENDING_ENCODES = 2
+# Finished jobs kept for /api/jobs
+KEEP_JOBS = 100
+
+
+def _now():
+    return utc().isoformat(timespec="seconds")
+
+
+class JobError(ValueError):
+    """Invalid capture job parameters."""
+
+
+class VideoBackend:
+    """Webcam or guide camera read through its capture thread.
+
+    Exposure is set by the camera itself, so jobs must ask for exposure 0;
+    each exposure is the first frame read after it was requested.
+    """
+
+    def __init__(self, index):
+        """Initialize for an OpenCV device index."""
+        self.index = index
+        # OpenCV converts every frame to 8-bit BGR
+        self.dtype = np.dtype(np.uint8)
+        # Exposure of the last frame in seconds, None when the camera chose it
+        self.exposure = None
+
+    def check(self, job):
+        """Raise JobError for a job this device cannot take."""
+        if job.exposure > 0:
+            raise JobError(
+                f"The {job.device} exposes automatically, exposure must be 0"
+            )
+        try:
+            check_format(job.format, self.dtype)
+        except ValueError as e:
+            raise JobError(str(e)) from None
+
+    def open(self):
+        """Nothing to open, the capture thread keeps the device open."""
+
+    def expose(self, exposure):
+        """Frame array of the next frame."""
+        timeout = max(FRAME_TIMEOUT, exposure + EXPOSURE_MARGIN)
+        return capture_service.get(self.index).next(timeout).image
+
+    def close(self):
+        """Nothing to release."""
+
+
+class GPhotoBackend:
+    """DSLR captures downloaded into memory with gphoto2.
+
+    Exposure 0 keeps the shutter speed set on the camera.
+    """
+
+    def __init__(self, port):
+        """Initialize for a gphoto2 port."""
+        self.port = port
+        self.camera = None
+        # Exposure of the last image in seconds, None when the camera chose it
+        self.exposure = None
+
+    def check(self, job):
+        """Any exposure is checked against the camera's shutter speeds."""
+
+    def open(self):
+        """Take the camera shared with live view, pausing the live view."""
+        self.camera = camera_handles.acquire(self.port)
+        camera_handles.hold(self.port)
+
+    def expose(self, exposure):
+        """(file name, bytes) of an image in the camera's own format."""
+        if exposure <= 0:
+            self.exposure = None
+            return self.camera.get_image_data()
+        name, data, self.exposure = self.camera.get_exposure_data(exposure)
+        return name, data
+
+    def close(self):
+        """Give the camera back and resume its live view."""
+        if self.camera is not None:
+            self.camera = None
+            camera_handles.unhold(self.port)
+            camera_handles.release(self.port)
+
+
+def frame_cards(job, started, exposure=None):
+    """FITS header cards for a frame of job exposed from started (UTC).
+
+    exposure is the exposure in seconds the device used, EXPTIME is left out
+    when it is None because the device chose it. Mount position and guiding
+    state come from the dashboard status cache, so a frame never waits for
+    the mount or PHD2; the cache is refreshed in the background for the next
+    frame.
+    """
+    cards = [
+        ("DATE-OBS", started.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3], "UTC start"),
+        ("INSTRUME", config_store.get(DEVICES[job.device], "")),
+    ]
+    if exposure is not None:
+        cards.append(("EXPTIME", exposure, "seconds"))
+    mount = status_aggregator.last("mount", METADATA_MAX_AGE)
+    if mount and mount.get("connected"):
+        try:
+            ra = parse_sexagesimal(mount["position"]["ra"])
+            dec = parse_sexagesimal(mount["position"]["dec"])
+        except (KeyError, ValueError):
+            pass
+        else:
+            cards += [
+                ("RA", ra * 15.0, "degrees, epoch of date"),
+                ("DEC", dec, "degrees, epoch of date"),
+                ("OBJCTRA", format_hms(ra)),
+                ("OBJCTDEC", format_dms(dec)),
+            ]
+    site = cached_site()
+    if site:
+        cards += [
+            ("SITELAT", site[0], "degrees"),
+            ("SITELONG", site[1], "degrees east"),
+        ]
+    guider = status_aggregator.last("phd2", METADATA_MAX_AGE)
+    if guider:
+        cards.append(("GUIDING", guider.get("state", "Stopped"), "PHD2 state"))
+    status_aggregator.refresh(("mount", "phd2"))
+    return cards
+
+
+def backend_for(device):
+    """Backend for the camera or guider configured for device."""
+    configured = config_store.get(DEVICES[device], "")
+    if not configured:
+        raise JobError(f"No {device} configured")
+    port = gphoto_port(configured)
+    if port:
+        return GPhotoBackend(port)
+    return VideoBackend(video_index(configured))
+
+
+class CaptureJob:
+    """One queued capture request and its progress."""
+
+    def __init__(
+        self,
+        device,
+        exposure=0.0,
+        count=1,
+        image_format="jpeg",
+        quality=JPEG_QUALITY,
+    ):
+        """Initialize and validate a job, raises JobError."""
+        if device not in DEVICES:
+            raise JobError(f"device must be one of {', '.join(DEVICES)}")
+        try:
+            exposure = float(exposure)
+            count = int(count)
+            quality = int(quality)
+        except (TypeError, ValueError):
+            raise JobError("exposure, count and quality must be numbers") from None
+        if not 0.0 <= exposure <= MAX_EXPOSURE:
+            raise JobError(f"exposure must be between 0 and {MAX_EXPOSURE:g} seconds")
+        if not 1 <= count <= MAX_COUNT:
+            raise JobError(f"count must be between 1 and {MAX_COUNT}")
+        if image_format not in FORMATS:
+            raise JobError(f"format must be one of {', '.join(FORMATS)}")
+        if not 1 <= quality <= 100:
+            raise JobError("quality must be between 1 and 100")
+
+        self.id = uuid.uuid4().hex[:12]
+        self.device = device
+        self.exposure = exposure
+        self.count = count
+        self.format = image_format
+        self.quality = quality
+        self.state = "queued"
+        self.exposed = 0
+        self.files = []
+        self.error = None
+        self.created = _now()
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+        self.version = 0
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        """True once the job will not change any more."""
+        return self.state in ("done", "failed", "cancelled")
+
+    def update(self, **fields):
+        """Set attributes and wake everyone waiting for a change."""
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, predicate=None, timeout=None):
+        """Wait until predicate(job) holds, by default until the job is done.
+
+        Returns the predicate's last value.
+        """
+        predicate = predicate or (lambda job: job.done)
+        with self._changed:
+            return self._changed.wait_for(lambda: predicate(self), timeout)
+
+    def wait_change(self, version, timeout=None):
+        """Wait for a version newer than version, returns the current one."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+    def to_dict(self):
+        """JSON representation with progress."""
+        return {
+            "id": self.id,
+            "device": self.device,
+            "exposure": self.exposure,
+            "count": self.count,
+            "format": self.format,
+            "quality": self.quality,
+            "state": self.state,
+            "exposed": self.exposed,
+            "saved": len(self.files),
+            "files": list(self.files),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Submits capture jobs and keeps the recent ones."""
+
+    def __init__(
+        self, backends=backend_for, output=IMAGE_PATH, keep=KEEP_JOBS, cards=frame_cards
+    ):
+        """Initialize with a device to backend function and output directory.
+
+        cards(job, started, exposure) returns the FITS header cards of a frame.
+        """
+        self.backends = backends
+        self.output = output
+        self.keep = keep
+        self.cards = cards
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        """Queue a job, raises ExecutorBusy when the device has too many.
+
+        Raises JobError when the device cannot take the job.
+        """
+        backend = self.backends(job.device)
+        backend.check(job)
+        # Known before it can start, so its progress can always be read
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [key for key, old in self._jobs.items() if old.done]
+            for key in finished[: max(0, len(self._jobs) - self.keep)]:
+                del self._jobs[key]
+        try:
+            get_executor(f"{job.device}-jobs").submit(self._run, job, backend)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        logger.info(
+            "Queued %s job %s: %d x %gs", job.device, job.id, job.count, job.exposure
+        )
+        return job
+
+    def get(self, job_id):
+        """A job by id, None when unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Every kept job, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Stop a job after its current exposure, False when unknown or done."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancelled.set()
+        return True
+
+    def _run(self, job, backend):
+        if job.cancelled.is_set():
+            job.update(state="cancelled", finished=_now())
+            return
+        job.update(state="exposing", started=_now())
+        pending = deque()
+        error = None
+        try:
+            get_executor(job.device).run(backend.open)
+            for index in range(job.count):
+                if job.cancelled.is_set():
+                    break
+                started = utc()
+                result = get_executor(job.device).run(
+                    backend.expose,
+                    job.exposure,
+                    timeout=job.exposure + EXPOSURE_MARGIN,
+                )
+                cards = ()
+                if job.format == "fits":
+                    cards = self.cards(job, started, backend.exposure)
+                job.update(exposed=job.exposed + 1)
+                # Encoding overlaps the next exposure, within a bound
+                while len(pending) >= MAX_PENDING_ENCODES:
+                    pending.popleft().result()
+                pending.append(
+                    get_executor("encode").submit(self._save, job, index, result, cards)
+                )
+            job.update(state="saving")
+            while pending:
+                pending.popleft().result()
+        except Exception as e:
+            logger.error("Capture job %s failed: %s", job.id, str(e))
+            error = str(e)
+            # Frames already exposed are still saved
+            while pending:
+                try:
+                    pending.popleft().result()
+                except Exception as save_error:
+                    logger.error(
+                        "Capture job %s failed to save a frame: %s",
+                        job.id,
+                        str(save_error),
+                    )
+        finally:
+            try:
+                get_executor(job.device).run(backend.close)
+            except Exception as e:
+                logger.warning("Failed to release %s: %s", job.device, str(e))
+
+        if error is not None:
+            state = "failed"
+        else:
+            state = "cancelled" if job.cancelled.is_set() else "done"
+        job.update(state=state, error=error, finished=_now())
+        logger.info("Capture job %s %s, %d files saved", job.id, state, len(job.files))
+
+    def _save(self, job, index, result, cards=()):
+        os.makedirs(self.output, exist_ok=True)
+        stem = f"{job.device}_{job.id}_{index + 1:03d}"
+        if isinstance(result, tuple):
+            # Camera file, written in the camera's format
+            name, data = result
+            filename = stem + (os.path.splitext(name)[1].lower() or ".jpg")
+            with open(os.path.join(self.output, filename), "wb") as f:
+                f.write(data)
+        else:
+            filename = stem + FORMATS[job.format]
+            write_image(
+                os.path.join(self.output, filename),
+                result,
+                job.format,
+                cards,
+                quality=job.quality,
+            )
+        job.update(files=job.files + [filename])
+        return filename
+
+
+# Global capture job queue
+job_queue = JobQueue()
@@ -0,0 +1,142 @@
+"""Unit tests for captured image file formats."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .formats import (
+    FITS_BLOCK,
+    check_format,
+    fits_card,
+    fits_header,
+    read_image,
+    write_fits,
+    write_image,
+)
+
+
+def read_fits(data):
+    """Header cards as a dict and the data bytes of a FITS file."""
+    header = {}
+    offset = 0
+    while True:
+        card = data[offset : offset + 80].decode("ascii")
+        offset += 80
+        if card.startswith("END"):
+            break
+        key, _, value = card.partition("=")
+        header[key.strip()] = value.split(" / ")[0].strip().strip("'").strip()
+    offset += -offset % FITS_BLOCK
+    return header, data[offset:]
+
+
+class TestFits(unittest.TestCase):
+    """Test FITS headers and data."""
+
+    def test_card(self):
+        """Test cards are 80 characters in fixed format."""
+        self.assertEqual(
+            fits_card("SIMPLE", True)[:30], "SIMPLE  =                    T"
+        )
+        self.assertEqual(fits_card("NAXIS", 2)[10:30].strip(), "2")
+        self.assertEqual(fits_card("OBJECT", "M 42")[10:20], "'M 42    '")
+        self.assertEqual(fits_card("NOTE", "it's")[10:20], "'it''s   '")
+        self.assertEqual(len(fits_card("COMMENT", "x" * 100)), 80)
+
+    def test_mono(self):
+        """Test an 8-bit frame is written as is after a padded header."""
+        image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        f = io.BytesIO()
+        write_fits(f, image, [("EXPTIME", 2.5, "seconds"), ("RA", 83.8)])
+        data = f.getvalue()
+        self.assertEqual(len(data) % FITS_BLOCK, 0)
+        header, body = read_fits(data)
+        self.assertEqual(header["BITPIX"], "8")
+        self.assertEqual((header["NAXIS1"], header["NAXIS2"]), ("4", "3"))
+        self.assertEqual(float(header["EXPTIME"]), 2.5)
+        self.assertEqual(body[:12], image.tobytes())
+
+    def test_unsigned_16(self):
+        """Test 16-bit frames are big-endian and offset by BZERO."""
+        image = np.array([[0, 1000, 65535]], dtype=np.uint16)
+        f = io.BytesIO()
+        write_fits(f, image)
+        header, body = read_fits(f.getvalue())
+        self.assertEqual((header["BITPIX"], header["BZERO"]), ("16", "32768"))
+        stored = np.frombuffer(body[:6], dtype=">i2")
+        np.testing.assert_array_equal(stored.astype(np.int64) + 32768, image[0])
+        # The frame itself is left alone
+        self.assertEqual(image[0, 2], 65535)
+
+    def test_colour(self):
+        """Test BGR frames become red, green and blue planes."""
+        image = np.zeros((2, 3, 3), dtype=np.uint8)
+        image[..., 2] = 200  # Red
+        f = io.BytesIO()
+        write_fits(f, image)
+        header, body = read_fits(f.getvalue())
+        self.assertEqual(header["NAXIS3"], "3")
+        planes = np.frombuffer(body[:18], dtype=np.uint8).reshape(3, 2, 3)
+        self.assertTrue((planes[0] == 200).all())
+        self.assertFalse(planes[1:].any())
+
+    def test_unsupported(self):
+        """Test sample types FITS cannot hold are refused."""
+        with self.assertRaises(ValueError):
+            fits_header(np.zeros((2, 2), dtype=np.int8))
+
+
+class TestWriteImage(unittest.TestCase):
+    """Test writing frames to files."""
+
+    def setUp(self):
+        """Create an output directory."""
+        self.output = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the output directory."""
+        shutil.rmtree(self.output)
+
+    def test_npy(self):
+        """Test arrays round trip through npy files."""
+        image = np.random.default_rng(1).integers(0, 255, (4, 5, 3), dtype=np.uint8)
+        path = os.path.join(self.output, "frame.npy")
+        write_image(path, image, "npy")
+        np.testing.assert_array_equal(np.load(path), image)
+
+    def test_read_fits(self):
+        """Test FITS frames read back as the arrays written."""
+        for image in (
+            np.arange(60, dtype=np.uint16).reshape(6, 10) * 1000,
+            np.random.default_rng(2).integers(0, 255, (4, 5, 3), dtype=np.uint8),
+        ):
+            path = os.path.join(self.output, "frame.fits")
+            write_image(path, image, "fits", [("EXPTIME", 1.0)])
+            np.testing.assert_array_equal(read_image(path), image)
+        with self.assertRaises(ValueError):
+            read_image(os.path.join(self.output, "IMG_0001.CR2"))
+
+    def test_unknown(self):
+        """Test an unknown format is refused."""
+        with self.assertRaises(ValueError):
+            write_image(os.path.join(self.output, "f.gif"), np.zeros((1, 1)), "gif")
+
+    def test_sample_types(self):
+        """Test formats refuse samples they cannot store."""
+        check_format("png", np.uint16)
+        check_format("npy", np.float64)
+        with self.assertRaises(ValueError):
+            check_format("jpeg", np.uint16)
+        with self.assertRaises(ValueError):
+            check_format("fits", np.uint32)
+        image = np.zeros((2, 2), dtype=np.uint16)
+        with self.assertRaises(ValueError):
+            write_image(os.path.join(self.output, "f.jpg"), image, "jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
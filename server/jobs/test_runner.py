@@ -0,0 +1,262 @@
+"""Unit tests for capture jobs."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+import numpy as np
+from flask import Flask
+
+from . import routes, runner
+from .runner import CaptureJob, JobError, JobQueue, frame_cards
+
+
+class FakeBackend:
+    """Camera returning in-memory files."""
+
+    def __init__(self, fail_at=None):
+        """Initialize, the exposure numbered fail_at raises."""
+        self.exposures = 0
+        self.fail_at = fail_at
+        self.opened = False
+        self.closed = False
+        self.exposure = None
+
+    def check(self, job):
+        """Accept every job."""
+
+    def open(self):
+        """Connect."""
+        self.opened = True
+
+    def expose(self, exposure):
+        """Take an exposure of exposure seconds."""
+        self.exposures += 1
+        if self.exposures == self.fail_at:
+            raise OSError("Camera disconnected")
+        time.sleep(exposure)
+        return f"IMG_{self.exposures:04d}.CR2", b"raw" * 10
+
+    def close(self):
+        """Release."""
+        self.closed = True
+
+
+class ArrayBackend(FakeBackend):
+    """Video device returning frame arrays."""
+
+    def expose(self, exposure):
+        """Take an exposure, a frame of the exposure count, reported as 0.5 s."""
+        self.exposures += 1
+        self.exposure = 0.5
+        return np.full((4, 6), self.exposures, dtype=np.uint8)
+
+
+class TestCaptureJob(unittest.TestCase):
+    """Test job validation."""
+
+    def test_invalid(self):
+        """Test bad parameters raise JobError."""
+        with self.assertRaises(JobError):
+            CaptureJob("telescope")
+        with self.assertRaises(JobError):
+            CaptureJob("camera", exposure=-1)
+        with self.assertRaises(JobError):
+            CaptureJob("camera", count=0)
+        with self.assertRaises(JobError):
+            CaptureJob("camera", count="many")
+        with self.assertRaises(JobError):
+            CaptureJob("camera", image_format="gif")
+        with self.assertRaises(JobError):
+            CaptureJob("camera", quality=0)
+
+
+class TestFrameCards(unittest.TestCase):
+    """Test FITS header cards from cached mount and guider state."""
+
+    def test_cards(self):
+        """Test position, site and guiding are taken from the caches."""
+        cached = {
+            "mount": {
+                "connected": True,
+                "position": {"ra": "05:35:17", "dec": "-05*23:28"},
+            },
+            "phd2": {"connected": True, "state": "Guiding", "guiding": True},
+        }
+        status = Mock()
+        status.last.side_effect = lambda name, max_age: cached[name]
+        with patch.object(runner, "status_aggregator", status), patch.object(
+            runner, "cached_site", return_value=(52.0, -1.5)
+        ):
+            started = datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+            job = CaptureJob("camera", exposure=30)
+            cards = {card[0]: card[1] for card in frame_cards(job, started, 30.0)}
+            unknown = [card[0] for card in frame_cards(job, started)]
+
+        self.assertEqual(cards["DATE-OBS"], "2026-01-02T03:04:05.678")
+        self.assertEqual(cards["EXPTIME"], 30.0)
+        # Left out when the device chose the exposure
+        self.assertNotIn("EXPTIME", unknown)
+        self.assertAlmostEqual(cards["RA"], 83.8208, places=3)
+        self.assertAlmostEqual(cards["DEC"], -5.3911, places=3)
+        self.assertEqual((cards["SITELAT"], cards["SITELONG"]), (52.0, -1.5))
+        self.assertEqual(cards["GUIDING"], "Guiding")
+        status.refresh.assert_called_with(("mount", "phd2"))
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test jobs run in the background and save every frame."""
+
+    def setUp(self):
+        """Set up a queue writing into a temporary directory."""
+        self.output = tempfile.mkdtemp()
+        self.backend = FakeBackend()
+        self.queue = JobQueue(lambda device: self.backend, self.output)
+
+    def tearDown(self):
+        """Remove the output directory."""
+        shutil.rmtree(self.output)
+
+    def test_job(self):
+        """Test submit returns at once and the job saves count files."""
+        job = CaptureJob("camera", exposure=0.05, count=3)
+        began = time.monotonic()
+        self.queue.submit(job)
+        self.assertLess(time.monotonic() - began, 0.05)
+        self.assertTrue(job.wait(timeout=5))
+        self.assertEqual(job.state, "done")
+        self.assertEqual(job.exposed, 3)
+        self.assertEqual(
+            job.files, [f"camera_{job.id}_{n:03d}.cr2" for n in range(1, 4)]
+        )
+        for name in job.files:
+            self.assertTrue(os.path.exists(os.path.join(self.output, name)))
+        self.assertTrue(self.backend.opened and self.backend.closed)
+        self.assertIs(self.queue.get(job.id), job)
+
+    def test_failure(self):
+        """Test a failed exposure fails the job and releases the camera."""
+        self.backend.fail_at = 2
+        job = self.queue.submit(CaptureJob("camera", count=3))
+        job.wait(timeout=5)
+        self.assertEqual(job.state, "failed")
+        self.assertEqual(job.error, "Camera disconnected")
+        self.assertEqual(len(job.files), 1)
+        self.assertTrue(self.backend.closed)
+
+    def test_failure_keeps_queued_frames(self):
+        """Test frames still being encoded when an exposure fails are saved."""
+        self.backend.fail_at = 3
+        save = self.queue._save
+
+        def slow_save(*args):
+            time.sleep(0.1)
+            return save(*args)
+
+        with patch.object(self.queue, "_save", slow_save):
+            job = self.queue.submit(CaptureJob("camera", count=3))
+            job.wait(timeout=5)
+        self.assertEqual(job.state, "failed")
+        self.assertEqual(len(job.files), 2)
+
+    def test_cancel(self):
+        """Test a cancelled job stops after its current exposure."""
+        job = self.queue.submit(CaptureJob("camera", exposure=0.1, count=50))
+        job.wait(lambda j: j.exposed >= 1, timeout=5)
+        self.assertTrue(self.queue.cancel(job.id))
+        job.wait(timeout=5)
+        self.assertEqual(job.state, "cancelled")
+        self.assertLess(job.exposed, 50)
+        self.assertFalse(self.queue.cancel(job.id))
+
+    def test_fits(self):
+        """Test frames are saved as FITS with the header cards of each frame."""
+        self.queue.backends = lambda device: ArrayBackend()
+        self.queue.cards = lambda job, started, exposure: [("EXPTIME", exposure)]
+        job = self.queue.submit(CaptureJob("camera", count=2, image_format="fits"))
+        job.wait(timeout=5)
+        self.assertEqual(job.state, "done")
+        self.assertEqual(job.files[1], f"camera_{job.id}_002.fits")
+        with open(os.path.join(self.output, job.files[1]), "rb") as f:
+            data = f.read()
+        self.assertIn(b"EXPTIME =                  0.5", data[:2880])
+        self.assertEqual(data[2880:2904], bytes([2]) * 24)
+
+    def test_npy(self):
+        """Test frames are saved as NumPy arrays."""
+        self.queue.backends = lambda device: ArrayBackend()
+        job = self.queue.submit(CaptureJob("guider", image_format="npy"))
+        job.wait(timeout=5)
+        saved = np.load(os.path.join(self.output, job.files[0]))
+        np.testing.assert_array_equal(saved, np.ones((4, 6), dtype=np.uint8))
+
+    def test_video_refused(self):
+        """Test video devices refuse exposures and formats of other sample types."""
+        self.queue.backends = lambda device: runner.VideoBackend(0)
+        with self.assertRaises(JobError):
+            self.queue.submit(CaptureJob("guider", exposure=2.0))
+        self.assertEqual(self.queue.jobs(), [])
+        backend = runner.VideoBackend(0)
+        backend.dtype = np.dtype(np.uint16)
+        self.queue.backends = lambda device: backend
+        with self.assertRaises(JobError):
+            self.queue.submit(CaptureJob("guider", image_format="jpeg"))
+
+    def test_jobs_in_order(self):
+        """Test jobs of a device run one after another."""
+        first = self.queue.submit(CaptureJob("guider", exposure=0.05, count=2))
+        second = self.queue.submit(CaptureJob("guider", count=1))
+        self.assertEqual(second.state, "queued")
+        second.wait(timeout=5)
+        self.assertEqual(first.state, "done")
+        self.assertEqual([job.id for job in self.queue.jobs()], [first.id, second.id])
+
+
+class TestJobRoutes(unittest.TestCase):
+    """Test queueing and reading jobs over HTTP."""
+
+    def setUp(self):
+        """Set up an app with the jobs blueprint and a fake camera."""
+        self.output = tempfile.mkdtemp()
+        self.queue = JobQueue(lambda device: FakeBackend(), self.output)
+        patcher = patch.object(routes, "job_queue", self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = Flask(__name__)
+        app.register_blueprint(routes.jobs_bp)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Remove the output directory."""
+        shutil.rmtree(self.output)
+
+    def test_post_and_get(self):
+        """Test a job is queued with 202 and read back by id."""
+        response = self.client.post("/api/jobs", json={"device": "camera"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["id"]
+        self.queue.get(job_id).wait(timeout=5)
+        data = self.client.get(f"/api/jobs/{job_id}").get_json()
+        self.assertEqual((data["state"], data["saved"]), ("done", 1))
+        self.assertEqual(len(self.client.get("/api/jobs").get_json()["jobs"]), 1)
+
+    def test_errors(self):
+        """Test invalid jobs are 400 and unknown ids 404."""
+        response = self.client.post("/api/jobs", json={"device": "camera", "count": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/jobs/nope").status_code, 404)
+
+    def test_stream(self):
+        """Test the stream sends progress until the job is done."""
+        response = self.client.post("/api/jobs", json={"count": 2, "exposure": 0.02})
+        job_id = response.get_json()["id"]
+        body = self.client.get(f"/api/jobs/{job_id}/stream").get_data(as_text=True)
+        self.assertIn('"state": "done"', body.strip().split("\n\n")[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
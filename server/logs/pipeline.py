@@ -0,0 +1,177 @@
+"""Queue based logging with a ring buffer of recent records.
+
+Request threads only put records on a queue; a listener thread formats them
+to stderr and appends structured copies to the ring buffer that backs
+/api/logs. Repeated messages from one call site are rate limited before they
+are queued, and the number dropped is reported with the next one let through.
+Errors are never dropped.
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Records kept for /api/logs
+BUFFER_SIZE = 2000
+# Records allowed per call site and RATE_INTERVAL seconds
+RATE_BURST = 5
+RATE_INTERVAL = 10.0
+
+
+class RingBuffer:
+    """Bounded list of structured log records with increasing ids."""
+
+    def __init__(self, capacity=BUFFER_SIZE):
+        """Initialize an empty buffer."""
+        self._records = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self.last_id = 0
+
+    def append(self, record):
+        """Add a record dict, assigning its id."""
+        with self._condition:
+            self.last_id += 1
+            record["id"] = self.last_id
+            self._records.append(record)
+            self._condition.notify_all()
+
+    def since(self, last_id=0, level=logging.NOTSET, limit=None):
+        """Records with an id above last_id and at least level, oldest first."""
+        with self._condition:
+            records = [
+                record
+                for record in self._records
+                if record["id"] > last_id and record["levelno"] >= level
+            ]
+        return records[-limit:] if limit else records
+
+    def wait(self, last_id, timeout):
+        """Wait until a record newer than last_id arrives, False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.last_id > last_id, timeout)
+
+
+class RingBufferHandler(logging.Handler):
+    """Store records as dicts in a RingBuffer."""
+
+    def __init__(self, buffer):
+        """Initialize for a buffer."""
+        super().__init__()
+        self.buffer = buffer
+
+    def emit(self, record):
+        """Append a structured copy of the record."""
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "levelno": record.levelno,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        self.buffer.append(entry)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most burst records per call site and interval.
+
+    Errors and worse always pass. The first record of a call site's new
+    interval carries the number dropped before it as record.suppressed, the
+    record itself is left as other handlers see it.
+    """
+
+    def __init__(self, burst=RATE_BURST, interval=RATE_INTERVAL):
+        """Initialize the limits."""
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._lock = threading.Lock()
+        # (logger, file, line) -> [window start, count, suppressed]
+        self._sites = {}
+
+    def filter(self, record):
+        """False for records over the limit of their call site."""
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                suppressed = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.burst:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records with their message and traceback kept apart."""
+
+    def prepare(self, record):
+        """Resolve arguments and tracebacks on the calling thread."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogPipeline:
+    """Root logger wiring: queue handler, listener thread and ring buffer."""
+
+    def __init__(self, capacity=BUFFER_SIZE):
+        """Initialize, nothing is installed until start."""
+        self.buffer = RingBuffer(capacity)
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+
+    def start(self, level=logging.INFO, stream=None, logger=None):
+        """Route the root (or given) logger's output through the queue.
+
+        Idempotent, later calls leave the running listener in place.
+        """
+        if self.listener is not None:
+            return
+        console = logging.StreamHandler(stream)
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.listener = logging.handlers.QueueListener(
+            self.queue, console, RingBufferHandler(self.buffer)
+        )
+        queue_handler = StructuredQueueHandler(self.queue)
+        queue_handler.addFilter(RateLimitFilter())
+
+        logger = logger or logging.getLogger()
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+        self.listener.start()
+
+    def stop(self):
+        """Flush queued records and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+# Global logging pipeline
+log_pipeline = LogPipeline()
@@ -0,0 +1,67 @@
+"""Routes to read recent server log records."""
+
+import json
+import logging
+
+from flask import Blueprint, Response, jsonify, request
+
+from .pipeline import log_pipeline
+
+logs_bp = Blueprint("logs", __name__, url_prefix="/api/logs")
+
+# Seconds between keepalive comments on the stream
+KEEPALIVE = 15.0
+
+
+def _level():
+    name = request.args.get("level", "DEBUG").upper()
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level {name}")
+    return level
+
+
+@logs_bp.route("", methods=["GET"])
+def get_logs():
+    """Records newer than ?since=<id>, optionally ?level= and ?limit=."""
+    try:
+        since = request.args.get("since", 0, type=int)
+        limit = request.args.get("limit", 500, type=int)
+        level = _level()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    buffer = log_pipeline.buffer
+    return jsonify({"logs": buffer.since(since, level, limit), "last": buffer.last_id})
+
+
+@logs_bp.route("/stream", methods=["GET"])
+def stream_logs():
+    """Server-sent events with each new record, from ?since=<id>."""
+    try:
+        # EventSource sends the last id it saw when it reconnects
+        since = request.headers.get("Last-Event-ID", type=int)
+        if since is None:
+            since = request.args.get("since", log_pipeline.buffer.last_id, type=int)
+        level = _level()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    buffer = log_pipeline.buffer
+
+    def events(last_id):
+        while True:
+            if not buffer.wait(last_id, KEEPALIVE):
+                yield ": keepalive\n\n"
+                continue
+            # Records up to newest were all matched by since, even if filtered
+            newest = buffer.last_id
+            for record in buffer.since(last_id, level):
+                yield f"id: {record['id']}\ndata: {json.dumps(record)}\n\n"
+                newest = max(newest, record["id"])
+            last_id = newest
+
+    response = Response(events(since), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
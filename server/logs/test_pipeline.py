@@ -0,0 +1,146 @@
+"""Unit tests for the logging pipeline."""
+
+import io
+import logging
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from . import routes
+from .pipeline import (
+    LogPipeline,
+    RateLimitFilter,
+    RingBuffer,
+    StructuredQueueHandler,
+)
+
+
+def make_record(msg="Reading %s", args=("port",), level=logging.INFO, lineno=10):
+    """Create a log record as a logger call would."""
+    return logging.LogRecord("oat.test", level, "mount.py", lineno, msg, args, None)
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Test the bounded record buffer."""
+
+    def test_since(self):
+        """Test records are returned after an id and the oldest are dropped."""
+        buffer = RingBuffer(3)
+        for i in range(5):
+            buffer.append({"levelno": logging.INFO, "message": str(i)})
+        self.assertEqual(buffer.last_id, 5)
+        self.assertEqual([r["id"] for r in buffer.since(0)], [3, 4, 5])
+        self.assertEqual([r["id"] for r in buffer.since(4)], [5])
+        self.assertEqual([r["id"] for r in buffer.since(0, limit=1)], [5])
+
+    def test_level(self):
+        """Test records below a level are skipped."""
+        buffer = RingBuffer()
+        buffer.append({"levelno": logging.INFO})
+        buffer.append({"levelno": logging.ERROR})
+        self.assertEqual([r["id"] for r in buffer.since(0, logging.WARNING)], [2])
+
+    def test_wait(self):
+        """Test wait returns when a newer record arrives."""
+        buffer = RingBuffer()
+        self.assertFalse(buffer.wait(0, 0.01))
+        threading.Timer(0.05, buffer.append, ({"levelno": 0},)).start()
+        self.assertTrue(buffer.wait(0, 2.0))
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    """Test repetitive messages are rate limited per call site."""
+
+    def test_burst(self):
+        """Test records over the burst are dropped and counted."""
+        rate = RateLimitFilter(burst=2, interval=60.0)
+        allowed = [rate.filter(make_record()) for _ in range(5)]
+        self.assertEqual(allowed, [True, True, False, False, False])
+        # Another call site has its own budget
+        self.assertTrue(rate.filter(make_record(lineno=20)))
+
+    def test_suppressed_count(self):
+        """Test the next record of a new window reports suppressed ones."""
+        rate = RateLimitFilter(burst=1, interval=0.05)
+        rate.filter(make_record())
+        rate.filter(make_record())
+        rate.filter(make_record())
+        time.sleep(0.06)
+        record = make_record()
+        self.assertTrue(rate.filter(record))
+        self.assertEqual(record.suppressed, 2)
+        # Other handlers see the record unchanged, the queue copy reports it
+        self.assertEqual(record.getMessage(), "Reading port")
+        queued = StructuredQueueHandler(None).prepare(record)
+        self.assertEqual(
+            queued.getMessage(), "Reading port (2 similar messages suppressed)"
+        )
+
+    def test_errors_pass(self):
+        """Test errors are never dropped or counted."""
+        rate = RateLimitFilter(burst=1, interval=60.0)
+        records = [make_record(level=logging.ERROR) for _ in range(3)]
+        self.assertEqual([rate.filter(r) for r in records], [True] * 3)
+        self.assertTrue(rate.filter(make_record()))
+
+
+class TestLogPipeline(unittest.TestCase):
+    """Test records reach the console and buffer through the queue."""
+
+    def setUp(self):
+        """Set up a pipeline on a private logger."""
+        self.stream = io.StringIO()
+        self.pipeline = LogPipeline()
+        self.logger = logging.getLogger("oat.test.pipeline")
+        self.logger.propagate = False
+        self.pipeline.start(logging.DEBUG, self.stream, self.logger)
+
+    def tearDown(self):
+        """Stop the listener thread."""
+        self.pipeline.stop()
+        self.logger.handlers = []
+
+    def test_records(self):
+        """Test structured records are stored with exceptions."""
+        self.logger.warning("Slew to %s", "M 31")
+        try:
+            raise ValueError("bad coordinates")
+        except ValueError:
+            self.logger.exception("Goto failed")
+        self.pipeline.stop()
+
+        records = self.pipeline.buffer.since(0)
+        self.assertEqual(records[0]["message"], "Slew to M 31")
+        self.assertEqual(records[0]["level"], "WARNING")
+        self.assertEqual(records[0]["logger"], "oat.test.pipeline")
+        self.assertIn("bad coordinates", records[1]["exception"])
+        self.assertIn("WARNING - Slew to M 31", self.stream.getvalue())
+
+    def test_routes(self):
+        """Test /api/logs filters by id and level."""
+        self.logger.info("Connected")
+        self.logger.error("Serial timeout")
+        self.pipeline.stop()
+
+        app = Flask(__name__)
+        app.register_blueprint(routes.logs_bp)
+        client = app.test_client()
+        with patch.object(routes, "log_pipeline", self.pipeline):
+            data = client.get("/api/logs?since=0").get_json()
+            self.assertEqual(
+                [r["message"] for r in data["logs"]][-2:],
+                ["Connected", "Serial timeout"],
+            )
+            self.assertEqual(data["last"], self.pipeline.buffer.last_id)
+            data = client.get("/api/logs?level=error").get_json()
+            self.assertEqual([r["message"] for r in data["logs"]], ["Serial timeout"])
+            data = client.get(f"/api/logs?since={data['last']}").get_json()
+            self.assertEqual(data["logs"], [])
+            self.assertEqual(client.get("/api/logs?level=loud").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,91 +7,40 @@ Serial commands for OpenAstroTech can be found here:
     https://wiki.openastrotech.com/Knowledge/Firmware/MeadeCommands
 """
 
+from datetime import datetime, timedelta
+
 from flask import Blueprint, abort, jsonify, request
 
+from ..astro.coordinates import format_dms, format_hms, parse_sexagesimal, utc
+from ..astro.precession import j2000_to_jnow, refract
+from ..executors import on_executor
 from .indi_client import IndiClient
 from .serial import MountSerial
+from .site import get_limits_engine, get_site
+from .status import dashboard_status, status_aggregator
 
 mount_bp = Blueprint("mount", __name__, url_prefix="/api/mount")
 
 
+def _is_stop():
+    """True for a manual move request that stops the mount."""
+    data = request.get_json(silent=True) or {}
+    return str(data.get("direction", "")).lower() == "stop"
+
+
 @mount_bp.route("/")
 @mount_bp.route("/status/all")
 def get_all_status():
-    """Get comprehensive mount, camera, and guider status."""
-    import json
-    import os
-
-    # Mount status
-    mount = MountSerial()
-    mount.connect()
+    """Get comprehensive mount, camera, and guider status.
 
-    mount_status = {
-        "connected": mount.is_connected,
-        "position": {"ra": "--:--:--", "dec": "--:--:--"},
-        "tracking": False,
-        "indi_connected": False,
-        "indi_server_running": False,
-    }
-
-    # Check INDI server status using IndiClient
-    from .indi_client import IndiClient
-
-    indi_client = IndiClient()
-    mount_status["indi_server_running"] = indi_client.is_server_running()
-    mount_status["indi_connected"] = (
-        indi_client.get_mount_status() if indi_client.is_server_running() else False
-    )
-
-    if mount.is_connected:
-        # Get position
-        mount.write(":GR#")
-        ra = mount.read_data()
-        mount.write(":GD#")
-        dec = mount.read_data()
-        if ra and dec:
-            mount_status["position"] = {"ra": ra, "dec": dec}
-
-        # Get tracking status
-        mount.write(":GT#")
-        tracking_response = mount.read_data()
-        mount_status["tracking"] = (
-            tracking_response == "1" if tracking_response else False
-        )
-
-    mount.disconnect()
-
-    # Device status
-    config_file = "device_config.json"
-    camera_device = ""
-    guider_device = ""
-
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, "r") as f:
-                config = json.load(f)
-                camera_device = config.get("cameraDevice", "")
-                guider_device = config.get("guiderDevice", "")
-        except:
-            pass
-
-    camera_status = {
-        # TODO: get camera status with gphoto2.
-        "connected": False,
-        "device": camera_device,
-    }
-
-    guider_status = {
-        "connected": os.path.exists(guider_device) if guider_device else False,
-        "device": guider_device,
-    }
-
-    return jsonify(
-        {"mount": mount_status, "camera": camera_status, "guider": guider_status}
-    )
+    Subsystems are queried concurrently, each within its own deadline. Values
+    that did not arrive in time are the last known ones, marked "stale".
+    """
+    return jsonify(dashboard_status(status_aggregator.collect()))
 
 
 @mount_bp.route("/status")
+@on_executor("mount")
 def status():
     """Get comprehensive mount status using multiple Meade commands."""
     mount = MountSerial()
@@ -136,6 +85,7 @@ def status():
 
 
 @mount_bp.route("/position")
+@on_executor("mount")
 def position():
     """Get current mount RA/DEC coordinates."""
     mount = MountSerial()
@@ -155,6 +105,7 @@ def position():
 
 
 @mount_bp.route("/tracking")
+@on_executor("mount")
 def tracking():
     """Get current tracking rate."""
     mount = MountSerial()
@@ -171,6 +122,7 @@ def tracking():
 
 
 @mount_bp.route("/target", methods=["GET"])
+@on_executor("mount")
 def get_target():
     """Get current target coordinates."""
     mount = MountSerial()
@@ -190,15 +142,55 @@ def get_target():
 
 
 @mount_bp.route("/target", methods=["POST"])
+@on_executor("mount")
 def set_target():
     """Set target coordinates for slewing.
 
     Expects JSON: {"ra": "HH:MM:SS", "dec": "sDD:MM:SS"}
+    Optional: "epoch": "JNOW" (default) or "J2000" to convert catalog coordinates
+    to epoch of date, "refraction": true to correct for atmospheric refraction,
+    "force": true to send targets outside the configured mount limits.
     """
     data = request.get_json()
     if not data or "ra" not in data or "dec" not in data:
         return jsonify({"error": "RA and DEC required"}), 400
 
+    epoch = str(data.get("epoch") or "JNOW").upper()
+    if epoch not in ("JNOW", "J2000"):
+        return jsonify({"error": "Invalid epoch. Use: JNOW, J2000"}), 400
+
+    mount_ra, mount_dec = data["ra"], data["dec"]
+    refraction_applied = False
+    try:
+        ra = parse_sexagesimal(data["ra"])
+        dec = parse_sexagesimal(data["dec"])
+    except ValueError:
+        # Plain JNOW targets are passed to the mount as given
+        if epoch == "J2000" or data.get("refraction"):
+            return jsonify({"error": "Invalid RA or DEC"}), 400
+        ra = dec = None
+
+    if ra is not None:
+        if epoch == "J2000":
+            ra, dec = j2000_to_jnow(ra, dec)
+        if not data.get("force"):
+            engine = get_limits_engine()
+            if engine:
+                reachable, reason = engine.check(ra, dec, epoch="JNOW")
+                if not reachable[0]:
+                    return (
+                        jsonify(
+                            {"error": f"Target {reason[0]}", "reason": str(reason[0])}
+                        ),
+                        422,
+                    )
+        site = get_site() if data.get("refraction") else None
+        if site:
+            ra, dec = refract(ra, dec, *site)
+            refraction_applied = True
+        if epoch == "J2000" or refraction_applied:
+            mount_ra, mount_dec = format_hms(float(ra)), format_dms(float(dec))
+
     mount = MountSerial()
     mount.connect()
 
@@ -206,10 +198,10 @@ def set_target():
         return jsonify({"error": "Mount not connected"}), 503
 
     # Set target coordinates
-    mount.write(f":Sr{data['ra']}#")  # Set target RA
+    mount.write(f":Sr{mount_ra}#")  # Set target RA
     ra_response = mount.read_data()
 
-    mount.write(f":Sd{data['dec']}#")  # Set target DEC
+    mount.write(f":Sd{mount_dec}#")  # Set target DEC
     dec_response = mount.read_data()
 
     mount.disconnect()
@@ -219,11 +211,87 @@ def set_target():
             "dec_set": dec_response == "1",
             "target_ra": data["ra"],
             "target_dec": data["dec"],
+            "epoch": epoch,
+            "mount_ra": mount_ra,
+            "mount_dec": mount_dec,
+            "refraction_applied": refraction_applied,
+        }
+    )
+
+
+# Targets accepted by one limits check request
+MAX_LIMIT_TARGETS = 5000
+
+
+@mount_bp.route("/limits", methods=["GET"])
+def get_limits():
+    """Get the site, mount limits and horizon profile used for target checks."""
+    engine = get_limits_engine()
+    if engine is None:
+        return jsonify({"error": "Site unknown. Configure latitude/longitude"}), 503
+    return jsonify(
+        {
+            "latitude": engine.latitude,
+            "longitude": engine.longitude,
+            "limits": engine.limits.to_config(),
+            "horizon": engine.horizon.to_config(),
+        }
+    )
+
+
+@mount_bp.route("/limits/check", methods=["POST"])
+def check_limits():
+    """Predict reachable windows and meridian flips for a list of targets.
+
+    Expects JSON: {"targets": [{"ra": "HH:MM:SS", "dec": "sDD:MM:SS"}, ...]}
+    Optional: "start" and "end" ISO times (default now to 12 hours later),
+    "step" in minutes (default 5), "epoch": "J2000" (default) or "JNOW".
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get("targets"), list) or not data["targets"]:
+        return jsonify({"error": "targets required"}), 400
+    if len(data["targets"]) > MAX_LIMIT_TARGETS:
+        return jsonify({"error": f"At most {MAX_LIMIT_TARGETS} targets"}), 400
+
+    epoch = str(data.get("epoch") or "J2000").upper()
+    if epoch not in ("JNOW", "J2000"):
+        return jsonify({"error": "Invalid epoch. Use: JNOW, J2000"}), 400
+
+    try:
+        ra = [parse_sexagesimal(target["ra"]) for target in data["targets"]]
+        dec = [parse_sexagesimal(target["dec"]) for target in data["targets"]]
+        start = datetime.fromisoformat(data["start"]) if data.get("start") else None
+        end = datetime.fromisoformat(data["end"]) if data.get("end") else None
+        step = float(data.get("step", 5.0))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Invalid targets, start, end or step"}), 400
+    if step <= 0:
+        return jsonify({"error": "step must be positive"}), 400
+
+    engine = get_limits_engine()
+    if engine is None:
+        return jsonify({"error": "Site unknown. Configure latitude/longitude"}), 503
+
+    start = utc(start)
+    end = utc(end) if end else start + timedelta(hours=12)
+    if end <= start or (end - start) > timedelta(hours=48):
+        return jsonify({"error": "end must be within 48 hours after start"}), 400
+
+    results = engine.windows(ra, dec, start, end, step=step, epoch=epoch)
+    for target, result in zip(data["targets"], results):
+        result.update(ra=target["ra"], dec=target["dec"], name=target.get("name"))
+    return jsonify(
+        {
+            "start": start.isoformat(timespec="seconds"),
+            "end": end.isoformat(timespec="seconds"),
+            "epoch": epoch,
+            "targets": results,
         }
     )
 
 
 @mount_bp.route("/indi/status")
+@on_executor("indi")
 def indi_status():
     """Check if mount is connected to INDI service."""
     indi = IndiClient()
@@ -246,6 +314,7 @@ def indi_status():
 
 
 @mount_bp.route("/home", methods=["POST"])
+@on_executor("mount")
 def home_mount():
     """Move to Home. No response expected."""
     mount = MountSerial()
@@ -265,6 +334,7 @@ def home_mount():
 
 
 @mount_bp.route("/home/ra", methods=["POST"])
+@on_executor("mount")
 def home_ra():
     """Home RA axis using Hall sensor. No response expected."""
     mount = MountSerial()
@@ -280,6 +350,7 @@ def home_ra():
 
 
 @mount_bp.route("/home/dec", methods=["POST"])
+@on_executor("mount")
 def home_dec():
     """Home DEC axis using Hall sensor. No response expected."""
     mount = MountSerial()
@@ -295,6 +366,7 @@ def home_dec():
 
 
 @mount_bp.route("/location", methods=["POST"])
+@on_executor("mount")
 def set_location():
     """Set mount location coordinates.
 
@@ -328,6 +400,7 @@ def set_location():
 
 
 @mount_bp.route("/home/set", methods=["POST"])
+@on_executor("mount")
 def set_home():
     """Set current position as home."""
     mount = MountSerial()
@@ -342,6 +415,7 @@ def set_home():
 
 
 @mount_bp.route("/home/goto", methods=["POST"])
+@on_executor("mount")
 def goto_home():
     """Move to home position."""
     mount = MountSerial()
@@ -356,6 +430,7 @@ def goto_home():
 
 
 @mount_bp.route("/slew", methods=["POST"])
+@on_executor("mount")
 def slew():
     """Slew to target coordinates."""
     mount = MountSerial()
@@ -370,6 +445,7 @@ def slew():
 
 
 @mount_bp.route("/move", methods=["POST"])
+@on_executor("mount", urgent=_is_stop)
 def manual_move():
     """Manual movement in cardinal directions."""
     data = request.get_json()
@@ -406,6 +482,7 @@ def manual_move():
 
 
 @mount_bp.route("/park", methods=["POST"])
+@on_executor("mount")
 def park():
     """Park the mount."""
     mount = MountSerial()
@@ -420,6 +497,7 @@ def park():
 
 
 @mount_bp.route("/tracking", methods=["GET"])
+@on_executor("mount")
 def get_tracking():
     """Get current tracking status."""
     mount = MountSerial()
@@ -437,6 +515,7 @@ def get_tracking():
 
 
 @mount_bp.route("/tracking", methods=["POST"])
+@on_executor("mount")
 def set_tracking():
     """Enable or disable tracking."""
     data = request.get_json()
@@ -461,6 +540,7 @@ def set_tracking():
 
 
 @mount_bp.route("/firmware")
+@on_executor("mount")
 def firmware():
     """Get mount firmware version."""
     mount = MountSerial()
@@ -477,6 +557,7 @@ def firmware():
 
 
 @mount_bp.route("/datetime", methods=["POST"])
+@on_executor("mount")
 def set_datetime():
     """Set mount date and time.
 
@@ -510,6 +591,7 @@ def set_datetime():
 
 
 @mount_bp.route("/indi/server", methods=["POST"])
+@on_executor("process")
 def indi_server_control():
     """Start or stop INDI server."""
     import subprocess
@@ -536,6 +618,7 @@ def indi_server_control():
 
 
 @mount_bp.route("/home/offset", methods=["GET", "POST"])
+@on_executor("mount")
 def home_offset():
     """Get or set homing offset values."""
     mount = MountSerial()
@@ -584,6 +667,7 @@ def home_offset():
 
 
 @mount_bp.route("/indi/connection", methods=["POST"])
+@on_executor("indi")
 def indi_connection():
     """Connect or disconnect mount from INDI service."""
     data = request.get_json()
@@ -1,7 +1,6 @@
 """Serial communication interface for OAT mount using Meade commands."""
 
 import logging
-import os
 import sys
 
 import serial
@@ -24,41 +23,23 @@ class MountSerial:
         self.is_connected = False
 
     def _get_configured_device(self):
-        """Get configured telescope device from config file."""
-        import json
+        """Get configured telescope device from the config store."""
+        from ..config.store import config_store
 
-        try:
-            config_file = "device_config.json"
-            if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    config = json.load(f)
-                    device = config.get("telescopeDevice", "")
-                    if device:
-                        logger.info("Using configured telescope device: %s", device)
-                        return device
-        except Exception as e:
-            logger.warning("Failed to load device config: %s", str(e))
+        device = config_store.get("telescopeDevice")
+        if device:
+            logger.debug("Using configured telescope device: %s", device)
+            return device
 
         # Fallback to default device
-        logger.info("Using default telescope device: %s", DEFAULT_DEVICE)
+        logger.debug("Using default telescope device: %s", DEFAULT_DEVICE)
         return DEFAULT_DEVICE
 
     def _get_configured_baudrate(self):
-        """Get configured telescope baudrate from config file."""
-        import json
-
-        try:
-            config_file = "device_config.json"
-            if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    config = json.load(f)
-                    baudrate = config.get("telescopeBaudrate", 9600)
-                    logger.info("Using configured telescope baudrate: %s", baudrate)
-                    return baudrate
-        except Exception as e:
-            logger.warning("Failed to load baudrate config: %s", str(e))
+        """Get configured telescope baudrate from the config store."""
+        from ..config.store import config_store
 
-        return 9600
+        return config_store.get("telescopeBaudrate", 9600)
 
     def connect(self):
         """Establish serial connection to mount."""
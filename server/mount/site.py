@@ -0,0 +1,128 @@
+"""Observing site and mount limits from the device configuration or the mount."""
+
+import logging
+import threading
+import time
+
+from ..astro.coordinates import parse_sexagesimal
+from ..astro.limits import HorizonProfile, LimitsEngine, MountLimits
+from ..config.store import config_store
+from ..executors import get_executor
+from .serial import MountSerial
+
+logger = logging.getLogger(__name__)
+
+# Seconds to reuse a site read from the mount before asking it again
+SITE_CACHE_SECONDS = 600
+# Seconds before asking again a mount that gave no site
+SITE_RETRY_SECONDS = 30
+
+_lock = threading.Lock()
+_mount_site = {"site": None, "time": 0.0, "failed": None, "generation": 0}
+
+
+def get_configured_site():
+    """Get (latitude, longitude) in degrees from the config store, or None."""
+    latitude = config_store.get("latitude")
+    longitude = config_store.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    return float(latitude), float(longitude)
+
+
+def get_limits_engine(site=None):
+    """Get a LimitsEngine for the site with the configured limits and horizon.
+
+    Limits come from "mountLimits" and the horizon profile from "horizon"
+    ([[azimuth, min altitude], ...]) in the device config. Returns None when the
+    site is unknown.
+    """
+    site = site or get_site()
+    if site is None:
+        return None
+    return LimitsEngine(
+        *site,
+        limits=MountLimits.from_config(config_store.get("mountLimits")),
+        horizon=HorizonProfile(config_store.get("horizon")),
+    )
+
+
+def read_mount_site():
+    """Read (latitude, longitude) from the mount with :Gt# and :Gg#, or None.
+
+    Meade longitude is west positive, it is returned east positive.
+    """
+    mount = MountSerial()
+    mount.connect()
+    if not mount.is_connected:
+        return None
+
+    mount.write(":Gt#")
+    latitude = mount.read_data()
+    mount.write(":Gg#")
+    longitude = mount.read_data()
+    mount.disconnect()
+
+    try:
+        east = -parse_sexagesimal(longitude)
+        return parse_sexagesimal(latitude), (east + 180.0) % 360.0 - 180.0
+    except (TypeError, ValueError):
+        logger.warning("Invalid site from mount: %s %s", latitude, longitude)
+        return None
+
+
+def get_site(latitude=None, longitude=None):
+    """Get the observing site as (latitude, longitude), or None if unknown.
+
+    Explicit values win, then the config file, then the mount. A mount that
+    gave no site is not asked again for SITE_RETRY_SECONDS.
+    """
+    if latitude is not None and longitude is not None:
+        return float(latitude), float(longitude)
+
+    site = get_configured_site()
+    if site:
+        return site
+
+    with _lock:
+        cached = _mount_site["site"]
+        if cached and time.monotonic() - _mount_site["time"] < SITE_CACHE_SECONDS:
+            return cached
+        failed = _mount_site["failed"]
+        if failed is not None and time.monotonic() - failed < SITE_RETRY_SECONDS:
+            return None
+        generation = _mount_site["generation"]
+
+    # Read without the lock, so cached_site never waits for the mount
+    site = get_executor("mount").run(read_mount_site)
+    with _lock:
+        # Unless the mount connection changed while it was read
+        if _mount_site["generation"] == generation:
+            if site:
+                _mount_site.update(site=site, time=time.monotonic(), failed=None)
+            else:
+                _mount_site.update(failed=time.monotonic())
+    return site
+
+
+def cached_site():
+    """Get the configured site or the one last read from the mount, or None.
+
+    Unlike get_site this never talks to the mount.
+    """
+    site = get_configured_site()
+    if site:
+        return site
+    with _lock:
+        return _mount_site["site"]
+
+
+def _reset_mount_site(changed, config):
+    """Forget the site read from the mount when the mount connection changes."""
+    with _lock:
+        _mount_site.update(
+            site=None, time=0.0, failed=None, generation=_mount_site["generation"] + 1
+        )
+
+
+config_store.subscribe(_reset_mount_site, keys=("telescopeDevice", "telescopeBaudrate"))
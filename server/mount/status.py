@@ -0,0 +1,259 @@
+"""Dashboard status gathered from every subsystem at once.
+
+Each subsystem probe runs on a shared thread pool with its own deadline and
+hands its device I/O to that device's executor. Probes that finish in time
+are returned fresh; for the others the last value is returned with "stale":
+true and its age, so one slow device cannot hold up the whole status. A
+probe still running from an earlier request is waited on again instead of
+being started twice.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from ..astro.coordinates import utc
+from ..camera.discovery import webcam_discovery
+from ..config.store import config_store
+from ..executors import get_executor
+from ..guider.phd2_client import PHD2Client
+from .indi_client import IndiClient
+from .serial import MountSerial
+
+logger = logging.getLogger(__name__)
+
+
+class Probe:
+    """A subsystem status callable with its deadline in seconds and default."""
+
+    def __init__(self, read, deadline, default):
+        """Initialize a probe."""
+        self.read = read
+        self.deadline = deadline
+        self.default = default
+
+
+class StatusAggregator:
+    """Run subsystem probes concurrently and cache their last values."""
+
+    def __init__(self, probes):
+        """Initialize with a dict of subsystem name to Probe."""
+        self.probes = probes
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            len(probes), thread_name_prefix="status-probe"
+        )
+        self._pending = {}
+        # name -> {"value", "time", "updated", "error"}
+        self._cache = {}
+
+    def collect(self):
+        """Get the status of every subsystem, waiting at most each deadline."""
+        started = time.monotonic()
+        futures = self._submit()
+        for name in self._by_deadline():
+            remaining = started + self.probes[name].deadline - time.monotonic()
+            try:
+                futures[name].result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                logger.debug("Status of %s timed out", name)
+            except Exception:
+                pass  # Recorded by _run
+        return self._results(started)
+
+    async def collect_async(self):
+        """Same as collect, awaiting the probes instead of blocking a thread."""
+        started = time.monotonic()
+        futures = self._submit()
+        for name in self._by_deadline():
+            remaining = started + self.probes[name].deadline - time.monotonic()
+            try:
+                # Shielded, a timeout must not cancel the probe itself
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(futures[name])),
+                    max(0.0, remaining),
+                )
+            except asyncio.TimeoutError:
+                logger.debug("Status of %s timed out", name)
+            except Exception:
+                pass  # Recorded by _run
+        return self._results(started)
+
+    def refresh(self, names):
+        """Start the named probes in the background without waiting for them."""
+        self._submit(names)
+
+    def last(self, name, max_age=None):
+        """Last value a probe returned, None when never read or older than max_age."""
+        with self._lock:
+            entry = self._cache.get(name, {})
+            if "value" not in entry:
+                return None
+            if max_age is not None and time.monotonic() - entry["time"] > max_age:
+                return None
+            return entry["value"]
+
+    def _submit(self, names=None):
+        with self._lock:
+            futures = {}
+            for name in names or self.probes:
+                probe = self.probes[name]
+                future = self._pending.get(name)
+                if future is None or future.done():
+                    future = self._executor.submit(self._run, name, probe)
+                    self._pending[name] = future
+                futures[name] = future
+        return futures
+
+    def _by_deadline(self):
+        return sorted(self.probes, key=lambda name: self.probes[name].deadline)
+
+    def _results(self, started):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: self._result(name, probe, started, now)
+                for name, probe in self.probes.items()
+            }
+
+    def _run(self, name, probe):
+        try:
+            value = probe.read()
+        except Exception as e:
+            logger.warning("Status of %s failed: %s", name, str(e))
+            with self._lock:
+                self._cache.setdefault(name, {})["error"] = str(e)
+            raise
+        with self._lock:
+            self._cache[name] = {
+                "value": value,
+                "time": time.monotonic(),
+                "updated": utc().isoformat(timespec="seconds"),
+            }
+        return value
+
+    def _result(self, name, probe, started, now):
+        entry = self._cache.get(name, {})
+        if "value" not in entry:
+            return dict(
+                probe.default, stale=True, error=entry.get("error", "Timed out")
+            )
+        result = dict(entry["value"], updated=entry["updated"])
+        if entry["time"] >= started and "error" not in entry:
+            result["stale"] = False
+        else:
+            result.update(stale=True, age=round(now - entry["time"], 1))
+            if "error" in entry:
+                result["error"] = entry["error"]
+        return result
+
+
+def read_mount():
+    """Serial connection, position and tracking state of the mount."""
+    return get_executor("mount").run(_read_mount)
+
+
+def _read_mount():
+    mount = MountSerial()
+    mount.connect()
+    status = {
+        "connected": mount.is_connected,
+        "position": {"ra": "--:--:--", "dec": "--:--:--"},
+        "tracking": False,
+    }
+    try:
+        if mount.is_connected:
+            mount.write(":GR#")
+            ra = mount.read_data()
+            mount.write(":GD#")
+            dec = mount.read_data()
+            if ra and dec:
+                status["position"] = {"ra": ra, "dec": dec}
+
+            mount.write(":GT#")
+            status["tracking"] = mount.read_data() == "1"
+    finally:
+        mount.disconnect()
+    return status
+
+
+def read_indi():
+    """INDI server and mount driver connection state."""
+    return get_executor("indi").run(_read_indi)
+
+
+def _read_indi():
+    indi_client = IndiClient()
+    running = indi_client.is_server_running()
+    return {
+        "server_running": running,
+        "connected": bool(running and indi_client.get_mount_status()),
+    }
+
+
+phd2 = PHD2Client()
+
+
+def read_phd2():
+    """PHD2 application state."""
+    return get_executor("phd2").run(phd2.get_status)
+
+
+def read_camera():
+    """Whether the configured camera is present, from the webcam discovery cache."""
+    device = config_store.get("cameraDevice", "")
+    return {
+        "connected": bool(device)
+        and any(
+            device in (camera["device"], camera["name"], str(camera["index"]))
+            for camera in webcam_discovery.cameras()
+        ),
+        "device": device,
+    }
+
+
+def read_guider():
+    """Whether the configured guide camera device exists."""
+    device = config_store.get("guiderDevice", "")
+    return {"connected": bool(device) and os.path.exists(device), "device": device}
+
+
+def dashboard_status(status):
+    """Shape collected status as returned by /api/mount/status/all."""
+    mount = dict(
+        status["mount"],
+        indi_connected=status["indi"]["connected"],
+        indi_server_running=status["indi"]["server_running"],
+    )
+    return {
+        "mount": mount,
+        "indi": status["indi"],
+        "phd2": status["phd2"],
+        "camera": status["camera"],
+        "guider": status["guider"],
+    }
+
+
+status_aggregator = StatusAggregator(
+    {
+        "mount": Probe(
+            read_mount,
+            2.0,
+            {
+                "connected": False,
+                "position": {"ra": "--:--:--", "dec": "--:--:--"},
+                "tracking": False,
+            },
+        ),
+        "indi": Probe(read_indi, 1.5, {"server_running": False, "connected": False}),
+        "phd2": Probe(
+            read_phd2, 1.0, {"connected": False, "state": "Stopped", "guiding": False}
+        ),
+        "camera": Probe(read_camera, 0.5, {"connected": False, "device": ""}),
+        "guider": Probe(read_guider, 0.5, {"connected": False, "device": ""}),
+    }
+)
@@ -6,6 +6,8 @@ from unittest.mock import Mock, patch
 
 from flask import Flask
 
+from ..astro.limits import LimitsEngine, MountLimits
+from . import routes
 from .routes import mount_bp
 
 
@@ -100,6 +102,80 @@ class TestMountRoutes(unittest.TestCase):
         response = self.client.post("/mount/target", json={"ra": "12:34:56"})
         self.assertEqual(response.status_code, 400)
 
+    def test_set_target_invalid_epoch(self):
+        """Test target setting with an unknown epoch."""
+        response = self.client.post(
+            "/api/mount/target",
+            json={"ra": "12:34:56", "dec": "+45:00:00", "epoch": "B1950"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_set_target_j2000(self):
+        """Test J2000 targets are sent to the mount as epoch of date."""
+        mount = Mock(is_connected=True)
+        mount.read_data.return_value = "1"
+        with patch.object(routes, "MountSerial", return_value=mount), patch.object(
+            routes, "get_limits_engine", return_value=None
+        ):
+            response = self.client.post(
+                "/api/mount/target",
+                json={"ra": "00:42:44", "dec": "+41:16:09", "epoch": "J2000"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data["epoch"], "J2000")
+        self.assertNotEqual(data["mount_ra"], "00:42:44")
+        mount.write.assert_any_call(f":Sr{data['mount_ra']}#")
+        mount.write.assert_any_call(f":Sd{data['mount_dec']}#")
+
+    def test_set_target_outside_limits(self):
+        """Test targets outside the mount limits are refused unless forced."""
+        engine = LimitsEngine(45.0, -75.0, MountLimits(dec_max=60))
+        mount = Mock(is_connected=True)
+        mount.read_data.return_value = "1"
+        target = {"ra": "12:00:00", "dec": "+70:00:00"}
+        with patch.object(routes, "MountSerial", return_value=mount), patch.object(
+            routes, "get_limits_engine", return_value=engine
+        ):
+            response = self.client.post("/api/mount/target", json=target)
+            self.assertEqual(response.status_code, 422)
+            data = json.loads(response.data)
+            self.assertEqual(data["reason"], "outside declination limits")
+            mount.write.assert_not_called()
+
+            response = self.client.post(
+                "/api/mount/target", json=dict(target, force=True)
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_check_limits(self):
+        """Test reachable windows are returned per target."""
+        engine = LimitsEngine(45.0, -75.0, MountLimits(dec_max=60))
+        with patch.object(routes, "get_limits_engine", return_value=engine):
+            response = self.client.post(
+                "/api/mount/limits/check",
+                json={
+                    "targets": [
+                        {"name": "M42", "ra": "05:35:17", "dec": "-05:23:28"},
+                        {"name": "Polaris", "ra": "02:31:49", "dec": "+89:15:51"},
+                    ],
+                    "start": "2025-01-15T00:00:00+00:00",
+                    "end": "2025-01-15T08:00:00+00:00",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        targets = json.loads(response.data)["targets"]
+        self.assertEqual([t["name"] for t in targets], ["M42", "Polaris"])
+        self.assertTrue(targets[0]["reachable"])
+        self.assertIsNotNone(targets[0]["flip"])
+        self.assertFalse(targets[1]["reachable"])
+
+    def test_check_limits_invalid(self):
+        """Test missing targets are rejected."""
+        response = self.client.post("/api/mount/limits/check", json={"targets": []})
+        self.assertEqual(response.status_code, 400)
+
     @patch("serial.Serial")
     def test_home_mount_success(self, mock_serial):
         """Test homing both axes."""
@@ -0,0 +1,50 @@
+"""Unit tests for the observing site lookup."""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from . import site
+
+
+@patch.object(site, "get_configured_site", return_value=None)
+class TestGetSite(unittest.TestCase):
+    """Test caching of sites read from the mount."""
+
+    def setUp(self):
+        """Forget any site read before."""
+        site._reset_mount_site({}, {})
+
+    def tearDown(self):
+        """Leave no cached site behind."""
+        site._reset_mount_site({}, {})
+
+    def test_explicit(self, configured):
+        """Test explicit coordinates win."""
+        self.assertEqual(site.get_site("45", -75), (45.0, -75.0))
+        with self.assertRaises(ValueError):
+            site.get_site("abc", -75)
+
+    def test_site_cached(self, configured):
+        """Test a site read from the mount is reused."""
+        read = Mock(return_value=(45.0, -75.0))
+        with patch.object(site, "read_mount_site", read):
+            self.assertEqual(site.get_site(), (45.0, -75.0))
+            self.assertEqual(site.get_site(), (45.0, -75.0))
+        read.assert_called_once()
+
+    def test_failure_cached(self, configured):
+        """Test a mount without a site is not asked again on every call."""
+        read = Mock(return_value=None)
+        with patch.object(site, "read_mount_site", read):
+            self.assertIsNone(site.get_site())
+            self.assertIsNone(site.get_site())
+            read.assert_called_once()
+
+            # A new mount connection is asked right away
+            site._reset_mount_site({}, {})
+            read.return_value = (45.0, -75.0)
+            self.assertEqual(site.get_site(), (45.0, -75.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Unit tests for concurrent status aggregation."""
+
+import threading
+import time
+import unittest
+
+from .status import Probe, StatusAggregator
+
+
+class TestStatusAggregator(unittest.TestCase):
+    """Test deadlines, stale values and failures."""
+
+    def setUp(self):
+        """Set up a fast probe and a probe that blocks until released."""
+        self.release = threading.Event()
+        self.calls = 0
+
+        def slow():
+            self.calls += 1
+            self.release.wait(5)
+            return {"connected": True}
+
+        self.aggregator = StatusAggregator(
+            {
+                "fast": Probe(lambda: {"connected": True}, 0.5, {"connected": False}),
+                "slow": Probe(slow, 0.05, {"connected": False}),
+            }
+        )
+
+    def tearDown(self):
+        """Let blocked probes finish."""
+        self.release.set()
+
+    def test_partial_results(self):
+        """Test a slow subsystem does not hold up the others."""
+        began = time.monotonic()
+        status = self.aggregator.collect()
+        self.assertLess(time.monotonic() - began, 0.5)
+        self.assertEqual(status["fast"]["connected"], True)
+        self.assertFalse(status["fast"]["stale"])
+        self.assertEqual(
+            status["slow"], {"connected": False, "stale": True, "error": "Timed out"}
+        )
+
+    def test_stale_value(self):
+        """Test the last value is returned and marked stale on a timeout."""
+        self.release.set()
+        self.assertFalse(self.aggregator.collect()["slow"]["stale"])
+        self.release.clear()
+        status = self.aggregator.collect()["slow"]
+        self.assertTrue(status["stale"])
+        self.assertTrue(status["connected"])
+        self.assertIn("age", status)
+
+    def test_no_duplicate_probes(self):
+        """Test a probe still running is not started again."""
+        self.aggregator.collect()
+        self.aggregator.collect()
+        self.assertEqual(self.calls, 1)
+
+    def test_failure(self):
+        """Test a failing probe returns its default with the error."""
+
+        def fail():
+            raise OSError("port busy")
+
+        aggregator = StatusAggregator({"mount": Probe(fail, 0.5, {"connected": False})})
+        self.assertEqual(
+            aggregator.collect()["mount"],
+            {"connected": False, "stale": True, "error": "port busy"},
+        )
+
+    def test_refresh_and_last(self):
+        """Test refresh probes in the background and last reads the cache."""
+        self.assertIsNone(self.aggregator.last("fast"))
+        self.aggregator.refresh(["fast"])
+        deadline = time.monotonic() + 1.0
+        while self.aggregator.last("fast") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.aggregator.last("fast"), {"connected": True})
+        self.assertIsNone(self.aggregator.last("fast", max_age=-1.0))
+        self.assertEqual(self.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
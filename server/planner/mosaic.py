@@ -0,0 +1,343 @@
+"""Mosaic panel geometry and an executor that slews, settles and captures.
+
+Panel centres are laid out on the tangent plane at the mosaic centre, so
+overlap stays correct near the pole, then projected back to RA/Dec. Panels
+run in serpentine order: along a row, then back along the next one, which
+keeps every slew to about one panel width.
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from ..astro.coordinates import format_dms, format_hms, parse_sexagesimal, utc
+from ..astro.precession import j2000_to_jnow
+from ..catalog.spatial import angular_distance
+from ..executors import get_executor
+from ..jobs.runner import CaptureJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds between :D# polls while slewing, and the longest slew allowed
+SLEW_POLL = 0.5
+SLEW_TIMEOUT = 300.0
+# Degrees a finished slew may end from its target
+ARRIVAL_TOLERANCE = 0.25
+# Seconds PHD2 may take to settle after a slew
+GUIDE_SETTLE_TIMEOUT = 120.0
+MAX_PANELS = 100
+
+
+def tangent_to_sky(ra, dec, xi, eta):
+    """RA (hours) and Dec (degrees) of tangent plane offsets (degrees) around ra, dec.
+
+    xi points east and eta north, as seen on the sky.
+    """
+    ra0 = math.radians(ra * 15.0)
+    dec0 = math.radians(dec)
+    xi = np.tan(np.radians(np.asarray(xi, dtype=np.float64)))
+    eta = np.tan(np.radians(np.asarray(eta, dtype=np.float64)))
+    denominator = math.cos(dec0) - eta * math.sin(dec0)
+    panel_ra = ra0 + np.arctan2(xi, denominator)
+    panel_dec = np.arctan2(
+        math.sin(dec0) + eta * math.cos(dec0), np.hypot(xi, denominator)
+    )
+    return np.degrees(panel_ra) / 15.0 % 24.0, np.degrees(panel_dec)
+
+
+def mosaic_panels(
+    ra, dec, fov_width, fov_height, columns, rows, overlap=0.2, rotation=0.0
+):
+    """Panel centres of a columns x rows mosaic in serpentine order.
+
+    fov_width and fov_height are the camera field in degrees, overlap the
+    fraction shared by neighbouring panels and rotation turns the grid by that
+    many degrees from north through east. Returns a list of dicts with "panel",
+    "row", "column", "ra" (hours), "dec" (degrees) and a "target" body for
+    POST /api/mount/target.
+    """
+    if columns < 1 or rows < 1:
+        raise ValueError("columns and rows must be at least 1")
+    if not 0.0 <= overlap < 1.0:
+        raise ValueError("overlap must be between 0 and 1")
+    if fov_width <= 0 or fov_height <= 0:
+        raise ValueError("field of view must be positive")
+
+    order = []
+    for row in range(rows):
+        cells = range(columns) if row % 2 == 0 else reversed(range(columns))
+        order.extend((row, column) for column in cells)
+    row_index = np.array([row for row, _ in order], dtype=np.float64)
+    column_index = np.array([column for _, column in order], dtype=np.float64)
+
+    # Offsets from the centre, rows run north to south, columns east to west
+    x = -(column_index - (columns - 1) / 2.0) * fov_width * (1.0 - overlap)
+    y = -(row_index - (rows - 1) / 2.0) * fov_height * (1.0 - overlap)
+    angle = math.radians(rotation)
+    xi = x * math.cos(angle) + y * math.sin(angle)
+    eta = -x * math.sin(angle) + y * math.cos(angle)
+    panel_ra, panel_dec = tangent_to_sky(ra, dec, xi, eta)
+    return [
+        {
+            "panel": index + 1,
+            "row": row,
+            "column": column,
+            "ra": round(float(panel_ra[index]), 6),
+            "dec": round(float(panel_dec[index]), 6),
+            "target": {
+                "ra": format_hms(float(panel_ra[index])),
+                "dec": format_dms(float(panel_dec[index])),
+                "epoch": "J2000",
+            },
+        }
+        for index, (row, column) in enumerate(order)
+    ]
+
+
+@contextmanager
+def _connected(mount_factory):
+    mount = mount_factory()
+    mount.connect()
+    try:
+        if not mount.is_connected:
+            raise RuntimeError("Mount not connected")
+        yield mount
+    finally:
+        mount.disconnect()
+
+
+def _ask(mount, command):
+    mount.write(command)
+    return mount.read_data()
+
+
+def _start_slew(mount, ra, dec):
+    ra_set = _ask(mount, f":Sr{format_hms(ra)}#")
+    dec_set = _ask(mount, f":Sd{format_dms(dec)}#")
+    if ra_set != "1" or dec_set != "1":
+        raise RuntimeError("Mount rejected target coordinates")
+    reply = _ask(mount, ":MS#")
+    if reply and not reply.startswith("0"):
+        raise RuntimeError(f"Slew refused: {reply[1:] or reply}")
+
+
+def _check_arrival(mount, ra, dec):
+    """Raise RuntimeError unless the mount points within ARRIVAL_TOLERANCE of ra, dec.
+
+    :D# also comes back empty once another request stopped the slew with :Q#.
+    """
+    try:
+        ra_now = parse_sexagesimal(_ask(mount, ":GR#"))
+        dec_now = parse_sexagesimal(_ask(mount, ":GD#"))
+    except ValueError:
+        raise RuntimeError("Mount position unknown after slew") from None
+    distance = angular_distance(ra_now * 15.0, dec_now, ra * 15.0, dec)
+    if distance > ARRIVAL_TOLERANCE:
+        raise RuntimeError(f"Slew stopped {distance:.1f} degrees from target")
+
+
+def _follow_slew(executor, mount_factory, ra, dec, stop, deadline, start):
+    """Start the slew if start is set and poll :D# over one connection.
+
+    Returns "done" once the mount arrived, "stopped" after sending :Q#,
+    "timeout" past the deadline, or "waiting" as soon as other mount work is
+    queued, so a manual stop never waits for the whole slew.
+    """
+    with _connected(mount_factory) as mount:
+        if start:
+            _start_slew(mount, ra, dec)
+        # :D# returns distance bars while slewing and nothing once done
+        while time.monotonic() < deadline and not stop.is_set():
+            if executor.queued:
+                return "waiting"
+            stop.wait(SLEW_POLL)
+            if not _ask(mount, ":D#"):
+                _check_arrival(mount, ra, dec)
+                return "done"
+        if stop.is_set():
+            # Abort the slew
+            _ask(mount, ":Q#")
+            return "stopped"
+        return "timeout"
+
+
+def slew(mount_factory, ra, dec, stop):
+    """Slew to JNow ra (hours) and dec (degrees) and wait until it is done.
+
+    The slew runs as one mount executor job over a single connection, which
+    polls :D# until the mount reports no distance left, then checks it is on
+    target. When other mount work queues up the job steps aside and carries
+    on afterwards over a new connection. When the stop event is set the slew
+    is aborted with :Q#. Raises RuntimeError when the mount refuses the
+    target, stops short of it or does not arrive within SLEW_TIMEOUT.
+    """
+    executor = get_executor("mount")
+    deadline = time.monotonic() + SLEW_TIMEOUT
+    start = True
+    while True:
+        outcome = executor.run(
+            _follow_slew,
+            executor,
+            mount_factory,
+            ra,
+            dec,
+            stop,
+            deadline,
+            start,
+            timeout=SLEW_TIMEOUT + executor.timeout,
+        )
+        if outcome == "timeout":
+            raise RuntimeError("Slew did not finish")
+        if outcome != "waiting":
+            return
+        start = False
+
+
+class MosaicRunner:
+    """Runs mosaic panels one at a time in a background thread.
+
+    For every panel: stop guiding, send the J2000 panel centre converted to
+    epoch of date and :MS#, poll :D# until the slew is done, wait the settle
+    time, restart guiding and wait for PHD2 to settle if guiding was active,
+    then take the exposures as one camera capture job.
+    """
+
+    def __init__(
+        self, mount_factory, job_queue, guider=None, limits=None, session=None
+    ):
+        """Initialize with a MountSerial factory, a JobQueue and PHD2 client.
+
+        limits is an optional callable returning a LimitsEngine or None.
+        session is a lock shared with runners that must not run alongside.
+        """
+        self.mount_factory = mount_factory
+        self.job_queue = job_queue
+        self.guider = guider
+        self.limits = limits
+        self.session = session or threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._job = None
+        self.status = {"state": "idle", "panels": []}
+
+    @property
+    def running(self):
+        """True while a mosaic is being executed."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, panels, exposures=1, settle=5.0, exposure=0.0, image_format="jpeg"):
+        """Start running panels, False if a mosaic or sequence is running.
+
+        exposures frames of exposure seconds are saved per panel in image_format.
+        """
+        with self._lock:
+            if self.running or not self.session.acquire(blocking=False):
+                return False
+            self._stop.clear()
+            self.status = {
+                "state": "running",
+                "started": utc().isoformat(timespec="seconds"),
+                "current": None,
+                "exposures": exposures,
+                "exposure": exposure,
+                "format": image_format,
+                "settle": settle,
+                "panels": [dict(panel, state="pending") for panel in panels],
+            }
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """Ask the running mosaic to stop, a capture ends after its current exposure."""
+        self._stop.set()
+        job = self._job
+        if job is not None:
+            self.job_queue.cancel(job.id)
+
+    def wait(self, timeout=None):
+        """Wait for the running mosaic to finish."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            guiding = self._guiding()
+            engine = self.limits() if self.limits else None
+            for panel in self.status["panels"]:
+                if self._stop.is_set():
+                    break
+                self.status["current"] = panel["panel"]
+                try:
+                    self._run_panel(panel, guiding, engine)
+                except Exception as e:
+                    panel.update(state="failed", error=str(e))
+                    raise
+            self.status["state"] = "stopped" if self._stop.is_set() else "done"
+        except Exception as e:
+            logger.error("Mosaic failed: %s", str(e))
+            self.status.update(state="failed", error=str(e))
+        finally:
+            self._job = None
+            self.status["finished"] = utc().isoformat(timespec="seconds")
+            self.session.release()
+
+    def _run_panel(self, panel, guiding, engine):
+        ra, dec = j2000_to_jnow(panel["ra"], panel["dec"])
+        if engine is not None:
+            reachable, reason = engine.check(ra, dec, epoch="JNOW")
+            if not reachable[0]:
+                panel.update(state="skipped", error=f"Target {reason[0]}")
+                return
+
+        began = time.monotonic()
+        if guiding:
+            self.guider.stop_guiding()
+        panel["state"] = "slewing"
+        slew(self.mount_factory, float(ra), float(dec), self._stop)
+        panel["slew_seconds"] = round(time.monotonic() - began, 1)
+
+        panel["state"] = "settling"
+        self._stop.wait(self.status["settle"])
+        if guiding and not self._stop.is_set():
+            if not self.guider.start_guiding():
+                raise RuntimeError("Failed to restart guiding")
+            if not self.guider.wait_for_settle(GUIDE_SETTLE_TIMEOUT):
+                raise RuntimeError("Guiding did not settle")
+        panel["settle_seconds"] = round(
+            time.monotonic() - began - panel["slew_seconds"], 1
+        )
+        if self._stop.is_set():
+            panel["state"] = "stopped"
+            return
+
+        panel["state"] = "capturing"
+        job = CaptureJob(
+            "camera",
+            exposure=self.status["exposure"],
+            count=self.status["exposures"],
+            image_format=self.status["format"],
+        )
+        self._job = self.job_queue.submit(job)
+        panel["job"] = job.id
+        if self._stop.is_set():
+            # Stopped while the job was being submitted
+            self.job_queue.cancel(job.id)
+        job.wait()
+        panel["files"] = list(job.files)
+        if job.state == "failed":
+            raise RuntimeError(job.error)
+        panel["state"] = "done" if job.state == "done" else "stopped"
+
+    def _guiding(self):
+        if self.guider is None:
+            return False
+        try:
+            return self.guider.get_status().get("guiding", False)
+        except Exception:
+            return False
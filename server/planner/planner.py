@@ -0,0 +1,218 @@
+"""Order a night's targets to cut slew time and keep them high in the sky.
+
+Targets are evaluated on one time grid with LimitsEngine.grid. The schedule is
+then built greedily, a nearest neighbour tour where distance is a cost in
+minutes: slew and wait time, altitude given up against the best altitude the
+target still reaches later, how long the target stays up after its block and
+a penalty for blocks that cross the meridian flip. Each step scores every
+remaining target in one NumPy pass, so 50+ targets plan in milliseconds.
+"""
+
+import math
+
+import numpy as np
+
+from ..astro.coordinates import format_dms, format_hms
+
+# Degrees per second on each axis, both axes move at once
+SLEW_RATE = 2.0
+SETTLE_SECONDS = 10.0
+# Cost in minutes per degree below the best altitude still to come
+ALTITUDE_WEIGHT = 1.0
+# Cost in minutes per hour the target remains reachable after its block
+URGENCY_WEIGHT = 5.0
+# Cost in minutes of flipping in the middle of a block
+FLIP_PENALTY = 30.0
+
+
+def slew_seconds(ha_from, dec_from, ha_to, dec_to, latitude, meridian_limit=0.0):
+    """Estimate slew time between hour angles (hours) and declinations (degrees).
+
+    The RA and Dec axes move together, so the slower axis sets the time. A
+    slew to the other side of the pier swings the Dec axis over the pole.
+    """
+    ha_from, ha_to = np.asarray(ha_from), np.asarray(ha_to)
+    dec_from, dec_to = np.asarray(dec_from), np.asarray(dec_to)
+    ra_axis = np.abs(ha_to - ha_from) * 15.0
+    dec_axis = np.abs(dec_to - dec_from)
+    flip = (ha_from >= meridian_limit) != (ha_to >= meridian_limit)
+    hemisphere = 1.0 if latitude >= 0 else -1.0
+    ra_axis = np.where(flip, np.abs(180.0 - ra_axis), ra_axis)
+    dec_axis = np.where(flip, 180.0 - hemisphere * (dec_from + dec_to), dec_axis)
+    return np.maximum(ra_axis, dec_axis) / SLEW_RATE + SETTLE_SECONDS
+
+
+def _next_index(mask):
+    """For each column, the first column at or after it where mask is set."""
+    columns = mask.shape[1]
+    index = np.where(mask, np.arange(columns), columns)
+    return np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1]
+
+
+def _window_sums(values, length):
+    """Sum of values[:, j : j + length + 1] per row and column, NaN past the end."""
+    rows, columns = values.shape
+    totals = np.zeros((rows, columns + 1))
+    totals[:, 1:] = np.cumsum(values, axis=1)
+    first = np.arange(columns)[None, :]
+    last = first + length[:, None] + 1
+    sums = (
+        totals[np.arange(rows)[:, None], np.minimum(last, columns)]
+        - totals[np.arange(rows)[:, None], first]
+    )
+    return np.where(last <= columns, sums, np.nan)
+
+
+class SessionPlanner:
+    """Greedy session planner for one site, set of mount limits and time range."""
+
+    def __init__(self, engine, step=1.0):
+        """Initialize with a LimitsEngine and a time step in minutes."""
+        self.engine = engine
+        self.step = step
+
+    def plan(self, targets, start=None, end=None, epoch="J2000", position=None):
+        """Order targets and give each a start and end time.
+
+        targets are dicts with "ra" (hours), "dec" (degrees) and "duration"
+        (minutes); other keys are passed through. position is the (ra, dec)
+        the mount points at when the session starts, in the same epoch.
+        Returns {"plan": [...], "unscheduled": [...]}.
+        """
+        ra = [target["ra"] for target in targets]
+        dec = [target["dec"] for target in targets]
+        if position is not None:
+            ra.append(position[0])
+            dec.append(position[1])
+        grid = self.engine.grid(ra, dec, start, end, step=self.step, epoch=epoch)
+        ok, altitude, ha = grid.ok, grid.altitude, grid.hour_angle
+        if position is not None:
+            start_ha, start_dec = ha[-1, 0], grid.dec[-1]
+            ok, altitude, ha = ok[:-1], altitude[:-1], ha[:-1]
+        columns = ok.shape[1]
+
+        # Blocks span length + 1 grid columns
+        length = np.array(
+            [max(1, math.ceil(target["duration"] / self.step)) for target in targets]
+        )
+        feasible = _window_sums(ok, length) == length[:, None] + 1
+        flips = np.zeros(ok.shape)
+        flips[:, :-1] = self.engine.flips(ha)
+        # flips[:, k] marks a crossing between columns k and k + 1
+        crosses = _window_sums(flips, length - 1) > 0
+        mean_altitude = _window_sums(altitude, length) / (length[:, None] + 1)
+        best_altitude = np.maximum.accumulate(
+            np.where(feasible, mean_altitude, -np.inf)[:, ::-1], axis=1
+        )[:, ::-1]
+        last_start = np.where(
+            feasible.any(axis=1), columns - 1 - np.argmax(feasible[:, ::-1], axis=1), -1
+        )
+        next_any = _next_index(feasible)
+        next_clear = _next_index(feasible & ~crosses)
+
+        rows = np.arange(len(targets))
+        remaining = np.ones(len(targets), dtype=bool)
+        column, previous = 0, None
+        plan = []
+        while remaining.any() and column < columns:
+            candidates = rows[remaining]
+            if previous is not None:
+                slews = slew_seconds(
+                    ha[previous, column],
+                    grid.dec[previous],
+                    ha[candidates, column],
+                    grid.dec[candidates],
+                    self.engine.latitude,
+                    self.engine.limits.meridian_limit,
+                )
+            elif position is not None:
+                slews = slew_seconds(
+                    start_ha,
+                    start_dec,
+                    ha[candidates, 0],
+                    grid.dec[candidates],
+                    self.engine.latitude,
+                    self.engine.limits.meridian_limit,
+                )
+            else:
+                slews = np.zeros(len(candidates))
+            arrive = column + np.ceil(slews / 60.0 / self.step).astype(int)
+            arrive = np.minimum(arrive, columns - 1)
+
+            options = []
+            for next_start in (next_any, next_clear):
+                begin = next_start[candidates, arrive]
+                valid = begin < columns
+                begin = np.minimum(begin, columns - 1)
+                cost = (
+                    slews / 60.0
+                    + (begin - column) * self.step
+                    + ALTITUDE_WEIGHT
+                    * (
+                        best_altitude[candidates, begin]
+                        - mean_altitude[candidates, begin]
+                    )
+                    + URGENCY_WEIGHT
+                    * (last_start[candidates] - begin)
+                    * self.step
+                    / 60.0
+                    + FLIP_PENALTY * crosses[candidates, begin]
+                )
+                options.append((np.where(valid, cost, np.inf), begin))
+            costs = np.stack([cost for cost, _ in options])
+            begins = np.stack([begin for _, begin in options])
+            choice = np.unravel_index(np.argmin(costs), costs.shape)
+            if not np.isfinite(costs[choice]):
+                break
+
+            row = candidates[choice[1]]
+            begin = int(begins[choice])
+            finish = begin + int(length[row])
+            plan.append(
+                self._entry(
+                    targets[row],
+                    grid,
+                    row,
+                    begin,
+                    finish,
+                    slews[choice[1]],
+                    column,
+                    bool(crosses[row, begin]),
+                    epoch,
+                )
+            )
+            remaining[row] = False
+            column, previous = finish, row
+
+        unscheduled = [
+            dict(
+                targets[row],
+                reason=(
+                    "no time left in the session"
+                    if feasible[row].any()
+                    else "not reachable for the requested duration"
+                ),
+            )
+            for row in rows[remaining]
+        ]
+        return {"plan": plan, "unscheduled": unscheduled}
+
+    def _entry(self, target, grid, row, begin, finish, slew, column, flip, epoch):
+        altitude = grid.altitude[row, begin : finish + 1]
+        return dict(
+            target,
+            start=grid.times[begin],
+            end=grid.times[finish],
+            slew_seconds=round(float(slew), 1),
+            wait_minutes=round(max(0.0, (begin - column) * self.step - slew / 60.0), 1),
+            altitude_start=round(float(altitude[0]), 2),
+            altitude_end=round(float(altitude[-1]), 2),
+            max_altitude=round(float(altitude.max()), 2),
+            flip=flip,
+            # Body for POST /api/mount/target
+            target={
+                "ra": format_hms(target["ra"]),
+                "dec": format_dms(target["dec"]),
+                "epoch": epoch,
+            },
+        )
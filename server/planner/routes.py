@@ -0,0 +1,268 @@
+"""Routes to plan an observing session."""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+
+from ..astro.coordinates import parse_sexagesimal, utc
+from ..catalog import routes as catalog_routes
+from ..guider.phd2_client import PHD2Client
+from ..jobs.runner import CaptureJob, job_queue
+from ..mount.serial import MountSerial
+from ..mount.site import get_limits_engine, get_site
+from .mosaic import MAX_PANELS, MosaicRunner, mosaic_panels
+from .planner import SessionPlanner
+from .sequence import SequenceRunner, sequence_plan
+
+planner_bp = Blueprint("planner", __name__, url_prefix="/api/planner")
+
+MAX_TARGETS = 500
+MAX_HOURS = 24
+DEFAULT_DURATION = 60.0
+
+
+# Held by the running mosaic or sequence, both slew the mount and capture
+session = threading.Lock()
+
+# Global mosaic runner, one mosaic runs at a time
+mosaic_runner = MosaicRunner(
+    MountSerial,
+    job_queue,
+    guider=PHD2Client(),
+    limits=get_limits_engine,
+    session=session,
+)
+
+# Global sequence runner, one sequence runs at a time
+sequence_runner = SequenceRunner(
+    job_queue,
+    MountSerial,
+    guider=PHD2Client(),
+    limits=get_limits_engine,
+    session=session,
+)
+
+
+def _coordinate(value):
+    """Numbers are taken as is, strings as sexagesimal."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_sexagesimal(value)
+
+
+def _resolve(target, duration):
+    """Build a planner target from a catalog id or ra/dec."""
+    if "ra" in target and "dec" in target:
+        resolved = {
+            "name": target.get("name") or target.get("id"),
+            "ra": _coordinate(target["ra"]),
+            "dec": _coordinate(target["dec"]),
+        }
+    else:
+        obj = catalog_routes.catalog.lookup(str(target.get("id", "")))
+        if obj is None:
+            raise ValueError(f"Unknown target: {target.get('id')}")
+        resolved = {"name": obj.get("id"), "ra": obj["ra"], "dec": obj["dec"]}
+    resolved["duration"] = float(target.get("duration", duration))
+    if resolved["duration"] <= 0:
+        raise ValueError("duration must be positive")
+    return resolved
+
+
+@planner_bp.route("/plan", methods=["POST"])
+def plan():
+    """Order targets to minimize slews while keeping them high.
+
+    Expects JSON: {"targets": [{"id": "M31"} or {"name", "ra", "dec"}, ...]}
+    Targets may set "duration" in minutes. Optional: "duration" (default 60),
+    "start" and "end" ISO times (default now to 12 hours later), "step" in
+    minutes (default 1), "epoch": "J2000" (default) or "JNOW", "lat"/"lon"
+    (default to the configured or mount site) and "position": {"ra", "dec"}
+    the mount points at when the session starts.
+    Each planned entry carries a "target" body for POST /api/mount/target.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get("targets"), list) or not data["targets"]:
+        return jsonify({"error": "targets required"}), 400
+    if len(data["targets"]) > MAX_TARGETS:
+        return jsonify({"error": f"At most {MAX_TARGETS} targets"}), 400
+
+    epoch = str(data.get("epoch") or "J2000").upper()
+    if epoch not in ("JNOW", "J2000"):
+        return jsonify({"error": "Invalid epoch. Use: JNOW, J2000"}), 400
+
+    try:
+        duration = float(data.get("duration", DEFAULT_DURATION))
+        targets = [_resolve(target, duration) for target in data["targets"]]
+        start = (
+            utc(datetime.fromisoformat(data["start"])) if data.get("start") else utc()
+        )
+        end = (
+            utc(datetime.fromisoformat(data["end"]))
+            if data.get("end")
+            else start + timedelta(hours=12)
+        )
+        step = float(data.get("step", 1.0))
+        position = None
+        if data.get("position"):
+            position = (
+                _coordinate(data["position"]["ra"]),
+                _coordinate(data["position"]["dec"]),
+            )
+        if end <= start or end - start > timedelta(hours=MAX_HOURS):
+            raise ValueError(f"end must be within {MAX_HOURS} hours after start")
+        if not 0.5 <= step <= 30:
+            raise ValueError("step must be between 0.5 and 30 minutes")
+        # Last, as without lat and lon the site may be read from the mount
+        site = get_site(data.get("lat"), data.get("lon"))
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if site is None:
+        return jsonify({"error": "Site unknown, set location or connect mount"}), 503
+    engine = get_limits_engine(site)
+
+    began = time.perf_counter()
+    result = SessionPlanner(engine, step=step).plan(
+        targets, start, end, epoch=epoch, position=position
+    )
+    result.update(
+        site={"latitude": site[0], "longitude": site[1]},
+        start=start.isoformat(timespec="seconds"),
+        end=end.isoformat(timespec="seconds"),
+        epoch=epoch,
+        elapsed_ms=round((time.perf_counter() - began) * 1000.0, 1),
+    )
+    return jsonify(result)
+
+
+def _mosaic_panels(data):
+    """Panels for a mosaic request, raises ValueError on bad input."""
+    centre = _resolve(data, DEFAULT_DURATION)
+    panels = mosaic_panels(
+        centre["ra"],
+        centre["dec"],
+        float(data["fov_width"]),
+        float(data["fov_height"]),
+        int(data.get("columns", 2)),
+        int(data.get("rows", 2)),
+        overlap=float(data.get("overlap", 0.2)),
+        rotation=float(data.get("rotation", 0.0)),
+    )
+    if len(panels) > MAX_PANELS:
+        raise ValueError(f"At most {MAX_PANELS} panels")
+    return panels
+
+
+@planner_bp.route("/mosaic", methods=["POST"])
+def mosaic():
+    """Get the panel centres of a mosaic in serpentine order.
+
+    Expects JSON: {"id": "M31"} or {"ra", "dec"} (J2000) for the centre and
+    "fov_width", "fov_height" in degrees. Optional: "columns", "rows"
+    (default 2), "overlap" fraction (default 0.2), "rotation" in degrees.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Mosaic centre and field of view required"}), 400
+    try:
+        panels = _mosaic_panels(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid mosaic: {e}"}), 400
+    return jsonify({"panels": panels})
+
+
+@planner_bp.route("/mosaic/run", methods=["POST"])
+def run_mosaic():
+    """Slew to each panel, settle and capture.
+
+    Takes the /mosaic body plus "exposures" per panel (default 1) of
+    "exposure" seconds (default 0), "format" of the saved frames (default
+    jpeg) and "settle" seconds after each slew (default 5). Frames are taken
+    as camera capture jobs. PHD2 guiding, if active, is stopped for slews and
+    settled before captures.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Mosaic centre and field of view required"}), 400
+    try:
+        panels = _mosaic_panels(data)
+        exposures = int(data.get("exposures", 1))
+        settle = float(data.get("settle", 5.0))
+        if exposures < 1 or settle < 0:
+            raise ValueError("exposures must be at least 1 and settle positive")
+        # CaptureJob checks exposure, count and format
+        job = CaptureJob(
+            "camera",
+            exposure=data.get("exposure", 0.0),
+            count=exposures,
+            image_format=data.get("format", "jpeg"),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid mosaic: {e}"}), 400
+
+    started = mosaic_runner.start(
+        panels, exposures, settle, exposure=job.exposure, image_format=job.format
+    )
+    if not started:
+        return jsonify({"error": "A mosaic or sequence is already running"}), 409
+    return jsonify(mosaic_runner.status), 202
+
+
+@planner_bp.route("/mosaic/status")
+def mosaic_status():
+    """Get the progress of the current or last mosaic."""
+    return jsonify(mosaic_runner.status)
+
+
+@planner_bp.route("/mosaic/stop", methods=["POST"])
+def stop_mosaic():
+    """Stop the running mosaic, aborting a slew in progress."""
+    if not mosaic_runner.running:
+        return jsonify({"error": "No mosaic running"}), 409
+    mosaic_runner.stop()
+    return jsonify({"message": "Stopping mosaic"})
+
+
+@planner_bp.route("/sequence/run", methods=["POST"])
+def run_sequence():
+    """Run an imaging sequence in the background.
+
+    Expects JSON "steps", each with "exposure" seconds, "count", optional
+    "filter", "device" (default camera), "format" and "quality". Optional:
+    "target" ({"id"} or {"ra", "dec"} J2000) to slew to first, "settle"
+    seconds after the slew, "dither_every" frames (0 never dithers),
+    "dither_pixels", "ra_only", "pause_on_guiding_lost" (default true) and
+    "resume_timeout" seconds to wait for guiding to recover.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Sequence steps required"}), 400
+    try:
+        target = None
+        if data.get("target"):
+            target = _resolve(data["target"], DEFAULT_DURATION)
+            target = {"name": target["name"], "ra": target["ra"], "dec": target["dec"]}
+        plan = sequence_plan(data, target)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid sequence: {e}"}), 400
+
+    if not sequence_runner.start(plan):
+        return jsonify({"error": "A mosaic or sequence is already running"}), 409
+    return jsonify(sequence_runner.status), 202
+
+
+@planner_bp.route("/sequence/status")
+def sequence_status():
+    """Get the progress of the current or last sequence."""
+    return jsonify(sequence_runner.status)
+
+
+@planner_bp.route("/sequence/stop", methods=["POST"])
+def stop_sequence():
+    """Stop the running sequence after the current exposure."""
+    if not sequence_runner.running:
+        return jsonify({"error": "No sequence running"}), 409
+    sequence_runner.stop()
+    return jsonify({"message": "Stopping sequence"})
@@ -0,0 +1,269 @@
+"""Imaging sequences: blocks of exposures with dithers between them.
+
+A plan optionally slews to a target, then runs its steps in order. Each step
+takes its exposures as capture jobs of "dither_every" frames. Once the last
+frame of a block is exposed the guider dithers, and the block's frames are
+saved while PHD2 settles, so the camera only waits for the settle. When
+guiding is lost the running job is cancelled and the sequence pauses until
+PHD2 is guiding again.
+"""
+
+import logging
+import threading
+import time
+
+from ..astro.coordinates import utc
+from ..astro.precession import j2000_to_jnow
+from ..jobs.runner import JPEG_QUALITY, CaptureJob
+from .mosaic import GUIDE_SETTLE_TIMEOUT, slew
+
+logger = logging.getLogger(__name__)
+
+# Seconds between guiding checks while a block is exposing
+GUIDE_POLL = 2.0
+# Seconds a paused sequence waits for guiding to come back
+RESUME_TIMEOUT = 600.0
+MAX_STEPS = 50
+
+
+def sequence_plan(data, target=None):
+    """Validated plan from a request body, raises ValueError on bad input.
+
+    target is the J2000 "ra" (hours) and "dec" (degrees) to slew to first,
+    or None to image wherever the mount points.
+    """
+    steps = data.get("steps")
+    if not isinstance(steps, list) or not 1 <= len(steps) <= MAX_STEPS:
+        raise ValueError(f"steps must be a list of 1 to {MAX_STEPS} steps")
+    plan = {
+        "target": target,
+        "settle": float(data.get("settle", 5.0)),
+        "dither_every": int(data.get("dither_every", 0)),
+        "dither_pixels": float(data.get("dither_pixels", 5.0)),
+        "ra_only": bool(data.get("ra_only", False)),
+        "pause_on_lost": bool(data.get("pause_on_guiding_lost", True)),
+        "resume_timeout": float(data.get("resume_timeout", RESUME_TIMEOUT)),
+        "steps": [],
+    }
+    if plan["settle"] < 0 or plan["dither_every"] < 0 or plan["resume_timeout"] < 0:
+        raise ValueError("settle, dither_every and resume_timeout must be positive")
+    for step in steps:
+        # CaptureJob checks device, exposure, count and format
+        job = CaptureJob(
+            step.get("device", "camera"),
+            exposure=step.get("exposure", 0.0),
+            count=step.get("count", 1),
+            image_format=step.get("format", "jpeg"),
+            quality=step.get("quality", JPEG_QUALITY),
+        )
+        plan["steps"].append(
+            {
+                "device": job.device,
+                "filter": step.get("filter"),
+                "exposure": job.exposure,
+                "count": job.count,
+                "format": job.format,
+                "quality": job.quality,
+            }
+        )
+    return plan
+
+
+class SequenceRunner:
+    """Runs one imaging sequence at a time in a background thread."""
+
+    def __init__(
+        self, job_queue, mount_factory=None, guider=None, limits=None, session=None
+    ):
+        """Initialize with a JobQueue, a MountSerial factory and PHD2 client.
+
+        limits is an optional callable returning a LimitsEngine or None.
+        session is a lock shared with runners that must not run alongside.
+        """
+        self.job_queue = job_queue
+        self.mount_factory = mount_factory
+        self.guider = guider
+        self.limits = limits
+        self.session = session or threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._job = None
+        self.status = {"state": "idle", "steps": []}
+
+    @property
+    def running(self):
+        """True while a sequence is being executed."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, plan):
+        """Start running a plan from sequence_plan, False if one is running.
+
+        A mosaic holding the shared session counts as running.
+        """
+        with self._lock:
+            if self.running or not self.session.acquire(blocking=False):
+                return False
+            self._stop.clear()
+            self.status = {
+                "state": "running",
+                "started": utc().isoformat(timespec="seconds"),
+                "target": plan["target"],
+                "current": None,
+                "dithers": 0,
+                "pauses": 0,
+                # Seconds the camera sat idle between blocks
+                "dead_seconds": 0.0,
+                "steps": [
+                    dict(step, step=index + 1, state="pending", done=0, jobs=[])
+                    for index, step in enumerate(plan["steps"])
+                ],
+            }
+            self._thread = threading.Thread(target=self._run, args=(plan,), daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the sequence, the running job ends after its current exposure."""
+        self._stop.set()
+        job = self._job
+        if job is not None:
+            self.job_queue.cancel(job.id)
+
+    def wait(self, timeout=None):
+        """Wait for the running sequence to finish."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, plan):
+        try:
+            guiding = self._guiding()
+            if plan["target"] is not None:
+                self._slew_to(plan, guiding)
+            for step in self.status["steps"]:
+                if self._stop.is_set():
+                    break
+                self.status["current"] = step["step"]
+                try:
+                    self._run_step(plan, step, guiding)
+                except Exception as e:
+                    step.update(state="failed", error=str(e))
+                    raise
+            self.status["state"] = "stopped" if self._stop.is_set() else "done"
+        except Exception as e:
+            logger.error("Sequence failed: %s", str(e))
+            self.status.update(state="failed", error=str(e))
+        finally:
+            self._job = None
+            self.status["finished"] = utc().isoformat(timespec="seconds")
+            self.session.release()
+
+    def _slew_to(self, plan, guiding):
+        ra, dec = j2000_to_jnow(plan["target"]["ra"], plan["target"]["dec"])
+        engine = self.limits() if self.limits else None
+        if engine is not None:
+            reachable, reason = engine.check(ra, dec, epoch="JNOW")
+            if not reachable[0]:
+                raise RuntimeError(f"Target {reason[0]}")
+
+        self.status["state"] = "slewing"
+        if guiding:
+            self.guider.stop_guiding()
+        slew(self.mount_factory, float(ra), float(dec), self._stop)
+
+        self.status["state"] = "settling"
+        self._stop.wait(plan["settle"])
+        if guiding and not self._stop.is_set():
+            if not self.guider.start_guiding():
+                raise RuntimeError("Failed to restart guiding")
+            if not self.guider.wait_for_settle(GUIDE_SETTLE_TIMEOUT):
+                raise RuntimeError("Guiding did not settle")
+        self.status["state"] = "running"
+
+    def _run_step(self, plan, step, guiding):
+        step["state"] = "running"
+        block = plan["dither_every"] or step["count"]
+        idle_since = None
+        while step["done"] < step["count"] and not self._stop.is_set():
+            job = CaptureJob(
+                step["device"],
+                exposure=step["exposure"],
+                count=min(block, step["count"] - step["done"]),
+                image_format=step["format"],
+                quality=step["quality"],
+            )
+            self._job = self.job_queue.submit(job)
+            step["jobs"].append(job.id)
+            if self._stop.is_set():
+                # Stopped while the job was being submitted
+                self.job_queue.cancel(job.id)
+            if idle_since is not None:
+                job.wait(lambda j: j.state != "queued")
+                self.status["dead_seconds"] = round(
+                    self.status["dead_seconds"] + time.monotonic() - idle_since, 1
+                )
+            lost = self._expose(job, guiding and plan["pause_on_lost"])
+            step["done"] += job.exposed
+            idle_since = time.monotonic()
+
+            if lost:
+                self._pause(plan["resume_timeout"])
+            elif (
+                guiding
+                and plan["dither_every"]
+                and job.exposed == job.count
+                and step["done"] < step["count"]
+                and not self._stop.is_set()
+            ):
+                # Frames of the block are saved while PHD2 settles
+                self._dither(plan)
+            job.wait()
+            if job.state == "failed":
+                raise RuntimeError(job.error)
+        step["state"] = "done" if step["done"] >= step["count"] else "stopped"
+
+    def _expose(self, job, watch_guiding):
+        """Wait until the job exposed every frame, True if guiding was lost."""
+        while not job.wait(lambda j: j.exposed >= j.count or j.done, GUIDE_POLL):
+            if watch_guiding and not self._locked():
+                logger.warning("Guiding lost, pausing sequence")
+                self.job_queue.cancel(job.id)
+                job.wait()
+                return True
+        return False
+
+    def _pause(self, resume_timeout):
+        self.status["state"] = "paused"
+        self.status["pauses"] += 1
+        deadline = time.monotonic() + resume_timeout
+        while not self._stop.is_set():
+            if self._locked():
+                logger.info("Guiding recovered, resuming sequence")
+                self.status["state"] = "running"
+                return
+            if time.monotonic() >= deadline:
+                raise RuntimeError("Guiding was not recovered")
+            self._stop.wait(GUIDE_POLL)
+
+    def _dither(self, plan):
+        self.status["state"] = "dithering"
+        if not self.guider.dither(plan["dither_pixels"], ra_only=plan["ra_only"]):
+            raise RuntimeError("Dither failed")
+        if not self.guider.wait_for_settle(GUIDE_SETTLE_TIMEOUT):
+            raise RuntimeError("Guiding did not settle after dither")
+        self.status["dithers"] += 1
+        self.status["state"] = "running"
+
+    def _locked(self):
+        try:
+            return self.guider.get_status().get("state") == "Guiding"
+        except Exception:
+            return False
+
+    def _guiding(self):
+        if self.guider is None:
+            return False
+        try:
+            return self.guider.get_status().get("guiding", False)
+        except Exception:
+            return False
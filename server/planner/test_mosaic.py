@@ -0,0 +1,289 @@
+"""Unit tests for mosaic geometry and execution."""
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from flask import Flask
+
+from ..catalog.spatial import angular_distance
+from ..executors import DeviceExecutor
+from ..jobs.runner import JobQueue
+from . import mosaic, routes
+from .mosaic import MosaicRunner, mosaic_panels
+from .routes import planner_bp
+
+
+def separation(a, b):
+    """Angular distance in degrees between two panels."""
+    return angular_distance(a["ra"] * 15.0, a["dec"], b["ra"] * 15.0, b["dec"])
+
+
+class FakeBackend:
+    """Camera returning in-memory files."""
+
+    def __init__(self):
+        """Initialize with no exposures taken."""
+        self.exposures = 0
+
+    def check(self, job):
+        """Accept every job."""
+
+    def open(self):
+        """Connect."""
+
+    def expose(self, exposure):
+        """Take an exposure of exposure seconds."""
+        self.exposures += 1
+        time.sleep(exposure)
+        return f"IMG_{self.exposures:04d}.CR2", b"raw"
+
+    def close(self):
+        """Release."""
+
+
+def fake_mount(slew_polls=2, arrive=True):
+    """Mount mock accepting coordinates and slewing for slew_polls :D# polls.
+
+    Unless arrive is False it reports the target as its position afterwards.
+    """
+    mount = Mock(is_connected=True)
+    state = {"last": None, "polls": 0, ":GR#": "00:00:00", ":GD#": "+00:00:00"}
+
+    def write(command):
+        state["last"] = command
+        return True
+
+    def read_data():
+        command = state["last"]
+        if command.startswith((":Sr", ":Sd")):
+            if arrive:
+                state[":G" + command[2].upper() + "#"] = command[3:-1]
+            return "1"
+        if command == ":MS#":
+            state["polls"] = slew_polls
+            return "0"
+        if command == ":D#":
+            state["polls"] -= 1
+            return "|" if state["polls"] > 0 else ""
+        return state.get(command, "")
+
+    mount.write.side_effect = write
+    mount.read_data.side_effect = read_data
+    return mount
+
+
+class TestMosaicPanels(unittest.TestCase):
+    """Test panel geometry."""
+
+    def test_single_panel_is_centre(self):
+        """Test a 1x1 mosaic is the centre."""
+        (panel,) = mosaic_panels(5.5, -5.0, 2.0, 1.5, 1, 1)
+        self.assertAlmostEqual(panel["ra"], 5.5, places=6)
+        self.assertAlmostEqual(panel["dec"], -5.0, places=6)
+        self.assertEqual(panel["target"]["epoch"], "J2000")
+
+    def test_overlap_spacing(self):
+        """Test neighbouring panels are one field less the overlap apart."""
+        for dec in (0.0, 60.0, 88.0):
+            panels = mosaic_panels(12.0, dec, 2.0, 1.0, 3, 2, overlap=0.25)
+            self.assertAlmostEqual(separation(panels[0], panels[1]), 1.5, places=2)
+            # Panel 6 sits below panel 1 in the serpentine order
+            self.assertAlmostEqual(separation(panels[0], panels[5]), 0.75, places=2)
+
+    def test_serpentine_order(self):
+        """Test rows alternate direction."""
+        panels = mosaic_panels(1.0, 30.0, 1.0, 1.0, 3, 2)
+        self.assertEqual(
+            [(p["row"], p["column"]) for p in panels],
+            [(0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0)],
+        )
+
+    def test_rotation(self):
+        """Test a 90 degree rotation turns rows into columns."""
+        flat = mosaic_panels(6.0, 0.0, 1.0, 1.0, 2, 1)
+        turned = mosaic_panels(6.0, 0.0, 1.0, 1.0, 2, 1, rotation=90.0)
+        self.assertAlmostEqual(flat[0]["dec"], flat[1]["dec"], places=6)
+        self.assertAlmostEqual(turned[0]["ra"], turned[1]["ra"], places=6)
+
+    def test_invalid(self):
+        """Test invalid overlap is rejected."""
+        with self.assertRaises(ValueError):
+            mosaic_panels(1.0, 1.0, 1.0, 1.0, 2, 2, overlap=1.0)
+
+
+@patch.object(mosaic, "SLEW_POLL", 0.0)
+class TestMosaicRunner(unittest.TestCase):
+    """Test mosaic execution."""
+
+    def setUp(self):
+        """Set up a job queue writing into a temporary directory."""
+        self.output = tempfile.mkdtemp()
+        self.backend = FakeBackend()
+        self.queue = JobQueue(
+            backends=lambda device: self.backend,
+            output=self.output,
+            cards=lambda job, started, exposure: [],
+        )
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.output)
+
+    def test_run(self):
+        """Test every panel is slewed to, settled and captured."""
+        mount = fake_mount()
+        runner = MosaicRunner(lambda: mount, self.queue)
+        self.assertTrue(runner.start(mosaic_panels(1.0, 30.0, 1.0, 1.0, 2, 2), 2, 0))
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        self.assertEqual(self.backend.exposures, 8)
+        panels = runner.status["panels"]
+        self.assertEqual([p["state"] for p in panels], ["done"] * 4)
+        self.assertEqual([len(p["files"]) for p in panels], [2] * 4)
+        self.assertEqual(
+            [c.args[0] for c in mount.write.call_args_list].count(":MS#"), 4
+        )
+        # One connection per slew, each closed again
+        self.assertEqual(mount.connect.call_count, 4)
+        self.assertEqual(mount.connect.call_count, mount.disconnect.call_count)
+
+    def test_guided_run_settles(self):
+        """Test guiding is stopped for slews and settled before captures."""
+        guider = Mock()
+        guider.get_status.return_value = {"guiding": True}
+        guider.start_guiding.return_value = True
+        guider.wait_for_settle.return_value = True
+        mount = fake_mount()
+        runner = MosaicRunner(lambda: mount, self.queue, guider=guider)
+        runner.start(mosaic_panels(1.0, 30.0, 1.0, 1.0, 2, 1), 1, 0)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        self.assertEqual(guider.stop_guiding.call_count, 2)
+        self.assertEqual(guider.wait_for_settle.call_count, 2)
+
+    def test_slew_refused(self):
+        """Test a refused slew fails the mosaic."""
+        mount = fake_mount()
+        mount.read_data.side_effect = ["1", "1", "1Object below horizon"]
+        runner = MosaicRunner(lambda: mount, self.queue)
+        runner.start(mosaic_panels(1.0, 30.0, 1.0, 1.0, 1, 1), 1, 0)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "failed")
+        self.assertIn("below horizon", runner.status["error"])
+        self.assertEqual(runner.status["panels"][0]["state"], "failed")
+        self.assertEqual(self.backend.exposures, 0)
+
+    def test_slew_stopped_elsewhere(self):
+        """Test a slew stopped short of its panel is not taken as done."""
+        mount = fake_mount(arrive=False)
+        runner = MosaicRunner(lambda: mount, self.queue)
+        runner.start(mosaic_panels(1.0, 30.0, 1.0, 1.0, 1, 1), 1, 0)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "failed")
+        self.assertIn("from target", runner.status["error"])
+        self.assertEqual(self.backend.exposures, 0)
+
+    def test_slew_steps_aside(self):
+        """Test a slew hands the mount worker to queued work and carries on."""
+        executor = DeviceExecutor("mount")
+        mount = fake_mount(slew_polls=3)
+        reply = mount.read_data.side_effect
+        ran = []
+
+        def read_data():
+            if mount.write.call_args.args[0] == ":D#" and not ran:
+                executor.submit(ran.append, True)
+            return reply()
+
+        mount.read_data.side_effect = read_data
+        with patch.object(mosaic, "get_executor", return_value=executor):
+            mosaic.slew(lambda: mount, 1.0, 30.0, threading.Event())
+
+        self.assertEqual(ran, [True])
+        self.assertEqual(mount.connect.call_count, 2)
+        commands = [c.args[0] for c in mount.write.call_args_list]
+        self.assertEqual(commands.count(":MS#"), 1)
+        self.assertEqual(commands[-2:], [":GR#", ":GD#"])
+
+    def test_slew_stopped(self):
+        """Test a stopped slew is aborted with :Q# over its own connection."""
+        mount = fake_mount(slew_polls=100)
+        reply = mount.read_data.side_effect
+        stop = threading.Event()
+
+        def read_data():
+            if mount.write.call_args.args[0] == ":D#":
+                stop.set()
+            return reply()
+
+        mount.read_data.side_effect = read_data
+        mosaic.slew(lambda: mount, 1.0, 30.0, stop)
+
+        self.assertEqual(mount.write.call_args.args[0], ":Q#")
+        self.assertEqual(mount.connect.call_count, 1)
+
+
+class TestMosaicRoutes(unittest.TestCase):
+    """Test mosaic API routes."""
+
+    def setUp(self):
+        """Set up test client."""
+        self.app = Flask(__name__)
+        self.app.register_blueprint(planner_bp)
+        self.client = self.app.test_client()
+
+    def test_mosaic_panels(self):
+        """Test panel preview."""
+        response = self.client.post(
+            "/api/planner/mosaic",
+            json={
+                "ra": "05:35:17",
+                "dec": "-05:23:28",
+                "fov_width": 2.2,
+                "fov_height": 1.5,
+                "columns": 3,
+                "rows": 2,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.data)["panels"]), 6)
+
+    def test_mosaic_invalid(self):
+        """Test a mosaic without a field of view."""
+        response = self.client.post(
+            "/api/planner/mosaic", json={"ra": "05:35:17", "dec": "-05:23:28"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_run_during_sequence(self):
+        """Test a mosaic is refused while a sequence holds the session."""
+        with routes.session:
+            response = self.client.post(
+                "/api/planner/mosaic/run",
+                json={
+                    "ra": "05:35:17",
+                    "dec": "-05:23:28",
+                    "fov_width": 2.2,
+                    "fov_height": 1.5,
+                },
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(b"sequence", response.data)
+
+    def test_stop_without_mosaic(self):
+        """Test stopping when nothing runs."""
+        response = self.client.post("/api/planner/mosaic/stop")
+        self.assertEqual(response.status_code, 409)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Unit tests for the session planner."""
+
+import json
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from flask import Flask
+
+from ..astro.coordinates import sidereal_time
+from ..astro.limits import LimitsEngine, MountLimits
+from .planner import SessionPlanner, slew_seconds
+from .routes import planner_bp
+
+START = datetime(2025, 1, 15, 3, 0, tzinfo=timezone.utc)
+LATITUDE, LONGITUDE = 45.0, -75.0
+
+
+def ra_at_hour_angle(ha, when=START):
+    """JNow RA (hours) with the given hour angle at when."""
+    return (sidereal_time(when, LONGITUDE) / 15.0 - ha) % 24.0
+
+
+class TestSessionPlanner(unittest.TestCase):
+    """Test target ordering."""
+
+    def setUp(self):
+        """Set up a planner with a 20 degree altitude limit."""
+        self.planner = SessionPlanner(
+            LimitsEngine(LATITUDE, LONGITUDE, MountLimits(min_altitude=20))
+        )
+
+    def plan(self, targets, hours=6):
+        """Plan JNow targets from START."""
+        return self.planner.plan(
+            targets, START, START + timedelta(hours=hours), epoch="JNOW"
+        )
+
+    def test_setting_target_first(self):
+        """Test a target low in the west is observed before a rising one."""
+        result = self.plan(
+            [
+                {
+                    "name": "rising",
+                    "ra": ra_at_hour_angle(-3),
+                    "dec": 40,
+                    "duration": 30,
+                },
+                {
+                    "name": "setting",
+                    "ra": ra_at_hour_angle(4),
+                    "dec": 20,
+                    "duration": 30,
+                },
+            ]
+        )
+        self.assertEqual([e["name"] for e in result["plan"]], ["setting", "rising"])
+        first, second = result["plan"]
+        self.assertEqual(first["start"], START.isoformat(timespec="seconds"))
+        self.assertGreaterEqual(second["start"], first["end"])
+        self.assertEqual(second["target"]["epoch"], "JNOW")
+
+    def test_flip_avoidance(self):
+        """Test a block is moved past the meridian instead of flipping in it."""
+        result = self.plan(
+            [
+                {
+                    "name": "meridian",
+                    "ra": ra_at_hour_angle(-0.1),
+                    "dec": 30,
+                    "duration": 30,
+                }
+            ]
+        )
+        entry = result["plan"][0]
+        self.assertFalse(entry["flip"])
+        delay = datetime.fromisoformat(entry["start"]) - START
+        self.assertTrue(timedelta(minutes=5) <= delay <= timedelta(minutes=8))
+
+    def test_unscheduled(self):
+        """Test targets that never rise are reported."""
+        result = self.plan([{"name": "south", "ra": 0.0, "dec": -80, "duration": 10}])
+        self.assertEqual(result["plan"], [])
+        self.assertEqual(result["unscheduled"][0]["name"], "south")
+
+    def test_many_targets_fast(self):
+        """Test 100 targets plan well under a second."""
+        rng = np.random.default_rng(1)
+        targets = [
+            {"name": str(i), "ra": ra, "dec": dec, "duration": 5}
+            for i, (ra, dec) in enumerate(
+                zip(rng.uniform(0, 24, 100), rng.uniform(-20, 80, 100))
+            )
+        ]
+        began = time.perf_counter()
+        result = self.plan(targets, hours=12)
+        self.assertLess(time.perf_counter() - began, 1.0)
+        self.assertGreater(len(result["plan"]), 50)
+        ends = [e["end"] for e in result["plan"]]
+        starts = [e["start"] for e in result["plan"]]
+        self.assertTrue(all(s >= e for s, e in zip(starts[1:], ends)))
+
+    def test_slew_across_pier(self):
+        """Test slews to the other side of the pier swing over the pole."""
+        same = slew_seconds(-0.5, 60.0, -1.0, 60.0, LATITUDE)
+        flip = slew_seconds(-0.25, 60.0, 0.25, 60.0, LATITUDE)
+        self.assertLess(same, flip)
+
+
+class TestPlannerRoutes(unittest.TestCase):
+    """Test planner API routes."""
+
+    def setUp(self):
+        """Set up test client."""
+        self.app = Flask(__name__)
+        self.app.register_blueprint(planner_bp)
+        self.client = self.app.test_client()
+
+    def test_plan(self):
+        """Test planning targets given as coordinates."""
+        response = self.client.post(
+            "/api/planner/plan",
+            json={
+                "targets": [
+                    {"name": "M42", "ra": "05:35:17", "dec": "-05:23:28"},
+                    {"name": "M31", "ra": 0.712, "dec": 41.27, "duration": 20},
+                ],
+                "start": "2025-01-15T00:00:00+00:00",
+                "end": "2025-01-15T06:00:00+00:00",
+                "lat": 45,
+                "lon": -75,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(sorted(e["name"] for e in data["plan"]), ["M31", "M42"])
+        self.assertIn("ra", data["plan"][0]["target"])
+
+    def test_plan_invalid(self):
+        """Test missing targets and bad coordinates are rejected."""
+        response = self.client.post("/api/planner/plan", json={"targets": []})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/api/planner/plan",
+            json={"targets": [{"ra": "abc", "dec": "10"}], "lat": 45, "lon": -75},
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/api/planner/plan",
+            json={"targets": [{"ra": 1, "dec": 10}], "lat": "abc", "lon": -75},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+"""Unit tests for imaging sequences."""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from flask import Flask
+
+from ..jobs.runner import JobQueue
+from . import mosaic, routes, sequence
+from .sequence import SequenceRunner, sequence_plan
+from .test_mosaic import FakeBackend, fake_mount
+
+
+def fake_guider(states=None):
+    """PHD2 mock guiding, get_status reports states in turn then Guiding."""
+    states = list(states or [])
+    guider = Mock()
+
+    def get_status():
+        state = states.pop(0) if states else "Guiding"
+        return {"connected": True, "state": state, "guiding": state != "Stopped"}
+
+    guider.get_status.side_effect = get_status
+    guider.dither.return_value = True
+    guider.start_guiding.return_value = True
+    guider.wait_for_settle.return_value = True
+    return guider
+
+
+@patch.object(sequence, "GUIDE_POLL", 0.01)
+@patch.object(mosaic, "SLEW_POLL", 0.0)
+class TestSequenceRunner(unittest.TestCase):
+    """Test sequence execution."""
+
+    def setUp(self):
+        """Set up a job queue writing into a temporary directory."""
+        self.output = tempfile.mkdtemp()
+        self.backend = FakeBackend()
+        self.queue = JobQueue(lambda device: self.backend, self.output)
+
+    def tearDown(self):
+        """Remove the output directory."""
+        shutil.rmtree(self.output)
+
+    def plan(self, **fields):
+        """Plan of a 5 frame luminance step and a 2 frame red step."""
+        data = {
+            "steps": [
+                {"filter": "L", "exposure": 0.01, "count": 5},
+                {"filter": "R", "exposure": 0.01, "count": 2},
+            ]
+        }
+        data.update(fields)
+        return sequence_plan(data)
+
+    def test_run_unguided(self):
+        """Test every step runs as one job without dithering."""
+        runner = SequenceRunner(self.queue)
+        self.assertTrue(runner.start(self.plan(dither_every=2)))
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        self.assertEqual([s["done"] for s in runner.status["steps"]], [5, 2])
+        self.assertEqual([len(s["jobs"]) for s in runner.status["steps"]], [3, 1])
+        self.assertEqual(runner.status["dithers"], 0)
+        self.assertEqual(self.backend.exposures, 7)
+
+    def test_dither_every(self):
+        """Test a guided step dithers between blocks but not after the last."""
+        guider = fake_guider()
+        runner = SequenceRunner(self.queue, guider=guider)
+        runner.start(self.plan(dither_every=2, dither_pixels=3.0))
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        counts = [self.queue.get(i).count for i in runner.status["steps"][0]["jobs"]]
+        self.assertEqual(counts, [2, 2, 1])
+        self.assertEqual(runner.status["dithers"], 2)
+        guider.dither.assert_called_with(3.0, ra_only=False)
+        self.assertEqual(guider.wait_for_settle.call_count, 2)
+
+    def test_pause_on_guiding_lost(self):
+        """Test lost guiding cancels the job and resumes once guiding is back."""
+        guider = fake_guider(["Guiding", "LostLock", "LostLock", "LostLock"])
+        runner = SequenceRunner(self.queue, guider=guider)
+        plan = sequence_plan({"steps": [{"exposure": 0.05, "count": 4}]})
+        runner.start(plan)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        self.assertEqual(runner.status["pauses"], 1)
+        step = runner.status["steps"][0]
+        self.assertEqual(step["done"], 4)
+        self.assertEqual(self.queue.get(step["jobs"][0]).state, "cancelled")
+
+    def test_guiding_not_recovered(self):
+        """Test the sequence fails when guiding stays lost."""
+        guider = fake_guider(["Guiding"] + ["LostLock"] * 1000)
+        runner = SequenceRunner(self.queue, guider=guider)
+        plan = sequence_plan(
+            {"steps": [{"exposure": 0.05, "count": 4}], "resume_timeout": 0.1}
+        )
+        runner.start(plan)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "failed")
+        self.assertEqual(runner.status["error"], "Guiding was not recovered")
+
+    def test_slew_first(self):
+        """Test the mount slews and guiding settles before the first frame."""
+        mount = fake_mount()
+        guider = fake_guider()
+        runner = SequenceRunner(self.queue, lambda: mount, guider=guider)
+        plan = sequence_plan(
+            {"steps": [{"count": 1}], "settle": 0}, {"ra": 5.5, "dec": -5.0}
+        )
+        runner.start(plan)
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "done")
+        self.assertIn(":MS#", [c.args[0] for c in mount.write.call_args_list])
+        guider.stop_guiding.assert_called_once()
+        guider.start_guiding.assert_called_once()
+        self.assertEqual(mount.connect.call_count, mount.disconnect.call_count)
+
+    def test_stop(self):
+        """Test stopping cancels the running job."""
+        runner = SequenceRunner(self.queue)
+        runner.start(sequence_plan({"steps": [{"exposure": 0.05, "count": 100}]}))
+        time.sleep(0.1)
+        runner.stop()
+        runner.wait(5)
+
+        self.assertEqual(runner.status["state"], "stopped")
+        self.assertEqual(runner.status["steps"][0]["state"], "stopped")
+        self.assertLess(self.backend.exposures, 100)
+
+    def test_shared_session(self):
+        """Test a sequence is refused while a mosaic holds the session."""
+        session = threading.Lock()
+        runner = SequenceRunner(self.queue, session=session)
+        mosaic_runner = mosaic.MosaicRunner(Mock(), self.queue, session=session)
+        session.acquire()
+        self.assertFalse(runner.start(self.plan()))
+        session.release()
+
+        self.assertTrue(runner.start(self.plan()))
+        self.assertFalse(mosaic_runner.start([{"panel": 1, "ra": 0, "dec": 0}]))
+        runner.wait(5)
+        self.assertEqual(runner.status["state"], "done")
+        self.assertFalse(session.locked())
+
+    def test_invalid_plan(self):
+        """Test bad plans raise ValueError."""
+        with self.assertRaises(ValueError):
+            sequence_plan({"steps": []})
+        with self.assertRaises(ValueError):
+            sequence_plan({"steps": [{"count": 0}]})
+        with self.assertRaises(ValueError):
+            sequence_plan({"steps": [{"count": 1}], "dither_every": -1})
+
+
+class TestSequenceRoutes(unittest.TestCase):
+    """Test sequence API routes."""
+
+    def setUp(self):
+        """Set up test client."""
+        self.app = Flask(__name__)
+        self.app.register_blueprint(routes.planner_bp)
+        self.client = self.app.test_client()
+
+    def test_invalid(self):
+        """Test a sequence without steps."""
+        response = self.client.post("/api/planner/sequence/run", json={"steps": []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_run_when_running(self):
+        """Test a second sequence is refused while one runs."""
+        with patch.object(routes.sequence_runner, "start", return_value=False):
+            response = self.client.post(
+                "/api/planner/sequence/run", json={"steps": [{"count": 1}]}
+            )
+        self.assertEqual(response.status_code, 409)
+
+    def test_stop_without_sequence(self):
+        """Test stopping when nothing runs."""
+        response = self.client.post("/api/planner/sequence/stop")
+        self.assertEqual(response.status_code, 409)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+"""Opt-in request profiling and stack samples of slow requests.
+
+Requests are profiled with cProfile when the next N requests have been
+armed, one in every K when sampling is on, or, where the app enables
+PROFILING, when they carry an ``X-OAT-Profile: 1`` header. Independently,
+once a slow request threshold is set, a sampler thread takes stack samples
+of requests that have been running for more than SAMPLE_AFTER seconds, and
+the samples are kept when the request ends up slower than the threshold.
+Views running on a device executor are followed into its thread, so a slow
+status shows the serial wait rather than only the request thread blocked
+on it.
+
+Everything is off by default, and then a request costs a few attribute
+reads.
+"""
+
+import cProfile
+import functools
+import io
+import itertools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-OAT-Profile"
+# WSGI environ key of the request's Trace, shared with copied request contexts
+TRACE_KEY = "oat.trace"
+# Keep stack samples of requests slower than this, 0 disables tracking
+SLOW_THRESHOLD = float(os.environ.get("OAT_SLOW_REQUEST_MS", "0")) / 1000
+# Requests are sampled once they have run this long
+SAMPLE_AFTER = 0.1
+SAMPLE_INTERVAL = 0.02
+# Innermost frames kept per stack sample
+STACK_DEPTH = 30
+# Captured profiles kept for /api/debug/profiles
+KEEP_PROFILES = 50
+# Functions listed in a cProfile report
+REPORT_LINES = 40
+
+
+class Trace:
+    """One request in flight."""
+
+    def __init__(self, method, path):
+        """Initialize for a request started now on the current thread."""
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.began = time.monotonic()
+        # Thread the request itself runs on
+        self.thread = threading.get_ident()
+        self.threads = {self.thread}
+        self.samples = Counter()
+        self.profiled = False
+        # cProfile of the request thread
+        self.main = None
+        # Finished cProfile runs of each thread
+        self.profiles = []
+
+    def profile(self):
+        """Start a cProfile on the current thread, None if one is active."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows a single active profiler per process
+            return None
+        return profile
+
+    def finish(self, profile):
+        """Stop a profile started by profile on the current thread."""
+        if profile is not None:
+            profile.disable()
+            self.profiles.append(profile)
+
+
+class RequestProfiler:
+    """Flask extension capturing profiles and slow request stacks."""
+
+    def __init__(self, threshold=SLOW_THRESHOLD, keep=KEEP_PROFILES):
+        """Initialize, nothing is profiled until a request asks for it."""
+        self.threshold = threshold
+        # Profiles asked for with the request header are taken
+        self.enabled = False
+        self.armed = 0
+        self.sample_every = 0
+        self._count = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._inflight = {}
+        self._captured = deque(maxlen=keep)
+        self._condition = threading.Condition()
+        self._sampler = None
+
+    def init_app(self, app):
+        """Register the request hooks on app.
+
+        The request header is only honoured when app.config["PROFILING"] is
+        true. Requests that end in an unhandled error skip after_request, so
+        their trace is dropped on teardown.
+        """
+        self.enabled = bool(app.config.setdefault("PROFILING", False))
+        app.before_request(self._begin)
+        app.after_request(self._end)
+        app.teardown_request(self._teardown)
+
+    def configure(self, armed=None, sample_every=None, threshold=None):
+        """Arm the next N requests, sample 1 in K, or change the threshold."""
+        with self._condition:
+            if armed is not None:
+                self.armed = max(0, int(armed))
+            if sample_every is not None:
+                self.sample_every = max(0, int(sample_every))
+            if threshold is not None:
+                self.threshold = max(0.0, float(threshold))
+            return self.settings()
+
+    def settings(self):
+        """Current arming, sampling and threshold."""
+        return {
+            "armed": self.armed,
+            "sample_every": self.sample_every,
+            "threshold_ms": round(self.threshold * 1000),
+        }
+
+    def _wants_profile(self):
+        if self.enabled and request.headers.get(PROFILE_HEADER) == "1":
+            return True
+        if self.armed:
+            self.armed -= 1
+            return True
+        return bool(self.sample_every) and next(self._count) % self.sample_every == 0
+
+    def _begin(self):
+        if not (self.threshold or self.armed or self.sample_every or self.enabled):
+            return
+        with self._condition:
+            profiled = self._wants_profile()
+            if not profiled and not self.threshold:
+                return
+            trace = Trace(request.method, request.path)
+            self._inflight[id(trace)] = trace
+            if self._sampler is None and self.threshold:
+                self._sampler = threading.Thread(
+                    target=self._sample, name="request-sampler", daemon=True
+                )
+                self._sampler.start()
+            self._condition.notify()
+        request.environ[TRACE_KEY] = trace
+        if profiled:
+            trace.profiled = True
+            trace.main = trace.profile()
+
+    def _end(self, response):
+        capture = self._finish(response.status_code)
+        if capture is not None:
+            response.headers["X-OAT-Profile-Id"] = str(capture["id"])
+        return response
+
+    def _teardown(self, error=None):
+        # Only left when after_request did not run. Request contexts copied
+        # to executor threads share the environ and tear down too, early.
+        trace = request.environ.get(TRACE_KEY)
+        if trace is not None and trace.thread == threading.get_ident():
+            self._finish(500)
+
+    def _finish(self, status):
+        """Stop tracking the current request, its capture or None."""
+        trace = request.environ.pop(TRACE_KEY, None)
+        if trace is None:
+            return None
+        trace.finish(trace.main)
+        with self._condition:
+            self._inflight.pop(id(trace), None)
+        duration = time.monotonic() - trace.began
+        if not trace.profiled and not (self.threshold and duration >= self.threshold):
+            return None
+        if not trace.profiled:
+            logger.warning(
+                "Slow request %s %s took %.0f ms",
+                trace.method,
+                trace.path,
+                duration * 1000,
+            )
+        return self._capture(trace, duration, status)
+
+    def follow(self, fn):
+        """Wrap fn, run in another thread, to count toward the current request.
+
+        Must be called within the request context, as
+        copy_current_request_context provides on executor threads.
+        """
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = request.environ.get(TRACE_KEY)
+            if trace is None:
+                return fn(*args, **kwargs)
+            ident = threading.get_ident()
+            trace.threads.add(ident)
+            profile = trace.profile() if trace.profiled else None
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                trace.finish(profile)
+                trace.threads.discard(ident)
+
+        return wrapper
+
+    def _capture(self, trace, duration, status):
+        capture = {
+            "id": next(self._ids),
+            "kind": "profile" if trace.profiled else "slow",
+            "method": trace.method,
+            "path": trace.path,
+            "status": status,
+            "started": datetime.fromtimestamp(trace.started, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "duration_ms": round(duration * 1000, 1),
+            "samples": [
+                {"count": count, "stack": list(stack)}
+                for stack, count in trace.samples.most_common()
+            ],
+        }
+        if trace.profiles:
+            capture["report"] = self._report(list(trace.profiles))
+        with self._condition:
+            self._captured.append(capture)
+        return capture
+
+    @staticmethod
+    def _report(profiles):
+        out = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=out)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(REPORT_LINES)
+        return out.getvalue()
+
+    def _sample(self):
+        while True:
+            with self._condition:
+                while not self._inflight:
+                    self._condition.wait()
+                traces = list(self._inflight.values())
+            now = time.monotonic()
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            samples = [
+                (trace, _stack(frames[ident]))
+                for trace in traces
+                if now - trace.began >= SAMPLE_AFTER
+                for ident in list(trace.threads)
+                if ident in frames
+            ]
+            del frames
+            with self._condition:
+                # Requests that ended meanwhile are already captured
+                for trace, stack in samples:
+                    if id(trace) in self._inflight:
+                        trace.samples[stack] += 1
+            time.sleep(SAMPLE_INTERVAL)
+
+    def profiles(self):
+        """Summaries of the captured profiles, newest first."""
+        with self._condition:
+            captured = list(self._captured)
+        summaries = []
+        for capture in reversed(captured):
+            summary = {
+                key: value
+                for key, value in capture.items()
+                if key not in ("report", "samples")
+            }
+            summary["stacks"] = len(capture["samples"])
+            summaries.append(summary)
+        return summaries
+
+    def get(self, capture_id):
+        """A captured profile by id, None when it is gone."""
+        with self._condition:
+            for capture in self._captured:
+                if capture["id"] == capture_id:
+                    return capture
+        return None
+
+    def clear(self):
+        """Drop every captured profile."""
+        with self._condition:
+            self._captured.clear()
+
+
+def _stack(frame):
+    """Stack of frame as "file:line function" strings, outermost first."""
+    stack = []
+    while frame is not None and len(stack) < STACK_DEPTH:
+        code = frame.f_code
+        stack.append(
+            f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+        )
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+# Global request profiler
+request_profiler = RequestProfiler()
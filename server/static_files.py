@@ -0,0 +1,189 @@
+"""Serve the client build with precompressed variants and cache headers.
+
+    python -m server.static_files server/static
+
+writes .gz (and .br when the brotli module is installed) next to every
+compressible file of the build. Requests get the smallest variant their
+Accept-Encoding allows. File names carrying a content hash, as written by
+the production Angular build, are cached as immutable; everything else is
+revalidated with its ETag. The SPA shell is held in memory with its gzip
+variant and only re-read when the file changes.
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import sys
+
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+# Content-Encoding and file suffix, best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = {
+    ".css",
+    ".html",
+    ".ico",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+# Smaller files are not worth a compressed variant
+MIN_COMPRESS_SIZE = 1024
+# main.3f2a9c81d07e6b45.js (webpack) or main-HJ2K4D7Q.js (esbuild)
+HASHED_NAME = re.compile(r"(\.[0-9a-f]{16,20}|-[A-Z0-9]{8})\.[a-z0-9]+$")
+IMMUTABLE_SECONDS = 365 * 24 * 3600
+
+
+def is_hashed(filename):
+    """True for build outputs whose name changes with their content."""
+    return HASHED_NAME.search(os.path.basename(filename)) is not None
+
+
+def _accepts(encoding):
+    return request.accept_encodings[encoding] > 0
+
+
+def send_static(directory, filename):
+    """Send a file from directory with the best precompressed variant.
+
+    Hashed names get an immutable Cache-Control, others must be
+    revalidated and answer If-None-Match with 304.
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    chosen, encoding = path, None
+    compressible = os.path.splitext(path)[1].lower() in COMPRESSIBLE
+    if compressible:
+        mtime = os.stat(path).st_mtime
+        for name, suffix in ENCODINGS:
+            variant = path + suffix
+            try:
+                fresh = os.stat(variant).st_mtime >= mtime
+            except OSError:
+                continue
+            if fresh and _accepts(name):
+                chosen, encoding = variant, name
+                break
+
+    response = send_file(chosen, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    if is_hashed(filename):
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_SECONDS
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+class SpaShell:
+    """index.html held in memory with a gzip copy and an ETag."""
+
+    def __init__(self, path):
+        """Initialize for the shell's path, read on first use."""
+        self.path = path
+        self._stamp = None
+        self._body = b""
+        self._gzip = b""
+        self._etag = ""
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            abort(404)
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stamp != self._stamp:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            self._body = body
+            self._gzip = gzip.compress(body, 9, mtime=0)
+            self._etag = hashlib.sha1(body).hexdigest()
+            self._stamp = stamp
+
+    def response(self):
+        """Response for the shell, 304 when the client's copy is current."""
+        self._load()
+        if _accepts("gzip"):
+            body, encoding = self._gzip, "gzip"
+        else:
+            body, encoding = self._body, None
+        response = Response(body, mimetype="text/html")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(f"{self._etag}-{encoding or 'identity'}")
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress_directory(directory):
+    """Write .gz and .br variants of compressible files, returns the count."""
+    brotli = _brotli()
+    if brotli is None:
+        logger.warning("brotli module not installed, writing gzip variants only")
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = {".gz": gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                # Keep only variants that actually save bytes
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("directory", help="Build output directory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    logger.info(
+        "Wrote %d compressed files in %s",
+        compress_directory(args.directory),
+        args.directory,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Unit tests for the ASGI entry point."""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from flask import Flask, jsonify, request
+
+from .asgi import AsgiApp, lane_for, wsgi_environ
+
+
+def call(application, method, path, body=b"", query=b"", disconnect_after=None):
+    """Run one request through an ASGI app, returns (status, headers, body).
+
+    With disconnect_after the client leaves once that many messages were sent.
+    """
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Like a server, nothing more arrives until the client leaves
+        while disconnect_after is None or len(sent) < disconnect_after:
+            await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", b"application/json")],
+    }
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    return (
+        start["status"],
+        dict(start["headers"]),
+        b"".join(message.get("body", b"") for message in sent[1:]),
+    )
+
+
+class TestAsgiApp(unittest.TestCase):
+    """Test WSGI bridging, lanes and native routes."""
+
+    def setUp(self):
+        """Set up a Flask app that records the serving thread."""
+        flask_app = Flask(__name__)
+        self.threads = []
+
+        @flask_app.route("/echo", methods=["GET", "POST"])
+        def echo():
+            self.threads.append(threading.current_thread().name)
+            return jsonify(
+                {"args": request.args.get("q"), "json": request.get_json(silent=True)}
+            )
+
+        @flask_app.route("/stream")
+        def stream():
+            return flask_app.response_class(
+                (chunk for chunk in (b"a", b"b", b"c")), mimetype="text/plain"
+            )
+
+        self.closed = threading.Event()
+
+        @flask_app.route("/endless/stream")
+        def endless():
+            def frames():
+                try:
+                    while True:
+                        self.threads.append(threading.current_thread().name)
+                        yield b"frame"
+                        time.sleep(0.01)
+                finally:
+                    self.closed.set()
+
+            return flask_app.response_class(frames(), mimetype="text/plain")
+
+        @flask_app.route("/broken/stream")
+        def broken():
+            def frames():
+                raise RuntimeError("no camera")
+                yield b"frame"
+
+            return flask_app.response_class(frames(), mimetype="text/plain")
+
+        async def native(scope, body):
+            return 200, {"native": True}
+
+        self.application = AsgiApp(
+            flask_app,
+            lanes={"control": 1, "default": 1, "stream": 1},
+            routes={("GET", "/native"): native},
+        )
+
+    def test_wsgi_request(self):
+        """Test query strings and bodies reach Flask."""
+        status, headers, body = call(
+            self.application, "POST", "/echo", b'{"a": 1}', query=b"q=x"
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/json")
+        self.assertIn(b'"a":1', body.replace(b" ", b""))
+        self.assertIn(b'"args":"x"', body.replace(b" ", b""))
+
+    def test_lanes(self):
+        """Test control requests run on their own threads."""
+        call(self.application, "GET", "/echo")
+        call(self.application, "POST", "/echo", b"{}")
+        self.assertTrue(self.threads[0].startswith("asgi-default"))
+        self.assertTrue(self.threads[1].startswith("asgi-control"))
+        self.assertEqual(lane_for("DELETE", "/api/x"), "control")
+        self.assertEqual(lane_for("GET", "/api/camera/stream"), "stream")
+        self.assertEqual(lane_for("GET", "/api/jobs/abc/stream"), "stream")
+        self.assertEqual(lane_for("GET", "/api/images/live/guider/stats"), "stream")
+        self.assertEqual(lane_for("GET", "/api/camera/streams"), "default")
+
+    def test_disconnect_closes_stream(self):
+        """Test an endless response is closed when the client leaves."""
+        status, _, body = call(
+            self.application, "GET", "/endless/stream", disconnect_after=4
+        )
+        self.assertEqual(status, 200)
+        self.assertTrue(body.startswith(b"frameframe"))
+        self.assertTrue(self.closed.wait(1))
+        self.assertTrue(self.threads[0].startswith("asgi-stream"))
+
+    def test_cookies(self):
+        """Test several Cookie headers are joined with semicolons."""
+        environ = wsgi_environ(
+            {
+                "method": "GET",
+                "path": "/",
+                "headers": [(b"cookie", b"a=1"), (b"cookie", b"b=2")],
+            },
+            b"",
+        )
+        self.assertEqual(environ["HTTP_COOKIE"], "a=1; b=2")
+
+    def test_path_decoded_once(self):
+        """Test the already decoded ASGI path reaches WSGI unchanged."""
+        environ = wsgi_environ({"method": "GET", "path": "/files/100%41/é"}, b"")
+        self.assertEqual(
+            environ["PATH_INFO"], "/files/100%41/é".encode().decode("latin-1")
+        )
+
+    def test_full_stream_lane(self):
+        """Test a stream client is refused while every stream thread is taken."""
+        first = threading.Thread(
+            target=call,
+            args=(self.application, "GET", "/endless/stream"),
+            kwargs={"disconnect_after": 30},
+        )
+        first.start()
+        while not self.threads:
+            time.sleep(0.01)
+        status, _, body = call(self.application, "GET", "/endless/stream")
+        self.assertEqual((status, body), (503, b'{"error": "Too many streams open"}'))
+        first.join(2)
+        self.assertEqual(call(self.application, "GET", "/stream")[0], 200)
+
+    def test_failed_response(self):
+        """Test an app failing before its response started answers 500."""
+        self.assertEqual(call(self.application, "GET", "/broken/stream")[0], 500)
+
+    def test_streamed_body(self):
+        """Test a generator response is forwarded chunk by chunk."""
+        status, _, body = call(self.application, "GET", "/stream")
+        self.assertEqual((status, body), (200, b"abc"))
+
+    def test_native_route(self):
+        """Test native async routes bypass the thread pools."""
+        status, headers, body = call(self.application, "GET", "/native")
+        self.assertEqual((status, body), (200, b'{"native": true}'))
+        self.assertEqual(headers[b"content-length"], b"16")
+
+    def test_lifespan(self):
+        """Test the startup callable runs when the server starts."""
+        startup = Mock()
+        application = AsgiApp(Flask(__name__), startup=startup)
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(application({"type": "lifespan"}, receive, send))
+        startup.assert_called_once()
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+
+    def test_not_found(self):
+        """Test Flask's own error responses pass through."""
+        self.assertEqual(call(self.application, "GET", "/missing")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
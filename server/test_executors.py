@@ -0,0 +1,119 @@
+"""Unit tests for device executors."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from flask import Flask, jsonify, request
+
+from .executors import DeviceExecutor, ExecutorBusy, ExecutorTimeout, on_executor
+
+
+class TestDeviceExecutor(unittest.TestCase):
+    """Test queue limits, timeouts, urgency and metrics."""
+
+    def setUp(self):
+        """Set up a one worker executor with a gate to hold it busy."""
+        self.executor = DeviceExecutor("mount", workers=1, max_queue=2, timeout=1.0)
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        """Release the worker and stop the executor."""
+        self.gate.set()
+        self.executor.shutdown()
+
+    def block(self):
+        """Occupy the worker until the gate opens."""
+        self.started.set()
+        self.gate.wait(5)
+        return "blocked"
+
+    def test_run(self):
+        """Test results and exceptions come back to the caller."""
+        self.assertEqual(self.executor.run(lambda x: x * 2, 21), 42)
+        with self.assertRaises(ValueError):
+            self.executor.run(int, "x")
+        metrics = self.executor.metrics()
+        self.assertEqual((metrics["completed"], metrics["failed"]), (1, 1))
+
+    def test_run_nested(self):
+        """Test a job running another on its own executor does not wait on itself."""
+
+        def outer():
+            return self.executor.run(lambda: "inner", timeout=0.5)
+
+        self.assertEqual(self.executor.run(outer), "inner")
+
+    def test_queue_limit(self):
+        """Test jobs beyond the queue limit are rejected."""
+        self.executor.submit(self.block)
+        self.started.wait(1)
+        self.executor.submit(time.sleep, 0)
+        self.executor.submit(time.sleep, 0)
+        with self.assertRaises(ExecutorBusy):
+            self.executor.submit(time.sleep, 0)
+        metrics = self.executor.metrics()
+        self.assertEqual((metrics["queued"], metrics["running"]), (2, 1))
+        self.assertEqual(metrics["rejected"], 1)
+
+    def test_urgent_first(self):
+        """Test urgent jobs run before queued ones."""
+        order = []
+        self.executor.submit(self.block)
+        self.started.wait(1)
+        normal = self.executor.submit(order.append, "move")
+        urgent = self.executor.submit(order.append, "stop", urgent=True)
+        self.gate.set()
+        normal.result(1)
+        urgent.result(1)
+        self.assertEqual(order, ["stop", "move"])
+
+    def test_timeout_cancels_queued(self):
+        """Test a queued job is cancelled when its caller times out."""
+        ran = []
+        self.executor.submit(self.block)
+        self.started.wait(1)
+        with self.assertRaises(ExecutorTimeout):
+            self.executor.run(ran.append, 1, timeout=0.05)
+        self.gate.set()
+        self.executor.run(time.sleep, 0)
+        self.assertEqual(ran, [])
+        self.assertEqual(self.executor.metrics()["timed_out"], 1)
+
+    def test_run_async(self):
+        """Test awaiting a job."""
+        result = asyncio.run(self.executor.run_async(sum, [1, 2, 3]))
+        self.assertEqual(result, 6)
+
+    def test_cancel_pending(self):
+        """Test queued jobs can be cancelled."""
+        self.executor.submit(self.block)
+        self.started.wait(1)
+        future = self.executor.submit(time.sleep, 0)
+        self.assertEqual(self.executor.cancel_pending(), 1)
+        self.assertTrue(future.cancelled())
+
+
+class TestOnExecutor(unittest.TestCase):
+    """Test running Flask views on an executor."""
+
+    def test_view(self):
+        """Test the view sees its request on the executor thread."""
+        app = Flask(__name__)
+
+        @app.route("/view", methods=["POST"])
+        @on_executor("camera")
+        def view():
+            return jsonify(
+                {"thread": threading.current_thread().name, "json": request.get_json()}
+            )
+
+        response = app.test_client().post("/view", json={"a": 1})
+        self.assertEqual(response.get_json()["json"], {"a": 1})
+        self.assertTrue(response.get_json()["thread"].startswith("camera-"))
+
+
+if __name__ == "__main__":
+    unittest.main()
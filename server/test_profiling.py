@@ -0,0 +1,112 @@
+"""Unit tests for request profiling."""
+
+import time
+import unittest
+
+from flask import Flask, jsonify
+
+from .executors import on_executor
+from .profiling import RequestProfiler
+
+
+def serial_wait():
+    """Stand in for a blocking serial read."""
+    time.sleep(0.3)
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test opt-in profiles and slow request capture."""
+
+    def setUp(self):
+        """Set up an app with a fast, a slow and an executor route."""
+        self.profiler = RequestProfiler(threshold=0.2)
+        app = Flask(__name__)
+        app.testing = True
+        app.config["PROFILING"] = True
+        self.profiler.init_app(app)
+
+        @app.route("/fast")
+        def fast():
+            return jsonify({"ok": True})
+
+        @app.route("/slow")
+        @on_executor("mount")
+        def slow():
+            serial_wait()
+            return jsonify({"ok": True})
+
+        @app.route("/broken")
+        def broken():
+            time.sleep(0.25)
+            raise RuntimeError("Serial port vanished")
+
+        self.client = app.test_client()
+
+    def test_fast_not_captured(self):
+        """Test fast requests leave nothing behind."""
+        response = self.client.get("/fast")
+        self.assertNotIn("X-OAT-Profile-Id", response.headers)
+        self.assertEqual(self.profiler.profiles(), [])
+        self.assertEqual(self.profiler._inflight, {})
+
+    def test_slow_captured(self):
+        """Test slow requests keep stack samples of the executor thread."""
+        response = self.client.get("/slow")
+        capture = self.profiler.get(int(response.headers["X-OAT-Profile-Id"]))
+        self.assertEqual(capture["kind"], "slow")
+        self.assertEqual(capture["path"], "/slow")
+        self.assertGreaterEqual(capture["duration_ms"], 300)
+        stacks = [" ".join(sample["stack"]) for sample in capture["samples"]]
+        self.assertTrue(any("serial_wait" in stack for stack in stacks))
+        self.assertNotIn("report", capture)
+
+    def test_failed_request_released(self):
+        """Test a request ending in an unhandled error is not tracked forever."""
+        with self.assertRaises(RuntimeError):
+            self.client.get("/broken")
+        self.assertEqual(self.profiler._inflight, {})
+        self.assertEqual(self.profiler.profiles()[0]["status"], 500)
+
+    def test_off_by_default(self):
+        """Test nothing is tracked, nor the header honoured, unless enabled."""
+        profiler = RequestProfiler(threshold=0)
+        app = Flask(__name__)
+        profiler.init_app(app)
+        app.route("/fast")(lambda: "ok")
+        response = app.test_client().get("/fast", headers={"X-OAT-Profile": "1"})
+        self.assertNotIn("X-OAT-Profile-Id", response.headers)
+        self.assertEqual(profiler.profiles(), [])
+        self.assertIsNone(profiler._sampler)
+
+    def test_header(self):
+        """Test the header profiles a single request."""
+        response = self.client.get("/fast", headers={"X-OAT-Profile": "1"})
+        capture = self.profiler.get(int(response.headers["X-OAT-Profile-Id"]))
+        self.assertEqual(capture["kind"], "profile")
+        self.assertIn("function calls", capture["report"])
+
+    def test_armed(self):
+        """Test armed profiling covers the next N requests and the executor."""
+        self.profiler.configure(armed=2, threshold=0)
+        self.client.get("/slow")
+        self.client.get("/fast")
+        self.client.get("/fast")
+        profiles = self.profiler.profiles()
+        self.assertEqual([p["path"] for p in profiles], ["/fast", "/slow"])
+        self.assertNotIn("samples", profiles[0])
+        report = self.profiler.get(profiles[1]["id"])["report"]
+        self.assertIn("serial_wait", report)
+        self.assertEqual(self.profiler.settings()["armed"], 0)
+
+    def test_sample_every(self):
+        """Test 1 in K requests are profiled."""
+        self.profiler.configure(sample_every=3, threshold=0)
+        for _ in range(6):
+            self.client.get("/fast")
+        self.assertEqual(len(self.profiler.profiles()), 2)
+        self.profiler.clear()
+        self.assertEqual(self.profiler.profiles(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Startup time and memory budget of the server."""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Budgets for importing the app and answering a first request
+STARTUP_SECONDS = 1.0
+STARTUP_RSS_MB = 100
+# Backends that must not be loaded until a request needs them
+LAZY_BACKENDS = ("cv2", "gphoto2", "requests")
+
+# ru_maxrss would count memory the child inherited from the pytest process,
+# so resident and peak memory are read from the child's own /proc entry
+SCRIPT = """
+import json, os, sys, time
+began = time.perf_counter()
+from server.app import app
+response = app.test_client().get("/api/config/device")
+elapsed = time.perf_counter() - began
+memory = {}
+if os.path.exists("/proc/self/status"):
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                memory[key] = int(value.split()[0]) / 1024.0
+print(json.dumps({
+    "seconds": elapsed,
+    "status": response.status_code,
+    "rss_mb": memory.get("VmRSS"),
+    "peak_mb": memory.get("VmHWM"),
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    """Test boot to first response stays within budget."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the app in a fresh interpreter and measure it."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT % (LAZY_BACKENDS,)],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True,
+        )
+        cls.result = json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_first_response(self):
+        """Test the app answers its first request within the time budget."""
+        self.assertEqual(self.result["status"], 200)
+        self.assertLess(self.result["seconds"], STARTUP_SECONDS)
+
+    def test_memory(self):
+        """Test resident memory after the first request stays within budget."""
+        if self.result["peak_mb"] is None:
+            self.skipTest("/proc/self/status is not available")
+        self.assertLess(self.result["rss_mb"], STARTUP_RSS_MB)
+        self.assertLess(self.result["peak_mb"], STARTUP_RSS_MB)
+
+    def test_backends_not_loaded(self):
+        """Test device backends are not imported at startup."""
+        self.assertEqual(self.result["loaded"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
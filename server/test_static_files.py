@@ -0,0 +1,128 @@
+"""Unit tests for static file serving."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from flask import Flask
+
+from .static_files import SpaShell, compress_directory, is_hashed, send_static
+
+SCRIPT = b"console.log('oat');\n" * 200
+
+
+class TestStaticFiles(unittest.TestCase):
+    """Test encoding negotiation, cache headers and the SPA shell."""
+
+    def setUp(self):
+        """Set up a build directory and an app serving it."""
+        self.directory = tempfile.mkdtemp()
+        self.write("main.3f2a9c81d07e6b45.js", SCRIPT)
+        self.write("messier.json", b'{"M 31": {}}' * 200)
+        self.write("index.html", b"<html><body><app-root></app-root></body></html>")
+        compress_directory(self.directory)
+
+        app = Flask(__name__, static_folder=None)
+        shell = SpaShell(os.path.join(self.directory, "index.html"))
+
+        @app.route("/static/<path:filename>")
+        def static(filename):
+            return send_static(self.directory, filename)
+
+        @app.route("/")
+        def index():
+            return shell.response()
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Remove the build directory."""
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        """Write a build output file."""
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(data)
+
+    def test_is_hashed(self):
+        """Test content hashed names are recognised."""
+        self.assertTrue(is_hashed("main.3f2a9c81d07e6b45.js"))
+        self.assertTrue(is_hashed("chunk-HJ2K4D7Q.js"))
+        self.assertFalse(is_hashed("messier.json"))
+        self.assertFalse(is_hashed("favicon.ico"))
+
+    def test_gzip_variant(self):
+        """Test the gzip variant is sent to clients that accept it."""
+        response = self.client.get(
+            "/static/main.3f2a9c81d07e6b45.js", headers={"Accept-Encoding": "gzip, br"}
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.data), SCRIPT)
+        self.assertIn("javascript", response.mimetype)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+    def test_identity(self):
+        """Test clients without gzip get the original file."""
+        response = self.client.get(
+            "/static/main.3f2a9c81d07e6b45.js", headers={"Accept-Encoding": "identity"}
+        )
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.data, SCRIPT)
+
+    def test_stale_variant_ignored(self):
+        """Test a variant older than its file is not served."""
+        path = os.path.join(self.directory, "messier.json")
+        later = time.time() + 10
+        os.utime(path, (later, later))
+        response = self.client.get(
+            "/static/messier.json", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_etag_revalidation(self):
+        """Test unhashed files are revalidated with their ETag."""
+        response = self.client.get(
+            "/static/messier.json", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        etag = response.headers["ETag"]
+        response = self.client.get(
+            "/static/messier.json",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing(self):
+        """Test missing files and paths outside the directory are 404."""
+        self.assertEqual(self.client.get("/static/none.js").status_code, 404)
+        self.assertEqual(self.client.get("/static/../etc/passwd").status_code, 404)
+
+    def test_spa_shell(self):
+        """Test the shell is served compressed and revalidated."""
+        response = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn(b"app-root", gzip.decompress(response.data))
+        response = self.client.get(
+            "/",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.write("index.html", b"<html>new</html>")
+        response = self.client.get("/")
+        self.assertEqual(response.data, b"<html>new</html>")
+
+    def test_small_files_skipped(self):
+        """Test no variants are written for tiny files."""
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "index.html.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()